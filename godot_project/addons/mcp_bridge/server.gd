@@ -2,8 +2,36 @@
 extends Node
 
 const PORT = 42069
+# Wire protocol version (see mcp_server/godot_client.py).
+# 1 = bare JSON lines answered in order, 2 = requests carry an "id" echoed in the reply.
+const PROTOCOL_VERSION = 2
+# Length-prefixed framing (negotiated in "hello"): u32 little-endian payload size, u8 kind, payload
+const FRAME_HEADER_SIZE = 5
+const FRAME_JSON = 0
+# Binary frames carry raw bytes for a request: u32 request id, then the data.
+# Large payloads are split into several frames of at most BINARY_CHUNK_SIZE.
+const FRAME_BINARY = 1
+const BINARY_CHUNK_SIZE = 1024 * 1024
+const MAX_FRAME_SIZE = 512 * 1024 * 1024
+# Command scheduling: queued commands run in _process until the frame budget is
+# spent, interactive ones first, taking turns between peers within a class.
+enum Priority { INTERACTIVE, NORMAL, BULK }
+const INTERACTIVE_METHODS = ["ping", "job_status", "job_cancel", "get_metrics", "get_selection", "get_node_details", "get_scene_tree_changes", "get_state", "file_exists", "list_dir", "get_errors", "uid_to_path", "path_to_uid"]
+const BULK_METHODS = ["batch", "get_properties", "set_properties", "search_files", "generate_terrain_mesh", "build_heightmap_terrain", "build_terrain_chunk", "get_heightmap", "scatter_multimesh", "replace_resource_in_scene", "get_editor_screenshot", "write_binary_file"]
+const DEFAULT_FRAME_BUDGET_MS = 4.0 # Override with project setting mcp_bridge/frame_budget_ms
+const DEFAULT_MAX_QUEUE_DEPTH = 256 # Per peer; override with mcp_bridge/max_queue_depth
+const DEFAULT_SNIPPET_CACHE_SIZE = 64 # Compiled scripts kept; override with mcp_bridge/snippet_cache_size
+const DEFAULT_RESOURCE_CACHE_DIR = "" # Where shared resources are saved as .tres ("" = memory only); mcp_bridge/resource_cache_dir
 var server := TCPServer.new()
 var peers: Array[StreamPeerTCP] = []
+# Per-peer read buffer and framing mode, keyed by StreamPeerTCP
+var _peer_state := {}
+var _frame_budget_usec := int(DEFAULT_FRAME_BUDGET_MS * 1000)
+var _max_queue_depth := DEFAULT_MAX_QUEUE_DEPTH
+var _queues := [{}, {}, {}]       # Per priority: peer -> Array of pending commands
+var _queue_order := [[], [], []]  # Per priority: peers with pending commands, round-robin
+var _bulk_running := false        # Bulk commands run one at a time
+var _yield_deadline := 0          # Ticks (usec) after which long commands should yield
 
 func _ready():
 	var err = server.listen(PORT)
@@ -11,12 +39,26 @@ func _ready():
 		print("MCP Bridge: Listening on port %d" % PORT)
 	else:
 		printerr("MCP Bridge: Failed to listen on port %d. Error: %d" % [PORT, err])
+	
+	_frame_budget_usec = int(float(ProjectSettings.get_setting("mcp_bridge/frame_budget_ms", DEFAULT_FRAME_BUDGET_MS)) * 1000)
+	_max_queue_depth = int(ProjectSettings.get_setting("mcp_bridge/max_queue_depth", DEFAULT_MAX_QUEUE_DEPTH))
+	_snippet_cache_size = maxi(1, int(ProjectSettings.get_setting("mcp_bridge/snippet_cache_size", DEFAULT_SNIPPET_CACHE_SIZE)))
+	_resource_cache_dir = str(ProjectSettings.get_setting("mcp_bridge/resource_cache_dir", DEFAULT_RESOURCE_CACHE_DIR))
+	
+	# Record edits to the open scene so clients can sync incrementally
+	get_tree().node_added.connect(_on_tree_node_added)
+	get_tree().node_removed.connect(_on_tree_node_removed)
+	get_tree().node_renamed.connect(_on_tree_node_renamed)
+	# Rebuild the file index lazily after the editor rescans
+	EditorInterface.get_resource_filesystem().filesystem_changed.connect(_on_filesystem_changed)
 
 func _process(_delta):
 	# Accept new connections
 	if server.is_connection_available():
 		var peer = server.take_connection()
+		peer.set_no_delay(true) # Pipelined replies shouldn't wait on Nagle
 		peers.append(peer)
+		_peer_state[peer] = {"buffer": PackedByteArray(), "scan": 0, "framing": "line", "queued": 0, "in_flight": 0}
 		print("MCP Bridge: Client connected")
 
 	# Process existing connections
@@ -29,31 +71,248 @@ func _process(_delta):
 			if peer.get_available_bytes() > 0:
 				_handle_data(peer)
 		elif status == StreamPeerTCP.STATUS_NONE or status == StreamPeerTCP.STATUS_ERROR:
+			_forget_peer(peer)
 			print("MCP Bridge: Client disconnected")
 	
 	peers = active_peers
+	_poll_jobs()
+	_drain_queue()
+
+func _forget_peer(peer: StreamPeerTCP):
+	# Drop a peer's state and anything it still has queued, at every priority
+	_peer_state.erase(peer)
+	for priority in range(_queues.size()):
+		_queues[priority].erase(peer)
+		_queue_order[priority].erase(peer)
+
+func _drain_queue():
+	# Run queued commands until this frame's budget is used up. At least one
+	# command starts every frame; commands that await _yield_if_over_budget()
+	# finish in later frames while the queue keeps moving.
+	var deadline = Time.get_ticks_usec() + _frame_budget_usec
+	_yield_deadline = deadline
+	while true:
+		var next = _dequeue()
+		if next.is_empty():
+			break
+		_dispatch(next[0], next[1], next[2], next[3])
+		if Time.get_ticks_usec() >= deadline:
+			break
+
+func _yield_if_over_budget() -> void:
+	# Long-running handlers call this between chunks of work
+	if Time.get_ticks_usec() >= _yield_deadline:
+		await get_tree().process_frame
+		_yield_deadline = Time.get_ticks_usec() + _frame_budget_usec
+
+func _command_priority(command: Dictionary) -> int:
+	# Commands without an id (protocol 1) all go through NORMAL so they stay in order
+	if not command.has("id"):
+		return Priority.NORMAL
+	match command.get("priority", ""):
+		"interactive": return Priority.INTERACTIVE
+		"normal": return Priority.NORMAL
+		"bulk": return Priority.BULK
+	var method = command.get("method", "")
+	if method in INTERACTIVE_METHODS:
+		return Priority.INTERACTIVE
+	if method in BULK_METHODS:
+		return Priority.BULK
+	return Priority.NORMAL
+
+func _enqueue(peer: StreamPeerTCP, state: Dictionary, command: Dictionary):
+	if state["queued"] >= _max_queue_depth:
+		# Backpressure: the client waits retry_after_ms and resends
+		var busy = {"error": "Bridge busy", "busy": true, "queue_depth": state["queued"], "retry_after_ms": clampi(state["queued"] * 2, 10, 1000)}
+		if command.has("id"):
+			busy["id"] = command["id"]
+		_send_response(peer, state, busy)
+		_method_metrics(str(command.get("method", "")))["busy"] += 1
+		return
+	var priority = _command_priority(command)
+	if not _queues[priority].has(peer):
+		_queues[priority][peer] = []
+		_queue_order[priority].append(peer)
+	_queues[priority][peer].append(command)
+	state["queued"] += 1
+
+func _dequeue() -> Array:
+	for priority in range(_queues.size()):
+		if priority == Priority.BULK and _bulk_running:
+			continue
+		var order: Array = _queue_order[priority]
+		for i in range(order.size()):
+			var peer = order.pop_front()
+			var queue: Array = _queues[priority][peer]
+			var state: Dictionary = _peer_state[peer]
+			# A protocol 1 peer expects replies in order: one command at a time
+			if not queue.front().has("id") and state["in_flight"] > 0:
+				order.append(peer)
+				continue
+			var command = queue.pop_front()
+			if queue.is_empty():
+				_queues[priority].erase(peer)
+			else:
+				order.append(peer)
+			state["queued"] -= 1
+			return [peer, state, command, priority]
+	return []
+
+func _dispatch(peer: StreamPeerTCP, state: Dictionary, command: Dictionary, priority: int):
+	state["in_flight"] += 1
+	if priority == Priority.BULK:
+		_bulk_running = true
+	await _run_command(peer, state, command)
+	state["in_flight"] -= 1
+	if priority == Priority.BULK:
+		_bulk_running = false
 
 func _handle_data(peer: StreamPeerTCP):
-	# Simple protocol: One JSON object per line or just raw JSON if small.
-	# For robustness, we'll assume the client sends one JSON object at a time.
-	# In a real scenario, we might need length prefixing.
-	# For now, let's read all available text.
-	var text = peer.get_utf8_string(peer.get_available_bytes())
-	if text.is_empty():
+	# Bytes are appended to a per-peer buffer and only complete messages are
+	# consumed, so a command split across TCP reads (or a multibyte UTF-8
+	# character split across them) is kept until the rest arrives.
+	var state: Dictionary = _peer_state[peer]
+	var chunk = peer.get_data(peer.get_available_bytes())
+	if chunk[0] != OK:
+		return
+	var buf: PackedByteArray = state["buffer"]
+	buf.append_array(chunk[1])
+
+	var pos := 0
+	while pos < buf.size():
+		if state["framing"] == "length":
+			if buf.size() - pos < FRAME_HEADER_SIZE:
+				break
+			var length := buf.decode_u32(pos)
+			if length > MAX_FRAME_SIZE:
+				printerr("MCP Bridge: Frame too large (%d bytes), dropping client" % length)
+				peer.disconnect_from_host()
+				_forget_peer(peer) # Before _drain_queue can reach its queued commands this frame
+				return
+			if buf.size() - pos - FRAME_HEADER_SIZE < length:
+				break
+			var kind := buf[pos + 4]
+			var payload := buf.slice(pos + FRAME_HEADER_SIZE, pos + FRAME_HEADER_SIZE + length)
+			pos += FRAME_HEADER_SIZE + length
+			if kind == FRAME_JSON:
+				_handle_message(peer, state, payload.get_string_from_utf8(), length)
+			elif kind == FRAME_BINARY:
+				_handle_binary(peer, state, payload)
+		else:
+			# Resume the newline search where the previous read stopped
+			var idx := buf.find(10, maxi(pos, state["scan"]))
+			if idx == -1:
+				state["scan"] = buf.size()
+				break
+			var line := buf.slice(pos, idx).get_string_from_utf8()
+			var size := idx - pos
+			pos = idx + 1
+			if not line.strip_edges().is_empty():
+				_handle_message(peer, state, line, size)
+
+	state["buffer"] = buf.slice(pos) if pos > 0 else buf
+	state["scan"] = maxi(0, state["scan"] - pos)
+
+func _handle_message(peer: StreamPeerTCP, state: Dictionary, text: String, size: int = 0):
+	var json = JSON.new()
+	var error = json.parse(text)
+	if error != OK:
+		printerr("MCP Bridge: JSON Parse Error: ", json.get_error_message())
+		return
+	var command = json.data
+	if not command is Dictionary:
+		_send_response(peer, state, {"error": "Command must be a JSON object"})
+		return
+	# For metrics: when the command arrived and how big it was
+	command["_received_usec"] = Time.get_ticks_usec()
+	command["_bytes_in"] = size
+	# A command with binary_size is followed by that many bytes in binary frames;
+	# hold it until they have all arrived
+	var params = command.get("params", {})
+	if params is Dictionary and int(params.get("binary_size", 0)) > 0 and state.get("binary", false):
+		state["upload"] = {"command": command, "data": PackedByteArray(), "size": int(params["binary_size"])}
+		return
+	if command.get("method") == "hello":
+		# Answered immediately: the framing switch must happen before the next read
+		_run_command(peer, state, command)
 		return
+	_enqueue(peer, state, command)
 
-	# Handle multiple commands if they come in a batch (newline separated)
-	var lines = text.split("\n", false)
-	for line in lines:
-		var json = JSON.new()
-		var error = json.parse(line)
-		if error == OK:
-			var command = json.data
-			var response = _execute_command(command)
-			peer.put_data(JSON.stringify(response).to_utf8_buffer())
-			peer.put_data("\n".to_utf8_buffer()) # Delimiter
+func _handle_binary(peer: StreamPeerTCP, state: Dictionary, payload: PackedByteArray):
+	var upload = state.get("upload")
+	if upload == null or payload.size() < 4 or payload.decode_u32(0) != int(upload["command"].get("id", 0)):
+		printerr("MCP Bridge: Unexpected binary frame, ignoring")
+		return
+	var data: PackedByteArray = upload["data"]
+	data.append_array(payload.slice(4))
+	upload["data"] = data
+	if data.size() >= upload["size"]:
+		state.erase("upload")
+		upload["command"]["params"]["_binary"] = data
+		upload["command"]["_bytes_in"] += data.size()
+		upload["command"]["_received_usec"] = Time.get_ticks_usec()
+		_enqueue(peer, state, upload["command"])
+
+func _run_command(peer: StreamPeerTCP, state: Dictionary, command: Dictionary):
+	var started := Time.get_ticks_usec()
+	var response = await _execute_command(command)
+	var exec_usec := Time.get_ticks_usec() - started
+	var queue_usec := started - int(command.get("_received_usec", started))
+	# Protocol 2: echo the request id so the client can match pipelined replies
+	if command.has("id"):
+		response["id"] = command["id"]
+		response["_timing"] = {"queue_ms": queue_usec / 1000.0, "exec_ms": exec_usec / 1000.0}
+	_note_file_writes(str(command.get("method", "")), command.get("params", {}), response)
+	var bytes_out := _send_response(peer, state, response)
+	_record_metrics(str(command.get("method", "")), queue_usec, exec_usec, int(command.get("_bytes_in", 0)), bytes_out, response.has("error"))
+	# The hello reply goes out in the old framing; switch only afterwards
+	if command.get("method") == "hello" and response.get("framing") == "length":
+		state["framing"] = "length"
+		state["binary"] = response.get("binary", false)
+
+func _send_response(peer: StreamPeerTCP, state: Dictionary, response: Dictionary) -> int:
+	# Handlers return raw bytes under "_binary". Binary-capable peers get them as
+	# binary frames after the JSON reply (which announces binary_size); others get
+	# base64 under "_binary_key". Returns the bytes sent (JSON body plus binary).
+	var binary = null
+	if response.has("_binary"):
+		binary = response["_binary"]
+		var fallback_key = response.get("_binary_key", "data_base64")
+		response.erase("_binary")
+		response.erase("_binary_key")
+		if state.get("binary", false):
+			response["binary_size"] = binary.size()
 		else:
-			printerr("MCP Bridge: JSON Parse Error: ", json.get_error_message())
+			response[fallback_key] = Marshalls.raw_to_base64(binary)
+			binary = null
+	
+	var body := JSON.stringify(response).to_utf8_buffer()
+	var sent := body.size()
+	if state["framing"] == "length":
+		peer.put_data(_frame_header(body.size(), FRAME_JSON))
+		peer.put_data(body)
+	else:
+		body.append(10) # "\n" delimiter
+		peer.put_data(body)
+	
+	if binary != null:
+		sent += binary.size()
+		var request_id := PackedByteArray()
+		request_id.resize(4)
+		request_id.encode_u32(0, int(response.get("id", 0)))
+		for offset in range(0, binary.size(), BINARY_CHUNK_SIZE):
+			var chunk: PackedByteArray = binary.slice(offset, offset + BINARY_CHUNK_SIZE)
+			peer.put_data(_frame_header(4 + chunk.size(), FRAME_BINARY))
+			peer.put_data(request_id)
+			peer.put_data(chunk)
+	return sent
+
+func _frame_header(length: int, kind: int) -> PackedByteArray:
+	var header := PackedByteArray()
+	header.resize(FRAME_HEADER_SIZE)
+	header.encode_u32(0, length)
+	header[4] = kind
+	return header
 
 func _execute_command(cmd: Dictionary) -> Dictionary:
 	if not "method" in cmd:
@@ -62,18 +321,32 @@ func _execute_command(cmd: Dictionary) -> Dictionary:
 	match cmd["method"]:
 		"ping":
 			return {"result": "pong"}
+		"hello":
+			return _hello(cmd.get("params", {}))
+		"batch":
+			return await _batch(cmd.get("params", {}))
 		"get_scene_tree":
-			return _get_scene_tree()
+			return _get_scene_tree(cmd.get("params", {}))
+		"get_scene_tree_changes":
+			return _get_scene_tree_changes(cmd.get("params", {}))
 		"add_node":
 			return _add_node(cmd.get("params", {}))
 		"execute_script":
 			return _execute_script(cmd.get("params", {}))
+		"register_snippet":
+			return _register_snippet(cmd.get("params", {}))
+		"run_snippet":
+			return _run_snippet(cmd.get("params", {}))
 		"get_state":
 			return _get_state()
 		"get_node_details":
 			return _get_node_details(cmd.get("params", {}))
 		"set_property":
 			return _set_property(cmd.get("params", {}))
+		"get_properties":
+			return await _get_properties(cmd.get("params", {}))
+		"set_properties":
+			return await _set_properties(cmd.get("params", {}))
 		"list_dir":
 			return _list_dir(cmd.get("params", {}))
 		"save_script":
@@ -143,7 +416,13 @@ func _execute_command(cmd: Dictionary) -> Dictionary:
 		"get_game_screenshot":
 			return _get_game_screenshot(cmd.get("params", {}))
 		"search_files":
-			return _search_files(cmd.get("params", {}))
+			return await _search_files(cmd.get("params", {}))
+		"job_status":
+			return _job_status(cmd.get("params", {}))
+		"job_cancel":
+			return _job_cancel(cmd.get("params", {}))
+		"get_metrics":
+			return _get_metrics(cmd.get("params", {}))
 		"file_exists":
 			return _file_exists(cmd.get("params", {}))
 		"set_collision_layer":
@@ -197,7 +476,9 @@ func _execute_command(cmd: Dictionary) -> Dictionary:
 		"rename_scene":
 			return _rename_scene(cmd.get("params", {}))
 		"replace_resource_in_scene":
-			return _replace_resource_in_scene(cmd.get("params", {}))
+			return await _replace_resource_in_scene(cmd.get("params", {}))
+		"update_files":
+			return _update_files(cmd.get("params", {}))
 		"write_binary_file":
 			return _write_binary_file(cmd.get("params", {}))
 		"spawn_fps_controller":
@@ -211,7 +492,17 @@ func _execute_command(cmd: Dictionary) -> Dictionary:
 		"create_rigidbody":
 			return _create_rigidbody(cmd.get("params", {}))
 		"generate_terrain_mesh":
-			return _generate_terrain_mesh(cmd.get("params", {}))
+			return await _generate_terrain_mesh(cmd.get("params", {}))
+		"build_heightmap_terrain":
+			return _build_heightmap_terrain(cmd.get("params", {}))
+		"build_terrain_chunk":
+			return _build_terrain_chunk(cmd.get("params", {}))
+		"resource_cache":
+			return _resource_cache(cmd.get("params", {}))
+		"get_heightmap":
+			return _get_heightmap(cmd.get("params", {}))
+		"scatter_multimesh":
+			return _scatter_multimesh(cmd.get("params", {}))
 		"create_terrain_material":
 			return _create_terrain_material(cmd.get("params", {}))
 		"create_particle_effect":
@@ -229,6 +520,940 @@ func _execute_command(cmd: Dictionary) -> Dictionary:
 		_:
 			return {"error": "Unknown method: " + cmd["method"]}
 
+func _hello(params: Dictionary) -> Dictionary:
+	# Protocol negotiation: reply with the highest version both sides understand
+	var requested = int(params.get("protocol", 1))
+	var reply = {"result": "hello", "protocol": mini(requested, PROTOCOL_VERSION)}
+	if params.get("framing", "line") == "length":
+		reply["framing"] = "length"
+		if params.get("binary", false):
+			reply["binary"] = true
+	return reply
+
+#
+# ============ NEW: Batch Commands ============
+#
+
+# "$N.key" (whole value) and "${N.key}" (inside a string) refer to step N's result
+var _step_ref_whole := RegEx.create_from_string("^\\$(\\d+(?:\\.\\w+)+)$")
+var _step_ref_inline := RegEx.create_from_string("\\$\\{(\\d+(?:\\.\\w+)+)\\}")
+
+func _batch(params: Dictionary) -> Dictionary:
+	# Runs the steps back to back (spilling into later frames only if they
+	# exceed the frame budget), so N commands cost one round trip
+	var steps = params.get("steps", [])
+	var stop_on_error = bool(params.get("stop_on_error", true))
+	if not steps is Array: return {"error": "steps must be an array"}
+	
+	var results: Array = []
+	var errors := 0
+	for step in steps:
+		var result: Dictionary
+		if not step is Dictionary or not step.has("method"):
+			result = {"error": "Each step needs a method"}
+		elif step["method"] == "batch":
+			result = {"error": "Nested batches are not supported"}
+		else:
+			var missing: Array = []
+			var step_params = _resolve_step_refs(step.get("params", {}), results, missing)
+			if missing.size() > 0:
+				result = {"error": "Unresolved step reference: " + ", ".join(missing)}
+			else:
+				result = await _execute_command({"method": step["method"], "params": step_params})
+				_note_file_writes(str(step["method"]), step_params, result)
+		results.append(result)
+		if result.has("error"):
+			errors += 1
+			if stop_on_error:
+				break
+		await _yield_if_over_budget()
+	
+	var summary = "Batch complete"
+	if errors > 0:
+		summary = "Batch stopped at step %d" % (results.size() - 1) if stop_on_error else "Batch finished with %d error(s)" % errors
+	return {"result": summary, "completed": results.size(), "total": steps.size(), "errors": errors, "results": results}
+
+func _resolve_step_refs(value, results: Array, missing: Array):
+	if value is String:
+		var whole = _step_ref_whole.search(value)
+		if whole:
+			var resolved = _lookup_step_ref(whole.get_string(1), results)
+			if resolved == null:
+				missing.append(value)
+				return value
+			return resolved
+		var text: String = value
+		for m in _step_ref_inline.search_all(value):
+			var resolved = _lookup_step_ref(m.get_string(1), results)
+			if resolved == null:
+				missing.append(m.get_string())
+			else:
+				text = text.replace(m.get_string(), str(resolved))
+		return text
+	if value is Dictionary:
+		var out = {}
+		for key in value:
+			out[key] = _resolve_step_refs(value[key], results, missing)
+		return out
+	if value is Array:
+		var out = []
+		for item in value:
+			out.append(_resolve_step_refs(item, results, missing))
+		return out
+	return value
+
+func _lookup_step_ref(ref: String, results: Array):
+	var parts = ref.split(".")
+	var index = int(parts[0])
+	if index >= results.size():
+		return null
+	var current = results[index]
+	for i in range(1, parts.size()):
+		if not current is Dictionary or not current.has(parts[i]):
+			return null
+		current = current[parts[i]]
+	return current
+
+#
+# ============ NEW: Scene Tree Sync ============
+#
+
+# Every add/remove/rename/reorder inside the edited scene bumps _tree_revision
+# and is appended to _tree_log, so clients holding a copy of the tree can ask
+# for "changes since revision N" instead of re-fetching it. Reorders come from
+# Node.child_order_changed, whatever moved the child (Scene dock, scripts,
+# undo/redo); they are logged when changes are read, once per parent, since
+# adding N children fires the signal N times.
+const TREE_LOG_LIMIT = 8192
+var _tree_revision := 0
+var _tree_log_base := 0     # Oldest revision the log can answer "since" for
+var _tree_log: Array = []
+var _tree_root_id := 0      # Instance id of the scene root the log describes
+var _tree_paths := {}       # Instance id -> node path, to report old paths on rename
+var _tree_reordered := {}   # Instance id -> parent whose child order changed since the last read
+
+func _sync_tree_root(root: Node) -> void:
+	# Switching scenes (or the first request) restarts the log
+	if root.get_instance_id() == _tree_root_id:
+		return
+	_tree_root_id = root.get_instance_id()
+	_tree_revision += 1
+	_tree_log_base = _tree_revision
+	_tree_log.clear()
+	_tree_paths.clear()
+	_tree_reordered.clear()
+	_index_tree_paths(root)
+
+func _index_tree_paths(node: Node) -> void:
+	var stack: Array[Node] = [node]
+	while not stack.is_empty():
+		var current: Node = stack.pop_back()
+		_tree_paths[current.get_instance_id()] = str(current.get_path())
+		_watch_child_order(current)
+		stack.append_array(current.get_children())
+
+func _watch_child_order(node: Node) -> void:
+	var callback = _on_tree_child_order_changed.bind(node)
+	if not node.child_order_changed.is_connected(callback):
+		node.child_order_changed.connect(callback)
+
+func _on_tree_child_order_changed(parent: Node) -> void:
+	if _tracked_root_for(parent):
+		_tree_reordered[parent.get_instance_id()] = parent
+
+func _flush_tree_reorders() -> void:
+	# The full child order is logged, so it doesn't matter how many moves led to it
+	for id in _tree_reordered:
+		var parent = _tree_reordered[id]
+		if not is_instance_valid(parent) or not parent.is_inside_tree() or not _tracked_root_for(parent):
+			continue # Gone since: its removal is already in the log
+		var children: Array = []
+		for child in parent.get_children():
+			children.append(str(child.get_path()))
+		_log_tree_change({"op": "reordered", "path": str(parent.get_path()), "children": children})
+	_tree_reordered.clear()
+
+func _tracked_root_for(node: Node) -> Node:
+	var root = EditorInterface.get_edited_scene_root()
+	if not root or root.get_instance_id() != _tree_root_id:
+		return null
+	if node != root and not root.is_ancestor_of(node):
+		return null
+	return root
+
+func _log_tree_change(change: Dictionary) -> void:
+	_tree_revision += 1
+	change["rev"] = _tree_revision
+	_tree_log.append(change)
+	if _tree_log.size() > TREE_LOG_LIMIT:
+		_tree_log = _tree_log.slice(_tree_log.size() - (TREE_LOG_LIMIT >> 1))
+		_tree_log_base = int(_tree_log[0]["rev"]) - 1
+
+func _on_tree_node_added(node: Node) -> void:
+	if not _tracked_root_for(node):
+		return
+	var path = str(node.get_path())
+	_tree_paths[node.get_instance_id()] = path
+	_watch_child_order(node)
+	_log_tree_change({
+		"op": "added",
+		"path": path,
+		"name": str(node.name),
+		"type": node.get_class(),
+		"parent": str(node.get_parent().get_path()),
+		"index": node.get_index()
+	})
+
+func _on_tree_node_removed(node: Node) -> void:
+	if not _tracked_root_for(node):
+		return
+	_tree_paths.erase(node.get_instance_id())
+	_log_tree_change({"op": "removed", "path": str(node.get_path())})
+
+func _on_tree_node_renamed(node: Node) -> void:
+	if not _tracked_root_for(node):
+		return
+	var old_path = _tree_paths.get(node.get_instance_id(), "")
+	if old_path == "":
+		# Never saw this node: clients can't patch it, so make them re-fetch
+		_tree_root_id = 0
+		return
+	_index_tree_paths(node) # Descendant paths changed too
+	_log_tree_change({"op": "renamed", "old_path": old_path, "path": str(node.get_path()), "name": str(node.name)})
+
+func _get_scene_tree_changes(params: Dictionary) -> Dictionary:
+	var root = _get_actual_editor_root()
+	if not root:
+		return {"error": "No active scene"}
+	
+	_flush_tree_reorders()
+	var since = int(params.get("since", -1))
+	if root.get_instance_id() != _tree_root_id or since < _tree_log_base or since > _tree_revision:
+		# Different scene, or too old for the log: client must call get_scene_tree
+		return {"reset": true, "revision": _tree_revision}
+	
+	var changes: Array = []
+	for i in range(_tree_log.size() - 1, -1, -1):
+		if int(_tree_log[i]["rev"]) <= since:
+			break
+		changes.append(_tree_log[i])
+	changes.reverse()
+	return {"reset": false, "revision": _tree_revision, "changes": changes}
+
+#
+# ============ NEW: Scene Tree Queries ============
+#
+
+const TREE_PAGE_SIZE = 200
+const TREE_PAGE_MAX = 2000
+const TREE_VISIT_BUDGET = 20000 # Nodes walked per page, so sparse filters stay bounded too
+const TREE_DEFAULT_FIELDS = ["path", "name", "type", "depth", "child_count"]
+
+func _query_scene_tree(root: Node, params: Dictionary) -> Dictionary:
+	# Flat, paged pre-order listing of a subtree. Paths are relative to the
+	# scene root ("." is the root itself), so they can be passed to other commands.
+	var root_path = str(params.get("root_path", ""))
+	var start: Node = root
+	if root_path != "" and root_path != ".":
+		start = root.get_node_or_null(root_path)
+		if not start:
+			return {"error": "Node not found: " + root_path}
+	
+	var max_depth = int(params.get("max_depth", -1))
+	var type_filter = str(params.get("type", ""))
+	var group_filter = str(params.get("group", ""))
+	var page_size = clampi(int(params.get("page_size", TREE_PAGE_SIZE)), 1, TREE_PAGE_MAX)
+	var fields = params.get("fields", [])
+	if fields is String:
+		fields = Array(fields.split(",", false)).map(func(f): return f.strip_edges())
+	if fields.is_empty():
+		fields = TREE_DEFAULT_FIELDS
+	
+	# Stack of [node, depth]; a cursor rebuilds the stack as it was when the page ended
+	var stack: Array = []
+	var cursor = str(params.get("cursor", ""))
+	if cursor != "":
+		var sep = cursor.find(":")
+		if sep == -1 or not cursor.substr(0, sep).is_valid_int():
+			return {"error": "Invalid cursor: " + cursor}
+		if int(cursor.substr(0, sep)) != _tree_revision:
+			return {"error": "Scene changed since this cursor was issued; query again without a cursor"}
+		var resume = root.get_node_or_null(cursor.substr(sep + 1))
+		if not resume or not (resume == start or start.is_ancestor_of(resume)):
+			return {"error": "Cursor does not belong to this query"}
+		stack = _tree_resume_stack(start, resume)
+	else:
+		stack.append([start, 0])
+	
+	var nodes: Array = []
+	var visited := 0
+	while not stack.is_empty() and nodes.size() < page_size and visited < TREE_VISIT_BUDGET:
+		var entry = stack.pop_back()
+		var node: Node = entry[0]
+		var depth: int = entry[1]
+		visited += 1
+		
+		var matches = (type_filter == "" or node.is_class(type_filter)) and (group_filter == "" or node.is_in_group(group_filter))
+		if matches:
+			nodes.append(_tree_node_fields(root, node, depth, fields))
+		
+		if max_depth < 0 or depth < max_depth:
+			for i in range(node.get_child_count() - 1, -1, -1):
+				stack.append([node.get_child(i), depth + 1])
+	
+	var next_cursor = null
+	if not stack.is_empty():
+		next_cursor = "%d:%s" % [_tree_revision, str(root.get_path_to(stack.back()[0]))]
+	return {"nodes": nodes, "count": nodes.size(), "visited": visited, "next_cursor": next_cursor, "revision": _tree_revision}
+
+func _tree_resume_stack(start: Node, resume: Node) -> Array:
+	# Pending entries are the later siblings of `resume` and of each of its
+	# ancestors below `start`, with `resume` itself on top
+	var chain: Array[Node] = []
+	var current = resume
+	while current != start:
+		chain.append(current)
+		current = current.get_parent()
+	
+	var stack: Array = []
+	for i in range(chain.size() - 1, -1, -1):
+		var node = chain[i]
+		var parent = node.get_parent()
+		var depth = chain.size() - i
+		for j in range(parent.get_child_count() - 1, node.get_index(), -1):
+			stack.append([parent.get_child(j), depth])
+	stack.append([resume, chain.size()])
+	return stack
+
+func _tree_node_fields(root: Node, node: Node, depth: int, fields: Array) -> Dictionary:
+	var data = {}
+	for field in fields:
+		match field:
+			"path":
+				data["path"] = str(root.get_path_to(node))
+			"name":
+				data["name"] = str(node.name)
+			"type":
+				data["type"] = node.get_class()
+			"depth":
+				data["depth"] = depth
+			"child_count":
+				data["child_count"] = node.get_child_count()
+			"index":
+				data["index"] = node.get_index()
+			"parent":
+				data["parent"] = str(root.get_path_to(node.get_parent())) if node != root else ""
+			"groups":
+				var groups = []
+				for g in node.get_groups():
+					if not str(g).begins_with("_"):
+						groups.append(str(g))
+				data["groups"] = groups
+			"script":
+				var script = node.get_script()
+				data["script"] = script.resource_path if script else ""
+			_:
+				# Any other field is read as a node property, e.g. "visible" or "position"
+				if field in node:
+					data[field] = str(node.get(field))
+	return data
+
+#
+# ============ NEW: File Index ============
+#
+
+# Flat copy of EditorFileSystem's tree: built once, marked dirty whenever the
+# editor reports filesystem changes and rebuilt in full on the next query (not
+# patched per file). Walking the in-memory EditorFileSystemDirectory avoids
+# touching the disk. While the editor is rescanning, queries are answered from
+# the previous build and the rebuild waits for the scan to finish.
+var _file_index_dirty := true
+var _file_index_built := false
+var _file_paths := PackedStringArray()
+var _file_paths_lower := PackedStringArray()
+var _file_names_lower := PackedStringArray()
+var _file_dirs := {} # Directory path -> PackedStringArray of entry names
+
+# Commands that write or remove project files. Their paths are patched into the
+# index as soon as they succeed: EditorFileSystem, and so filesystem_changed,
+# only catches up later, and list_dir should show the file right away.
+const FILE_WRITE_METHODS = ["save_script", "save_scene", "create_folder", "create_shader", "edit_file", "write_binary_file", "delete_scene", "duplicate_scene", "rename_scene", "update_files"]
+
+func _on_filesystem_changed() -> void:
+	_file_index_dirty = true
+
+func _note_file_writes(method: String, params, response: Dictionary) -> void:
+	if not method in FILE_WRITE_METHODS or not params is Dictionary or response.has("error") or not _file_index_built:
+		return
+	var paths: Array = params.get("paths", []).duplicate() if params.get("paths", []) is Array else []
+	for key in ["path", "dest_path", "old_path", "new_path"]:
+		if params.get(key, "") is String and params.get(key, "") != "":
+			paths.append(params[key])
+	for path in paths:
+		_index_path(str(path).trim_suffix("/"))
+
+func _index_path(path: String) -> void:
+	# Bring one entry of the file index in line with the disk
+	if not path.begins_with("res://") or path == "res:/":
+		return
+	var dir_key = path.get_base_dir()
+	if not _file_dirs.has(dir_key):
+		return # Folders the index doesn't know are read from disk by list_dir anyway
+	var entries: PackedStringArray = _file_dirs[dir_key]
+	var name = path.get_file()
+	var is_file = FileAccess.file_exists(path)
+	var at = entries.find(name)
+	if (is_file or DirAccess.dir_exists_absolute(path)) and at == -1:
+		entries.append(name)
+		if is_file:
+			_file_paths.append(path)
+			_file_paths_lower.append(path.to_lower())
+			_file_names_lower.append(name.to_lower())
+		else:
+			_file_dirs[path] = PackedStringArray()
+	elif not is_file and not DirAccess.dir_exists_absolute(path) and at != -1:
+		entries.remove_at(at)
+		var i = _file_paths.find(path)
+		if i != -1:
+			_file_paths.remove_at(i)
+			_file_paths_lower.remove_at(i)
+			_file_names_lower.remove_at(i)
+		_file_dirs.erase(path)
+	_file_dirs[dir_key] = entries # Packed arrays are values: store the edited copy
+
+func _ensure_file_index() -> bool:
+	if not _file_index_dirty:
+		return true
+	var efs = EditorInterface.get_resource_filesystem()
+	if efs.is_scanning():
+		return _file_index_built # Stale but usable; stays dirty until the scan ends
+	
+	_file_paths = PackedStringArray()
+	_file_paths_lower = PackedStringArray()
+	_file_names_lower = PackedStringArray()
+	_file_dirs = {}
+	var stack: Array[EditorFileSystemDirectory] = [efs.get_filesystem()]
+	while not stack.is_empty():
+		var dir: EditorFileSystemDirectory = stack.pop_back()
+		var dir_path = dir.get_path()
+		var entries = PackedStringArray()
+		for i in range(dir.get_subdir_count()):
+			var sub = dir.get_subdir(i)
+			entries.append(sub.get_name())
+			stack.append(sub)
+		for i in range(dir.get_file_count()):
+			var file_path = dir.get_file_path(i)
+			entries.append(dir.get_file(i))
+			_file_paths.append(file_path)
+			_file_paths_lower.append(file_path.to_lower())
+			_file_names_lower.append(dir.get_file(i).to_lower())
+		_file_dirs[dir_path.trim_suffix("/") if dir_path != "res://" else dir_path] = entries
+	
+	_file_index_dirty = false
+	_file_index_built = true
+	return true
+
+func _fuzzy_score(term: String, file_name: String, file_path: String) -> float:
+	# Higher is better; 0 means no match. Name hits beat path hits, prefixes
+	# beat substrings, substrings beat in-order subsequences ("plyctl" -> player_controller.gd),
+	# and close misspellings still match weakly. Shorter names win ties.
+	var length_penalty = 0.01 * (file_name.length() - term.length())
+	var stem = file_name.get_basename()
+	if stem == term:
+		return 200.0
+	if file_name.begins_with(term):
+		return 150.0 - length_penalty
+	if file_name.contains(term):
+		return 100.0 - length_penalty
+	if file_path.contains(term):
+		return 60.0 - 0.01 * file_path.length()
+	if term.is_subsequence_of(file_name):
+		return 30.0 + 10.0 * stem.similarity(term)
+	if term.length() >= 3:
+		var sim = stem.similarity(term)
+		if sim >= 0.5:
+			return 20.0 * sim
+	return 0.0
+
+#
+# ============ NEW: Variant Codec ============
+#
+
+# Lossless JSON form of Variants, mirrored by mcp_server/variant_codec.py.
+# JSON-native values pass through; everything else becomes {"$t": type, "v": ...}
+# where v is a flat component list (vectors, colors, rects, transforms in column
+# order) or, for packed arrays, base64 of their raw little-endian bytes.
+# Vector-valued packed arrays are float32, as in standard (non-double) builds.
+const _PACKED_VECTOR_WIDTH = {"PackedVector2Array": 2, "PackedVector3Array": 3, "PackedColorArray": 4, "PackedVector4Array": 4}
+const _PACKED_VECTOR_TYPE = {"PackedVector2Array": TYPE_PACKED_VECTOR2_ARRAY, "PackedVector3Array": TYPE_PACKED_VECTOR3_ARRAY, "PackedColorArray": TYPE_PACKED_COLOR_ARRAY, "PackedVector4Array": TYPE_PACKED_VECTOR4_ARRAY}
+
+func _encode_variant(value):
+	match typeof(value):
+		TYPE_NIL, TYPE_BOOL, TYPE_INT, TYPE_FLOAT, TYPE_STRING:
+			return value
+		TYPE_STRING_NAME, TYPE_NODE_PATH:
+			return {"$t": type_string(typeof(value)), "v": str(value)}
+		TYPE_VECTOR2, TYPE_VECTOR2I:
+			return {"$t": type_string(typeof(value)), "v": [value.x, value.y]}
+		TYPE_VECTOR3, TYPE_VECTOR3I:
+			return {"$t": type_string(typeof(value)), "v": [value.x, value.y, value.z]}
+		TYPE_VECTOR4, TYPE_VECTOR4I, TYPE_QUATERNION:
+			return {"$t": type_string(typeof(value)), "v": [value.x, value.y, value.z, value.w]}
+		TYPE_COLOR:
+			return {"$t": "Color", "v": [value.r, value.g, value.b, value.a]}
+		TYPE_RECT2, TYPE_RECT2I:
+			return {"$t": type_string(typeof(value)), "v": [value.position.x, value.position.y, value.size.x, value.size.y]}
+		TYPE_PLANE:
+			return {"$t": "Plane", "v": [value.normal.x, value.normal.y, value.normal.z, value.d]}
+		TYPE_AABB:
+			return {"$t": "AABB", "v": [value.position.x, value.position.y, value.position.z, value.size.x, value.size.y, value.size.z]}
+		TYPE_TRANSFORM2D:
+			return {"$t": "Transform2D", "v": [value.x.x, value.x.y, value.y.x, value.y.y, value.origin.x, value.origin.y]}
+		TYPE_BASIS:
+			return {"$t": "Basis", "v": _basis_components(value)}
+		TYPE_TRANSFORM3D:
+			return {"$t": "Transform3D", "v": _basis_components(value.basis) + [value.origin.x, value.origin.y, value.origin.z]}
+		TYPE_PROJECTION:
+			var components = []
+			for column in [value.x, value.y, value.z, value.w]:
+				components.append_array([column.x, column.y, column.z, column.w])
+			return {"$t": "Projection", "v": components}
+		TYPE_PACKED_BYTE_ARRAY:
+			return {"$t": "PackedByteArray", "v": Marshalls.raw_to_base64(value)}
+		TYPE_PACKED_INT32_ARRAY, TYPE_PACKED_INT64_ARRAY, TYPE_PACKED_FLOAT32_ARRAY, TYPE_PACKED_FLOAT64_ARRAY, \
+		TYPE_PACKED_VECTOR2_ARRAY, TYPE_PACKED_VECTOR3_ARRAY, TYPE_PACKED_COLOR_ARRAY, TYPE_PACKED_VECTOR4_ARRAY:
+			return {"$t": type_string(typeof(value)), "v": Marshalls.raw_to_base64(value.to_byte_array())}
+		TYPE_PACKED_STRING_ARRAY:
+			return {"$t": "PackedStringArray", "v": Array(value)}
+		TYPE_ARRAY:
+			return value.map(_encode_variant)
+		TYPE_DICTIONARY:
+			var out = {}
+			for key in value:
+				out[str(key)] = _encode_variant(value[key])
+			return out
+		TYPE_OBJECT:
+			if not is_instance_valid(value):
+				return null
+			if value is Resource and value.resource_path != "":
+				return {"$t": "Resource", "v": value.resource_path, "class": value.get_class()}
+			return {"$t": "Object", "v": str(value), "class": value.get_class()}
+	# RID, Callable, Signal: informational only, not decodable
+	return {"$t": type_string(typeof(value)), "v": str(value)}
+
+func _basis_components(basis: Basis) -> Array:
+	return [basis.x.x, basis.x.y, basis.x.z, basis.y.x, basis.y.y, basis.y.z, basis.z.x, basis.z.y, basis.z.z]
+
+func _is_encoded_variant(value) -> bool:
+	return value is Dictionary and value.has("$t")
+
+func _decode_variant(value):
+	if value is Array:
+		return value.map(_decode_variant)
+	if not value is Dictionary:
+		return value
+	if not value.has("$t"):
+		var out = {}
+		for key in value:
+			out[key] = _decode_variant(value[key])
+		return out
+	
+	var t: String = value["$t"]
+	var v = value.get("v")
+	match t:
+		"StringName": return StringName(v)
+		"NodePath": return NodePath(v)
+		"Vector2": return Vector2(v[0], v[1])
+		"Vector2i": return Vector2i(int(v[0]), int(v[1]))
+		"Vector3": return Vector3(v[0], v[1], v[2])
+		"Vector3i": return Vector3i(int(v[0]), int(v[1]), int(v[2]))
+		"Vector4": return Vector4(v[0], v[1], v[2], v[3])
+		"Vector4i": return Vector4i(int(v[0]), int(v[1]), int(v[2]), int(v[3]))
+		"Quaternion": return Quaternion(v[0], v[1], v[2], v[3])
+		"Color": return Color(v[0], v[1], v[2], v[3] if v.size() > 3 else 1.0)
+		"Rect2": return Rect2(v[0], v[1], v[2], v[3])
+		"Rect2i": return Rect2i(int(v[0]), int(v[1]), int(v[2]), int(v[3]))
+		"Plane": return Plane(Vector3(v[0], v[1], v[2]), v[3])
+		"AABB": return AABB(Vector3(v[0], v[1], v[2]), Vector3(v[3], v[4], v[5]))
+		"Transform2D": return Transform2D(Vector2(v[0], v[1]), Vector2(v[2], v[3]), Vector2(v[4], v[5]))
+		"Basis": return Basis(Vector3(v[0], v[1], v[2]), Vector3(v[3], v[4], v[5]), Vector3(v[6], v[7], v[8]))
+		"Transform3D": return Transform3D(Vector3(v[0], v[1], v[2]), Vector3(v[3], v[4], v[5]), Vector3(v[6], v[7], v[8]), Vector3(v[9], v[10], v[11]))
+		"Projection": return Projection(Vector4(v[0], v[1], v[2], v[3]), Vector4(v[4], v[5], v[6], v[7]), Vector4(v[8], v[9], v[10], v[11]), Vector4(v[12], v[13], v[14], v[15]))
+		"PackedByteArray": return Marshalls.base64_to_raw(v)
+		"PackedInt32Array": return Marshalls.base64_to_raw(v).to_int32_array()
+		"PackedInt64Array": return Marshalls.base64_to_raw(v).to_int64_array()
+		"PackedFloat32Array": return Marshalls.base64_to_raw(v).to_float32_array()
+		"PackedFloat64Array": return Marshalls.base64_to_raw(v).to_float64_array()
+		"PackedStringArray": return PackedStringArray(v)
+		"PackedVector2Array", "PackedVector3Array", "PackedColorArray", "PackedVector4Array":
+			return _decode_packed_vectors(t, Marshalls.base64_to_raw(v))
+		"Resource": return load(v) if v != "" else null
+	return v
+
+func _decode_packed_vectors(t: String, raw: PackedByteArray):
+	# The payload is already the element data of bytes_to_var's encoding for
+	# these types (little-endian float32 components), so prepend the 8 byte
+	# Variant header (type id, element count) and decode natively in one call
+	var width: int = _PACKED_VECTOR_WIDTH[t]
+	var count = floori(raw.size() / (4.0 * width))
+	var header = PackedByteArray()
+	header.resize(8)
+	header.encode_u32(0, _PACKED_VECTOR_TYPE[t])
+	header.encode_u32(4, count)
+	return bytes_to_var(header + raw.slice(0, count * width * 4))
+
+#
+# ============ NEW: Bulk Properties ============
+#
+
+# One call reads or writes the same properties on many nodes, chosen by
+# explicit paths or a group/type selector under root_path. Reads come back
+# columnar: "paths" plus one array per property, aligned by index.
+
+func _select_nodes(params: Dictionary, root: Node) -> Dictionary:
+	var root_path = params.get("root_path", ".")
+	var scope = root.get_node_or_null(root_path) if root_path != "." else root
+	if not scope: return {"error": "Root path not found: " + root_path}
+	
+	var paths: Array = []
+	var nodes: Array = []
+	if params.has("paths"):
+		for path in params["paths"]:
+			paths.append(str(path))
+			nodes.append(scope.get_node_or_null(path) if path != "." else scope)
+		return {"paths": paths, "nodes": nodes}
+	
+	var group = str(params.get("group", ""))
+	var type_name = str(params.get("type", ""))
+	if group == "" and type_name == "":
+		return {"error": "Give paths, group or type"}
+	var stack: Array[Node] = [scope]
+	while not stack.is_empty():
+		var node: Node = stack.pop_back()
+		if (group == "" or node.is_in_group(group)) and (type_name == "" or node.is_class(type_name)):
+			paths.append(str(scope.get_path_to(node)))
+			nodes.append(node)
+		var children = node.get_children()
+		children.reverse()
+		stack.append_array(children)
+	return {"paths": paths, "nodes": nodes}
+
+# Nodes handled between budget checks in get/set_properties, so a 20k node
+# selection spreads over frames without a clock read per node
+const _BULK_YIELD_EVERY = 256
+
+func _get_properties(params: Dictionary) -> Dictionary:
+	var properties = params.get("properties", [])
+	if properties.is_empty(): return {"error": "properties required"}
+	var typed = params.get("typed", false)
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var selection = _select_nodes(params, root)
+	if selection.has("error"): return selection
+	
+	var columns = {}
+	for prop in properties:
+		var column = []
+		column.resize(selection["nodes"].size())
+		columns[prop] = column
+	var errors = {}
+	for i in range(selection["nodes"].size()):
+		if i % _BULK_YIELD_EVERY == _BULK_YIELD_EVERY - 1:
+			await _yield_if_over_budget()
+		var node = selection["nodes"][i]
+		if not is_instance_valid(node): # Missing, or freed while we yielded
+			errors[selection["paths"][i]] = "Node not found"
+			continue
+		for prop in properties:
+			if not prop in node:
+				continue # stays null
+			var val = node.get(prop)
+			if typed:
+				columns[prop][i] = _encode_variant(val)
+			elif val == null or val is bool or val is int or val is float or val is String:
+				columns[prop][i] = val
+			else:
+				columns[prop][i] = str(val)
+	var result = {"paths": selection["paths"], "properties": columns, "count": selection["paths"].size()}
+	if not errors.is_empty():
+		result["errors"] = errors
+	return result
+
+func _set_properties(params: Dictionary) -> Dictionary:
+	# values: {prop: value} applied to every node; columns: {prop: [value per node]}
+	var values = params.get("values", {})
+	var columns = params.get("columns", {})
+	if not values is Dictionary or not columns is Dictionary: return {"error": "values and columns must be objects"}
+	if values.is_empty() and columns.is_empty(): return {"error": "values or columns required"}
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var selection = _select_nodes(params, root)
+	if selection.has("error"): return selection
+	var count = selection["nodes"].size()
+	for prop in columns:
+		if not columns[prop] is Array or columns[prop].size() != count:
+			return {"error": "Column %s needs one value per node (%d)" % [prop, count]}
+	
+	var results = []
+	var updated = 0
+	for i in range(count):
+		if i % _BULK_YIELD_EVERY == _BULK_YIELD_EVERY - 1:
+			await _yield_if_over_budget()
+		var node = selection["nodes"][i]
+		var entry = {"path": selection["paths"][i]}
+		if not is_instance_valid(node):
+			entry["error"] = "Node not found"
+			results.append(entry)
+			continue
+		var missing = []
+		for prop in values:
+			if prop in node:
+				_assign_property(node, prop, values[prop])
+			else:
+				missing.append(prop)
+		for prop in columns:
+			if prop in node:
+				_assign_property(node, prop, columns[prop][i])
+			else:
+				missing.append(prop)
+		if missing.is_empty():
+			updated += 1
+		else:
+			entry["error"] = "Unknown properties: " + ", ".join(missing)
+		results.append(entry)
+	return {"result": "Set properties on %d of %d nodes" % [updated, count], "updated": updated, "results": results}
+
+#
+# ============ NEW: Snippet Cache ============
+#
+
+# execute_script compiles each distinct source once: the compiled script and
+# its instance are kept in an LRU keyed by the source hash, and per-call values
+# arrive in `args` instead of being baked into the code. Named snippets keep
+# their source, so an evicted one is simply recompiled on its next run.
+var _snippet_cache_size := DEFAULT_SNIPPET_CACHE_SIZE
+var _snippet_cache := {} # source hash -> {"script", "instance"}
+var _snippet_lru: Array[String] = [] # least recently used first
+var _snippets := {} # name -> source
+
+func _compile_snippet(code: String) -> Dictionary:
+	var key = code.sha256_text()
+	if _snippet_cache.has(key):
+		_snippet_lru.erase(key)
+		_snippet_lru.append(key)
+		return {"instance": _snippet_cache[key]["instance"], "cached": true, "hash": key}
+	
+	# To execute code dynamically in Godot 4, we create a temporary script.
+	# The user code becomes the body of eval(); `args` holds the call's arguments.
+	var source = PackedStringArray(["@tool", "extends RefCounted", "func eval(editor_interface, args = {}):"])
+	for line in code.replace("\r\n", "\n").split("\n"):
+		source.append("\t" + line)
+	var script = GDScript.new()
+	script.source_code = "\n".join(source) + "\n"
+	var err = script.reload()
+	if err != OK:
+		return {"error": "Script parse error", "source": script.source_code}
+	
+	_snippet_cache[key] = {"script": script, "instance": script.new()}
+	_snippet_lru.append(key)
+	while _snippet_lru.size() > _snippet_cache_size:
+		_snippet_cache.erase(_snippet_lru.pop_front())
+	return {"instance": _snippet_cache[key]["instance"], "cached": false, "hash": key}
+
+func _register_snippet(params: Dictionary) -> Dictionary:
+	var name = str(params.get("name", ""))
+	var code = params.get("code", "")
+	if name == "" or code == "":
+		return {"error": "name and code required"}
+	var compiled = _compile_snippet(code)
+	if compiled.has("error"):
+		return compiled
+	_snippets[name] = code
+	return {"result": "Snippet registered", "name": name, "hash": compiled["hash"]}
+
+func _run_snippet(params: Dictionary) -> Dictionary:
+	var name = str(params.get("name", ""))
+	if not _snippets.has(name):
+		return {"error": "Unknown snippet: " + name, "unknown_snippet": true}
+	var args = params.get("args", {})
+	if not args is Dictionary:
+		return {"error": "args must be an object"}
+	var compiled = _compile_snippet(_snippets[name])
+	if compiled.has("error"):
+		return compiled
+	var result = compiled["instance"].eval(EditorInterface, args)
+	return {"result": str(result), "cached": compiled["cached"]}
+
+#
+# ============ NEW: Background Jobs ============
+#
+
+# Heavy handlers hand their CPU work to WorkerThreadPool and finish on the main
+# thread once it's done. A job's "shared" Dictionary is the only state both
+# threads touch (always under _jobs_mutex); everything else is main-thread only.
+const JOB_KEEP_MS = 300000 # Finished jobs stay queryable for 5 minutes
+var _jobs := {}
+var _next_job_id := 0
+var _jobs_mutex := Mutex.new()
+
+func _run_as_job(method: String, params: Dictionary, work: Callable, finish: Callable) -> Dictionary:
+	# work(shared) runs on a worker and returns its output (null if cancelled);
+	# finish(output) runs on the main thread and returns the command's reply.
+	# With params.async the reply is just the job id; otherwise wait for it.
+	_next_job_id += 1
+	var shared = {"progress": 0.0, "cancel": false, "done": false, "output": null}
+	var job = {
+		"id": _next_job_id,
+		"method": method,
+		"shared": shared,
+		"finish": finish,
+		"status": "running",
+		"result": null,
+		"started_at": Time.get_ticks_msec(),
+		"finished_at": 0
+	}
+	job["task_id"] = WorkerThreadPool.add_task(_run_job_work.bind(work, shared), false, "MCP " + method)
+	_jobs[job["id"]] = job
+	
+	if params.get("async", false):
+		return {"result": "Job started", "job_id": job["id"], "status": "running"}
+	while job["status"] == "running":
+		await get_tree().process_frame
+	return job["result"]
+
+func _run_job_work(work: Callable, shared: Dictionary):
+	var output = work.call(shared)
+	_jobs_mutex.lock()
+	shared["output"] = output
+	shared["done"] = true
+	_jobs_mutex.unlock()
+
+func _job_progress(shared: Dictionary, value: float) -> void:
+	_jobs_mutex.lock()
+	shared["progress"] = value
+	_jobs_mutex.unlock()
+
+func _job_cancelled(shared: Dictionary) -> bool:
+	_jobs_mutex.lock()
+	var cancelled = shared["cancel"]
+	_jobs_mutex.unlock()
+	return cancelled
+
+func _poll_jobs():
+	var now = Time.get_ticks_msec()
+	for id in _jobs.keys():
+		var job = _jobs[id]
+		if job["status"] != "running":
+			if now - job["finished_at"] > JOB_KEEP_MS:
+				_jobs.erase(id)
+			continue
+		var shared: Dictionary = job["shared"]
+		_jobs_mutex.lock()
+		var done = shared["done"]
+		var cancelled = shared["cancel"]
+		var output = shared["output"]
+		_jobs_mutex.unlock()
+		if not done:
+			continue
+		WorkerThreadPool.wait_for_task_completion(job["task_id"])
+		if cancelled:
+			job["status"] = "cancelled"
+			job["result"] = {"error": "Job cancelled", "job_id": id}
+		elif output == null:
+			job["status"] = "error"
+			job["result"] = {"error": "Job failed", "job_id": id}
+		else:
+			job["result"] = job["finish"].call(output)
+			job["status"] = "error" if job["result"].has("error") else "done"
+		shared["output"] = null
+		job["finished_at"] = now
+
+func _job_info(job: Dictionary) -> Dictionary:
+	_jobs_mutex.lock()
+	var progress = 1.0 if job["status"] != "running" else job["shared"]["progress"]
+	_jobs_mutex.unlock()
+	var end = job["finished_at"] if job["finished_at"] > 0 else Time.get_ticks_msec()
+	var info = {"job_id": job["id"], "method": job["method"], "status": job["status"], "progress": progress, "elapsed_ms": end - job["started_at"]}
+	if job["status"] != "running":
+		info["result"] = job["result"]
+	return info
+
+func _job_status(params: Dictionary) -> Dictionary:
+	if not params.has("job_id"):
+		var jobs = []
+		for id in _jobs:
+			jobs.append(_job_info(_jobs[id]))
+		return {"jobs": jobs}
+	var job = _jobs.get(int(params["job_id"]))
+	if not job: return {"error": "Unknown job: " + str(params["job_id"])}
+	return _job_info(job)
+
+func _job_cancel(params: Dictionary) -> Dictionary:
+	var job = _jobs.get(int(params.get("job_id", 0)))
+	if not job: return {"error": "Unknown job: " + str(params.get("job_id", ""))}
+	if job["status"] != "running":
+		return {"result": "Job already " + job["status"], "job_id": job["id"]}
+	_jobs_mutex.lock()
+	job["shared"]["cancel"] = true
+	_jobs_mutex.unlock()
+	return {"result": "Cancellation requested", "job_id": job["id"]}
+
+#
+# ============ NEW: Metrics ============
+#
+
+# Every command run through _run_command is counted per method: queue time
+# (arrival to start), execution time (_execute_command, including frames it
+# spends awaiting), request/response bytes, errors and busy rejections. The
+# histograms use the same bucket bounds as mcp_server/metrics.py; each slot
+# counts values up to its bound, the last one everything above.
+const METRICS_BUCKETS_MS = [0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0]
+var _metrics := {} # method -> counters and histograms, see _method_metrics
+var _metrics_since := Time.get_unix_time_from_system()
+
+func _method_metrics(method: String) -> Dictionary:
+	if not _metrics.has(method):
+		var empty := []
+		empty.resize(METRICS_BUCKETS_MS.size() + 1)
+		empty.fill(0)
+		_metrics[method] = {"count": 0, "errors": 0, "busy": 0, "bytes_in": 0, "bytes_out": 0,
+			"queue": empty.duplicate(), "queue_sum_ms": 0.0, "exec": empty.duplicate(), "exec_sum_ms": 0.0}
+	return _metrics[method]
+
+func _record_metrics(method: String, queue_usec: int, exec_usec: int, bytes_in: int, bytes_out: int, failed: bool):
+	var m := _method_metrics(method)
+	m["count"] += 1
+	if failed:
+		m["errors"] += 1
+	m["bytes_in"] += bytes_in
+	m["bytes_out"] += bytes_out
+	var queue_ms := queue_usec / 1000.0
+	var exec_ms := exec_usec / 1000.0
+	m["queue"][METRICS_BUCKETS_MS.bsearch(queue_ms)] += 1
+	m["queue_sum_ms"] += queue_ms
+	m["exec"][METRICS_BUCKETS_MS.bsearch(exec_ms)] += 1
+	m["exec_sum_ms"] += exec_ms
+
+func _get_metrics(params: Dictionary) -> Dictionary:
+	var methods := {}
+	for method in _metrics:
+		var m: Dictionary = _metrics[method]
+		methods[method] = {"count": m["count"], "errors": m["errors"], "busy": m["busy"],
+			"bytes_in": m["bytes_in"], "bytes_out": m["bytes_out"],
+			"queue": m["queue"], "queue_sum_ms": m["queue_sum_ms"],
+			"exec": m["exec"], "exec_sum_ms": m["exec_sum_ms"]}
+	var queued := 0
+	for state in _peer_state.values():
+		queued += state["queued"]
+	var out = {"since": _metrics_since, "buckets_ms": METRICS_BUCKETS_MS, "methods": methods,
+		"queue_depth": queued, "peers": peers.size()}
+	if params.get("reset", false):
+		_metrics.clear()
+		_metrics_since = Time.get_unix_time_from_system()
+	return {"result": out}
+
 #
 # ============ NEW: Terrain Tools ============
 #
@@ -245,6 +1470,46 @@ func _generate_terrain_mesh(params: Dictionary) -> Dictionary:
 	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
 	if not parent: return {"error": "Parent not found"}
 	
+	# Noise, mesh arrays and collision faces are computed on a worker thread;
+	# only the resources and nodes are created here on the main thread
+	var work = func(shared: Dictionary):
+		return _build_terrain_arrays(shared, size, height_scale, noise_seed)
+	var finish = func(output):
+		if not is_instance_valid(parent) or not parent.is_inside_tree():
+			return {"error": "Parent was removed while the terrain was generating"}
+		var mesh = ArrayMesh.new()
+		mesh.add_surface_from_arrays(Mesh.PRIMITIVE_TRIANGLES, output["arrays"])
+		var collision = ConcavePolygonShape3D.new()
+		collision.set_faces(output["faces"])
+		
+		# 3. Create Node Structure
+		var body = StaticBody3D.new()
+		body.name = name
+		body.set_meta("_edit_group_", true)
+		parent.add_child(body)
+		body.owner = root
+		
+		var mesh_inst = MeshInstance3D.new()
+		mesh_inst.name = "Mesh"
+		mesh_inst.mesh = mesh
+		body.add_child(mesh_inst)
+		mesh_inst.owner = root
+		
+		# 4. Create Collision
+		var shape = CollisionShape3D.new()
+		shape.name = "Collision"
+		shape.shape = collision
+		body.add_child(shape)
+		shape.owner = root
+		
+		# 5. Center it (optional, but nice)
+		body.position = Vector3(-size / 2.0, 0, -size / 2.0)
+		
+		return {"result": "Terrain generated", "path": str(body.get_path())}
+	return await _run_as_job("generate_terrain_mesh", params, work, finish)
+
+func _build_terrain_arrays(shared: Dictionary, size: int, height_scale: float, noise_seed: int):
+	# Runs on a worker thread: no scene tree or server access in here
 	# 1. Generate Noise
 	var noise = FastNoiseLite.new()
 	noise.seed = noise_seed
@@ -252,24 +1517,32 @@ func _generate_terrain_mesh(params: Dictionary) -> Dictionary:
 	noise.frequency = 0.02  # Smooth rolling hills by default (was 0.05)
 	noise.fractal_octaves = 4
 	
+	# Sample every grid point once (each quad shares its corners with its neighbours)
+	var stride = size + 1
+	var heights = PackedFloat32Array()
+	heights.resize(stride * stride)
+	for z in range(stride):
+		if _job_cancelled(shared):
+			return null
+		for x in range(stride):
+			heights[z * stride + x] = noise.get_noise_2d(x, z) * height_scale
+		_job_progress(shared, 0.4 * z / stride)
+	
 	# 2. Build Mesh with SurfaceTool
 	var st = SurfaceTool.new()
 	st.begin(Mesh.PRIMITIVE_TRIANGLES)
 	
 	# Simple UV mapping and normals
 	for z in range(size):
+		if _job_cancelled(shared):
+			return null
 		for x in range(size):
 			# Two triangles per quad
 			# Vertices
-			var h1 = noise.get_noise_2d(x, z) * height_scale
-			var h2 = noise.get_noise_2d(x + 1, z) * height_scale
-			var h3 = noise.get_noise_2d(x, z + 1) * height_scale
-			var h4 = noise.get_noise_2d(x + 1, z + 1) * height_scale
-			
-			var v1 = Vector3(x, h1, z)
-			var v2 = Vector3(x + 1, h2, z)
-			var v3 = Vector3(x, h3, z + 1)
-			var v4 = Vector3(x + 1, h4, z + 1)
+			var v1 = Vector3(x, heights[z * stride + x], z)
+			var v2 = Vector3(x + 1, heights[z * stride + x + 1], z)
+			var v3 = Vector3(x, heights[(z + 1) * stride + x], z + 1)
+			var v4 = Vector3(x + 1, heights[(z + 1) * stride + x + 1], z + 1)
 			
 			# Triangle 1 (v1, v2, v3)
 			st.set_uv(Vector2(x, z))
@@ -286,13 +1559,76 @@ func _generate_terrain_mesh(params: Dictionary) -> Dictionary:
 			st.add_vertex(v4)
 			st.set_uv(Vector2(x, z + 1))
 			st.add_vertex(v3)
+		_job_progress(shared, 0.4 + 0.4 * z / size)
 	
 	# Indexing and generating normals creates a smooth surface
 	st.index()
 	st.generate_normals()
-	var mesh = st.commit()
+	var arrays = st.commit_to_arrays()
+	
+	# Triangle soup for the trimesh collider (what create_trimesh_shape() builds)
+	var vertices: PackedVector3Array = arrays[Mesh.ARRAY_VERTEX]
+	var indices: PackedInt32Array = arrays[Mesh.ARRAY_INDEX]
+	var faces = PackedVector3Array()
+	faces.resize(indices.size())
+	for i in range(indices.size()):
+		faces[i] = vertices[indices[i]]
+	return {"arrays": arrays, "faces": faces}
+
+func _unpack_sections(params: Dictionary) -> Dictionary:
+	# Clients send several Variants (in bytes_to_var format) as one binary
+	# payload, with params.sections = {name: [offset, length]}
+	var blob = params.get("_binary")
+	if blob == null:
+		blob = Marshalls.base64_to_raw(params.get("data_base64", ""))
+	var out = {}
+	var sections = params.get("sections", {})
+	for key in sections:
+		var start = int(sections[key][0])
+		var end = start + int(sections[key][1])
+		if start < 0 or end > blob.size():
+			return {"error": "Section %s is outside the %d byte payload" % [key, blob.size()]}
+		out[key] = bytes_to_var(blob.slice(start, end))
+	return out
+
+func _build_heightmap_terrain(params: Dictionary) -> Dictionary:
+	# Mesh arrays and collision heights are computed client-side (see
+	# mcp_server/terrain.py); this only wraps them in resources and nodes.
+	var parent_path = params.get("parent_path", ".")
+	var name = params.get("name", "Terrain")
+	var width = int(params.get("width", 0))
+	var depth = int(params.get("depth", 0))
+	var cell_size = float(params.get("cell_size", 1.0))
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
+	if not parent: return {"error": "Parent not found"}
+	
+	var data = _unpack_sections(params)
+	if data.has("error"): return data
+	if not data.get("vertices") is PackedVector3Array or not data.get("normals") is PackedVector3Array \
+			or not data.get("uvs") is PackedVector2Array or not data.get("indices") is PackedInt32Array \
+			or not data.get("heights") is PackedFloat32Array:
+		return {"error": "Expected vertices, normals, uvs, indices and heights packed arrays"}
+	if width < 2 or depth < 2 or data["heights"].size() != width * depth or data["vertices"].size() != width * depth:
+		return {"error": "Heightmap size doesn't match width x depth (%d x %d)" % [width, depth]}
+	
+	var arrays = []
+	arrays.resize(Mesh.ARRAY_MAX)
+	arrays[Mesh.ARRAY_VERTEX] = data["vertices"]
+	arrays[Mesh.ARRAY_NORMAL] = data["normals"]
+	arrays[Mesh.ARRAY_TEX_UV] = data["uvs"]
+	arrays[Mesh.ARRAY_INDEX] = data["indices"]
+	var mesh = ArrayMesh.new()
+	mesh.add_surface_from_arrays(Mesh.PRIMITIVE_TRIANGLES, arrays)
+	
+	# Heights are in cells; scaling the shape uniformly sets the sample spacing
+	var collision = HeightMapShape3D.new()
+	collision.map_width = width
+	collision.map_depth = depth
+	collision.map_data = data["heights"]
 	
-	# 3. Create Node Structure
 	var body = StaticBody3D.new()
 	body.name = name
 	body.set_meta("_edit_group_", true)
@@ -305,17 +1641,226 @@ func _generate_terrain_mesh(params: Dictionary) -> Dictionary:
 	body.add_child(mesh_inst)
 	mesh_inst.owner = root
 	
-	# 4. Create Collision
 	var shape = CollisionShape3D.new()
 	shape.name = "Collision"
-	shape.shape = mesh.create_trimesh_shape()
+	shape.shape = collision
+	shape.scale = Vector3.ONE * cell_size
 	body.add_child(shape)
 	shape.owner = root
 	
-	# 5. Center it (optional, but nice)
-	body.position = Vector3(-size / 2.0, 0, -size / 2.0)
+	return {"result": "Terrain generated", "path": str(body.get_path()), "vertices": width * depth, "triangles": (width - 1) * (depth - 1) * 2}
+
+func _build_terrain_chunk(params: Dictionary) -> Dictionary:
+	# One tile of a chunked terrain (see terrain.chunk_payloads): a StaticBody3D
+	# under the terrain root holding one MeshInstance3D per LOD, switched by
+	# visibility ranges, and a HeightMapShape3D collider. Each LOD mesh and the
+	# collider are saved as their own resources so tiles can be streamed.
+	var parent_path = params.get("parent_path", ".")
+	var terrain_name = params.get("terrain", "Terrain")
+	var chunk = Vector2i(int(params.get("x", 0)), int(params.get("z", 0)))
+	var chunk_name = "Chunk_%d_%d" % [chunk.x, chunk.y]
+	var width = int(params.get("width", 0))
+	var cell_size = float(params.get("cell_size", 1.0))
+	var ranges = params.get("lod_ranges", [[0.0, 0.0]])
+	var save_dir = params.get("save_dir", "")
+	var pos = params.get("position", [0.0, 0.0, 0.0])
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
+	if not parent: return {"error": "Parent not found"}
+	
+	var data = _unpack_sections(params)
+	if data.has("error"): return data
+	if not data.get("heights") is PackedFloat32Array or data["heights"].size() != width * width:
+		return {"error": "Expected %d x %d collision heights" % [width, width]}
+	if save_dir == "":
+		save_dir = "res://terrain/" + terrain_name.to_snake_case()
+	if DirAccess.make_dir_recursive_absolute(save_dir) != OK:
+		return {"error": "Could not create " + save_dir}
+	
+	var terrain = parent.get_node_or_null(NodePath(terrain_name))
+	if not terrain:
+		terrain = Node3D.new()
+		terrain.name = terrain_name
+		parent.add_child(terrain)
+		terrain.owner = root
+	terrain.set_meta("terrain_chunk_size", (width - 1) * cell_size)
+	terrain.set_meta("terrain_lod_ranges", ranges)
+	
+	var old = terrain.get_node_or_null(NodePath(chunk_name))
+	if old:
+		terrain.remove_child(old)
+		old.queue_free()
 	
-	return {"result": "Terrain generated", "path": str(body.get_path())}
+	var body = StaticBody3D.new()
+	body.name = chunk_name
+	body.position = Vector3(pos[0], pos[1], pos[2])
+	body.set_meta("terrain_chunk", chunk)
+	terrain.add_child(body)
+	body.owner = root
+	
+	var fs = EditorInterface.get_resource_filesystem()
+	var saved = []
+	for lod in range(ranges.size()):
+		var prefix = "lod%d_" % lod
+		var arrays = []
+		arrays.resize(Mesh.ARRAY_MAX)
+		arrays[Mesh.ARRAY_VERTEX] = data.get(prefix + "vertices")
+		arrays[Mesh.ARRAY_NORMAL] = data.get(prefix + "normals")
+		arrays[Mesh.ARRAY_TEX_UV] = data.get(prefix + "uvs")
+		arrays[Mesh.ARRAY_INDEX] = data.get(prefix + "indices")
+		if not arrays[Mesh.ARRAY_VERTEX] is PackedVector3Array or not arrays[Mesh.ARRAY_INDEX] is PackedInt32Array:
+			return {"error": "Missing mesh arrays for LOD %d" % lod}
+		var mesh = ArrayMesh.new()
+		mesh.add_surface_from_arrays(Mesh.PRIMITIVE_TRIANGLES, arrays)
+		var mesh_path = save_dir.path_join("%s_lod%d.res" % [chunk_name.to_lower(), lod])
+		if ResourceSaver.save(mesh, mesh_path, ResourceSaver.FLAG_CHANGE_PATH) != OK:
+			return {"error": "Could not save " + mesh_path}
+		fs.update_file(mesh_path)
+		saved.append(mesh_path)
+		
+		var mesh_inst = MeshInstance3D.new()
+		mesh_inst.name = "LOD%d" % lod
+		mesh_inst.mesh = mesh
+		# Visibility ranges swap LODs by camera distance and cull past the last one
+		mesh_inst.visibility_range_begin = float(ranges[lod][0])
+		mesh_inst.visibility_range_end = float(ranges[lod][1])
+		mesh_inst.visibility_range_begin_margin = float(ranges[lod][0]) * 0.05
+		mesh_inst.visibility_range_end_margin = float(ranges[lod][1]) * 0.05
+		body.add_child(mesh_inst)
+		mesh_inst.owner = root
+	
+	var collision = HeightMapShape3D.new()
+	collision.map_width = width
+	collision.map_depth = width
+	collision.map_data = data["heights"]
+	var shape_path = save_dir.path_join("%s_collision.res" % chunk_name.to_lower())
+	if ResourceSaver.save(collision, shape_path, ResourceSaver.FLAG_CHANGE_PATH) != OK:
+		return {"error": "Could not save " + shape_path}
+	fs.update_file(shape_path)
+	saved.append(shape_path)
+	
+	var shape = CollisionShape3D.new()
+	shape.name = "Collision"
+	shape.shape = collision
+	shape.scale = Vector3.ONE * cell_size
+	body.add_child(shape)
+	shape.owner = root
+	
+	return {"result": "Chunk built", "path": str(body.get_path()), "resources": saved}
+
+#
+# ============ NEW: Scatter ============
+#
+
+func _get_heightmap(params: Dictionary) -> Dictionary:
+	# Every HeightMapShape3D at or under `path`, with its global transform, so
+	# clients can sample terrain heights. Heights go out as one float32 buffer;
+	# shapes[i].offset/count locate each shape's samples in it.
+	# Transforms are global, or relative to params.relative_to (e.g. the node
+	# that will hold the placed instances).
+	var path = params.get("path", "")
+	var relative_path = params.get("relative_to", "")
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var node = root.get_node_or_null(path) if path != "." else root
+	if not node: return {"error": "Node not found: " + path}
+	var to_local = Transform3D.IDENTITY
+	if relative_path != "":
+		var relative = root.get_node_or_null(relative_path) if relative_path != "." else root
+		if not relative is Node3D: return {"error": "relative_to is not a Node3D: " + relative_path}
+		to_local = relative.global_transform.affine_inverse()
+	
+	var shapes = []
+	var data = PackedByteArray()
+	var offset := 0
+	var stack: Array[Node] = [node]
+	while not stack.is_empty():
+		var current: Node = stack.pop_back()
+		stack.append_array(current.get_children())
+		if not current is CollisionShape3D or not current.shape is HeightMapShape3D:
+			continue
+		var shape: HeightMapShape3D = current.shape
+		var xform: Transform3D = to_local * current.global_transform
+		shapes.append({
+			"path": str(root.get_path_to(current)),
+			"width": shape.map_width,
+			"depth": shape.map_depth,
+			"transform": _encode_variant(xform)["v"],
+			"offset": offset,
+			"count": shape.map_data.size()
+		})
+		data.append_array(shape.map_data.to_byte_array())
+		offset += shape.map_data.size()
+	if shapes.is_empty():
+		return {"error": "No HeightMapShape3D found under " + path}
+	return {"shapes": shapes, "_binary": data, "_binary_key": "heights_base64"}
+
+func _scatter_multimesh(params: Dictionary) -> Dictionary:
+	# One MultiMeshInstance3D for all instances. The client computes placement
+	# and uploads the MultiMesh buffer directly: 12 float32 per instance, the
+	# rows of each 3x4 transform (basis columns interleaved with the origin).
+	var parent_path = params.get("parent_path", ".")
+	var name = params.get("name", "Scatter")
+	var count = int(params.get("count", 0))
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
+	if not parent: return {"error": "Parent not found"}
+	
+	var bytes = params.get("_binary")
+	if bytes == null:
+		bytes = Marshalls.base64_to_raw(params.get("data_base64", ""))
+	var buffer = bytes.to_float32_array()
+	if count <= 0 or buffer.size() != count * 12:
+		return {"error": "Expected %d transforms (12 floats each), got %d floats" % [count, buffer.size()]}
+	
+	var mesh: Mesh = null
+	var material: Material = null
+	var mesh_path = params.get("mesh_path", "")
+	var scene_path = params.get("scene_path", "")
+	if mesh_path != "":
+		mesh = load(mesh_path) as Mesh
+		if not mesh: return {"error": "Not a mesh: " + mesh_path}
+	elif scene_path != "":
+		# MultiMesh draws one mesh: use the scene's first MeshInstance3D
+		var packed = load(scene_path) as PackedScene
+		if not packed: return {"error": "Not a scene: " + scene_path}
+		var instance = packed.instantiate()
+		var stack: Array[Node] = [instance]
+		while not stack.is_empty() and not mesh:
+			var current: Node = stack.pop_front()
+			if current is MeshInstance3D and current.mesh:
+				mesh = current.mesh
+				material = current.material_override
+			stack.append_array(current.get_children())
+		instance.free()
+		if not mesh: return {"error": "No MeshInstance3D in " + scene_path}
+	else:
+		var shape = params.get("primitive", "box")
+		mesh = _shared_primitive_mesh(shape, float(params.get("size", 1.0)))
+		if not mesh: return {"error": "Unknown shape: " + shape + ". Use: box, sphere, cylinder, capsule, plane, prism, torus"}
+		var color = params.get("color", [0.8, 0.8, 0.8])
+		material = _shared_material(Color(color[0], color[1], color[2]))
+	
+	var multimesh = MultiMesh.new()
+	multimesh.transform_format = MultiMesh.TRANSFORM_3D
+	multimesh.mesh = mesh
+	multimesh.instance_count = count
+	multimesh.buffer = buffer
+	
+	var mmi = MultiMeshInstance3D.new()
+	mmi.name = name
+	mmi.multimesh = multimesh
+	if material:
+		mmi.material_override = material
+	mmi.visibility_range_end = float(params.get("visibility_range", 0.0))
+	parent.add_child(mmi)
+	mmi.owner = root
+	
+	return {"result": "Scattered %d instances" % count, "path": str(mmi.get_path()), "aabb": _encode_variant(multimesh.get_aabb())["v"]}
 
 func _create_terrain_material(params: Dictionary) -> Dictionary:
 	var shader_path = params.get("path", "res://terrain_material.gdshader")
@@ -664,6 +2209,21 @@ func _create_particle_effect(params: Dictionary) -> Dictionary:
 	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
 	if not parent: return {"error": "Parent not found"}
 	
+	var setups = {
+		"fire": _setup_fire_particles,
+		"smoke": _setup_smoke_particles,
+		"sparks": _setup_sparks_particles,
+		"explosion": _setup_explosion_particles,
+		"magic": _setup_magic_particles,
+		"rain": _setup_rain_particles,
+		"snow": _setup_snow_particles,
+		"dust": _setup_dust_particles,
+		"leaves": _setup_leaves_particles,
+		"blood": _setup_blood_particles
+	}
+	if not setups.has(preset):
+		return {"error": "Unknown preset: " + preset + ". Use: fire, smoke, sparks, explosion, magic, rain, snow, dust, leaves, blood"}
+	
 	# Create particle node
 	var type_name = "GPUParticles3D" if is_3d else "GPUParticles2D"
 	if not ClassDB.class_exists(type_name):
@@ -674,35 +2234,13 @@ func _create_particle_effect(params: Dictionary) -> Dictionary:
 	parent.add_child(particles)
 	particles.owner = root
 	
-	# Create process material
-	var mat = ParticleProcessMaterial.new()
-	
-	# Apply preset
-	match preset:
-		"fire":
-			_setup_fire_particles(mat, is_3d)
-		"smoke":
-			_setup_smoke_particles(mat, is_3d)
-		"sparks":
-			_setup_sparks_particles(mat, is_3d)
-		"explosion":
-			_setup_explosion_particles(mat, is_3d)
-			one_shot = true
-		"magic":
-			_setup_magic_particles(mat, is_3d)
-		"rain":
-			_setup_rain_particles(mat, is_3d)
-		"snow":
-			_setup_snow_particles(mat, is_3d)
-		"dust":
-			_setup_dust_particles(mat, is_3d)
-		"leaves":
-			_setup_leaves_particles(mat, is_3d)
-		"blood":
-			_setup_blood_particles(mat, is_3d)
-			one_shot = true
-		_:
-			return {"error": "Unknown preset: " + preset + ". Use: fire, smoke, sparks, explosion, magic, rain, snow, dust, leaves, blood"}
+	# Process material, shared by every effect with the same preset
+	var mat = _shared_resource("ParticleProcessMaterial:%s:%s" % [preset, is_3d], func():
+		var preset_mat = ParticleProcessMaterial.new()
+		setups[preset].call(preset_mat, is_3d)
+		return preset_mat)
+	if preset in ["explosion", "blood"]:
+		one_shot = true
 	
 	particles.process_material = mat
 	particles.one_shot = one_shot
@@ -710,9 +2248,10 @@ func _create_particle_effect(params: Dictionary) -> Dictionary:
 	
 	# Create a simple mesh for 3D particles (QuadMesh facing camera)
 	if is_3d:
-		var quad = QuadMesh.new()
-		quad.size = Vector2(0.5, 0.5)
-		particles.draw_pass_1 = quad
+		particles.draw_pass_1 = _shared_resource("QuadMesh:particle", func():
+			var quad = QuadMesh.new()
+			quad.size = Vector2(0.5, 0.5)
+			return quad)
 	
 	return {"result": "Particle effect created", "path": str(particles.get_path()), "preset": preset}
 
@@ -1033,30 +2572,112 @@ func _lighting_preset(params: Dictionary) -> Dictionary:
 	
 	return {"result": "Lighting preset applied", "preset": preset, "light_path": str(light.get_path()), "env_path": str(world_env.get_path())}
 
+#
+# ============ NEW: Shared Resources ============
+#
+
+# Generated meshes, materials and shapes are interned by (type, parameters):
+# every builder asking for a 0.8-grey StandardMaterial3D or a 1m BoxMesh gets
+# the same instance, so scenes save one sub-resource instead of N and the
+# renderer can batch them. With a cache folder set (mcp_bridge/resource_cache_dir
+# or resource_cache configure), each is also saved there as .tres and later
+# loaded from disk, so scenes reference it as an external resource.
+var _resource_cache := {} # key -> {"resource", "type", "bytes", "hits", "path"}
+var _resource_cache_dir := DEFAULT_RESOURCE_CACHE_DIR
+var _resource_requests := 0
+var _resource_hits := 0
+
+func _shared_resource(key: String, make: Callable) -> Resource:
+	_resource_requests += 1
+	var entry = _resource_cache.get(key)
+	if entry:
+		_resource_hits += 1
+		entry["hits"] += 1
+		return entry["resource"]
+	
+	var resource: Resource = null
+	var path = ""
+	if _resource_cache_dir != "":
+		path = _resource_cache_dir.path_join("%s.tres" % key.md5_text())
+		if ResourceLoader.exists(path):
+			resource = load(path)
+	if not resource:
+		resource = make.call()
+		if not resource:
+			return null
+		if path != "":
+			DirAccess.make_dir_recursive_absolute(_resource_cache_dir)
+			if ResourceSaver.save(resource, path, ResourceSaver.FLAG_CHANGE_PATH) == OK:
+				EditorInterface.get_resource_filesystem().update_file(path)
+			else:
+				path = ""
+	_resource_cache[key] = {"resource": resource, "type": resource.get_class(), "bytes": _resource_bytes(resource), "hits": 0, "path": path}
+	return resource
+
+func _resource_bytes(resource: Resource) -> int:
+	# Rough footprint of one copy: vertex/index data for meshes, serialized size otherwise
+	if resource is Mesh:
+		var total = 0
+		for surface in range(resource.get_surface_count()):
+			total += resource.surface_get_array_len(surface) * 32 + resource.surface_get_array_index_len(surface) * 4
+		return total
+	return var_to_bytes_with_objects(resource).size()
+
+func _shared_material(color: Color, properties: Dictionary = {}) -> StandardMaterial3D:
+	return _shared_resource("StandardMaterial3D:%s:%s" % [color.to_html(), var_to_str(properties)], func():
+		var mat = StandardMaterial3D.new()
+		mat.albedo_color = color
+		for prop in properties:
+			mat.set(prop, properties[prop])
+		return mat)
+
+func _shared_primitive_mesh(shape: String, size: float) -> Mesh:
+	return _shared_resource("Mesh:%s:%s" % [shape, size], _primitive_mesh.bind(shape, size))
+
+func _shared_primitive_shape(shape: String, size: float) -> Shape3D:
+	return _shared_resource("Shape:%s:%s" % [shape, size], _primitive_shape.bind(shape, size))
+
+func _resource_cache(params: Dictionary) -> Dictionary:
+	match params.get("action", "report"):
+		"clear":
+			var dropped = _resource_cache.size()
+			_resource_cache.clear()
+			_resource_requests = 0
+			_resource_hits = 0
+			return {"result": "Resource cache cleared", "dropped": dropped}
+		"configure":
+			var dir = str(params.get("dir", ""))
+			if dir != "" and not dir.begins_with("res://"):
+				return {"error": "Cache folder must be under res://"}
+			_resource_cache_dir = dir
+			return {"result": "Shared resources are saved to " + dir if dir != "" else "Shared resources are kept in memory only"}
+		"report":
+			var by_type = {}
+			var saved = 0
+			for key in _resource_cache:
+				var entry = _resource_cache[key]
+				var stats = by_type.get(entry["type"], {"resources": 0, "hits": 0, "bytes_saved": 0})
+				stats["resources"] += 1
+				stats["hits"] += entry["hits"]
+				stats["bytes_saved"] += entry["hits"] * entry["bytes"]
+				by_type[entry["type"]] = stats
+				saved += entry["hits"] * entry["bytes"]
+			return {
+				"resources": _resource_cache.size(),
+				"requests": _resource_requests,
+				"hits": _resource_hits,
+				"hit_rate": float(_resource_hits) / _resource_requests if _resource_requests > 0 else 0.0,
+				"bytes_saved": saved,
+				"cache_dir": _resource_cache_dir,
+				"by_type": by_type
+			}
+	return {"error": "Unknown action. Use: report, clear, configure"}
+
 #
 # ============ NEW: Primitive Mesh Tools ============
 #
 
-func _create_primitive(params: Dictionary) -> Dictionary:
-	var shape = params.get("shape", "box")
-	var parent_path = params.get("parent_path", ".")
-	var name = params.get("name", "Primitive")
-	var size = float(params.get("size", 1.0))
-	var color_str = params.get("color", "0.8,0.8,0.8")
-	var with_collision = bool(params.get("collision", true))  # Default TRUE for game-ready objects
-	
-	var root = _get_actual_editor_root()
-	if not root: return {"error": "No active scene"}
-	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
-	if not parent: return {"error": "Parent not found"}
-	
-	# Parse color
-	var color_parts = color_str.split(",")
-	var color = Color(0.8, 0.8, 0.8)
-	if color_parts.size() >= 3:
-		color = Color(float(color_parts[0]), float(color_parts[1]), float(color_parts[2]))
-	
-	# Create mesh
+func _primitive_mesh(shape: String, size: float) -> Mesh:
 	var mesh: Mesh
 	match shape:
 		"box":
@@ -1093,11 +2714,58 @@ func _create_primitive(params: Dictionary) -> Dictionary:
 			torus.outer_radius = size / 2.0
 			mesh = torus
 		_:
-			return {"error": "Unknown shape: " + shape + ". Use: box, sphere, cylinder, capsule, plane, prism, torus"}
+			return null
+	return mesh
+
+func _primitive_shape(shape: String, size: float) -> Shape3D:
+	# Collision matching _primitive_mesh; null for shapes without a simple one
+	match shape:
+		"box":
+			var box_shape = BoxShape3D.new()
+			box_shape.size = Vector3(size, size, size)
+			return box_shape
+		"sphere":
+			var sphere_shape = SphereShape3D.new()
+			sphere_shape.radius = size / 2.0
+			return sphere_shape
+		"cylinder":
+			var cyl_shape = CylinderShape3D.new()
+			cyl_shape.radius = size / 2.0
+			cyl_shape.height = size
+			return cyl_shape
+		"capsule":
+			var cap_shape = CapsuleShape3D.new()
+			cap_shape.radius = size / 3.0
+			cap_shape.height = size
+			return cap_shape
+	return null
+
+func _create_primitive(params: Dictionary) -> Dictionary:
+	var shape = params.get("shape", "box")
+	var parent_path = params.get("parent_path", ".")
+	var name = params.get("name", "Primitive")
+	var size = float(params.get("size", 1.0))
+	var color_str = params.get("color", "0.8,0.8,0.8")
+	var with_collision = bool(params.get("collision", true))  # Default TRUE for game-ready objects
+	
+	var root = _get_actual_editor_root()
+	if not root: return {"error": "No active scene"}
+	var parent = root.get_node_or_null(parent_path) if parent_path != "." else root
+	if not parent: return {"error": "Parent not found"}
+	
+	# Parse color
+	var color_parts = color_str.split(",")
+	var color = Color(0.8, 0.8, 0.8)
+	if color_parts.size() >= 3:
+		color = Color(float(color_parts[0]), float(color_parts[1]), float(color_parts[2]))
+	
+	# Create mesh (shared with every primitive of the same shape and size)
+	var mesh = _shared_primitive_mesh(shape, size)
+	if not mesh:
+		return {"error": "Unknown shape: " + shape + ". Use: box, sphere, cylinder, capsule, plane, prism, torus"}
 	
 	# Create material
-	var mat = StandardMaterial3D.new()
-	mat.albedo_color = color
+	var mat = _shared_material(color)
 	
 	# Create node structure
 	var result_node: Node3D
@@ -1117,27 +2785,9 @@ func _create_primitive(params: Dictionary) -> Dictionary:
 		
 		var col_shape = CollisionShape3D.new()
 		col_shape.name = "Collision"
-		match shape:
-			"box":
-				var box_shape = BoxShape3D.new()
-				box_shape.size = Vector3(size, size, size)
-				col_shape.shape = box_shape
-			"sphere":
-				var sphere_shape = SphereShape3D.new()
-				sphere_shape.radius = size / 2.0
-				col_shape.shape = sphere_shape
-			"cylinder":
-				var cyl_shape = CylinderShape3D.new()
-				cyl_shape.radius = size / 2.0
-				cyl_shape.height = size
-				col_shape.shape = cyl_shape
-			"capsule":
-				var cap_shape = CapsuleShape3D.new()
-				cap_shape.radius = size / 3.0
-				cap_shape.height = size
-				col_shape.shape = cap_shape
-			_:
-				col_shape.shape = mesh.create_trimesh_shape()
+		col_shape.shape = _shared_resource("Shape:%s:%s" % [shape, size], func():
+			var simple = _primitive_shape(shape, size)
+			return simple if simple else mesh.create_trimesh_shape())
 		body.add_child(col_shape)
 		col_shape.owner = root
 		result_node = body
@@ -1563,7 +3213,9 @@ func _seek_animation(params: Dictionary) -> Dictionary:
 	player.seek(time, update, backwards)
 	return {"result": "Seeked", "time": time}
 
-func _parse_value_like(current, text: String):
+func _parse_value_like(current, text):
+	if _is_encoded_variant(text):
+		return _decode_variant(text)
 	if text == "":
 		return current
 	var t := typeof(current)
@@ -1977,22 +3629,12 @@ func _get_editor_screenshot(_params) -> Dictionary:
 	if not img:
 		return {"error": "Could not capture image"}
 	
-	# Save to temp file
-	var path = "res://.editor_screenshot.png"
-	img.save_png(path)
-	
-	# Convert to base64
-	var file = FileAccess.open(path, FileAccess.READ)
-	if not file:
-		return {"error": "Could not read screenshot"}
-	
-	var bytes = file.get_buffer(file.get_length())
-	var base64 = Marshalls.raw_to_base64(bytes)
+	# Encode in memory; sent as raw binary frames (or base64 to older clients)
+	var png = img.save_png_to_buffer()
+	if png.is_empty():
+		return {"error": "Could not encode screenshot"}
 	
-	# Cleanup
-	DirAccess.remove_absolute(path)
-	
-	return {"image_base64": base64, "format": "png"}
+	return {"_binary": png, "_binary_key": "image_base64", "format": "png", "width": img.get_width(), "height": img.get_height()}
 
 func _get_game_screenshot(_params) -> Dictionary:
 	# This only works when game is running
@@ -2006,31 +3648,51 @@ func _get_game_screenshot(_params) -> Dictionary:
 # ============ NEW: File Search ============
 
 func _search_files(params: Dictionary) -> Dictionary:
-	var query = params.get("query", "").to_lower()
-	var extension = params.get("extension", "")
+	var query = str(params.get("query", "")).to_lower().strip_edges()
+	var extension = str(params.get("extension", ""))
+	var limit = int(params.get("limit", 50))
 	if query == "": return {"error": "Query required"}
-	
+	if extension != "" and not extension.begins_with("."):
+		extension = "." + extension
+	
+	if not _ensure_file_index():
+		return {"error": "Editor is still scanning the project, try again shortly"}
+	
+	# Packed arrays are copy-on-write, so the worker keeps a stable snapshot
+	var paths := _file_paths
+	var paths_lower := _file_paths_lower
+	var names_lower := _file_names_lower
+	var work = func(shared: Dictionary):
+		return _score_files(shared, query.split(" ", false), extension, limit, paths, paths_lower, names_lower)
+	return await _run_as_job("search_files", params, work, func(output): return output)
+
+func _score_files(shared: Dictionary, terms: PackedStringArray, extension: String, limit: int,
+		paths: PackedStringArray, paths_lower: PackedStringArray, names_lower: PackedStringArray):
+	# Runs on a worker thread
+	var scored: Array = []
+	for i in range(paths.size()):
+		if i % 4096 == 0:
+			if _job_cancelled(shared):
+				return null
+			_job_progress(shared, float(i) / paths.size())
+		var path: String = paths[i]
+		if extension != "" and not path.ends_with(extension):
+			continue
+		var score := 0.0
+		for term in terms:
+			var term_score = _fuzzy_score(term, names_lower[i], paths_lower[i])
+			if term_score <= 0.0:
+				score = 0.0
+				break
+			score += term_score
+		if score > 0.0:
+			scored.append([score, path])
+	
+	scored.sort_custom(func(a, b): return a[0] > b[0] if a[0] != b[0] else a[1] < b[1])
 	var results = []
-	_search_files_recursive("res://", query, extension, results)
-	return {"files": results}
-
-func _search_files_recursive(path: String, query: String, ext: String, results: Array):
-	var dir = DirAccess.open(path)
-	if not dir: return
-	
-	dir.list_dir_begin()
-	var file_name = dir.get_next()
-	while file_name != "":
-		if not file_name.begins_with("."):
-			var full_path = path + "/" + file_name if path != "res://" else path + file_name
-			if dir.current_is_dir():
-				_search_files_recursive(full_path, query, ext, results)
-			else:
-				var matches_query = file_name.to_lower().contains(query)
-				var matches_ext = ext == "" or file_name.ends_with(ext)
-				if matches_query and matches_ext:
-					results.append(full_path)
-		file_name = dir.get_next()
+	for i in range(mini(limit, scored.size()) if limit > 0 else scored.size()):
+		results.append(scored[i][1])
+	return {"files": results, "total": scored.size()}
 
 # ============ NEW: UID Conversion ============
 
@@ -2085,7 +3747,7 @@ func _delete_scene(params: Dictionary) -> Dictionary:
 	if FileAccess.file_exists(path + ".import"):
 		DirAccess.remove_absolute(path + ".import")
 	
-	EditorInterface.get_resource_filesystem().scan()
+	EditorInterface.get_resource_filesystem().update_file(path)
 	return {"result": "Deleted " + path}
 
 func _duplicate_scene(params: Dictionary) -> Dictionary:
@@ -2104,12 +3766,20 @@ func _duplicate_scene(params: Dictionary) -> Dictionary:
 		return {"error": "Could not read source scene"}
 	var content = src_file.get_as_text()
 	src_file.close()
+	# The copy needs its own UID, or uid:// references could resolve to either file
+	var header_end = content.find("\n")
+	if header_end > 0:
+		var uid_regex = RegEx.create_from_string("uid=\"uid://[^\"]*\"")
+		var uid = ResourceUID.create_id()
+		var header = uid_regex.sub(content.substr(0, header_end), "uid=\"" + ResourceUID.id_to_text(uid) + "\"")
+		content = header + content.substr(header_end)
+		ResourceUID.add_id(uid, dest_path)
 	var dst_file = FileAccess.open(dest_path, FileAccess.WRITE)
 	if not dst_file:
 		return {"error": "Could not write destination scene"}
 	dst_file.store_string(content)
 	dst_file.close()
-	EditorInterface.get_resource_filesystem().scan()
+	EditorInterface.get_resource_filesystem().update_file(dest_path)
 	return {"result": "Scene duplicated", "path": dest_path}
 
 func _rename_scene(params: Dictionary) -> Dictionary:
@@ -2128,7 +3798,9 @@ func _rename_scene(params: Dictionary) -> Dictionary:
 		return {"error": "Failed to rename scene: " + str(err)}
 	if FileAccess.file_exists(old_path + ".import"):
 		DirAccess.rename_absolute(old_path + ".import", new_path + ".import")
-	EditorInterface.get_resource_filesystem().scan()
+	var fs = EditorInterface.get_resource_filesystem()
+	fs.update_file(old_path)
+	fs.update_file(new_path)
 	return {"result": "Scene renamed", "path": new_path}
 
 func _replace_resource_in_scene(params: Dictionary) -> Dictionary:
@@ -2139,22 +3811,61 @@ func _replace_resource_in_scene(params: Dictionary) -> Dictionary:
 		return {"error": "scene_path, old_resource and new_resource required"}
 	if not FileAccess.file_exists(scene_path):
 		return {"error": "Scene file not found: " + scene_path}
-	var file = FileAccess.open(scene_path, FileAccess.READ)
-	if not file:
-		return {"error": "Could not read scene file"}
-	var content = file.get_as_text()
-	file.close()
-	var count = content.count(old_resource)
-	if count == 0:
-		return {"error": "Old resource not found in scene", "old_resource": old_resource}
-	content = content.replace(old_resource, new_resource)
-	file = FileAccess.open(scene_path, FileAccess.WRITE)
-	if not file:
-		return {"error": "Could not write scene file"}
-	file.store_string(content)
-	file.close()
-	EditorInterface.get_resource_filesystem().scan()
-	return {"result": "Replaced resources", "count": count}
+	# Read, replace and write on a worker; only the rescan happens on the main thread
+	var work = func(_shared: Dictionary):
+		var file = FileAccess.open(scene_path, FileAccess.READ)
+		if not file:
+			return {"error": "Could not read scene file"}
+		var content = file.get_as_text()
+		file.close()
+		var count = content.count(old_resource)
+		if count == 0:
+			return {"error": "Old resource not found in scene", "old_resource": old_resource}
+		content = content.replace(old_resource, new_resource)
+		file = FileAccess.open(scene_path, FileAccess.WRITE)
+		if not file:
+			return {"error": "Could not write scene file"}
+		file.store_string(content)
+		file.close()
+		return {"result": "Replaced resources", "count": count}
+	var finish = func(output):
+		if not output.has("error"):
+			EditorInterface.get_resource_filesystem().update_file(scene_path)
+		return output
+	return await _run_as_job("replace_resource_in_scene", params, work, finish)
+
+#
+# ============ NEW: Targeted Filesystem Updates ============
+#
+
+func _update_files(params: Dictionary) -> Dictionary:
+	# Tell the editor about files changed on disk by the MCP server, one by one,
+	# instead of rescanning the whole project
+	var paths = params.get("paths", [])
+	if typeof(paths) != TYPE_ARRAY or paths.is_empty():
+		return {"error": "paths (non-empty array) required"}
+	var fs = EditorInterface.get_resource_filesystem()
+	var updated = []
+	var removed = []
+	var reloaded = []
+	var open_scenes = EditorInterface.get_open_scenes()
+	for entry in paths:
+		var path = str(entry)
+		fs.update_file(path)  # Also drops files that no longer exist
+		if not FileAccess.file_exists(path):
+			removed.append(path)
+			continue
+		updated.append(path)
+		if not params.get("reload", true):
+			continue
+		if path in open_scenes:
+			EditorInterface.reload_scene_from_path(path)
+			reloaded.append(path)
+		elif ResourceLoader.has_cached(path):
+			# Loaded copies would otherwise keep the old contents
+			ResourceLoader.load(path, "", ResourceLoader.CACHE_MODE_REPLACE)
+			reloaded.append(path)
+	return {"result": "Updated %d file(s)" % updated.size(), "updated": updated, "removed": removed, "reloaded": reloaded}
 
 # ============ NEW: Add Resource ============
 
@@ -2293,30 +4004,25 @@ func _spawn_spinning_pickup(params: Dictionary) -> Dictionary:
 	# Add collision shape (required for Area3D to detect anything!)
 	var col = CollisionShape3D.new()
 	col.name = "CollisionShape3D"
-	var sphere_shape = SphereShape3D.new()
-	sphere_shape.radius = 0.5
-	col.shape = sphere_shape
+	col.shape = _shared_primitive_shape("sphere", 1.0)
 	area.add_child(col)
 	col.owner = root
 	
 	# Add visual mesh
 	var mesh_inst = MeshInstance3D.new()
 	mesh_inst.name = "Mesh"
-	var cylinder = CylinderMesh.new()
-	cylinder.top_radius = 0.3
-	cylinder.bottom_radius = 0.3
-	cylinder.height = 0.1
-	mesh_inst.mesh = cylinder
+	mesh_inst.mesh = _shared_resource("CylinderMesh:coin", func():
+		var cylinder = CylinderMesh.new()
+		cylinder.top_radius = 0.3
+		cylinder.bottom_radius = 0.3
+		cylinder.height = 0.1
+		return cylinder)
 	mesh_inst.rotation_degrees = Vector3(90, 0, 0)  # Lay flat like a coin
 	area.add_child(mesh_inst)
 	mesh_inst.owner = root
 	
 	# Add gold material
-	var mat = StandardMaterial3D.new()
-	mat.albedo_color = Color(1.0, 0.84, 0.0)  # Gold
-	mat.metallic = 0.8
-	mat.roughness = 0.3
-	mesh_inst.material_override = mat
+	mesh_inst.material_override = _shared_material(Color(1.0, 0.84, 0.0), {"metallic": 0.8, "roughness": 0.3})  # Gold
 	
 	# Add spinning animation via AnimationPlayer
 	var anim_player = AnimationPlayer.new()
@@ -2370,32 +4076,9 @@ func _create_trigger_area(params: Dictionary) -> Dictionary:
 	var col = CollisionShape3D.new()
 	col.name = "CollisionShape3D"
 	
-	var shape: Shape3D
-	match shape_type:
-		"box":
-			var box = BoxShape3D.new()
-			box.size = Vector3(size, size, size)
-			shape = box
-		"sphere":
-			var sphere = SphereShape3D.new()
-			sphere.radius = size / 2.0
-			shape = sphere
-		"capsule":
-			var capsule = CapsuleShape3D.new()
-			capsule.radius = size / 3.0
-			capsule.height = size
-			shape = capsule
-		"cylinder":
-			var cyl = CylinderShape3D.new()
-			cyl.radius = size / 2.0
-			cyl.height = size
-			shape = cyl
-		_:
-			var box = BoxShape3D.new()
-			box.size = Vector3(size, size, size)
-			shape = box
-	
-	col.shape = shape
+	if not shape_type in ["box", "sphere", "capsule", "cylinder"]:
+		shape_type = "box"
+	col.shape = _shared_primitive_shape(shape_type, size)
 	area.add_child(col)
 	col.owner = root
 	
@@ -2403,13 +4086,8 @@ func _create_trigger_area(params: Dictionary) -> Dictionary:
 	if show_debug:
 		var mesh_inst = MeshInstance3D.new()
 		mesh_inst.name = "DebugMesh"
-		var debug_mesh = BoxMesh.new()
-		debug_mesh.size = Vector3(size, size, size)
-		mesh_inst.mesh = debug_mesh
-		var mat = StandardMaterial3D.new()
-		mat.albedo_color = Color(0.2, 0.8, 0.2, 0.3)
-		mat.transparency = BaseMaterial3D.TRANSPARENCY_ALPHA
-		mesh_inst.material_override = mat
+		mesh_inst.mesh = _shared_primitive_mesh("box", size)
+		mesh_inst.material_override = _shared_material(Color(0.2, 0.8, 0.2, 0.3), {"transparency": BaseMaterial3D.TRANSPARENCY_ALPHA})
 		area.add_child(mesh_inst)
 		mesh_inst.owner = root
 	
@@ -2447,51 +4125,10 @@ func _create_rigidbody(params: Dictionary) -> Dictionary:
 	var col = CollisionShape3D.new()
 	col.name = "CollisionShape3D"
 	
-	var col_shape: Shape3D
-	var mesh: Mesh
-	
-	match shape_type:
-		"box":
-			var box_shape = BoxShape3D.new()
-			box_shape.size = Vector3(size, size, size)
-			col_shape = box_shape
-			var box_mesh = BoxMesh.new()
-			box_mesh.size = Vector3(size, size, size)
-			mesh = box_mesh
-		"sphere":
-			var sphere_shape = SphereShape3D.new()
-			sphere_shape.radius = size / 2.0
-			col_shape = sphere_shape
-			var sphere_mesh = SphereMesh.new()
-			sphere_mesh.radius = size / 2.0
-			sphere_mesh.height = size
-			mesh = sphere_mesh
-		"capsule":
-			var cap_shape = CapsuleShape3D.new()
-			cap_shape.radius = size / 3.0
-			cap_shape.height = size
-			col_shape = cap_shape
-			var cap_mesh = CapsuleMesh.new()
-			cap_mesh.radius = size / 3.0
-			cap_mesh.height = size
-			mesh = cap_mesh
-		"cylinder":
-			var cyl_shape = CylinderShape3D.new()
-			cyl_shape.radius = size / 2.0
-			cyl_shape.height = size
-			col_shape = cyl_shape
-			var cyl_mesh = CylinderMesh.new()
-			cyl_mesh.top_radius = size / 2.0
-			cyl_mesh.bottom_radius = size / 2.0
-			cyl_mesh.height = size
-			mesh = cyl_mesh
-		_:
-			var box_shape = BoxShape3D.new()
-			box_shape.size = Vector3(size, size, size)
-			col_shape = box_shape
-			var box_mesh = BoxMesh.new()
-			box_mesh.size = Vector3(size, size, size)
-			mesh = box_mesh
+	if not shape_type in ["box", "sphere", "capsule", "cylinder"]:
+		shape_type = "box"
+	var col_shape = _shared_primitive_shape(shape_type, size)
+	var mesh = _shared_primitive_mesh(shape_type, size)
 	
 	col.shape = col_shape
 	body.add_child(col)
@@ -2501,9 +4138,7 @@ func _create_rigidbody(params: Dictionary) -> Dictionary:
 	var mesh_inst = MeshInstance3D.new()
 	mesh_inst.name = "Mesh"
 	mesh_inst.mesh = mesh
-	var mat = StandardMaterial3D.new()
-	mat.albedo_color = color
-	mesh_inst.material_override = mat
+	mesh_inst.material_override = _shared_material(color)
 	body.add_child(mesh_inst)
 	mesh_inst.owner = root
 	
@@ -2924,12 +4559,14 @@ func _get_node_details(params: Dictionary) -> Dictionary:
 	var node = root.get_node_or_null(path) if path != "." else root
 	if not node: return {"error": "Node not found"}
 	
+	# typed: lossless {"$t", "v"} values (see Variant Codec); default is display strings
+	var typed = params.get("typed", false)
 	var props = {}
 	for p in node.get_property_list():
 		# Filter out some internal clutter if desired, but raw is fine for now
 		if p.usage & PROPERTY_USAGE_STORAGE:
 			var val = node.get(p.name)
-			props[p.name] = str(val) # Stringify for JSON safety
+			props[p.name] = _encode_variant(val) if typed else str(val) # Stringify for JSON safety
 			
 	return {"name": node.name, "class": node.get_class(), "properties": props}
 
@@ -2946,9 +4583,20 @@ func _set_property(params: Dictionary) -> Dictionary:
 	var node = root.get_node_or_null(path) if path != "." else root
 	if not node: return {"error": "Node not found"}
 	
-	# Try to guess type from current value
+	_assign_property(node, prop, val)
+	
+	var result = {"result": "Property set", "new_value": str(node.get(prop))}
+	if params.get("typed", false):
+		result["value"] = _encode_variant(node.get(prop))
+	return result
+
+func _assign_property(node: Node, prop: String, val) -> void:
+	# Typed values need no guessing
 	var current = node.get(prop)
-	if current == null:
+	if _is_encoded_variant(val):
+		node.set(prop, _decode_variant(val))
+	# Otherwise try to guess type from current value
+	elif current == null:
 		node.set(prop, val)
 	elif typeof(current) == TYPE_INT:
 		node.set(prop, int(val))
@@ -2992,11 +4640,15 @@ func _set_property(params: Dictionary) -> Dictionary:
 	else:
 		# Fallback
 		node.set(prop, val)
-		
-	return {"result": "Property set", "new_value": str(node.get(prop))}
 
 func _list_dir(params: Dictionary) -> Dictionary:
 	var path = params.get("path", "res://")
+	var key = path.trim_suffix("/") if path != "res://" else path
+	if _ensure_file_index() and not _file_index_dirty and _file_dirs.has(key):
+		return {"files": Array(_file_dirs[key]), "path": path}
+	
+	# Not indexed (outside res://, or created since the last scan), or the index
+	# is stale while the editor rescans: read the disk
 	var dir = DirAccess.open(path)
 	if not dir: return {"error": "Failed to open directory: " + path}
 	
@@ -3079,12 +4731,18 @@ func _instantiate_scene(params: Dictionary) -> Dictionary:
 	
 	return {"result": "Instantiated " + new_node.name}
 
-func _get_scene_tree() -> Dictionary:
+const TREE_QUERY_PARAMS = ["root_path", "max_depth", "type", "group", "fields", "cursor", "page_size"]
+
+func _get_scene_tree(params: Dictionary = {}) -> Dictionary:
 	var root = _get_actual_editor_root()
 	if not root:
 		return {"error": "No active scene"}
 	
-	return {"tree": _serialize_node(root)}
+	_sync_tree_root(root)
+	for key in TREE_QUERY_PARAMS:
+		if params.has(key):
+			return _query_scene_tree(root, params)
+	return {"tree": _serialize_node(root), "revision": _tree_revision}
 
 func _get_actual_editor_root() -> Node:
 	var root = EditorInterface.get_edited_scene_root()
@@ -3144,26 +4802,15 @@ func _execute_script(params: Dictionary) -> Dictionary:
 	var code = params.get("code", "")
 	if code == "":
 		return {"error": "No code provided"}
-
-	# To execute code dynamically in Godot 4, we can use Expression or create a temporary script.
-	# Creating a script is more powerful as it allows multiple lines and context.
-	
-	var script = GDScript.new()
-	script.source_code = "@tool\nextends RefCounted\nfunc eval(editor_interface):\n"
-	
-	# Indent user code
-	var lines = code.replace("\r\n", "\n").split("\n")
-	for line in lines:
-		script.source_code += "\t" + line + "\n"
-		
-	var err = script.reload()
-	if err != OK:
-		return {"error": "Script parse error", "source": script.source_code}
-		
-	var obj = script.new()
-	var result = obj.eval(EditorInterface)
+	var args = params.get("args", {})
+	if not args is Dictionary:
+		return {"error": "args must be an object"}
 	
-	return {"result": str(result)}
+	var compiled = _compile_snippet(code)
+	if compiled.has("error"):
+		return compiled
+	var result = compiled["instance"].eval(EditorInterface, args)
+	return {"result": str(result), "cached": compiled["cached"]}
 
 func _file_exists(params: Dictionary) -> Dictionary:
 	var path = params.get("path", "")
@@ -3215,7 +4862,7 @@ func _move_node(params: Dictionary) -> Dictionary:
 func _set_shader_param(params: Dictionary) -> Dictionary:
 	var path = params.get("path", "")
 	var param = params.get("param", "")
-	var value_str = str(params.get("value", ""))
+	var raw_value = params.get("value", "")
 	
 	var root = EditorInterface.get_edited_scene_root()
 	if not root: return {"error": "No scene open"}
@@ -3242,10 +4889,10 @@ func _set_shader_param(params: Dictionary) -> Dictionary:
 	if not mat is ShaderMaterial:
 		return {"error": "Material is not a ShaderMaterial"}
 		
-	var val = _parse_shader_value(value_str)
+	var val = _decode_variant(raw_value) if _is_encoded_variant(raw_value) else _parse_shader_value(str(raw_value))
 	mat.set_shader_parameter(param, val)
 	
-	return {"result": "Set " + param + " to " + value_str}
+	return {"result": "Set " + param + " to " + str(val)}
 
 func _parse_shader_value(s: String):
 	if s == "true": return true
@@ -3263,12 +4910,14 @@ func _write_binary_file(params: Dictionary) -> Dictionary:
 	var content_b64 = params.get("content_base64", "")
 	
 	if path == "": return {"error": "Path required"}
-	if content_b64 == "": return {"error": "Content required"}
 	
-	# Decode Base64 to PackedByteArray
-	var bytes = Marshalls.base64_to_raw(content_b64)
+	# Raw bytes arrive via binary frames; older clients send base64
+	var bytes = params.get("_binary")
 	if bytes == null:
-		return {"error": "Invalid base64 content"}
+		if content_b64 == "": return {"error": "Content required"}
+		bytes = Marshalls.base64_to_raw(content_b64)
+		if bytes == null:
+			return {"error": "Invalid base64 content"}
 		
 	var file = FileAccess.open(path, FileAccess.WRITE)
 	if not file:
@@ -0,0 +1,92 @@
+"""
+Benchmark: per-call sockets vs. the pooled persistent connection.
+
+Runs against the in-memory bridge from mock_bridge.py, which speaks the same
+protocol as server.gd, so no Godot editor is needed:
+
+    python bench_connection.py --calls 5000
+
+Use --live to hit a real editor on GODOT_HOST:GODOT_PORT instead of the mock.
+"""
+import argparse
+import json
+import os
+import socket
+import time
+
+from godot_client import GodotConnection, GodotConnectionPool
+from mock_bridge import MockBridge
+
+GODOT_HOST = os.environ.get("GODOT_HOST", "127.0.0.1")
+GODOT_PORT = int(os.environ.get("GODOT_PORT", "42069"))
+
+
+def send_per_call(host: str, port: int, method: str, params: dict = None) -> dict:
+    """The original send_to_godot: one socket per command."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(5)
+        s.connect((host, port))
+        payload = {"method": method, "params": params or {}}
+        s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        buffer = ""
+        while True:
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            buffer += chunk.decode("utf-8")
+            if "\n" in buffer:
+                break
+        return json.loads(buffer.strip())
+
+
+def _run(label: str, fn, rounds: int, per_round: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - start
+    calls = rounds * per_round
+    rate = calls / elapsed
+    print(f"{label:<10} {calls:>7} calls  {elapsed:8.3f}s  {rate:10.1f} calls/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--frame-ms", type=float, default=0.0,
+                        help="Simulated per-command delay in the mock bridge")
+    parser.add_argument("--pipeline", type=int, default=32,
+                        help="Requests in flight per round trip for the pipelined run")
+    parser.add_argument("--protocol", type=int, default=2, choices=(1, 2),
+                        help="Protocol version the mock bridge advertises")
+    parser.add_argument("--no-framing", action="store_true",
+                        help="Stay on newline-delimited JSON instead of length-prefixed frames")
+    parser.add_argument("--live", action="store_true", help="Benchmark a running Godot editor")
+    args = parser.parse_args()
+
+    bridge = None
+    if args.live:
+        host, port = GODOT_HOST, GODOT_PORT
+    else:
+        bridge = MockBridge(port=0, latency={"default": args.frame_ms / 1000.0}, protocol=args.protocol)
+        host, port = bridge.start()
+
+    pool = GodotConnectionPool(host, port, size=1, framing=not args.no_framing)
+    conn = GodotConnection(host, port, framing=not args.no_framing)
+    try:
+        per_call = _run("per-call", lambda: send_per_call(host, port, "ping"), args.calls)
+        pooled = _run("pooled", lambda: pool.call("ping"), args.calls)
+        batch = [("ping", {})] * args.pipeline
+        rounds = max(1, args.calls // args.pipeline)
+        pipelined = _run("pipelined", lambda: conn.call_many(batch), rounds, args.pipeline)
+        print(f"pooled speedup     {pooled / per_call:.1f}x")
+        print(f"pipelined speedup  {pipelined / per_call:.1f}x  ({args.pipeline} in flight)")
+    finally:
+        pool.close()
+        conn.close()
+        if bridge:
+            bridge.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+End-to-end benchmark of the MCP tools in server.py, run against mock_bridge.py.
+
+The mock bridge is started in a subprocess (so its work doesn't share this
+process's GIL or allocation counts) and server.py is pointed at it with
+GODOT_PORT. Each workload then calls the @mcp.tool() functions directly, the
+way an MCP client's requests would, and reports ops/sec, p50/p99 latency per
+tool call and memory allocated during the run (tracemalloc, in a second pass
+so tracing doesn't skew the timings). No Godot editor or GPU is needed:
+
+    python benchmark.py                              # every workload
+    python benchmark.py --nodes 1000 --latency-ms 1 build_scene tree_queries
+    python benchmark.py --json results.json          # machine-readable, for CI
+
+Exits non-zero if any tool call returned an error.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GROUPS = 10  # Nodes are spread under this many parents
+
+
+def _percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Run:
+    """Latency samples and error count for one workload pass."""
+
+    def __init__(self):
+        self.latencies = []
+        self.items = 0
+        self.errors = []
+        self.first_started = None
+        self.last_finished = None
+
+    @property
+    def wall(self) -> float:
+        """Seconds from the first timed call to the last one (setup excluded)."""
+        if self.first_started is None:
+            return 0.0
+        return self.last_finished - self.first_started
+
+    async def call(self, tool, *args, items: int = 1, **kwargs) -> str:
+        started = time.perf_counter()
+        if self.first_started is None:
+            self.first_started = started
+        result = await tool(*args, **kwargs)
+        self.last_finished = time.perf_counter()
+        self.latencies.append((self.last_finished - started) * 1000.0)
+        self.items += items
+        if isinstance(result, str) and result.startswith("Error"):
+            self.errors.append(f"{tool.__name__}: {result}")
+        return result
+
+
+async def _gather_limited(coros: list, limit: int):
+    """Await coroutines with at most `limit` running at once (like concurrent MCP requests)."""
+    slots = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with slots:
+            return await coro
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def _new_scene(server):
+    result = await server.godot_new_scene("Node3D", "Bench")
+    if result.startswith("Error"):
+        raise RuntimeError(result)
+
+
+async def _populate(server, nodes: int):
+    """A GROUPS x (nodes / GROUPS) scene of MeshInstance3Ds in group "props", built with batches."""
+    await _new_scene(server)
+    steps = [{"method": "add_node", "params": {"type": "Node3D", "name": f"Group{g}"}} for g in range(GROUPS)]
+    for i in range(nodes):
+        parent = f"Group{i % GROUPS}"
+        steps.append({"method": "add_node", "params": {"type": "MeshInstance3D", "name": f"Mesh{i}", "parent_path": parent}})
+        steps.append({"method": "add_to_group", "params": {"path": f"{parent}/Mesh{i}", "group": "props"}})
+    for start in range(0, len(steps), 500):
+        result = await server.godot_batch(json.dumps(steps[start:start + 500]))
+        if result.startswith("Error") or json.loads(result)["errors"]:
+            raise RuntimeError(f"Could not build the benchmark scene: {result[:200]}")
+
+
+# Each workload sets up its own scene, then times its tool calls in `run`
+
+async def build_scene(server, args, run: Run):
+    """Add every node with its own godot_add_node call."""
+    await _new_scene(server)
+    for g in range(GROUPS):
+        await run.call(server.godot_add_node, "Node3D", f"Group{g}")
+    await _gather_limited([run.call(server.godot_add_node, "MeshInstance3D", f"Mesh{i}", f"Group{i % GROUPS}")
+                           for i in range(args.nodes)], args.concurrency)
+
+
+async def build_scene_batch(server, args, run: Run):
+    """The same scene through godot_batch, 100 nodes per call."""
+    await _new_scene(server)
+    steps = [{"method": "add_node", "params": {"type": "Node3D", "name": f"Group{g}"}} for g in range(GROUPS)]
+    steps += [{"method": "add_node", "params": {"type": "MeshInstance3D", "name": f"Mesh{i}", "parent_path": f"Group{i % GROUPS}"}}
+              for i in range(args.nodes)]
+    for start in range(0, len(steps), 100):
+        chunk = steps[start:start + 100]
+        await run.call(server.godot_batch, json.dumps(chunk), items=len(chunk))
+
+
+async def bulk_property_edit(server, args, run: Run):
+    """Move every node in group "props" with one godot_set_properties call per round."""
+    await _populate(server, args.nodes)
+    for r in range(args.repeat):
+        positions = [f"{i % 32},{r},{i // 32}" for i in range(args.nodes)]
+        await run.call(server.godot_set_properties, columns=json.dumps({"position": positions}), group="props",
+                       items=args.nodes)
+        await run.call(server.godot_get_properties, "position,visible", group="props", items=args.nodes)
+
+
+async def property_edit_per_node(server, args, run: Run):
+    """The same edit as bulk_property_edit, one godot_set_property call per node."""
+    await _populate(server, args.nodes)
+    await _gather_limited([run.call(server.godot_set_property, f"Group{i % GROUPS}/Mesh{i}", "position", f"{i % 32},0,{i // 32}")
+                           for i in range(args.nodes)], args.concurrency)
+
+
+async def tree_queries(server, args, run: Run):
+    """Repeated full-tree reads (served from the synced mirror), a few edits in between."""
+    await _populate(server, args.nodes)
+    for r in range(args.repeat * 10):
+        await run.call(server.godot_get_scene_tree, items=args.nodes)
+        if r % 10 == 9:
+            await server.godot_add_node("Node3D", f"Extra{r}", "Group0")
+
+
+async def tree_queries_paged(server, args, run: Run):
+    """Filtered, paged listings of every MeshInstance3D, following next_cursor."""
+    await _populate(server, args.nodes)
+    for _ in range(args.repeat):
+        cursor = ""
+        while True:
+            result = await run.call(server.godot_get_scene_tree, type="MeshInstance3D", fields="path,position",
+                                    cursor=cursor, page_size=200)
+            if result.startswith("Error"):
+                break
+            page = json.loads(result)
+            run.items += page["count"] - 1
+            cursor = page.get("next_cursor") or ""
+            if not cursor:
+                break
+
+
+WORKLOADS = {fn.__name__: fn for fn in (
+    build_scene, build_scene_batch, bulk_property_edit, property_edit_per_node, tree_queries, tree_queries_paged,
+)}
+
+
+async def measure(server, name: str, args) -> dict:
+    workload = WORKLOADS[name]
+    server._metrics.reset()
+    run = Run()
+    await workload(server, args, run)
+    wall = run.wall
+    result = {
+        "workload": name,
+        "description": workload.__doc__.strip(),
+        "ops": len(run.latencies),
+        "items": run.items,
+        "ops_per_sec": round(len(run.latencies) / wall, 1) if wall else 0.0,
+        "items_per_sec": round(run.items / wall, 1) if wall else 0.0,
+        "p50_ms": round(_percentile(run.latencies, 0.50), 3),
+        "p99_ms": round(_percentile(run.latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(run.latencies), 3) if run.latencies else 0.0,
+        "errors": len(run.errors),
+        "bridge_calls": server._metrics.snapshot()["methods"],
+    }
+    if run.errors:
+        result["first_error"] = run.errors[0]
+
+    if args.alloc:
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        alloc_run = Run()
+        await workload(server, args, alloc_run)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_peak_kib"] = round((peak - before) / 1024.0, 1)
+        result["alloc_retained_kib"] = round((current - before) / 1024.0, 1)
+        result["alloc_per_op_kib"] = round((peak - before) / 1024.0 / max(1, len(alloc_run.latencies)), 2)
+    return result
+
+
+def start_mock(args) -> tuple:
+    """Start mock_bridge.py in a subprocess; returns (process, port)."""
+    cmd = [sys.executable, os.path.join(HERE, "mock_bridge.py"), "--port", "0",
+           "--latency-ms", str(args.latency_ms), "--jitter", str(args.jitter)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Mock bridge listening on"):
+        proc.kill()
+        raise RuntimeError(f"Mock bridge failed to start: {line!r}")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workloads", nargs="*", metavar="WORKLOAD",
+                        help="Workloads to run (default all): " + ", ".join(WORKLOADS))
+    parser.add_argument("--nodes", type=int, default=1000, help="Scene size")
+    parser.add_argument("--repeat", type=int, default=10, help="Rounds for the edit / query workloads")
+    parser.add_argument("--concurrency", type=int, default=8, help="Tool calls in flight for per-node workloads")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated bridge execution time per command")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra bridge latency, as a fraction")
+    parser.add_argument("--no-alloc", dest="alloc", action="store_false", help="Skip the tracemalloc pass")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)}")
+
+    proc, port = start_mock(args)
+    try:
+        os.environ["GODOT_PORT"] = str(port)
+        sys.path.insert(0, HERE)
+        import server  # Reads GODOT_PORT on import
+
+        async def run_all():
+            return [await measure(server, name, args) for name in (args.workloads or WORKLOADS)]
+        results = asyncio.run(run_all())
+    finally:
+        proc.terminate()
+        proc.wait(5)
+
+    print(f"{'workload':<24} {'ops':>6} {'ops/s':>9} {'items/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9} {'errors':>6}")
+    for r in results:
+        print(f"{r['workload']:<24} {r['ops']:>6} {r['ops_per_sec']:>9.1f} {r['items_per_sec']:>10.1f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r.get('alloc_peak_kib', 0):>9.1f} {r['errors']:>6}")
+        if r.get("first_error"):
+            print(f"    {r['first_error']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"nodes": args.nodes, "repeat": args.repeat, "concurrency": args.concurrency,
+                       "latency_ms": args.latency_ms, "results": results}, f, indent=2)
+    sys.exit(1 if any(r["errors"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Record bridge traffic to a trace file and replay it against a bridge.
+
+With GODOT_TRACE_FILE set, server.py appends every bridge call it makes to
+that file: method, params, the reply, when the call started and how long the
+round trip took. The file is gzip-compressed JSON Lines, one record per call,
+written append-only (each MCP server run adds a gzip member that starts with
+a session header), so it survives crashes and can be concatenated. Raw bytes
+(uploads, screenshots) are stored as {"$bytes": base64}.
+
+Replaying re-issues a session's calls against a real editor or mock_bridge.py,
+either at the original pace or as fast as the bridge allows, and compares
+each reply with the recorded one:
+
+    python command_trace.py stats session.jsonl.gz
+    python command_trace.py replay session.jsonl.gz --speed max --diff
+    python command_trace.py replay session.jsonl.gz --mock --speed 1
+
+Replay keeps the recorded ordering: a call is only sent once every call that
+had finished before it originally started has been answered, so dependent
+commands (add a node, then set its properties) stay in order while calls that
+overlapped in the recording overlap again.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+from godot_client import AsyncGodotConnection
+
+TRACE_VERSION = 1
+FLUSH_INTERVAL = 1.0  # Seconds between gzip sync flushes while recording
+
+# Reply keys that differ between runs by nature
+VOLATILE_KEYS = {"id", "_timing", "_sent_bytes", "_received_bytes", "elapsed_ms", "job_id"}
+
+
+def _to_json(value):
+    """Make params/replies JSON-safe: bytes become {"$bytes": base64}."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$bytes": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and "$bytes" in value:
+            return base64.b64decode(value["$bytes"])
+        return {k: _from_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_json(v) for v in value]
+    return value
+
+
+class TraceWriter:
+    """Appends call records to a .jsonl.gz trace; safe to use from several threads."""
+
+    def __init__(self, path: str, **session):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "ab")
+        self._t0 = time.perf_counter()
+        self._last_flush = self._t0
+        self._write({"trace": TRACE_VERSION, "started": time.time(), **session})
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    def record(self, method: str, params: dict, response: dict, started: float, round_trip_ms: float,
+               timing: dict = None):
+        """`started` is the call's time.perf_counter() start."""
+        record = {
+            "t": round(started - self._t0, 6),
+            "rt_ms": round(round_trip_ms, 3),
+            "method": method,
+            "params": _to_json(params or {}),
+            "response": _to_json(response),
+        }
+        if timing:
+            record["timing"] = timing
+        with self._lock:
+            if self._file is None:
+                return
+            self._write(record)
+            now = time.perf_counter()
+            if now - self._last_flush >= FLUSH_INTERVAL:
+                self._file.flush()  # Sync flush: everything so far is readable after a crash
+                self._last_flush = now
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_sessions(path: str) -> list:
+    """The trace's sessions, each a (header, [call records]) pair, in file order."""
+    sessions = []
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn last line of a crashed run
+                if "trace" in record:
+                    sessions.append((record, []))
+                elif sessions:
+                    record["params"] = _from_json(record.get("params", {}))
+                    record["response"] = _from_json(record.get("response", {}))
+                    sessions[-1][1].append(record)
+        except EOFError:
+            pass  # Unfinished gzip member: keep what was flushed
+    return sessions
+
+
+def diff(expected, actual, path: str = "", ignore: set = VOLATILE_KEYS, limit: int = 20) -> list:
+    """Human-readable differences between a recorded and a replayed reply."""
+    out = []
+
+    def walk(a, b, where):
+        if len(out) >= limit:
+            return
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in sorted(set(a) | set(b), key=str):
+                if key in ignore:
+                    continue
+                if key not in b:
+                    out.append(f"{where}{key}: missing (expected {_short(a[key])})")
+                elif key not in a:
+                    out.append(f"{where}{key}: unexpected {_short(b[key])}")
+                else:
+                    walk(a[key], b[key], f"{where}{key}.")
+        elif isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                out.append(f"{where.rstrip('.')}: {len(a)} items expected, got {len(b)}")
+            for i, (x, y) in enumerate(zip(a, b)):
+                walk(x, y, f"{where}{i}.")
+        elif isinstance(a, float) or isinstance(b, float):
+            if not (isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-9)):
+                out.append(f"{where.rstrip('.')}: expected {_short(a)}, got {_short(b)}")
+        elif a != b:
+            out.append(f"{where.rstrip('.')}: expected {_short(a)}, got {_short(b)}")
+
+    walk(expected, actual, path)
+    return out
+
+
+def _short(value, width: int = 60) -> str:
+    text = json.dumps(_to_json(value))
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+async def replay(records: list, connection: AsyncGodotConnection, speed: float = 1.0,
+                 compare: bool = True, ignore: set = VOLATILE_KEYS, timeout: float = 30.0) -> list:
+    """
+    Re-issue recorded calls. speed 1.0 keeps the original pace, 2.0 doubles it,
+    0 sends each call as soon as its predecessors allow. Returns one result per
+    record: {"method", "rt_ms" (recorded), "replay_ms", "diff"} (or "error").
+    """
+    records = sorted(records, key=lambda r: r["t"])
+    results = [None] * len(records)
+    started = time.perf_counter()
+    t_first = records[0]["t"] if records else 0.0
+    waiting = []  # (recorded end time, task) of calls sent but not yet known to be answered
+
+    async def send(i, record):
+        sent = time.perf_counter()
+        try:
+            response = await connection.call(record["method"], record["params"], timeout=timeout)
+        except Exception as e:  # Timeouts and dropped connections are results too
+            results[i] = {"method": record["method"], "rt_ms": record["rt_ms"],
+                          "replay_ms": (time.perf_counter() - sent) * 1000.0, "error": f"{type(e).__name__}: {e}"}
+            return
+        result = {"method": record["method"], "rt_ms": record["rt_ms"], "replay_ms": (time.perf_counter() - sent) * 1000.0}
+        if compare:
+            result["diff"] = diff(record["response"], response, ignore=ignore)
+        results[i] = result
+
+    for i, record in enumerate(records):
+        # Calls that had finished before this one started must be answered first
+        ready = [task for end, task in waiting if end <= record["t"]]
+        if ready:
+            await asyncio.gather(*ready)
+            waiting = [(end, task) for end, task in waiting if end > record["t"]]
+        if speed > 0:
+            delay = started + (record["t"] - t_first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        task = asyncio.create_task(send(i, record))
+        waiting.append((record["t"] + record["rt_ms"] / 1000.0, task))
+    await asyncio.gather(*(task for _, task in waiting))
+    return results
+
+
+def _percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(results: list) -> dict:
+    """Per-method recorded vs replayed latency, mismatches and errors."""
+    by_method = {}
+    for r in results:
+        by_method.setdefault(r["method"], []).append(r)
+    summary = {}
+    for method, rows in sorted(by_method.items(), key=lambda kv: -sum(r["replay_ms"] for r in kv[1])):
+        recorded = [r["rt_ms"] for r in rows]
+        replayed = [r["replay_ms"] for r in rows]
+        summary[method] = {
+            "calls": len(rows),
+            "recorded_p50_ms": round(_percentile(recorded, 0.5), 3),
+            "replay_p50_ms": round(_percentile(replayed, 0.5), 3),
+            "recorded_p99_ms": round(_percentile(recorded, 0.99), 3),
+            "replay_p99_ms": round(_percentile(replayed, 0.99), 3),
+            "mismatches": sum(1 for r in rows if r.get("diff")),
+            "errors": sum(1 for r in rows if "error" in r),
+        }
+    return summary
+
+
+def _print_table(summary: dict, recorded_label: str = "recorded"):
+    print(f"{'method':<28} {'calls':>6} {recorded_label + ' p50':>13} {'replay p50':>11} "
+          f"{recorded_label + ' p99':>13} {'replay p99':>11} {'diffs':>6} {'errors':>6}")
+    for method, s in summary.items():
+        print(f"{method:<28} {s['calls']:>6} {s['recorded_p50_ms']:>13.3f} {s['replay_p50_ms']:>11.3f} "
+              f"{s['recorded_p99_ms']:>13.3f} {s['replay_p99_ms']:>11.3f} {s['mismatches']:>6} {s['errors']:>6}")
+
+
+def _select_session(sessions: list, index: int):
+    if not sessions:
+        sys.exit("Trace has no sessions")
+    try:
+        return sessions[index]
+    except IndexError:
+        sys.exit(f"Trace has {len(sessions)} session(s); --session {index} is out of range")
+
+
+def _cmd_stats(args):
+    sessions = read_sessions(args.trace)
+    for n, (header, records) in enumerate(sessions):
+        span = (records[-1]["t"] + records[-1]["rt_ms"] / 1000.0) if records else 0.0
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(header.get("started", 0)))
+        print(f"session {n}: started {started}, {len(records)} calls over {span:.1f}s")
+        by_method = {}
+        for r in records:
+            by_method.setdefault(r["method"], []).append(r["rt_ms"])
+        for method, times in sorted(by_method.items(), key=lambda kv: -sum(kv[1])):
+            print(f"    {method:<28} {len(times):>6} calls  p50 {_percentile(times, 0.5):9.3f} ms  "
+                  f"p99 {_percentile(times, 0.99):9.3f} ms  total {sum(times) / 1000.0:8.2f} s")
+
+
+def _cmd_replay(args):
+    header, records = _select_session(read_sessions(args.trace), args.session)
+    if args.methods:
+        keep = set(args.methods.split(","))
+        records = [r for r in records if r["method"] in keep]
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+    ignore = VOLATILE_KEYS | set(filter(None, args.ignore.split(",")))
+
+    bridge = None
+    host, port = args.host, args.port
+    if args.mock:
+        from mock_bridge import MockBridge
+        bridge = MockBridge(port=0)
+        host, port = bridge.start()
+
+    async def run():
+        connection = AsyncGodotConnection(host, port)
+        try:
+            started = time.perf_counter()
+            results = await replay(records, connection, speed, args.diff, ignore, args.timeout)
+            return results, time.perf_counter() - started
+        finally:
+            connection.close()
+
+    try:
+        results, elapsed = asyncio.run(run())
+    finally:
+        if bridge:
+            bridge.stop()
+
+    summary = summarize(results)
+    recorded_span = (records[-1]["t"] - records[0]["t"] + records[-1]["rt_ms"] / 1000.0) if records else 0.0
+    print(f"Replayed {len(results)} calls in {elapsed:.2f}s (recorded: {recorded_span:.2f}s)"
+          f"{', ' + format(len(results) / elapsed, '.1f') + ' calls/s' if elapsed else ''}")
+    _print_table(summary)
+    if args.diff:
+        shown = 0
+        for record, result in zip(sorted(records, key=lambda r: r["t"]), results):
+            if result.get("diff") and shown < args.show:
+                shown += 1
+                print(f"\n{record['method']} {json.dumps(_to_json(record['params']))[:120]}")
+                for line in result["diff"]:
+                    print(f"    {line}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_s": elapsed, "recorded_s": recorded_span, "speed": args.speed,
+                       "summary": summary}, f, indent=2)
+    failed = any(s["errors"] for s in summary.values()) or (args.diff and any(s["mismatches"] for s in summary.values()))
+    sys.exit(1 if failed else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stats = sub.add_parser("stats", help="Summarize a trace")
+    stats.add_argument("trace")
+    stats.set_defaults(func=_cmd_stats)
+
+    rep = sub.add_parser("replay", help="Re-issue a trace against a bridge")
+    rep.add_argument("trace")
+    rep.add_argument("--session", type=int, default=-1, help="Session to replay (default: the last)")
+    rep.add_argument("--host", default=os.environ.get("GODOT_HOST", "127.0.0.1"))
+    rep.add_argument("--port", type=int, default=int(os.environ.get("GODOT_PORT", "42069")))
+    rep.add_argument("--mock", action="store_true", help="Replay against an in-process mock_bridge.py")
+    rep.add_argument("--speed", default="1", help='Pace multiplier (1 = as recorded) or "max"')
+    rep.add_argument("--methods", default="", help="Only replay these methods (comma-separated)")
+    rep.add_argument("--diff", action="store_true", help="Compare replies with the recorded ones")
+    rep.add_argument("--ignore", default="", help="Extra reply keys to leave out of the comparison")
+    rep.add_argument("--show", type=int, default=10, help="Differing calls to print")
+    rep.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for each reply")
+    rep.add_argument("--json", metavar="PATH", help="Also write the summary as JSON")
+    rep.set_defaults(func=_cmd_replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Dependency graph of the project's resources, kept up to date incrementally.
+
+Edges come from the references Godot itself follows:
+
+    .tscn / .tres          [ext_resource] entries (path and uid)
+    .gd                    preload() / load() / ResourceLoader.load() and
+                           extends "res://..." with a literal path or uid
+    .gdshader(inc)         #include "res://..."
+    project.godot          quoted res:// / uid:// values (main scene, autoloads)
+
+Each file's own UID (its header, .uid sidecar or .import file) is indexed too,
+so references by UID resolve to paths the way Godot resolves them: UID first,
+path as the fallback.
+
+The graph is saved to .godot/mcp_dependencies.json in the project. refresh()
+walks the project and only re-reads files whose mtime or size changed, and
+only re-parses those whose content hash changed; update() re-indexes given
+files without a walk. dependencies() and dependents() then just follow the
+stored forward and reverse edges.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import refactor
+import tscn
+
+GRAPH_VERSION = 1
+CACHE_FILE = os.path.join(".godot", "mcp_dependencies.json")
+SOURCE_EXTENSIONS = (".tscn", ".tres", ".gd", ".gdshader", ".gdshaderinc")
+
+_SCRIPT_REF = re.compile(
+    r'''(?:\b(?:preload|load|ResourceLoader\.load|ResourceLoader\.load_threaded_request)\s*\(\s*|^\s*extends\s+)(["'])([^"'\n]+)\1''',
+    re.M)
+_INCLUDE_REF = re.compile(r'''^\s*#include\s+"([^"\n]+)"''', re.M)
+_SETTING_REF = re.compile(r'''"\*?((?:res|uid)://[^"\n]+)"''')  # "*res://" marks an autoload singleton
+
+
+def _is_source(name: str) -> bool:
+    return name.endswith(SOURCE_EXTENSIONS) or name.rsplit("/", 1)[-1] in refactor.TEXT_FILES
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _absolute(ref: str, source: str) -> str:
+    """Resolve a reference relative to the file it appears in (res:// and uid:// pass through)."""
+    if ref.startswith(("res://", "uid://")):
+        return ref
+    directory = source.rsplit("/", 1)[0]
+    parts = []
+    for part in f"{directory}/{ref}"[len("res://"):].split("/"):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part not in ("", "."):
+            parts.append(part)
+    return "res://" + "/".join(parts)
+
+
+def extract(res: str, text: str) -> tuple:
+    """(own uid, [[path, uid], ...]) for one source file's contents."""
+    if res.endswith((".tscn", ".tres")):
+        f = tscn.parse(text)
+        own_uid = f.header.attr("uid", "") if f.sections else ""
+        deps = [[_absolute(s.attr("path", ""), res) if s.attr("path") else "", s.attr("uid", "")]
+                for s in f.ext_resources]
+        return own_uid, deps
+    if res.endswith(".gd"):
+        refs = _SCRIPT_REF.findall(text)
+    else:
+        pattern = _INCLUDE_REF if res.endswith(SOURCE_EXTENSIONS) else _SETTING_REF
+        refs = [("", r) for r in pattern.findall(text)]
+    deps = []
+    for _, ref in refs:
+        ref = _absolute(ref, res)
+        deps.append(["", ref] if ref.startswith("uid://") else [ref, ""])
+    return "", deps
+
+
+class DependencyGraph:
+    """Forward and reverse resource edges for one project folder; thread-safe."""
+
+    def __init__(self, root: str, cache_path: str = None):
+        self.root = os.path.realpath(root)
+        self.cache_path = cache_path or os.path.join(self.root, CACHE_FILE)
+        self._lock = threading.Lock()
+        self._files = {}  # res path -> {"mtime", "size", "hash", "uid", "deps"}
+        self._uids = {}  # uid -> res path (sources and imported / sidecar-uid files)
+        self._sidecars = {}  # res path of a .uid / .import file -> (mtime, size, uid)
+        self._dependents = None  # target res path -> set of sources, rebuilt on demand
+        self.refreshed = 0.0
+        self._load()
+
+    # -- persistence ---------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != GRAPH_VERSION or data.get("root") != self.root:
+            return
+        self._files = data.get("files", {})
+        self._sidecars = {k: tuple(v) for k, v in data.get("sidecars", {}).items()}
+        self._rebuild_uids()
+
+    def save(self):
+        with self._lock:
+            data = {"version": GRAPH_VERSION, "root": self.root, "files": self._files,
+                    "sidecars": {k: list(v) for k, v in self._sidecars.items()}}
+        directory = os.path.dirname(self.cache_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".deps-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # -- indexing ------------------------------------------------------------
+
+    def _rebuild_uids(self):
+        uids = {}
+        for sidecar, (_, _, uid) in self._sidecars.items():
+            if uid:
+                uids[uid] = sidecar.rsplit(".", 1)[0]  # res://a.png.import -> res://a.png
+        for res, entry in self._files.items():
+            if entry.get("uid"):
+                uids[entry["uid"]] = res
+        self._uids = uids
+        self._dependents = None
+
+    def _walk(self):
+        """(res path, local path, stat) of every source and sidecar file."""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith(".") and entry.name not in refactor.SKIP_DIRS:
+                        stack.append(entry.path)
+                elif _is_source(entry.name) or entry.name.endswith((".uid", ".import")):
+                    res = "res://" + os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                    yield res, entry.path, entry.stat()
+
+    def _index(self, res: str, local: str, st) -> bool:
+        """Re-read one file if it changed; returns True if its edges or uid did."""
+        if res.endswith((".uid", ".import")):
+            old = self._sidecars.get(res)
+            if old and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+                return False
+            uid = refactor.read_uid(local[:-len(".uid")]) if res.endswith(".uid") else \
+                refactor.read_uid(local[:-len(".import")])
+            self._sidecars[res] = (st.st_mtime_ns, st.st_size, uid)
+            return not old or old[2] != uid
+        entry = self._files.get(res)
+        if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return False
+        with open(local, "rb") as f:
+            data = f.read()
+        digest = _hash(data)
+        if entry and entry["hash"] == digest:
+            entry["mtime"], entry["size"] = st.st_mtime_ns, st.st_size  # Touched, not changed
+            return False
+        try:
+            uid, deps = extract(res, data.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            uid, deps = "", []  # Unreadable: no edges rather than a failed refresh
+        self._files[res] = {"mtime": st.st_mtime_ns, "size": st.st_size, "hash": digest, "uid": uid, "deps": deps}
+        return True
+
+    def refresh(self) -> dict:
+        """Bring the graph up to date with the project folder."""
+        started = time.perf_counter()
+        changed = 0
+        with self._lock:
+            seen_files, seen_sidecars = set(), set()
+            for res, local, st in self._walk():
+                (seen_sidecars if res.endswith((".uid", ".import")) else seen_files).add(res)
+                try:
+                    changed += self._index(res, local, st)
+                except OSError:
+                    continue
+            removed = [r for r in self._files if r not in seen_files]
+            removed += [r for r in self._sidecars if r not in seen_sidecars]
+            for res in removed:
+                self._files.pop(res, None)
+                self._sidecars.pop(res, None)
+            if changed or removed:
+                self._rebuild_uids()
+            self.refreshed = time.time()
+        if changed or removed:
+            try:
+                self.save()
+            except OSError:
+                pass  # A read-only project still gets answers, just no cache
+        return {"files": len(self._files), "changed": changed, "removed": len(removed),
+                "ms": round((time.perf_counter() - started) * 1000.0, 1)}
+
+    def update(self, paths: list):
+        """Re-index just these files (e.g. after the MCP server wrote or removed them)."""
+        with self._lock:
+            for res in paths:
+                local = os.path.join(self.root, *res[len("res://"):].split("/"))
+                targets = [(res, local)] + [(res + ext, local + ext) for ext in (".uid", ".import")]
+                for r, l in targets:
+                    try:
+                        st = os.stat(l)
+                    except OSError:
+                        self._files.pop(r, None)
+                        self._sidecars.pop(r, None)
+                        continue
+                    if _is_source(r) or r.endswith((".uid", ".import")):
+                        self._index(r, l, st)
+            self._rebuild_uids()
+
+    # -- queries -------------------------------------------------------------
+
+    def resolve(self, ref: str) -> str:
+        """res:// path for a path or uid:// reference ("" for an unknown uid)."""
+        if ref.startswith("uid://"):
+            return self._uids.get(ref, "")
+        return ref
+
+    def uid_of(self, res: str) -> str:
+        """UID of an indexed file ("" if it has none or isn't known)."""
+        entry = self._files.get(res)
+        if entry and entry["uid"]:
+            return entry["uid"]
+        for sidecar in (res + ".uid", res + ".import"):
+            if sidecar in self._sidecars:
+                return self._sidecars[sidecar][2]
+        return ""
+
+    def _target(self, dep: list) -> str:
+        path, uid = dep
+        return (self._uids.get(uid) if uid else None) or path
+
+    def _reverse(self) -> dict:
+        if self._dependents is None:
+            dependents = {}
+            for source, entry in self._files.items():
+                for dep in entry["deps"]:
+                    target = self._target(dep)
+                    if target:
+                        dependents.setdefault(target, set()).add(source)
+            self._dependents = dependents
+        return self._dependents
+
+    def exists(self, res: str) -> bool:
+        return os.path.exists(os.path.join(self.root, *res[len("res://"):].split("/")))
+
+    def dependencies(self, ref: str, recursive: bool = False) -> list:
+        """What `ref` loads: [{"path", "uid", "via", "missing"}], breadth-first when recursive."""
+        with self._lock:
+            start = self.resolve(ref)
+            out, seen, queue = [], {start}, [start]
+            while queue:
+                source = queue.pop(0)
+                for dep in self._files.get(source, {}).get("deps", []):
+                    target = self._target(dep)
+                    if not target or target in seen:
+                        if not target:
+                            out.append({"path": "", "uid": dep[1], "via": source, "missing": True})
+                        continue
+                    seen.add(target)
+                    out.append({"path": target, "uid": dep[1], "via": source, "missing": not self.exists(target)})
+                    if recursive:
+                        queue.append(target)
+            return out
+
+    def dependents(self, ref: str, recursive: bool = False) -> list:
+        """Files that load `ref` (directly, or through others when recursive)."""
+        with self._lock:
+            start = self.resolve(ref)
+            reverse = self._reverse()
+            out, seen, queue = [], {start}, [start]
+            while queue:
+                for source in sorted(reverse.get(queue.pop(0), ())):
+                    if source not in seen:
+                        seen.add(source)
+                        out.append(source)
+                        if recursive:
+                            queue.append(source)
+            return out
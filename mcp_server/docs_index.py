@@ -0,0 +1,348 @@
+"""
+Offline index of the Godot class reference for godot_docs / godot_docs_search.
+
+Built once from the engine's XML class reference, either the doc/classes folder
+of a Godot source checkout or the output of `godot --doctool`:
+
+    python docs_index.py build path/to/godot/doc/classes
+    python docs_index.py build --godot /path/to/godot      # runs --doctool for you
+
+and written as one gzip-compressed JSON file (GODOT_DOCS_INDEX, defaulting to
+godot_docs_index.json.gz next to this file). At runtime class lookups are a
+dict hit, full-text search goes through an inverted index stored in the same
+file, and rendered class summaries are kept in an LRU cache.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from difflib import get_close_matches
+from functools import lru_cache
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.environ.get(
+    "GODOT_DOCS_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "godot_docs_index.json.gz"))
+RENDER_CACHE_SIZE = 256
+
+# Search weights per field a term appears in
+NAME_WEIGHT = 8.0
+BRIEF_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has if in into is it its of on or that the this to "
+    "was when which will with you your".split())
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+[A-Za-z]?")
+
+
+def tokenize(text: str) -> list:
+    """Lowercase words, with CamelCase and snake_case names also split into parts."""
+    tokens = []
+    for word in _WORD_RE.findall(text.replace("_", " ")):
+        lower = word.lower()
+        if lower not in _STOPWORDS and len(lower) > 1:
+            tokens.append(lower)
+        parts = _CAMEL_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) > 1 and p.lower() not in _STOPWORDS)
+    return tokens
+
+
+# ============ BBCode Cleanup ============
+
+_CODEBLOCKS_RE = re.compile(r"\[codeblocks\](.*?)\[/codeblocks\]", re.S)
+_GDSCRIPT_RE = re.compile(r"\[gdscript\](.*?)\[/gdscript\]", re.S)
+_CODEBLOCK_RE = re.compile(r"\[codeblock[^\]]*\](.*?)\[/codeblock\]", re.S)
+_REF_RE = re.compile(r"\[(?:member|method|signal|constant|enum|param|annotation|theme_item|constructor|operator) ([^\]]+)\]")
+_CODE_RE = re.compile(r"\[code\](.*?)\[/code\]", re.S)
+_URL_RE = re.compile(r"\[url=([^\]]+)\](.*?)\[/url\]", re.S)
+_CLASS_REF_RE = re.compile(r"\[([A-Z@][A-Za-z0-9_]*)\]")
+_TAG_RE = re.compile(r"\[/?(?:b|i|u|s|kbd|center|color[^\]]*|font[^\]]*|br|lb|rb)\]")
+
+
+def clean_bbcode(text: str) -> str:
+    """Turn the class reference's BBCode into plain text with `code` spans."""
+    if not text:
+        return ""
+    text = _CODEBLOCKS_RE.sub(lambda m: "\n".join(_GDSCRIPT_RE.findall(m.group(1))), text)
+    text = _CODEBLOCK_RE.sub(lambda m: m.group(1), text)
+    text = _REF_RE.sub(r"`\1`", text)
+    text = _CODE_RE.sub(r"`\1`", text)
+    text = _URL_RE.sub(r"\2 (\1)", text)
+    text = _CLASS_REF_RE.sub(r"\1", text)
+    text = _TAG_RE.sub("", text)
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return "\n".join(lines)
+
+
+# ============ Building ============
+
+def _params_signature(element) -> str:
+    params = []
+    for param in sorted(element.findall("param"), key=lambda p: int(p.get("index", 0))):
+        text = f"{param.get('name')}: {param.get('type')}"
+        if param.get("default") is not None:
+            text += f" = {param.get('default')}"
+        params.append(text)
+    return ", ".join(params)
+
+
+def parse_class_xml(path: str):
+    """Parse one class reference XML file into the index's class record (None if not a class)."""
+    root = ET.parse(path).getroot()
+    if root.tag != "class":
+        return None
+    record = {
+        "name": root.get("name"),
+        "inherits": root.get("inherits", ""),
+        "brief": clean_bbcode(root.findtext("brief_description", "")),
+        "description": clean_bbcode(root.findtext("description", "")),
+        "members": [],
+        "methods": [],
+        "signals": [],
+        "constants": [],
+    }
+    for member in root.iterfind("members/member"):
+        record["members"].append([member.get("name"), member.get("type", ""), member.get("default", ""),
+                                  clean_bbcode(member.text or "")])
+    for method in root.iterfind("methods/method"):
+        ret = method.find("return")
+        signature = f"{method.get('name')}({_params_signature(method)})"
+        if method.get("qualifiers"):
+            signature += " " + method.get("qualifiers")
+        record["methods"].append([method.get("name"), ret.get("type", "void") if ret is not None else "void",
+                                  signature, clean_bbcode(method.findtext("description", ""))])
+    for signal in root.iterfind("signals/signal"):
+        record["signals"].append([signal.get("name"), f"{signal.get('name')}({_params_signature(signal)})",
+                                  clean_bbcode(signal.findtext("description", ""))])
+    for constant in root.iterfind("constants/constant"):
+        record["constants"].append([constant.get("name"), constant.get("value", ""), constant.get("enum", ""),
+                                    clean_bbcode(constant.text or "")])
+    return record
+
+
+def _entries(record: dict):
+    """Yield (doc_id, kind, title, [(text, weight), ...]) for a class and each of its members."""
+    name = record["name"]
+    yield name, "class", name, [(name, NAME_WEIGHT), (record["brief"], BRIEF_WEIGHT),
+                                (record["description"], TEXT_WEIGHT)]
+    for prop, prop_type, _default, desc in record["members"]:
+        yield f"{name}.{prop}", "property", f"{name}.{prop} ({prop_type})", [(prop, NAME_WEIGHT), (desc, TEXT_WEIGHT)]
+    for method, ret, signature, desc in record["methods"]:
+        yield f"{name}.{method}()", "method", f"{name}.{signature} -> {ret}", [(method, NAME_WEIGHT), (desc, TEXT_WEIGHT)]
+    for signal, signature, desc in record["signals"]:
+        yield f"{name}.{signal}", "signal", f"{name}.{signature} (signal)", [(signal, NAME_WEIGHT), (desc, TEXT_WEIGHT)]
+
+
+def build_index(xml_dirs: list, godot_version: str = "") -> dict:
+    """Parse every class XML under xml_dirs and return the index as a JSON-ready dict."""
+    classes = {}
+    for xml_dir in xml_dirs:
+        for dirpath, _dirnames, filenames in os.walk(xml_dir):
+            for filename in sorted(filenames):
+                if filename.endswith(".xml"):
+                    record = parse_class_xml(os.path.join(dirpath, filename))
+                    if record:
+                        classes[record["name"].lower()] = record
+
+    docs = []
+    postings = defaultdict(list)  # term -> flat [doc, weight, doc, weight, ...]
+    for key in sorted(classes):
+        for doc_id, kind, title, fields in _entries(classes[key]):
+            weights = defaultdict(float)
+            for text, weight in fields:
+                for token in tokenize(text):
+                    weights[token] += weight
+            doc = len(docs)
+            docs.append([doc_id, kind, title])
+            for token, weight in weights.items():
+                postings[token].extend((doc, round(1.0 + math.log(weight), 3)))
+
+    return {"version": INDEX_VERSION, "godot_version": godot_version, "classes": classes,
+            "docs": docs, "postings": postings}
+
+
+def write_index(index: dict, path: str):
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def run_doctool(godot_bin: str, out_dir: str) -> str:
+    """Dump the class reference of `godot_bin` into out_dir and return the Godot version."""
+    subprocess.run([godot_bin, "--headless", "--doctool", out_dir], check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    version = subprocess.run([godot_bin, "--version"], capture_output=True, text=True)
+    return version.stdout.strip()
+
+
+# ============ Lookup ============
+
+class DocsIndex:
+    """Loaded index: O(1) class lookup, inverted-index search, LRU-cached rendering."""
+
+    def __init__(self, data: dict):
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported docs index version {data.get('version')}; rebuild it")
+        self.godot_version = data.get("godot_version", "")
+        self.classes = data["classes"]
+        self.docs = data["docs"]
+        self.postings = data["postings"]
+        self.render_class = lru_cache(maxsize=RENDER_CACHE_SIZE)(self._render_class)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def get_class(self, class_name: str):
+        return self.classes.get(class_name.lower().replace(" ", ""))
+
+    def suggest(self, class_name: str, n: int = 5) -> list:
+        matches = get_close_matches(class_name.lower().replace(" ", ""), self.classes.keys(), n=n, cutoff=0.6)
+        return [self.classes[m]["name"] for m in matches]
+
+    def _render_class(self, class_name: str):
+        record = self.get_class(class_name)
+        if record is None:
+            return None
+        name = record["name"]
+        result = [f"# {name} - Godot Documentation" + (f" ({self.godot_version})" if self.godot_version else "")]
+        result.append("Source: local class reference index\n")
+
+        chain = []
+        parent = record["inherits"]
+        while parent:
+            chain.append(parent)
+            parent = self.classes.get(parent.lower(), {}).get("inherits", "")
+        if chain:
+            result.append(f"**Inherits: {' < '.join(chain)}**\n")
+
+        description = record["description"] or record["brief"]
+        if description:
+            result.append("## Description")
+            result.append(description[:1000] + "...\n" if len(description) > 1000 else description + "\n")
+
+        if record["members"]:
+            result.append("## Key Properties")
+            for prop, prop_type, default, _desc in record["members"][:10]:
+                result.append(f"- `{prop}` ({prop_type})" + (f" = {default}" if default else ""))
+            if len(record["members"]) > 10:
+                result.append(f"- ... {len(record['members']) - 10} more")
+            result.append("")
+
+        if record["methods"]:
+            result.append("## Key Methods")
+            for _method, ret, signature, _desc in record["methods"][:15]:
+                result.append(f"- `{signature}` → {ret}")
+            if len(record["methods"]) > 15:
+                result.append(f"- ... {len(record['methods']) - 15} more")
+            result.append("")
+
+        if record["signals"]:
+            result.append("## Signals")
+            for _signal, signature, _desc in record["signals"][:8]:
+                result.append(f"- `{signature}`")
+            result.append("")
+
+        return "\n".join(result)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Return up to `limit` (doc_id, kind, title) entries ranked by tf-idf over the query terms."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        total = len(self.docs)
+        scores = defaultdict(float)
+        matched = defaultdict(int)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + total / (len(postings) // 2))
+            for i in range(0, len(postings), 2):
+                scores[postings[i]] += postings[i + 1] * idf
+                matched[postings[i]] += 1
+        # Documents matching more of the query terms always rank first
+        ranked = sorted(scores, key=lambda d: (matched[d], scores[d]), reverse=True)[:limit]
+        return [tuple(self.docs[d]) for d in ranked]
+
+    def describe(self, doc_id: str) -> str:
+        """Short description for a search hit."""
+        class_name, _, member = doc_id.partition(".")
+        record = self.get_class(class_name)
+        if record is None:
+            return ""
+        if not member:
+            return record["brief"]
+        member = member.rstrip("()")
+        for entry in record["members"]:
+            if entry[0] == member:
+                return entry[3]
+        for entry in record["methods"]:
+            if entry[0] == member:
+                return entry[3]
+        for entry in record["signals"]:
+            if entry[0] == member:
+                return entry[2]
+        return ""
+
+
+_loaded = None
+
+
+def load_default():
+    """The index at DEFAULT_INDEX_PATH, loaded once; None if it hasn't been built."""
+    global _loaded
+    if _loaded is None:
+        if not os.path.exists(DEFAULT_INDEX_PATH):
+            return None
+        _loaded = DocsIndex.load(DEFAULT_INDEX_PATH)
+    return _loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the index from class reference XML")
+    build.add_argument("xml_dirs", nargs="*", help="Folders containing class XML (searched recursively)")
+    build.add_argument("--godot", help="Godot binary to run --doctool with instead of passing folders")
+    build.add_argument("--version", default="", help="Godot version label stored in the index")
+    build.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH)
+    query = sub.add_parser("search", help="Search a built index")
+    query.add_argument("query")
+    query.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == "search":
+        index = DocsIndex.load(args.index)
+        for doc_id, kind, title in index.search(args.query):
+            print(f"{kind:<9} {title}")
+        return
+
+    if args.godot:
+        with tempfile.TemporaryDirectory() as out_dir:
+            version = run_doctool(args.godot, out_dir)
+            index = build_index([out_dir], args.version or version)
+    elif args.xml_dirs:
+        index = build_index(args.xml_dirs, args.version)
+    else:
+        parser.error("pass class reference folders or --godot")
+    if not index["classes"]:
+        sys.exit("No class reference XML found")
+    write_index(index, args.output)
+    print(f"Indexed {len(index['classes'])} classes, {len(index['docs'])} entries -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,677 @@
+"""
+Client-side connection handling for the Godot MCP Bridge plugin.
+
+The bridge (godot_project/addons/mcp_bridge/server.gd) speaks newline-delimited
+JSON over TCP. Instead of opening a fresh socket for every call, clients keep
+long-lived connections that are health-checked with `ping` after sitting idle
+and transparently re-established when Godot restarts or the plugin is
+reloaded. GodotConnection / GodotConnectionPool are the blocking API for
+scripts (bench_connection.py uses them); the MCP tools use
+AsyncGodotConnection below.
+
+Wire protocol versions:
+    1: one bare {"method", "params"} line in, one reply line out, strictly in
+       order. This is all that older plugins understand.
+    2: every request carries an integer "id" that the bridge echoes back, so
+       many requests can be in flight on one socket and replies may arrive in
+       any order. Negotiated with a `hello` command right after connecting;
+       a bridge that answers "Unknown method" is treated as version 1.
+
+The same `hello` can switch the socket from newline-delimited JSON to
+length-prefixed frames (FRAME_HEADER below), which lets large replies such as
+scene files or screenshots be read in one pass without scanning for newlines.
+Framed connections can also carry raw bytes (FRAME_BINARY) next to a JSON
+message, so screenshots and file uploads skip base64 entirely: a message whose
+params or reply contain "binary_size" is followed by that many bytes in binary
+frames tagged with its request id. Callers pass bytes as params["_binary"] and
+get them back as reply["binary"].
+
+Every reply also records how big the exchange was: reply["_sent_bytes"] and
+reply["_received_bytes"] count the JSON body plus any binary payload, for the
+caller's metrics (see metrics.py).
+
+AsyncGodotConnection is the asyncio flavour used by the MCP tools: on protocol
+2 it multiplexes any number of concurrent calls over one socket, matching
+replies to callers by id.
+"""
+import asyncio
+import base64
+import json
+import socket
+import struct
+import threading
+import time
+
+DEFAULT_TIMEOUT = 5.0       # Seconds to wait for connect / reply
+IDLE_PING_AFTER = 15.0      # Seconds a socket may sit idle before we ping it
+RECV_SIZE = 65536
+PROTOCOL_VERSION = 2
+
+# Length-prefixed framing (negotiated in `hello`): little-endian u32 payload
+# length, one kind byte, then the payload.
+FRAME_HEADER = struct.Struct("<IB")
+FRAME_JSON = 0
+FRAME_BINARY = 1            # Payload: u32 request id, then raw bytes
+BINARY_ID = struct.Struct("<I")
+BINARY_CHUNK_SIZE = 1024 * 1024
+MAX_FRAME_SIZE = 512 * 1024 * 1024
+
+# Keys added to every reply with the request/response size in bytes
+SENT_BYTES = "_sent_bytes"
+RECEIVED_BYTES = "_received_bytes"
+
+
+class GodotConnectionError(ConnectionError):
+    """Raised when the bridge can't be reached or drops the connection."""
+
+
+def _hello_params(framing: bool) -> dict:
+    params = {"protocol": PROTOCOL_VERSION}
+    if framing:
+        params["framing"] = "length"
+        params["binary"] = True
+    return params
+
+
+def _split_binary(payload: dict, binary_ok: bool):
+    """
+    Take raw bytes out of payload["params"]["_binary"]. Returns the payload to
+    JSON-encode (announcing binary_size) and the bytes to send after it, or,
+    if the socket can't carry binary frames, the payload with the bytes inlined
+    as base64 under params["_binary_fallback"] (default "data_base64").
+    """
+    params = payload.get("params")
+    if not params or "_binary" not in params:
+        return payload, None
+    params = dict(params)
+    data = params.pop("_binary")
+    fallback_key = params.pop("_binary_fallback", "data_base64")
+    if binary_ok and "id" in payload and len(data):
+        params["binary_size"] = len(data)
+        return {**payload, "params": params}, memoryview(data).cast("B")
+    params[fallback_key] = base64.b64encode(data).decode("ascii")
+    return {**payload, "params": params}, None
+
+
+class _StreamReader:
+    """
+    Buffered socket reader for both newline-delimited and length-prefixed
+    messages. Bytes are received with recv_into into one reusable bytearray,
+    newline searches resume where the previous one stopped, and large frame
+    payloads are received straight into an exactly-sized buffer.
+    """
+
+    def __init__(self, sock: socket.socket, size: int = RECV_SIZE):
+        self._sock = sock
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        self._start = 0   # First unread byte
+        self._end = 0     # End of received data
+
+    def _recv_more(self):
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buf):
+            if self._start:
+                # Move the unread tail to the front
+                tail = bytes(self._view[self._start:self._end])
+                self._buf[:len(tail)] = tail
+                self._start, self._end = 0, len(tail)
+            else:
+                # A single line longer than the buffer: grow it
+                self._view.release()
+                self._buf += bytes(len(self._buf))
+                self._view = memoryview(self._buf)
+        got = self._sock.recv_into(self._view[self._end:])
+        if not got:
+            raise GodotConnectionError("Connection closed by Godot")
+        self._end += got
+
+    def read_line(self) -> bytes:
+        scanned = 0
+        while True:
+            idx = self._buf.find(b"\n", self._start + scanned, self._end)
+            if idx != -1:
+                line = bytes(self._view[self._start:idx])
+                self._start = idx + 1
+                return line
+            scanned = self._end - self._start
+            self._recv_more()
+
+    def read_frame(self):
+        """Return (kind, payload) for the next length-prefixed frame."""
+        while self._end - self._start < FRAME_HEADER.size:
+            self._recv_more()
+        length, kind = FRAME_HEADER.unpack_from(self._buf, self._start)
+        if length > MAX_FRAME_SIZE:
+            raise GodotConnectionError(f"Frame too large ({length} bytes)")
+        self._start += FRAME_HEADER.size
+        buffered = self._end - self._start
+        if length <= buffered:
+            payload = bytes(self._view[self._start:self._start + length])
+            self._start += length
+            return kind, payload
+
+        payload = bytearray(length)
+        view = memoryview(payload)
+        view[:buffered] = self._view[self._start:self._end]
+        self._start = self._end = 0
+        got = buffered
+        while got < length:
+            n = self._sock.recv_into(view[got:])
+            if not n:
+                raise GodotConnectionError("Connection closed by Godot")
+            got += n
+        view.release()
+        return kind, payload
+
+    def read_binary_into(self, dest: memoryview) -> int:
+        """
+        Read the next binary frame's data straight into `dest` and return its
+        length, without an intermediate copy for anything not already buffered.
+        """
+        while self._end - self._start < FRAME_HEADER.size + BINARY_ID.size:
+            self._recv_more()
+        length, kind = FRAME_HEADER.unpack_from(self._buf, self._start)
+        if kind != FRAME_BINARY:
+            raise GodotConnectionError(f"Expected a binary frame, got kind {kind}")
+        size = length - BINARY_ID.size
+        if size > len(dest):
+            raise GodotConnectionError("Binary data longer than announced")
+        self._start += FRAME_HEADER.size + BINARY_ID.size
+
+        buffered = min(size, self._end - self._start)
+        dest[:buffered] = self._view[self._start:self._start + buffered]
+        self._start += buffered
+        got = buffered
+        while got < size:
+            n = self._sock.recv_into(dest[got:size])
+            if not n:
+                raise GodotConnectionError("Connection closed by Godot")
+            got += n
+        return size
+
+
+class GodotConnection:
+    """A single persistent TCP connection to the bridge."""
+
+    def __init__(self, host: str, port: int, timeout: float = DEFAULT_TIMEOUT, framing: bool = True):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.use_framing = framing
+        self._sock = None
+        self._reader = None
+        self._last_used = 0.0
+        self._next_id = 0
+        self.protocol = 1
+        self.framing = "line"
+        self.binary = False
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self):
+        """Open the socket (no-op if already connected)."""
+        if self._sock is not None:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = _StreamReader(sock)
+        self._last_used = time.monotonic()
+        try:
+            self._handshake()
+        except BaseException:
+            self.close()
+            raise
+
+    def _handshake(self):
+        """Negotiate protocol and framing, falling back to 1 / lines for old plugins."""
+        self.protocol = 1
+        self.framing = "line"
+        self.binary = False
+        reply = self._send_v1("hello", _hello_params(self.use_framing))
+        if "error" not in reply:
+            self.protocol = min(int(reply.get("protocol", 1)), PROTOCOL_VERSION)
+            if reply.get("framing") == "length":
+                self.framing = "length"
+                self.binary = bool(reply.get("binary"))
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _write_messages(self, payloads: list) -> list:
+        """Send the payloads; returns the size in bytes of each one."""
+        out = bytearray()
+        sizes = []
+        for payload in payloads:
+            payload, binary = _split_binary(payload, self.binary)
+            body = json.dumps(payload).encode("utf-8")
+            sizes.append(len(body) + (len(binary) if binary is not None else 0))
+            if self.framing == "line":
+                out += body
+                out += b"\n"
+            elif len(body) < RECV_SIZE:
+                out += FRAME_HEADER.pack(len(body), FRAME_JSON)
+                out += body
+            else:
+                # Big payloads go out as-is rather than being copied into `out`
+                out += FRAME_HEADER.pack(len(body), FRAME_JSON)
+                self._sock.sendall(out)
+                self._sock.sendall(body)
+                out = bytearray()
+            if binary is not None:
+                rid = BINARY_ID.pack(payload["id"])
+                for offset in range(0, len(binary), BINARY_CHUNK_SIZE):
+                    chunk = binary[offset:offset + BINARY_CHUNK_SIZE]
+                    out += FRAME_HEADER.pack(BINARY_ID.size + len(chunk), FRAME_BINARY)
+                    out += rid
+                    self._sock.sendall(out)
+                    self._sock.sendall(chunk)
+                    out = bytearray()
+        if out:
+            self._sock.sendall(out)
+        return sizes
+
+    def _read_message(self):
+        """Read the next reply, or None for a blank line."""
+        if self.framing == "length":
+            while True:
+                kind, payload = self._reader.read_frame()
+                if kind == FRAME_JSON:
+                    reply = json.loads(payload)
+                    reply[RECEIVED_BYTES] = len(payload)
+                    if "binary_size" in reply:
+                        reply["binary"] = self._read_binary(int(reply.pop("binary_size")))
+                        reply[RECEIVED_BYTES] += len(reply["binary"])
+                    return reply
+        line = self._reader.read_line()
+        if not line.strip():
+            return None
+        reply = json.loads(line)
+        reply[RECEIVED_BYTES] = len(line)
+        return reply
+
+    def _read_binary(self, size: int) -> bytearray:
+        data = bytearray(size)
+        view = memoryview(data)
+        got = 0
+        while got < size:
+            got += self._reader.read_binary_into(view[got:])
+        view.release()
+        return data
+
+    def _send_v1(self, method: str, params: dict) -> dict:
+        sizes = self._write_messages([{"method": method, "params": params or {}}])
+        reply = self._read_message()
+        self._last_used = time.monotonic()
+        if reply is None:
+            return {"error": "Empty response from Godot"}
+        reply[SENT_BYTES] = sizes[0]
+        return reply
+
+    def _send_pipelined(self, commands: list) -> list:
+        """Write every request at once, then collect the replies by id."""
+        ids = []
+        payloads = []
+        for method, params in commands:
+            self._next_id += 1
+            ids.append(self._next_id)
+            payloads.append({"id": self._next_id, "method": method, "params": params or {}})
+        sizes = self._write_messages(payloads)
+
+        pending = set(ids)
+        replies = {}
+        while pending:
+            reply = self._read_message()
+            if reply is None:
+                continue
+            rid = reply.pop("id", None)
+            if isinstance(rid, float):
+                rid = int(rid)  # Godot's JSON parser hands numbers back as floats
+            if rid in pending:
+                replies[rid] = reply
+                pending.discard(rid)
+            # Anything else is a late reply to a request that already timed out
+        self._last_used = time.monotonic()
+        for i, size in zip(ids, sizes):
+            replies[i][SENT_BYTES] = size
+        return [replies[i] for i in ids]
+
+    def _roundtrip_many(self, commands: list, timeout: float = None) -> list:
+        self._sock.settimeout(timeout or self.timeout)
+        if self.protocol >= 2:
+            return self._send_pipelined(commands)
+        return [self._send_v1(method, params) for method, params in commands]
+
+    def _roundtrip(self, method: str, params: dict) -> dict:
+        return self._roundtrip_many([(method, params)])[0]
+
+    def ping(self) -> bool:
+        """Return True if the bridge answers `ping` on this socket."""
+        try:
+            return self._roundtrip("ping", {}).get("result") == "pong"
+        except (OSError, ValueError):
+            return False
+
+    def ensure_alive(self):
+        """Connect if needed, and ping sockets that have been idle a while."""
+        if self._sock is None:
+            self.connect()
+            return
+        if time.monotonic() - self._last_used > IDLE_PING_AFTER and not self.ping():
+            self.close()
+            self.connect()
+
+    def call(self, method: str, params: dict = None, timeout: float = None) -> dict:
+        """Send one command and wait for its reply."""
+        return self.call_many([(method, params)], timeout)[0]
+
+    def call_many(self, commands: list, timeout: float = None) -> list:
+        """
+        Send a list of (method, params) commands and return their replies in
+        the same order. On protocol 2 they are pipelined on the socket; on
+        protocol 1 they go one at a time. `timeout` overrides the connection's
+        reply timeout for this call.
+
+        A reused socket that turns out to be dead (Godot restarted, plugin
+        reloaded) is reconnected once and the commands resent. Failures on a
+        freshly opened socket, and timeouts, are raised to the caller.
+        """
+        reused = self._sock is not None
+        self.ensure_alive()
+        try:
+            return self._roundtrip_many(commands, timeout)
+        except socket.timeout:
+            # The command may still be running in the editor; don't resend it
+            self.close()
+            raise
+        except (OSError, GodotConnectionError):
+            self.close()
+            if not reused:
+                raise
+        self.connect()
+        try:
+            return self._roundtrip_many(commands, timeout)
+        except (OSError, GodotConnectionError):
+            self.close()
+            raise
+
+
+class GodotConnectionPool:
+    """
+    A small pool of GodotConnection objects shared by all MCP tools.
+
+    Each call borrows an idle connection (or opens a new one while under
+    `size`), and returns it afterwards. Connections that fail are dropped
+    rather than returned to the pool.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 4, timeout: float = DEFAULT_TIMEOUT,
+                 framing: bool = True):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.framing = framing
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _acquire(self) -> GodotConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise GodotConnectionError("Timed out waiting for a free Godot connection")
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return GodotConnection(self.host, self.port, self.timeout, self.framing)
+
+    def _release(self, conn: GodotConnection):
+        if conn.connected:
+            with self._lock:
+                self._idle.append(conn)
+        self._slots.release()
+
+    def call(self, method: str, params: dict = None, timeout: float = None) -> dict:
+        conn = self._acquire()
+        try:
+            return conn.call(method, params, timeout)
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class AsyncGodotConnection:
+    """
+    asyncio counterpart of GodotConnection, built on asyncio.open_connection.
+
+    On protocol 2 a background task reads replies and resolves the waiting
+    callers by id, so concurrent tool calls share one socket without waiting
+    for each other. Older (protocol 1) plugins answer strictly in order, so
+    calls take turns on the socket.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = DEFAULT_TIMEOUT, framing: bool = True):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.use_framing = framing
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending = {}
+        self._next_id = 0
+        self._connect_lock = asyncio.Lock()
+        self._turn_lock = asyncio.Lock()   # Serializes calls on protocol 1
+        self.protocol = 1
+        self.framing = "line"
+        self.binary = False
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def connect(self):
+        """Open the socket and negotiate the protocol (no-op if already connected)."""
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, limit=MAX_FRAME_SIZE), self.timeout)
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reader, self._writer = reader, writer
+            try:
+                await asyncio.wait_for(self._handshake(), self.timeout)
+            except BaseException:
+                self.close()
+                raise
+            if self.protocol >= 2:
+                self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _handshake(self):
+        self.protocol = 1
+        self.framing = "line"
+        self.binary = False
+        await self._write_messages([{"method": "hello", "params": _hello_params(self.use_framing)}])
+        reply = await self._read_message()
+        if reply and "error" not in reply:
+            self.protocol = min(int(reply.get("protocol", 1)), PROTOCOL_VERSION)
+            if reply.get("framing") == "length":
+                self.framing = "length"
+                self.binary = bool(reply.get("binary"))
+
+    def close(self, error: Exception = None):
+        task, self._read_task = self._read_task, None
+        if task is not None:
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error or GodotConnectionError("Connection closed"))
+
+    async def _write_messages(self, payloads: list) -> list:
+        """Send the payloads; returns the size in bytes of each one."""
+        if self._writer is None:
+            raise GodotConnectionError("Connection closed")
+        chunks = []
+        sizes = []
+        for payload in payloads:
+            payload, binary = _split_binary(payload, self.binary)
+            body = json.dumps(payload).encode("utf-8")
+            sizes.append(len(body) + (len(binary) if binary is not None else 0))
+            if self.framing == "line":
+                chunks.append(body + b"\n")
+            else:
+                chunks.append(FRAME_HEADER.pack(len(body), FRAME_JSON))
+                chunks.append(body)
+            if binary is not None:
+                rid = BINARY_ID.pack(payload["id"])
+                for offset in range(0, len(binary), BINARY_CHUNK_SIZE):
+                    chunk = binary[offset:offset + BINARY_CHUNK_SIZE]
+                    chunks.append(FRAME_HEADER.pack(BINARY_ID.size + len(chunk), FRAME_BINARY) + rid)
+                    chunks.append(chunk)
+        # One writelines call per batch keeps concurrent callers' frames intact
+        self._writer.writelines(chunks)
+        await self._writer.drain()
+        return sizes
+
+    async def _read_message(self):
+        """Read the next reply, or None for a blank line."""
+        try:
+            if self.framing == "length":
+                while True:
+                    length, kind = FRAME_HEADER.unpack(await self._reader.readexactly(FRAME_HEADER.size))
+                    if length > MAX_FRAME_SIZE:
+                        raise GodotConnectionError(f"Frame too large ({length} bytes)")
+                    payload = await self._reader.readexactly(length)
+                    if kind == FRAME_JSON:
+                        reply = json.loads(payload)
+                        reply[RECEIVED_BYTES] = length
+                        if "binary_size" in reply:
+                            reply["binary"] = await self._read_binary(int(reply.pop("binary_size")))
+                            reply[RECEIVED_BYTES] += len(reply["binary"])
+                        return reply
+            line = await self._reader.readline()
+        except asyncio.IncompleteReadError:
+            raise GodotConnectionError("Connection closed by Godot") from None
+        if not line:
+            raise GodotConnectionError("Connection closed by Godot")
+        if not line.strip():
+            return None
+        reply = json.loads(line)
+        reply[RECEIVED_BYTES] = len(line)
+        return reply
+
+    async def _read_binary(self, size: int) -> bytearray:
+        data = bytearray()
+        while len(data) < size:
+            length, kind = FRAME_HEADER.unpack(await self._reader.readexactly(FRAME_HEADER.size))
+            if kind != FRAME_BINARY or length < BINARY_ID.size or length > MAX_FRAME_SIZE:
+                raise GodotConnectionError(f"Expected a binary frame, got kind {kind}")
+            await self._reader.readexactly(BINARY_ID.size)
+            data += await self._reader.readexactly(length - BINARY_ID.size)
+        return data
+
+    async def _read_loop(self):
+        try:
+            while True:
+                reply = await self._read_message()
+                if reply is None:
+                    continue
+                rid = reply.pop("id", None)
+                if isinstance(rid, float):
+                    rid = int(rid)
+                future = self._pending.pop(rid, None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._read_task = None
+            self.close(e if isinstance(e, GodotConnectionError) else GodotConnectionError(str(e)))
+
+    async def _roundtrip_many(self, commands: list, timeout: float) -> list:
+        if self.protocol >= 2:
+            loop = asyncio.get_running_loop()
+            ids = []
+            payloads = []
+            for method, params in commands:
+                self._next_id += 1
+                ids.append(self._next_id)
+                self._pending[self._next_id] = loop.create_future()
+                payloads.append({"id": self._next_id, "method": method, "params": params or {}})
+            futures = [self._pending[i] for i in ids]
+            try:
+                sizes = await self._write_messages(payloads)
+                replies = list(await asyncio.wait_for(asyncio.gather(*futures), timeout))
+                for reply, size in zip(replies, sizes):
+                    reply[SENT_BYTES] = size
+                return replies
+            finally:
+                for i in ids:
+                    self._pending.pop(i, None)
+
+        async with self._turn_lock:
+            replies = []
+            for method, params in commands:
+                sizes = await self._write_messages([{"method": method, "params": params or {}}])
+                reply = await asyncio.wait_for(self._read_message(), timeout)
+                if reply is None:
+                    reply = {"error": "Empty response from Godot"}
+                reply[SENT_BYTES] = sizes[0]
+                replies.append(reply)
+            return replies
+
+    async def call(self, method: str, params: dict = None, timeout: float = None) -> dict:
+        """Send one command and wait for its reply."""
+        return (await self.call_many([(method, params)], timeout))[0]
+
+    async def call_many(self, commands: list, timeout: float = None) -> list:
+        """
+        Send (method, params) commands and return their replies in order.
+        Same reconnect rules as GodotConnection.call_many: a reused socket that
+        turns out to be dead is reconnected once; timeouts are not retried.
+        """
+        timeout = timeout or self.timeout
+        reused = self.connected
+        await self.connect()
+        try:
+            return await self._roundtrip_many(commands, timeout)
+        except asyncio.TimeoutError:
+            if self.protocol < 2:
+                self.close()  # A late reply would be read as the next call's
+            raise
+        except (OSError, GodotConnectionError):
+            self.close()
+            if not reused:
+                raise
+        await self.connect()
+        try:
+            return await self._roundtrip_many(commands, timeout)
+        except asyncio.TimeoutError:
+            if self.protocol < 2:
+                self.close()
+            raise
+        except (OSError, GodotConnectionError):
+            self.close()
+            raise
@@ -0,0 +1,270 @@
+"""
+Per-method call metrics for the bridge, collected by send_to_godot_async in server.py.
+
+For every bridge method we keep the number of calls and errors, request and
+response sizes, and three latency histograms:
+
+    round_trip   client side, from sending the request to having the reply
+    queue        bridge side, time the command waited in server.gd's queue
+    exec         bridge side, time spent in _execute_command
+
+queue and exec come from the "_timing" the bridge adds to replies on protocol
+2, so round_trip - queue - exec is what the transport and JSON cost. The
+bridge keeps its own totals too (get_metrics in server.gd), with the same
+bucket bounds, covering every client.
+
+Snapshots render as JSON, Prometheus text exposition format or one JSON line
+per snapshot. Set GODOT_METRICS_FILE to have them written out every
+GODOT_METRICS_INTERVAL seconds (default 60): a ".prom" file is rewritten in
+Prometheus format (for node_exporter's textfile collector), anything else
+gets a JSON line appended.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# Upper bounds (ms) of the latency buckets; the last bucket is +Inf
+BUCKETS_MS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0)
+
+PROMETHEUS_PREFIX = "godot_mcp"
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds, Prometheus style (le = upper bound)."""
+
+    def __init__(self, bounds: tuple = BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    @classmethod
+    def from_counts(cls, bounds, counts, total: float) -> "Histogram":
+        """Rebuild a histogram from per-bucket counts (as reported by the bridge)."""
+        hist = cls(bounds)
+        hist.counts = [int(c) for c in counts]
+        hist.count = sum(hist.counts)
+        hist.sum = float(total)
+        return hist
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum += ms
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return lower  # +Inf bucket: the best we can say is "above the last bound"
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "buckets": list(self.counts),
+        }
+
+
+class MethodStats:
+    """Counters and histograms for one bridge method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.round_trip = Histogram()
+        self.queue = Histogram()
+        self.exec = Histogram()
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "round_trip": self.round_trip.summary(),
+            "queue": self.queue.summary(),
+            "exec": self.exec.summary(),
+        }
+
+
+class Metrics:
+    """Per-method stats, recorded on the event loop; locked so threads can read or export them safely."""
+
+    def __init__(self, export_path: str = "", export_interval: float = 60.0):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self.since = time.time()
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self._last_export = time.monotonic()
+
+    def record(self, method: str, round_trip_ms: float, error: bool = False, bytes_sent: int = 0,
+               bytes_received: int = 0, queue_ms: float = None, exec_ms: float = None):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+            stats.calls += 1
+            stats.errors += bool(error)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.round_trip.observe(round_trip_ms)
+            if queue_ms is not None:
+                stats.queue.observe(queue_ms)
+            if exec_ms is not None:
+                stats.exec.observe(exec_ms)
+            due = self.export_path and time.monotonic() - self._last_export >= self.export_interval
+            if due:
+                self._last_export = time.monotonic()
+        if due:
+            try:
+                export(self.export_path, self.snapshot())
+            except OSError:
+                pass  # Metrics must never break a tool call
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+            self.since = time.time()
+
+    def snapshot(self) -> dict:
+        """Summaries per method, slowest (by total round trip time) first."""
+        with self._lock:
+            methods = sorted(self._methods.items(), key=lambda kv: -kv[1].round_trip.sum)
+            return {
+                "since": self.since,
+                "time": time.time(),
+                "buckets_ms": list(BUCKETS_MS),
+                "methods": {name: stats.summary() for name, stats in methods},
+            }
+
+
+def _labels(**labels) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def _prometheus_histogram(lines: list, name: str, method: str, bounds, counts, total: float):
+    cumulative = 0
+    for bound, n in zip(list(bounds) + ["+Inf"], counts):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(method=method, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(method=method)} {total}")
+    lines.append(f"{name}_count{_labels(method=method)} {cumulative}")
+
+
+def to_prometheus(snapshot: dict) -> str:
+    """
+    Prometheus text format for a snapshot from Metrics.snapshot(), plus the
+    bridge's own numbers if the snapshot has a "bridge" entry (bridge_summary).
+    """
+    p = PROMETHEUS_PREFIX
+    lines = []
+    counters = [
+        ("client_calls_total", "Bridge calls made by the MCP server", "calls"),
+        ("client_errors_total", "Bridge calls that returned an error", "errors"),
+        ("client_request_bytes_total", "Request bytes sent to the bridge", "bytes_sent"),
+        ("client_response_bytes_total", "Response bytes received from the bridge", "bytes_received"),
+    ]
+    methods = snapshot.get("methods", {})
+    for metric, help_text, key in counters:
+        lines.append(f"# HELP {p}_{metric} {help_text}")
+        lines.append(f"# TYPE {p}_{metric} counter")
+        for method, stats in methods.items():
+            lines.append(f"{p}_{metric}{_labels(method=method)} {stats[key]}")
+
+    histograms = [
+        ("client_round_trip_ms", "Client round trip per call", "round_trip"),
+        ("client_queue_ms", "Bridge queue time reported to the client", "queue"),
+        ("client_exec_ms", "Bridge execution time reported to the client", "exec"),
+    ]
+    bounds = snapshot.get("buckets_ms", BUCKETS_MS)
+    for metric, help_text, key in histograms:
+        lines.append(f"# HELP {p}_{metric} {help_text}")
+        lines.append(f"# TYPE {p}_{metric} histogram")
+        for method, stats in methods.items():
+            hist = stats[key]
+            _prometheus_histogram(lines, f"{p}_{metric}", method, bounds, hist["buckets"], hist["sum_ms"])
+
+    bridge = snapshot.get("bridge")
+    if bridge:
+        bridge_bounds = bridge.get("buckets_ms", BUCKETS_MS)
+        bridge_methods = bridge.get("methods", {})
+        for metric, help_text, key in (
+                ("bridge_commands_total", "Commands run by the bridge", "count"),
+                ("bridge_errors_total", "Commands that returned an error", "errors"),
+                ("bridge_busy_total", "Commands rejected because the queue was full", "busy"),
+                ("bridge_request_bytes_total", "Request bytes received by the bridge", "bytes_in"),
+                ("bridge_response_bytes_total", "Response bytes sent by the bridge", "bytes_out")):
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} counter")
+            for method, stats in bridge_methods.items():
+                lines.append(f"{p}_{metric}{_labels(method=method)} {int(stats.get(key, 0))}")
+        for metric, help_text, key in (
+                ("bridge_queue_ms", "Time commands waited in the bridge queue", "queue"),
+                ("bridge_exec_ms", "Time the bridge spent executing commands", "exec")):
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} histogram")
+            for method, stats in bridge_methods.items():
+                hist = stats[key]
+                _prometheus_histogram(lines, f"{p}_{metric}", method, bridge_bounds, hist["buckets"], hist["sum_ms"])
+    return "\n".join(lines) + "\n"
+
+
+def bridge_summary(result: dict) -> dict:
+    """Turn get_metrics' raw bucket counts into the same summaries the client keeps."""
+    bounds = result.get("buckets_ms", BUCKETS_MS)
+    methods = {}
+    for method, m in result.get("methods", {}).items():
+        count = int(m.get("count", 0))
+        methods[method] = {
+            "count": count,
+            "errors": int(m.get("errors", 0)),
+            "error_rate": round(int(m.get("errors", 0)) / count, 4) if count else 0.0,
+            "busy": int(m.get("busy", 0)),
+            "bytes_in": int(m.get("bytes_in", 0)),
+            "bytes_out": int(m.get("bytes_out", 0)),
+            "queue": Histogram.from_counts(bounds, m["queue"], m["queue_sum_ms"]).summary(),
+            "exec": Histogram.from_counts(bounds, m["exec"], m["exec_sum_ms"]).summary(),
+        }
+    methods = dict(sorted(methods.items(), key=lambda kv: -kv[1]["exec"]["sum_ms"]))
+    return {**result, "buckets_ms": list(bounds), "methods": methods}
+
+
+def to_json_line(snapshot: dict) -> str:
+    return json.dumps(snapshot, separators=(",", ":")) + "\n"
+
+
+def export(path: str, snapshot: dict, fmt: str = ""):
+    """
+    Write a snapshot to `path`: "prometheus" replaces the file atomically,
+    "jsonl" appends one line. Without `fmt`, ".prom" files get Prometheus.
+    """
+    fmt = fmt or ("prometheus" if path.endswith(".prom") else "jsonl")
+    if fmt == "prometheus":
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(snapshot))
+        os.replace(tmp, path)
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(to_json_line(snapshot))
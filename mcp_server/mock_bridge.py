@@ -0,0 +1,900 @@
+"""
+In-memory stand-in for the Godot bridge (server.gd), for benchmarks and CI.
+
+MockBridge listens on a TCP port and speaks the same wire protocol as the
+plugin: the `hello` handshake, newline-delimited or length-prefixed JSON,
+binary frames and request ids (see godot_client.py). Scene-tree, property and
+filesystem commands work on an in-memory node tree and file table instead of
+an editor, with the reply shapes server.gd uses, so the MCP tools in server.py
+run unchanged against it. Like the editor, commands execute one at a time;
+each can be given an artificial latency to imitate the editor's frame timing.
+
+    python mock_bridge.py --port 42069 --latency-ms 2
+
+Inside Python, MockBridge(...).start() runs it on a background thread and
+returns the (host, port) it listens on.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import re
+import threading
+import time
+
+import variant_codec
+from godot_client import BINARY_ID, FRAME_BINARY, FRAME_HEADER, FRAME_JSON, PROTOCOL_VERSION
+from variant_codec import Color, Vector2, Vector3
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 42069
+TREE_LOG_LIMIT = 8192  # Same as server.gd: older clients get {"reset": true}
+
+# Node classes the mock can instantiate: class -> (parent class, own stored properties)
+CLASSES = {
+    "Node": (None, {"process_mode": 0, "editor_description": ""}),
+    "Node3D": ("Node", {"position": Vector3(0, 0, 0), "rotation": Vector3(0, 0, 0), "scale": Vector3(1, 1, 1), "visible": True}),
+    "VisualInstance3D": ("Node3D", {"layers": 1}),
+    "GeometryInstance3D": ("VisualInstance3D", {"cast_shadow": 1, "visibility_range_begin": 0.0, "visibility_range_end": 0.0}),
+    "MeshInstance3D": ("GeometryInstance3D", {"mesh": None}),
+    "MultiMeshInstance3D": ("GeometryInstance3D", {"multimesh": None}),
+    "Light3D": ("VisualInstance3D", {"light_color": Color(1, 1, 1, 1), "light_energy": 1.0, "shadow_enabled": False}),
+    "DirectionalLight3D": ("Light3D", {}),
+    "OmniLight3D": ("Light3D", {"omni_range": 5.0}),
+    "SpotLight3D": ("Light3D", {"spot_range": 5.0, "spot_angle": 45.0}),
+    "Camera3D": ("Node3D", {"fov": 75.0, "current": False}),
+    "CollisionObject3D": ("Node3D", {"collision_layer": 1, "collision_mask": 1}),
+    "StaticBody3D": ("CollisionObject3D", {}),
+    "CharacterBody3D": ("CollisionObject3D", {"velocity": Vector3(0, 0, 0)}),
+    "RigidBody3D": ("CollisionObject3D", {"mass": 1.0, "gravity_scale": 1.0}),
+    "Area3D": ("CollisionObject3D", {"monitoring": True}),
+    "CollisionShape3D": ("Node3D", {"shape": None, "disabled": False}),
+    "Node2D": ("Node", {"position": Vector2(0, 0), "rotation": 0.0, "scale": Vector2(1, 1), "visible": True}),
+    "Sprite2D": ("Node2D", {"texture": None, "centered": True}),
+    "Control": ("Node", {"position": Vector2(0, 0), "size": Vector2(0, 0), "visible": True, "modulate": Color(1, 1, 1, 1)}),
+    "Label": ("Control", {"text": ""}),
+    "Button": ("Control", {"text": "", "disabled": False}),
+    "AnimationPlayer": ("Node", {"autoplay": ""}),
+    "Timer": ("Node", {"wait_time": 1.0, "one_shot": False, "autostart": False}),
+}
+
+
+def register_class(name: str, parent: str, properties: dict = None):
+    """Teach the mock another node class (properties are its own, not inherited ones)."""
+    if parent not in CLASSES:
+        raise ValueError(f"Unknown parent class: {parent}")
+    CLASSES[name] = (parent, dict(properties or {}))
+
+
+def is_class(type_name: str, base: str) -> bool:
+    while type_name is not None:
+        if type_name == base:
+            return True
+        type_name = CLASSES[type_name][0]
+    return False
+
+
+def _default_properties(type_name: str) -> dict:
+    chain = []
+    while type_name is not None:
+        parent, own = CLASSES[type_name]
+        chain.append(own)
+        type_name = parent
+    props = {}
+    for own in reversed(chain):
+        props.update(own)
+    return props
+
+
+def display(value) -> str:
+    """str() of a value the way Godot prints it ("(1, 2, 3)", "true", "<null>")."""
+    if value is None:
+        return "<null>"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, tuple):
+        return "(" + ", ".join(display(c) for c in value) + ")"
+    return str(value)
+
+
+class MockNode:
+    __slots__ = ("name", "type", "parent", "children", "by_name", "properties", "groups", "script")
+
+    def __init__(self, type_name: str, name: str):
+        self.name = name
+        self.type = type_name
+        self.parent = None
+        self.children = []
+        self.by_name = {}
+        self.properties = _default_properties(type_name)
+        self.groups = set()
+        self.script = ""
+
+    def path(self) -> str:
+        parts = []
+        node = self
+        while node is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/root/" + "/".join(reversed(parts))
+
+    def path_from(self, ancestor: "MockNode") -> str:
+        if self is ancestor:
+            return "."
+        parts = []
+        node = self
+        while node is not ancestor:
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+
+    def walk(self):
+        """Pre-order traversal of this node and its descendants."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+
+class MockBridge:
+    """
+    The in-memory bridge. `latency` maps method names to seconds of simulated
+    execution time ("default" applies to the rest); `jitter` adds up to that
+    fraction of random extra delay. `protocol=1` imitates an old plugin that
+    doesn't understand `hello`.
+    """
+
+    def __init__(self, host: str = MOCK_HOST, port: int = MOCK_PORT, latency: dict = None,
+                 jitter: float = 0.0, protocol: int = PROTOCOL_VERSION):
+        self.host = host
+        self.port = port
+        self.latency = dict(latency or {})
+        self.jitter = jitter
+        self.protocol = protocol
+        self.commands = 0
+        self.files = {"res://project.godot": b""}
+        self.dirs = {"res://"}
+        self._loop = None
+        self._task = None
+        self._server = None
+        self._thread = None
+        self._main_thread = None  # asyncio.Lock: commands run one at a time, as in the editor
+        self._handlers = {name[len("_cmd_"):]: getattr(self, name) for name in dir(self) if name.startswith("_cmd_")}
+        self._new_tree("Node3D", "Main")
+
+    # --- Server --------------------------------------------------------------
+
+    async def serve(self, on_listening=None):
+        """
+        Listen until cancelled. self.port is updated to the bound port (port 0
+        picks a free one) before on_listening(host, port) is called.
+        """
+        self._main_thread = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if on_listening is not None:
+            on_listening(self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> tuple:
+        """Run the bridge on a daemon thread; returns (host, port) once it is listening."""
+        ready = threading.Event()
+
+        def run():
+            try:
+                asyncio.run(self._serve_until_stopped(ready))
+            finally:
+                ready.set()  # Don't leave start() waiting if binding failed
+
+        self._thread = threading.Thread(target=run, name="mock-bridge", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._server is None:
+            raise OSError(f"Mock bridge could not listen on {self.host}:{self.port}")
+        return self.host, self.port
+
+    async def _serve_until_stopped(self, ready: threading.Event):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        try:
+            await self.serve(lambda host, port: ready.set())
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        """Stop a bridge started with start()."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    async def _handle_client(self, reader, writer):
+        state = {"framing": "line", "binary": False}
+        tasks = set()
+        try:
+            while True:
+                command = await self._read_command(reader, state)
+                if command is None:
+                    break
+                if not isinstance(command, dict):
+                    self._write(writer, state, {"error": "Command must be a JSON object"})
+                    continue
+                command["_received"] = time.perf_counter()
+                if "id" in command and command.get("method") != "hello":
+                    task = asyncio.create_task(self._run(writer, state, command))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                else:
+                    # Protocol 1 (and the handshake) answer strictly in order
+                    await self._run(writer, state, command)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _read_command(self, reader, state):
+        if state["framing"] == "line":
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return None
+                if line.strip():
+                    return json.loads(line)
+        while True:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            length, kind = FRAME_HEADER.unpack(header)
+            payload = await reader.readexactly(length)
+            if kind != FRAME_JSON:
+                continue  # Stray binary frame
+            command = json.loads(payload)
+            params = command.get("params") if isinstance(command, dict) else None
+            if isinstance(params, dict) and params.get("binary_size"):
+                size = int(params.pop("binary_size"))
+                data = bytearray()
+                while len(data) < size:
+                    length, kind = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                    chunk = await reader.readexactly(length)
+                    if kind == FRAME_BINARY:
+                        data += chunk[BINARY_ID.size:]
+                params["_binary"] = bytes(data)
+            return command
+
+    async def _run(self, writer, state, command: dict):
+        method = command.get("method")
+        async with self._main_thread:
+            started = time.perf_counter()
+            delay = self.latency.get(method, self.latency.get("default", 0.0))
+            if delay:
+                await asyncio.sleep(delay * (1.0 + random.random() * self.jitter))
+            response = self.execute(method, command.get("params") or {})
+            finished = time.perf_counter()
+        if "id" in command:
+            response["id"] = command["id"]
+            response["_timing"] = {"queue_ms": (started - command["_received"]) * 1000.0,
+                                   "exec_ms": (finished - started) * 1000.0}
+        self._write(writer, state, response)
+        if method == "hello" and response.get("framing") == "length":
+            state["framing"] = "length"
+            state["binary"] = response.get("binary", False)
+
+    def _write(self, writer, state: dict, response: dict):
+        binary = None
+        if "_binary" in response:
+            binary = response.pop("_binary")
+            key = response.pop("_binary_key", "data_base64")
+            if state["binary"]:
+                response["binary_size"] = len(binary)
+            else:
+                response[key] = base64.b64encode(binary).decode("ascii")
+                binary = None
+        body = json.dumps(response).encode("utf-8")
+        if state["framing"] == "line":
+            writer.write(body + b"\n")
+        else:
+            writer.write(FRAME_HEADER.pack(len(body), FRAME_JSON) + body)
+        if binary:
+            rid = BINARY_ID.pack(int(response.get("id", 0)))
+            writer.write(FRAME_HEADER.pack(BINARY_ID.size + len(binary), FRAME_BINARY) + rid + binary)
+
+    def execute(self, method: str, params: dict) -> dict:
+        """Run one command synchronously (also usable without a socket)."""
+        self.commands += 1
+        if method is None:
+            return {"error": "No method specified"}
+        handler = self._handlers.get(method)
+        if handler is None or (method == "hello" and self.protocol < 2):
+            return {"error": f"Unknown method: {method}"}
+        try:
+            return handler(params)
+        except Exception as e:  # A broken command must not take the connection down
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    # --- Scene tree ----------------------------------------------------------
+
+    def _new_tree(self, root_type: str, name: str):
+        self.root = MockNode(root_type, name)
+        self._revision = getattr(self, "_revision", 0) + 1
+        self._log_base = self._revision
+        self._log = []
+
+    def _log_change(self, change: dict):
+        self._revision += 1
+        change["rev"] = self._revision
+        self._log.append(change)
+        if len(self._log) > TREE_LOG_LIMIT:
+            self._log = self._log[len(self._log) - TREE_LOG_LIMIT // 2:]
+            self._log_base = self._log[0]["rev"] - 1
+
+    def node(self, path: str):
+        """Look a node up like root.get_node_or_null (relative, "." or absolute)."""
+        if path in ("", "."):
+            return self.root
+        if path.startswith("/root/"):
+            parts = path[len("/root/"):].split("/")
+            if parts[0] != self.root.name:
+                return None
+            parts = parts[1:]
+        else:
+            parts = path.split("/")
+        node = self.root
+        for part in parts:
+            if part in ("", "."):
+                continue
+            node = node.parent if part == ".." else node.by_name.get(part)
+            if node is None:
+                return None
+        return node
+
+    def _unique_name(self, parent: MockNode, name: str) -> str:
+        if name not in parent.by_name:
+            return name
+        base = re.sub(r"\d+$", "", name) or name
+        n = 2
+        while f"{base}{n}" in parent.by_name:
+            n += 1
+        return f"{base}{n}"
+
+    def _attach(self, parent: MockNode, node: MockNode, index: int = None):
+        node.name = self._unique_name(parent, node.name)
+        node.parent = parent
+        if index is None:
+            parent.children.append(node)
+        else:
+            parent.children.insert(index, node)
+        parent.by_name[node.name] = node
+        for added in node.walk():
+            self._log_change({"op": "added", "path": added.path(), "name": added.name, "type": added.type,
+                              "parent": added.parent.path(), "index": added.parent.children.index(added)})
+
+    def _detach(self, node: MockNode):
+        for removed in node.walk():
+            self._log_change({"op": "removed", "path": removed.path()})
+        parent = node.parent
+        parent.children.remove(node)
+        del parent.by_name[node.name]
+        node.parent = None
+
+    def _cmd_hello(self, params):
+        reply = {"result": "hello", "protocol": min(int(params.get("protocol", 1)), self.protocol)}
+        if params.get("framing", "line") == "length":
+            reply["framing"] = "length"
+            if params.get("binary", False):
+                reply["binary"] = True
+        return reply
+
+    def _cmd_ping(self, params):
+        return {"result": "pong"}
+
+    def _cmd_get_state(self, params):
+        return {"open_scenes": ["res://new_scene.tscn"], "edited_scene_root": f"{self.root.name}:<{self.root.type}>",
+                "edited_scene_name": self.root.name}
+
+    def _cmd_new_scene(self, params):
+        root_type = params.get("root_type", "Node3D")
+        if root_type not in CLASSES:
+            return {"error": "Invalid node type: " + root_type}
+        self._new_tree(root_type, params.get("name", "Root"))
+        return {"result": "New scene created", "path": "res://new_scene.tscn"}
+
+    def _cmd_get_scene_tree(self, params):
+        if any(key in params for key in ("root_path", "max_depth", "type", "group", "fields", "cursor", "page_size")):
+            return self._query_tree(params)
+
+        def serialize(node):
+            return {"name": node.name, "type": node.type, "path": node.path(),
+                    "children": [serialize(child) for child in node.children]}
+        return {"tree": serialize(self.root), "revision": self._revision}
+
+    def _query_tree(self, params):
+        start = self.node(params.get("root_path", "."))
+        if start is None:
+            return {"error": "Node not found: " + params["root_path"]}
+        max_depth = int(params.get("max_depth", -1))
+        type_filter = params.get("type", "")
+        group_filter = params.get("group", "")
+        page_size = max(1, min(int(params.get("page_size", 200)), 2000))
+        fields = params.get("fields") or ["path", "name", "type", "depth", "child_count"]
+        skip = 0
+        if params.get("cursor"):
+            rev, _, offset = str(params["cursor"]).partition(":")
+            if int(rev) != self._revision:
+                return {"error": "Scene changed since this cursor was issued; query again without a cursor"}
+            skip = int(offset)
+
+        nodes = []
+        visited = 0
+        stack = [(start, 0)]
+        position = 0
+        while stack and len(nodes) < page_size:
+            node, depth = stack.pop()
+            if max_depth < 0 or depth < max_depth:
+                stack.extend((child, depth + 1) for child in reversed(node.children))
+            position += 1
+            if position <= skip:
+                continue
+            visited += 1
+            if (not type_filter or is_class(node.type, type_filter)) and (not group_filter or group_filter in node.groups):
+                nodes.append(self._fields(node, depth, fields))
+        # The mock's cursor is simply "<revision>:<nodes walked so far>"
+        next_cursor = f"{self._revision}:{position}" if stack else None
+        return {"nodes": nodes, "count": len(nodes), "visited": visited, "next_cursor": next_cursor, "revision": self._revision}
+
+    def _fields(self, node: MockNode, depth: int, fields: list) -> dict:
+        data = {}
+        for field in fields:
+            if field == "path":
+                data["path"] = node.path_from(self.root)
+            elif field == "name":
+                data["name"] = node.name
+            elif field == "type":
+                data["type"] = node.type
+            elif field == "depth":
+                data["depth"] = depth
+            elif field == "child_count":
+                data["child_count"] = len(node.children)
+            elif field == "index":
+                data["index"] = node.parent.children.index(node) if node.parent else 0
+            elif field == "parent":
+                data["parent"] = node.parent.path_from(self.root) if node.parent else ""
+            elif field == "groups":
+                data["groups"] = sorted(node.groups)
+            elif field == "script":
+                data["script"] = node.script
+            elif field in node.properties:
+                data[field] = display(node.properties[field])
+        return data
+
+    def _cmd_get_scene_tree_changes(self, params):
+        since = int(params.get("since", -1))
+        if since < self._log_base or since > self._revision:
+            return {"reset": True, "revision": self._revision}
+        changes = [c for c in self._log[since - self._log_base:]]
+        return {"reset": False, "revision": self._revision, "changes": changes}
+
+    def _cmd_add_node(self, params):
+        type_name = params.get("type", "Node")
+        parent = self.node(params.get("parent_path", ""))
+        if parent is None:
+            return {"error": "Parent path not found: " + params.get("parent_path", "")}
+        if type_name not in CLASSES:
+            return {"error": "Invalid node type: " + type_name}
+        node = MockNode(type_name, params.get("name") or type_name)
+        self._attach(parent, node)
+        return {"result": "Node created", "path": node.path()}
+
+    def _cmd_delete_node(self, params):
+        node = self.node(params.get("path", "")) if params.get("path") else None
+        if node is None:
+            return {"error": "Path required" if not params.get("path") else "Node not found"}
+        if node is self.root:
+            return {"error": "Cannot delete root node"}
+        self._detach(node)
+        return {"result": "Node deleted"}
+
+    def _cmd_rename_node(self, params):
+        path, new_name = params.get("path", ""), params.get("new_name", "")
+        if not path or not new_name:
+            return {"error": "Path and new_name required"}
+        node = self.node(path)
+        if node is None:
+            return {"error": "Node not found"}
+        old_path = node.path()
+        if node.parent is not None:
+            del node.parent.by_name[node.name]
+            node.name = self._unique_name(node.parent, new_name)
+            node.parent.by_name[node.name] = node
+        else:
+            node.name = new_name
+        self._log_change({"op": "renamed", "old_path": old_path, "path": node.path(), "name": node.name})
+        return {"result": "Renamed to " + new_name}
+
+    def _cmd_reparent_node(self, params):
+        node = self.node(params.get("path", ""))
+        new_parent = self.node(params.get("new_parent", ""))
+        if node is None or new_parent is None or node is self.root:
+            return {"error": "Node or parent not found"}
+        self._detach(node)
+        self._attach(new_parent, node)
+        return {"result": "Reparented"}
+
+    def _cmd_move_node(self, params):
+        path = params.get("path", "")
+        node = self.node(path)
+        if node is None:
+            return {"error": "Node not found: " + path}
+        if node.parent is None:
+            return {"error": "Cannot move root node"}
+        siblings = node.parent.children
+        siblings.remove(node)
+        index = int(params.get("index", 0))
+        siblings.insert(index if index >= 0 else len(siblings) + 1 + index, node)
+        self._log_change({"op": "reordered", "path": node.parent.path(), "children": [c.path() for c in siblings]})
+        return {"result": f"Moved {node.name} to index {index}"}
+
+    def _cmd_duplicate_node(self, params):
+        node = self.node(params.get("path", "")) if params.get("path") else None
+        if node is None:
+            return {"error": "Path required" if not params.get("path") else "Node not found"}
+
+        def copy(source):
+            clone = MockNode(source.type, source.name)
+            clone.properties = dict(source.properties)
+            clone.groups = set(source.groups)
+            clone.script = source.script
+            for child in source.children:
+                child_clone = copy(child)
+                child_clone.parent = clone
+                clone.children.append(child_clone)
+                clone.by_name[child_clone.name] = child_clone
+            return clone
+
+        duplicate = copy(node)
+        if params.get("new_name"):
+            duplicate.name = params["new_name"]
+        self._attach(node.parent or self.root, duplicate)
+        return {"result": "Duplicated", "path": duplicate.path()}
+
+    def _cmd_find_nodes_by_type(self, params):
+        type_name = params.get("type", "")
+        if not type_name:
+            return {"error": "Type required"}
+        return {"nodes": [{"name": n.name, "path": n.path()} for n in self.root.walk()
+                          if n.type in CLASSES and is_class(n.type, type_name)]}
+
+    def _cmd_find_nodes_by_group(self, params):
+        group = params.get("group", "")
+        if not group:
+            return {"error": "Group required"}
+        return {"nodes": [{"name": n.name, "path": n.path()} for n in self.root.walk() if group in n.groups]}
+
+    def _group_target(self, params):
+        path, group = params.get("path", ""), params.get("group", "")
+        if not path or not group:
+            return None, {"error": "Path and group required"}
+        node = self.node(path)
+        if node is None:
+            return None, {"error": "Node not found"}
+        return node, None
+
+    def _cmd_add_to_group(self, params):
+        node, error = self._group_target(params)
+        if error:
+            return error
+        node.groups.add(params["group"])
+        return {"result": "Added to group: " + params["group"]}
+
+    def _cmd_remove_from_group(self, params):
+        node, error = self._group_target(params)
+        if error:
+            return error
+        node.groups.discard(params["group"])
+        return {"result": "Removed from group: " + params["group"]}
+
+    def _cmd_get_groups(self, params):
+        if not params.get("path"):
+            return {"error": "Path required"}
+        node = self.node(params["path"])
+        if node is None:
+            return {"error": "Node not found"}
+        return {"groups": sorted(node.groups)}
+
+    # --- Properties ----------------------------------------------------------
+
+    def _cmd_get_node_details(self, params):
+        if not params.get("path"):
+            return {"error": "Path required"}
+        node = self.node(params["path"])
+        if node is None:
+            return {"error": "Node not found"}
+        encode = self._encode if params.get("typed") else display
+        return {"name": node.name, "class": node.type,
+                "properties": {name: encode(value) for name, value in node.properties.items()}}
+
+    @staticmethod
+    def _encode(value):
+        return variant_codec.encode(value) if value is not None else None
+
+    def _cmd_set_property(self, params):
+        path, prop = params.get("path", ""), params.get("property", "")
+        if not path or not prop:
+            return {"error": "Missing path or property"}
+        node = self.node(path)
+        if node is None:
+            return {"error": "Node not found"}
+        self._assign(node, prop, params.get("value"))
+        value = node.properties.get(prop)
+        result = {"result": "Property set", "new_value": display(value)}
+        if params.get("typed"):
+            result["value"] = self._encode(value)
+        return result
+
+    def _assign(self, node: MockNode, prop: str, value):
+        """Same coercions as _assign_property in server.gd."""
+        if prop not in node.properties:
+            return  # Godot ignores unknown properties
+        current = node.properties[prop]
+        if variant_codec.is_encoded(value):
+            value = variant_codec.decode(value)
+        elif isinstance(current, bool):
+            value = str(value).lower() == "true"
+        elif isinstance(current, int):
+            value = int(value)
+        elif isinstance(current, float):
+            value = float(value)
+        elif isinstance(current, tuple) and isinstance(value, str):
+            if type(current) is Color and value.startswith("#"):
+                hex_digits = value[1:]
+                value = Color(*(int(hex_digits[i:i + 2], 16) / 255.0 for i in (0, 2, 4)), 1.0)
+            else:
+                parts = [float(p) for p in value.split(",")]
+                if type(current) is Color and len(parts) == 3:
+                    parts.append(1.0)
+                if len(parts) != len(current):
+                    return
+                value = type(current)(parts)
+        node.properties[prop] = value
+
+    def _select(self, params):
+        scope = self.node(params.get("root_path", "."))
+        if scope is None:
+            return None, {"error": "Root path not found: " + params.get("root_path", ".")}
+        if "paths" in params:
+            paths = [str(p) for p in params["paths"]]
+            return (paths, [scope if p == "." else self._relative(scope, p) for p in paths]), None
+        group, type_name = params.get("group", ""), params.get("type", "")
+        if not group and not type_name:
+            return None, {"error": "Give paths, group or type"}
+        nodes = [n for n in scope.walk()
+                 if (not group or group in n.groups) and (not type_name or is_class(n.type, type_name))]
+        return ([n.path_from(scope) for n in nodes], nodes), None
+
+    def _relative(self, scope: MockNode, path: str):
+        node = scope
+        for part in path.split("/"):
+            node = node.by_name.get(part) if node is not None else None
+        return node
+
+    def _cmd_get_properties(self, params):
+        properties = params.get("properties") or []
+        if not properties:
+            return {"error": "properties required"}
+        selection, error = self._select(params)
+        if error:
+            return error
+        paths, nodes = selection
+        encode = self._encode if params.get("typed") else (
+            lambda v: v if v is None or isinstance(v, (bool, int, float, str)) else display(v))
+        columns = {prop: [None] * len(nodes) for prop in properties}
+        errors = {}
+        for i, node in enumerate(nodes):
+            if node is None:
+                errors[paths[i]] = "Node not found"
+                continue
+            for prop in properties:
+                if prop in node.properties:
+                    columns[prop][i] = encode(node.properties[prop])
+        result = {"paths": paths, "properties": columns, "count": len(paths)}
+        if errors:
+            result["errors"] = errors
+        return result
+
+    def _cmd_set_properties(self, params):
+        values, columns = params.get("values") or {}, params.get("columns") or {}
+        if not values and not columns:
+            return {"error": "values or columns required"}
+        selection, error = self._select(params)
+        if error:
+            return error
+        paths, nodes = selection
+        for prop, column in columns.items():
+            if not isinstance(column, list) or len(column) != len(nodes):
+                return {"error": f"Column {prop} needs one value per node ({len(nodes)})"}
+        results = []
+        updated = 0
+        for i, node in enumerate(nodes):
+            entry = {"path": paths[i]}
+            if node is None:
+                entry["error"] = "Node not found"
+                results.append(entry)
+                continue
+            missing = []
+            for prop, value in list(values.items()) + [(p, c[i]) for p, c in columns.items()]:
+                if prop in node.properties:
+                    self._assign(node, prop, value)
+                else:
+                    missing.append(prop)
+            if missing:
+                entry["error"] = "Unknown properties: " + ", ".join(missing)
+            else:
+                updated += 1
+            results.append(entry)
+        return {"result": f"Set properties on {updated} of {len(nodes)} nodes", "updated": updated, "results": results}
+
+    # --- Batch ---------------------------------------------------------------
+
+    _STEP_REF_WHOLE = re.compile(r"^\$(\d+(?:\.\w+)+)$")
+    _STEP_REF_INLINE = re.compile(r"\$\{(\d+(?:\.\w+)+)\}")
+
+    def _cmd_batch(self, params):
+        steps = params.get("steps", [])
+        stop_on_error = bool(params.get("stop_on_error", True))
+        if not isinstance(steps, list):
+            return {"error": "steps must be an array"}
+        results = []
+        errors = 0
+        for step in steps:
+            if not isinstance(step, dict) or "method" not in step:
+                result = {"error": "Each step needs a method"}
+            elif step["method"] == "batch":
+                result = {"error": "Nested batches are not supported"}
+            else:
+                missing = []
+                step_params = self._resolve_refs(step.get("params", {}), results, missing)
+                if missing:
+                    result = {"error": "Unresolved step reference: " + ", ".join(missing)}
+                else:
+                    result = self.execute(step["method"], step_params)
+            results.append(result)
+            if "error" in result:
+                errors += 1
+                if stop_on_error:
+                    break
+        summary = "Batch complete"
+        if errors:
+            summary = f"Batch stopped at step {len(results) - 1}" if stop_on_error else f"Batch finished with {errors} error(s)"
+        return {"result": summary, "completed": len(results), "total": len(steps), "errors": errors, "results": results}
+
+    def _resolve_refs(self, value, results: list, missing: list):
+        if isinstance(value, str):
+            whole = self._STEP_REF_WHOLE.match(value)
+            if whole:
+                resolved = self._lookup_ref(whole.group(1), results)
+                if resolved is None:
+                    missing.append(value)
+                    return value
+                return resolved
+
+            def inline(m):
+                resolved = self._lookup_ref(m.group(1), results)
+                if resolved is None:
+                    missing.append(m.group(0))
+                    return m.group(0)
+                return str(resolved)
+            return self._STEP_REF_INLINE.sub(inline, value)
+        if isinstance(value, dict):
+            return {k: self._resolve_refs(v, results, missing) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._resolve_refs(v, results, missing) for v in value]
+        return value
+
+    @staticmethod
+    def _lookup_ref(ref: str, results: list):
+        parts = ref.split(".")
+        index = int(parts[0])
+        if index >= len(results):
+            return None
+        current = results[index]
+        for part in parts[1:]:
+            if not isinstance(current, dict) or part not in current:
+                return None
+            current = current[part]
+        return current
+
+    # --- Filesystem ----------------------------------------------------------
+
+    def _add_dirs(self, path: str):
+        """Register the directories above a res:// path."""
+        parent = path.rsplit("/", 1)[0]
+        while parent.startswith("res://") and len(parent) > len("res://") and parent not in self.dirs:
+            self.dirs.add(parent)
+            parent = parent.rsplit("/", 1)[0]
+
+    def _cmd_list_dir(self, params):
+        path = params.get("path", "res://")
+        key = path.rstrip("/") if path != "res://" else path
+        if key not in self.dirs:
+            return {"error": "Failed to open directory: " + path}
+        prefix = key if key.endswith("/") else key + "/"
+        names = {p[len(prefix):].split("/", 1)[0] for p in list(self.files) + list(self.dirs)
+                 if p.startswith(prefix) and p != prefix}
+        return {"files": sorted(n for n in names if n and not n.startswith(".")), "path": path}
+
+    def _cmd_file_exists(self, params):
+        path = params.get("path", "")
+        if not path:
+            return {"error": "Path required"}
+        return {"exists": path in self.files or path.rstrip("/") in self.dirs}
+
+    def _cmd_create_folder(self, params):
+        path = params.get("path", "")
+        if not path.startswith("res://"):
+            return {"error": "Path must be in res://"}
+        self.dirs.add(path.rstrip("/"))
+        self._add_dirs(path.rstrip("/"))
+        return {"result": "Folder created"}
+
+    def _cmd_save_script(self, params):
+        path = params.get("path", "")
+        if not path.startswith("res://"):
+            return {"error": "Path must start with res://"}
+        self.files[path] = params.get("content", "").encode("utf-8")
+        self._add_dirs(path)
+        return {"result": "Saved " + path}
+
+    def _cmd_read_script(self, params):
+        path = params.get("path", "")
+        if path not in self.files:
+            return {"error": "File not found"}
+        return {"content": self.files[path].decode("utf-8"), "path": path}
+
+    def _cmd_write_binary_file(self, params):
+        path = params.get("path", "")
+        if not path:
+            return {"error": "Path required"}
+        data = params.get("_binary")
+        if data is None:
+            if not params.get("content_base64"):
+                return {"error": "Content required"}
+            data = base64.b64decode(params["content_base64"])
+        self.files[path] = bytes(data)
+        self._add_dirs(path)
+        return {"result": f"Successfully wrote {len(data)} bytes to {path}"}
+
+    def _cmd_update_files(self, params):
+        paths = params.get("paths")
+        if not isinstance(paths, list) or not paths:
+            return {"error": "paths (non-empty array) required"}
+        # No editor filesystem to refresh: acknowledge like the bridge does
+        return {"result": f"Updated {len(paths)} file(s)", "updated": [str(p) for p in paths], "removed": [], "reloaded": []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=MOCK_HOST)
+    parser.add_argument("--port", type=int, default=MOCK_PORT, help="0 picks a free port (printed on start)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated execution time per command")
+    parser.add_argument("--method-latency", default="{}",
+                        help='JSON map of per-method latency in ms, e.g. {"get_scene_tree": 20}')
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, as a fraction")
+    parser.add_argument("--protocol", type=int, default=PROTOCOL_VERSION, choices=(1, 2))
+    args = parser.parse_args()
+
+    latency = {method: ms / 1000.0 for method, ms in json.loads(args.method_latency).items()}
+    latency.setdefault("default", args.latency_ms / 1000.0)
+    bridge = MockBridge(args.host, args.port, latency, args.jitter, args.protocol)
+
+    try:
+        asyncio.run(bridge.serve(lambda host, port: print(f"Mock bridge listening on {host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Project-wide rewrite of resource references, for moving or replacing an asset.
+
+Every reference to an old resource, given by path, by UID or as a folder
+prefix ("res://textures/" to move everything under it), is pointed at the new
+one:
+
+    .tscn / .tres      [ext_resource] entries, edited structurally with tscn.py
+                       (path, and uid when the new file's UID is known)
+    .gd, shaders,      quoted "res://..." / "uid://..." literals that equal the
+    project.godot      old reference exactly (no blind substring replace)
+
+Files are read and rewritten by a process pool (in-process for small
+projects); each worker writes its result to a temporary file next to the
+original. Only when every file succeeded are the temporaries renamed over the
+originals, so an error leaves the project as it was. The caller then tells
+the editor about the changed files once (update_files in server.gd) instead
+of rescanning the whole filesystem.
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tscn
+
+SCENE_EXTENSIONS = (".tscn", ".tres")
+TEXT_EXTENSIONS = (".gd", ".gdshader", ".gdshaderinc")
+TEXT_FILES = ("project.godot",)
+POOL_THRESHOLD = 64  # Fewer candidate files than this are handled in-process
+SKIP_DIRS = (".godot", ".import", ".git")
+
+_UID_ATTR = re.compile(r'\buid="(uid://[^"]*)"')
+
+
+def project_files(root: str) -> list:
+    """Local paths of every file that can reference resources, skipping editor caches."""
+    out = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        for name in files:
+            if name.endswith(SCENE_EXTENSIONS) or name.endswith(TEXT_EXTENSIONS) or name in TEXT_FILES:
+                out.append(os.path.join(directory, name))
+    return out
+
+
+def res_path(root: str, local: str) -> str:
+    return "res://" + os.path.relpath(local, root).replace(os.sep, "/")
+
+
+def read_uid(local: str) -> str:
+    """
+    UID of a resource file on disk, from the file's own header (.tscn/.tres),
+    its .uid sidecar (scripts, shaders) or its .import file; "" if it has none.
+    """
+    candidates = []
+    if local.endswith(SCENE_EXTENSIONS):
+        candidates.append((local, True))
+    candidates += [(local + ".uid", False), (local + ".import", False)]
+    for path, header_only in candidates:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.readline() if header_only else f.read(4096)
+        except OSError:
+            continue
+        if path.endswith(".uid"):
+            return text.strip()
+        m = _UID_ATTR.search(text)
+        if m:
+            return m.group(1)
+    return ""
+
+
+class Rename:
+    """
+    One old -> new reference mapping. `old_path` / `new_path` are res:// paths
+    (folder prefixes ending in "/" when `prefix`); `old_uid` also matches
+    references by UID; `new_uid` is written to matching [ext_resource]s
+    ("" removes the uid so Godot goes by path, None keeps what is there).
+    """
+
+    def __init__(self, old_path: str, new_path: str, old_uid: str = "", new_uid: str = None, prefix: bool = False):
+        if not (old_path or old_uid):
+            raise ValueError("Rename needs an old path or UID")
+        self.old_path = old_path
+        self.new_path = new_path
+        self.old_uid = old_uid
+        self.new_uid = new_uid
+        self.prefix = prefix
+        if prefix:
+            self._literal = re.compile(r'(["\'])' + re.escape(old_path) + r'([^"\'\n]*)\1')
+        else:
+            targets = [re.escape(t) for t in (old_path, old_uid) if t]
+            self._literal = re.compile(r'(["\'])(' + "|".join(targets) + r')\1')
+
+    def mentioned_in(self, text: str) -> bool:
+        return bool(self.old_path and self.old_path in text) or bool(self.old_uid and self.old_uid in text)
+
+    def target(self, path: str, uid: str):
+        """New path for a reference (path, uid), or None if it isn't one of ours."""
+        if self.prefix:
+            return self.new_path + path[len(self.old_path):] if path and path.startswith(self.old_path) else None
+        if (self.old_path and path == self.old_path) or (self.old_uid and uid == self.old_uid):
+            return self.new_path
+        return None
+
+    def replace_literals(self, text: str):
+        """Replace quoted literals; returns (new text, number replaced)."""
+        def sub(m):
+            if self.prefix:
+                return f"{m.group(1)}{self.new_path}{m.group(2)}{m.group(1)}"
+            new = self.new_uid if m.group(2) == self.old_uid and self.new_uid else self.new_path
+            return f"{m.group(1)}{new}{m.group(1)}"
+        return self._literal.subn(sub, text)
+
+
+def _rewrite_scene(text: str, rename: Rename) -> tuple:
+    f = tscn.parse(text)
+    changes = []
+    for s in f.ext_resources:
+        path, uid = s.attr("path", ""), s.attr("uid", "")
+        new_path = rename.target(path, uid)
+        if new_path is None:
+            continue
+        change = {"id": s.attr("id"), "old": path, "new": new_path}
+        if new_path != path:
+            s.set_attr("path", tscn.format_value(new_path))
+        if not rename.prefix and rename.new_uid is not None and rename.new_uid != uid:
+            if rename.new_uid:
+                s.insert_attr("uid", tscn.format_value(rename.new_uid), before="path")
+            else:
+                s.remove_attr("uid")
+            change["uid"] = rename.new_uid
+        changes.append(change)
+    return (f.dump() if changes else text), changes
+
+
+def rewrite_file(job: tuple) -> dict:
+    """
+    Worker: rewrite one file's references. `job` is (local path, res path,
+    Rename, dry_run). Returns None if the file doesn't mention the old
+    resource, else {"path", "changes" or "replaced", "tmp"} ("tmp" is the
+    rewritten copy waiting to be renamed into place) or {"path", "error"}.
+    """
+    local, res, rename, dry_run = job
+    try:
+        with open(local, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        if not rename.mentioned_in(text):
+            return None
+        if local.endswith(SCENE_EXTENSIONS):
+            new_text, changes = _rewrite_scene(text, rename)
+            result = {"path": res, "changes": changes}
+        else:
+            new_text, count = rename.replace_literals(text)
+            result = {"path": res, "replaced": count}
+        if new_text == text:
+            return None
+        if not dry_run:
+            fd, tmp = tempfile.mkstemp(prefix=".refactor-", dir=os.path.dirname(local))
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(new_text)
+            shutil.copymode(local, tmp)
+            result["tmp"] = tmp
+        return result
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        return {"path": res, "error": f"{type(e).__name__}: {e}"}
+
+
+def refactor(root: str, rename: Rename, dry_run: bool = False, workers: int = 0, files: list = None) -> dict:
+    """
+    Rewrite every reference under `root`, or only in `files` (local paths, e.g.
+    the dependents known from depgraph.py) to skip the scan. Returns
+    {"files": [per-file results], "scanned", "changed", "errors", "written",
+    "elapsed_ms"}; nothing is written if any file failed.
+    """
+    started = time.perf_counter()
+    root = os.path.realpath(root)
+    files = project_files(root) if files is None else files
+    jobs = [(local, res_path(root, local), rename, dry_run) for local in files]
+    workers = workers or min(8, os.cpu_count() or 1)
+    if len(jobs) < POOL_THRESHOLD or workers == 1:
+        results = [rewrite_file(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(rewrite_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    results = [r for r in results if r]
+    errors = [r for r in results if "error" in r]
+    written = []
+    pending = [(r.pop("tmp"), os.path.join(root, *r["path"][len("res://"):].split("/")))
+               for r in results if "tmp" in r]
+    if errors:
+        for tmp, _ in pending:
+            os.remove(tmp)
+    else:
+        for tmp, local in pending:
+            os.replace(tmp, local)
+            written.append(res_path(root, local))
+    return {
+        "files": results,
+        "scanned": len(files),
+        "changed": len(results) - len(errors),
+        "errors": len(errors),
+        "written": written,
+        "dry_run": dry_run,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
@@ -0,0 +1,144 @@
+"""
+Instance placement for godot_scatter, computed with NumPy.
+
+Points come from uniform random sampling or Poisson-disk sampling (Bridson)
+over an XZ rectangle, get their heights from the terrain's HeightMapShape3D
+data (see get_heightmap in server.gd), and are packed straight into Godot's
+MultiMesh buffer layout: 12 float32 per instance, the three rows of the 3x4
+transform. The whole buffer goes to the bridge in one binary upload.
+"""
+import numpy as np
+
+
+def random_points(bounds: tuple, count: int, rng) -> np.ndarray:
+    """`count` uniform points in (x0, z0, x1, z1), shape (count, 2)."""
+    x0, z0, x1, z1 = bounds
+    return np.column_stack([rng.uniform(x0, x1, count), rng.uniform(z0, z1, count)])
+
+
+def poisson_disk(bounds: tuple, radius: float, rng, attempts: int = 30, limit: int = None) -> np.ndarray:
+    """
+    Points in (x0, z0, x1, z1) no closer than `radius` to each other
+    (Bridson's algorithm). Candidates for each active point are generated
+    together and checked against a background grid of cell radius/sqrt(2),
+    which holds at most one point per cell. The grid is a dict of occupied
+    cells, so memory follows the points placed, not the area (a small radius
+    over a huge area with a low `limit` stays cheap). Stops after `limit` points.
+    """
+    x0, z0, x1, z1 = bounds
+    width, depth = x1 - x0, z1 - z0
+    cell = radius / np.sqrt(2)
+    grid = {}  # (gx, gz) -> index of the point in that cell
+    radius_sq = radius * radius
+
+    points = [(rng.uniform(0, width), rng.uniform(0, depth))]
+    grid[int(points[0][0] / cell), int(points[0][1] / cell)] = 0
+    active = [0]
+    while active and (limit is None or len(points) < limit):
+        slot = rng.integers(len(active))
+        px, pz = points[active[slot]]
+        # Candidates in the annulus [r, 2r) around the active point
+        angle = rng.uniform(0, 2 * np.pi, attempts)
+        dist = radius * np.sqrt(rng.uniform(1, 4, attempts))
+        candidates = np.column_stack([px + dist * np.cos(angle), pz + dist * np.sin(angle)])
+        inside = (candidates[:, 0] >= 0) & (candidates[:, 0] < width) & (candidates[:, 1] >= 0) & (candidates[:, 1] < depth)
+
+        placed = False
+        for cx, cz in candidates[inside]:
+            gx, gz = int(cx / cell), int(cz / cell)
+            too_close = False
+            for nx in range(gx - 2, gx + 3):
+                for nz in range(gz - 2, gz + 3):
+                    i = grid.get((nx, nz))
+                    if i is not None:
+                        ox, oz = points[i]
+                        if (ox - cx) ** 2 + (oz - cz) ** 2 < radius_sq:
+                            too_close = True
+                            break
+                if too_close:
+                    break
+            if too_close:
+                continue
+            grid[gx, gz] = len(points)
+            active.append(len(points))
+            points.append((cx, cz))
+            placed = True
+            break
+        if not placed:
+            active[slot] = active[-1]
+            active.pop()
+    return np.asarray(points) + (x0, z0)
+
+
+class HeightField:
+    """
+    Heights sampled from get_heightmap's shapes. Each HeightMapShape3D is a
+    grid centred on its transform's origin; points outside every shape get
+    no height. Terrains are assumed upright (no tilt in the shape transforms).
+    """
+
+    def __init__(self, shapes: list, heights: np.ndarray):
+        self._shapes = []
+        for shape in shapes:
+            t = np.asarray(shape["transform"], dtype=np.float64)
+            x_axis, y_axis, z_axis, origin = t[0:3], t[3:6], t[6:9], t[9:12]
+            grid = heights[shape["offset"]:shape["offset"] + shape["count"]].reshape(shape["depth"], shape["width"])
+            # World XZ -> grid XZ
+            to_grid = np.linalg.inv(np.array([[x_axis[0], z_axis[0]], [x_axis[2], z_axis[2]]]))
+            self._shapes.append((grid, x_axis, y_axis, z_axis, origin, to_grid))
+
+    @classmethod
+    def from_response(cls, response: dict, data: bytes) -> "HeightField":
+        return cls(response["shapes"], np.frombuffer(data, dtype="<f4").astype(np.float64))
+
+    def bounds(self) -> tuple:
+        """XZ rectangle (x0, z0, x1, z1) covering every shape."""
+        corners = []
+        for grid, x_axis, _y, z_axis, origin, _ in self._shapes:
+            half_w, half_d = (grid.shape[1] - 1) / 2.0, (grid.shape[0] - 1) / 2.0
+            for sx in (-half_w, half_w):
+                for sz in (-half_d, half_d):
+                    p = origin + x_axis * sx + z_axis * sz
+                    corners.append((p[0], p[2]))
+        corners = np.asarray(corners)
+        return (*corners.min(axis=0), *corners.max(axis=0))
+
+    def sample(self, points: np.ndarray) -> tuple:
+        """Bilinear heights for (N, 2) XZ points: (y, found) arrays."""
+        y = np.zeros(len(points))
+        found = np.zeros(len(points), dtype=bool)
+        for grid, x_axis, y_axis, z_axis, origin, to_grid in self._shapes:
+            depth, width = grid.shape
+            local = (points - (origin[0], origin[2])) @ to_grid.T
+            gx, gz = local[:, 0] + (width - 1) / 2.0, local[:, 1] + (depth - 1) / 2.0
+            hit = ~found & (gx >= 0) & (gx <= width - 1) & (gz >= 0) & (gz <= depth - 1)
+            if not hit.any():
+                continue
+            gx, gz, lx, lz = gx[hit], gz[hit], local[hit, 0], local[hit, 1]
+            ix, iz = np.minimum(gx.astype(int), width - 2), np.minimum(gz.astype(int), depth - 2)
+            fx, fz = gx - ix, gz - iz
+            top = grid[iz, ix] * (1 - fx) + grid[iz, ix + 1] * fx
+            bottom = grid[iz + 1, ix] * (1 - fx) + grid[iz + 1, ix + 1] * fx
+            h = top * (1 - fz) + bottom * fz
+            y[hit] = origin[1] + y_axis[1] * h + x_axis[1] * lx + z_axis[1] * lz
+            found |= hit
+        return y, found
+
+
+def instance_buffer(positions: np.ndarray, rng, random_yaw: bool = True,
+                    scale_range: tuple = (1.0, 1.0)) -> np.ndarray:
+    """
+    MultiMesh TRANSFORM_3D buffer for (N, 3) positions: a random yaw and
+    uniform scale per instance, as float32 shaped (N, 12).
+    """
+    count = len(positions)
+    yaw = rng.uniform(0, 2 * np.pi, count) if random_yaw else np.zeros(count)
+    scale = rng.uniform(scale_range[0], scale_range[1], count)
+    c, s = np.cos(yaw) * scale, np.sin(yaw) * scale
+    zeros = np.zeros(count)
+    # Rows of [Basis.rotated(Y, yaw).scaled(scale) | origin]
+    return np.column_stack([
+        c, zeros, s, positions[:, 0],
+        zeros, scale, zeros, positions[:, 1],
+        -s, zeros, c, positions[:, 2],
+    ]).astype("<f4")
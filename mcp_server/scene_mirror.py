@@ -0,0 +1,167 @@
+"""
+Client-side copy of the edited scene tree, kept current with diffs.
+
+The bridge numbers every change to the open scene (see "Scene Tree Sync" in
+server.gd). After one full `get_scene_tree`, the mirror asks for
+`get_scene_tree_changes` since its revision and patches itself, so repeated
+tree queries cost one small round trip instead of a full walk and re-dump of
+the scene. The rendered JSON is cached per revision as well.
+"""
+import json
+
+
+class SceneTreeMirror:
+    """Flat path -> node store rebuilt from get_scene_tree and patched in place."""
+
+    def __init__(self):
+        self.revision = None
+        self._nodes = {}      # path -> {"name", "type", "path", "children": [child paths]}
+        self._parents = {}    # path -> parent path
+        self._root = None
+        self._rendered = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.revision is not None and self._root is not None
+
+    def clear(self):
+        self.revision = None
+        self._nodes.clear()
+        self._parents.clear()
+        self._root = None
+        self._rendered = None
+
+    def load(self, tree: dict, revision):
+        """Replace the mirror with a full tree as returned by get_scene_tree."""
+        self.clear()
+        stack = [(tree, None)]
+        while stack:
+            node, parent = stack.pop()
+            path = node["path"]
+            self._nodes[path] = {
+                "name": node["name"],
+                "type": node["type"],
+                "path": path,
+                "children": [child["path"] for child in node.get("children", [])],
+            }
+            self._parents[path] = parent
+            stack.extend((child, path) for child in node.get("children", []))
+        self._root = tree["path"]
+        self.revision = revision
+
+    def apply(self, changes: list, revision) -> bool:
+        """
+        Patch the mirror with get_scene_tree_changes output. Returns False if
+        a change doesn't fit the mirror, in which case it has been cleared and
+        the caller should reload the full tree.
+        """
+        for change in changes:
+            handler = getattr(self, f"_apply_{change.get('op')}", None)
+            if handler is None or not handler(change):
+                self.clear()
+                return False
+        if changes:
+            self._rendered = None
+        self.revision = revision
+        return True
+
+    def _apply_added(self, change: dict) -> bool:
+        parent = self._nodes.get(change["parent"])
+        if parent is None:
+            return False
+        path = change["path"]
+        if path in self._nodes:
+            self._remove(path)
+        self._nodes[path] = {"name": change["name"], "type": change["type"], "path": path, "children": []}
+        self._parents[path] = change["parent"]
+        index = min(int(change.get("index", len(parent["children"]))), len(parent["children"]))
+        parent["children"].insert(index, path)
+        return True
+
+    def _apply_removed(self, change: dict) -> bool:
+        # Godot reports every node of a removed subtree; later ones are no-ops
+        if change["path"] in self._nodes:
+            self._remove(change["path"])
+        return True
+
+    def _apply_renamed(self, change: dict) -> bool:
+        old_path, new_path = change["old_path"], change["path"]
+        if old_path not in self._nodes:
+            return False
+        prefix = old_path + "/"
+        moved = [p for p in self._nodes if p == old_path or p.startswith(prefix)]
+        renames = {p: new_path + p[len(old_path):] for p in moved}
+
+        for old, new in renames.items():
+            node = self._nodes.pop(old)
+            node["path"] = new
+            node["children"] = [renames.get(c, c) for c in node["children"]]
+            self._nodes[new] = node
+            parent = self._parents.pop(old)
+            self._parents[new] = renames.get(parent, parent)
+        self._nodes[new_path]["name"] = change["name"]
+
+        parent = self._parents[new_path]
+        if parent is None:
+            self._root = new_path
+        else:
+            siblings = self._nodes[parent]["children"]
+            siblings[siblings.index(old_path)] = new_path
+        return True
+
+    def _apply_reordered(self, change: dict) -> bool:
+        # The parent's full child order; it must be the children the mirror has
+        parent = self._nodes.get(change["path"])
+        if parent is None:
+            return False
+        children = list(change["children"])
+        if sorted(children) != sorted(parent["children"]):
+            return False
+        parent["children"] = children
+        return True
+
+    def _remove(self, path: str):
+        parent = self._parents.get(path)
+        if parent is not None and parent in self._nodes:
+            self._nodes[parent]["children"].remove(path)
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            node = self._nodes.pop(current, None)
+            self._parents.pop(current, None)
+            if node:
+                stack.extend(node["children"])
+        if path == self._root:
+            self._root = None
+
+    def relative(self, path: str) -> str:
+        """A mirrored (absolute editor) path relative to the scene root, as the tools take them."""
+        if path == self._root:
+            return "."
+        return path[len(self._root) + 1:] if path.startswith(self._root + "/") else path
+
+    def to_tree(self) -> dict:
+        """
+        Rebuild the nested {"name", "type", "path", "children"} structure, with
+        paths relative to the scene root like the paged get_scene_tree listing.
+        """
+        if self._root is None:
+            return None
+        out = {}
+        stack = [(self._root, None)]
+        while stack:
+            path, siblings = stack.pop()
+            node = self._nodes[path]
+            data = {"name": node["name"], "type": node["type"], "path": self.relative(path), "children": []}
+            if siblings is None:
+                out = data
+            else:
+                siblings.append(data)
+            stack.extend((child, data["children"]) for child in reversed(node["children"]))
+        return out
+
+    def render(self) -> str:
+        """The tree as indented JSON, cached until the next change."""
+        if self._rendered is None:
+            self._rendered = json.dumps(self.to_tree(), indent=2)
+        return self._rendered
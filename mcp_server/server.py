@@ -1,9 +1,33 @@
-import socket
+import asyncio
+import atexit
 import json
+import math
+import time
 import re
 import base64
+import difflib
+import multiprocessing
 import os
-from mcp.server.fastmcp import FastMCP
+import threading
+from mcp.server.fastmcp import FastMCP, Image
+from godot_client import DEFAULT_TIMEOUT, RECEIVED_BYTES, SENT_BYTES, AsyncGodotConnection
+from scene_mirror import SceneTreeMirror
+import metrics
+import command_trace
+import variant_codec
+import tscn
+import refactor
+import depgraph
+import docs_index
+
+# Optional NumPy terrain pipeline (pip install numpy)
+try:
+    import numpy as np
+    import terrain
+    import scatter
+    TERRAIN_AVAILABLE = True
+except ImportError:
+    TERRAIN_AVAILABLE = False
 
 # Optional imports for doc lookup (graceful fallback if not installed)
 try:
@@ -16,8 +40,56 @@ except ImportError:
 # Initialize FastMCP server
 mcp = FastMCP("Godot Integration")
 
-GODOT_HOST = "127.0.0.1"
-GODOT_PORT = 42069
+GODOT_HOST = os.environ.get("GODOT_HOST", "127.0.0.1")
+GODOT_PORT = int(os.environ.get("GODOT_PORT", "42069"))
+GODOT_MAX_CONCURRENCY = int(os.environ.get("GODOT_MAX_CONCURRENCY", "8"))  # Max bridge calls in flight from tools
+# Project folder on disk, for tools that read and write project files without the editor
+GODOT_PROJECT_DIR = os.environ.get("GODOT_PROJECT_DIR",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "godot_project"))
+
+# Seconds to wait for a reply, per bridge method (everything else uses DEFAULT_TIMEOUT).
+# Override with e.g. GODOT_METHOD_TIMEOUTS='{"search_files": 30, "batch": 60}'
+METHOD_TIMEOUTS = {
+    "get_editor_screenshot": 15.0,
+    "get_game_screenshot": 15.0,
+    "search_files": 15.0,
+    "batch": 30.0,
+    "generate_terrain_mesh": 30.0,
+    "build_heightmap_terrain": 60.0,
+    "build_terrain_chunk": 60.0,
+    "scatter_multimesh": 60.0,
+    "replace_resource_in_scene": 15.0,
+    "save_scene": 15.0,
+    "get_properties": 15.0,
+    "set_properties": 15.0,
+}
+METHOD_TIMEOUTS.update(json.loads(os.environ.get("GODOT_METHOD_TIMEOUTS", "{}")))
+BUSY_RETRIES = 5  # Resends when the bridge's command queue is full (reply has "busy")
+
+# One long-lived, multiplexed connection shared by all tool calls (see godot_client.py)
+_godot_async = AsyncGodotConnection(GODOT_HOST, GODOT_PORT)
+_godot_slots = asyncio.Semaphore(GODOT_MAX_CONCURRENCY)
+
+# Per-method latency and size stats for every bridge call (see metrics.py)
+_metrics = metrics.Metrics(os.environ.get("GODOT_METRICS_FILE", ""),
+                           float(os.environ.get("GODOT_METRICS_INTERVAL", "60")))
+
+# Optional record of every bridge call for later replay (see command_trace.py)
+_trace = None
+if os.environ.get("GODOT_TRACE_FILE") and multiprocessing.parent_process() is None:  # Not in refactor workers
+    _trace = command_trace.TraceWriter(os.environ["GODOT_TRACE_FILE"], host=GODOT_HOST, port=GODOT_PORT)
+    atexit.register(_trace.close)
+
+# Cached copy of the edited scene tree, patched with diffs (see scene_mirror.py)
+_scene_mirror = SceneTreeMirror()
+_scene_mirror_lock = asyncio.Lock()
+
+def method_timeout(method: str) -> float:
+    return float(METHOD_TIMEOUTS.get(method, DEFAULT_TIMEOUT))
+
+def _busy_delay(response: dict, attempt: int) -> float:
+    """Seconds to back off after a busy reply: the bridge's hint, doubled per attempt."""
+    return min(2.0, response.get("retry_after_ms", 50) / 1000.0 * (2 ** attempt))
 
 def normalize_godot_path(path: str) -> str:
     """
@@ -48,76 +120,170 @@ def normalize_godot_path(path: str) -> str:
     clean_path = path.lstrip("./\\")
     return f"res://{clean_path}"
 
-def send_to_godot(method: str, params: dict = None) -> dict:
-    """Helper to send JSON commands to the Godot plugin via TCP."""
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(5) # 5 second timeout
+def project_file(path: str) -> str:
+    """Local path of a project file (res://, or anything normalize_godot_path accepts) in GODOT_PROJECT_DIR."""
+    root = os.path.realpath(GODOT_PROJECT_DIR)
+    local = os.path.realpath(os.path.join(root, normalize_godot_path(path)[len("res://"):]))
+    if os.path.commonpath([root, local]) != root:
+        raise ValueError(f"{path} is outside the project folder")
+    return local
+
+def _record_call(method: str, params: dict, started: float, response: dict) -> dict:
+    """Record one bridge call, taking the wire sizes and bridge timing off the reply."""
+    round_trip_ms = (time.perf_counter() - started) * 1000.0
+    timing = response.pop("_timing", None) or {}
+    _metrics.record(method, round_trip_ms, "error" in response,
+                    response.pop(SENT_BYTES, 0), response.pop(RECEIVED_BYTES, 0),
+                    timing.get("queue_ms"), timing.get("exec_ms"))
+    if _trace is not None:
+        _trace.record(method, params, response, started, round_trip_ms, timing)
+    return response
+
+async def send_to_godot_async(method: str, params: dict = None) -> dict:
+    """
+    Send a JSON command to the Godot plugin; every tool goes through here.
+    Calls share one multiplexed connection, so slow commands (screenshots,
+    searches) don't hold up the rest; at most GODOT_MAX_CONCURRENCY are in
+    flight at once. Busy replies are retried with backoff, and every call is
+    recorded in the metrics (and the trace, if enabled).
+    """
+    timeout = method_timeout(method)
+    for attempt in range(BUSY_RETRIES + 1):
+        async with _godot_slots:
+            started = time.perf_counter()
             try:
-                s.connect((GODOT_HOST, GODOT_PORT))
+                response = await _godot_async.call(method, params, timeout=timeout)
             except ConnectionRefusedError:
-                return {"error": "Connection refused. Is Godot running with the MCP Bridge plugin enabled?"}
-            
-            payload = {"method": method, "params": params or {}}
-            msg = json.dumps(payload) + "\n"
-            s.sendall(msg.encode('utf-8'))
-            
-            # Read response (simple line-based protocol)
-            buffer = ""
-            while True:
-                chunk = s.recv(4096)
-                if not chunk:
-                    break
-                buffer += chunk.decode('utf-8')
-                if "\n" in buffer:
-                    break
-            
-            if not buffer:
-                return {"error": "Empty response from Godot"}
-                
-            return json.loads(buffer.strip())
-            
-    except Exception as e:
-        return {"error": f"Communication error: {str(e)}"}
-
-@mcp.tool()
-def godot_write_binary_file(path: str, content_base64: str) -> str:
-    """
-    Write binary content (base64 encoded) to a file in the Godot project.
+                return _record_call(method, params, started, {"error": "Connection refused. Is Godot running with the MCP Bridge plugin enabled?"})
+            except asyncio.TimeoutError:
+                return _record_call(method, params, started, {"error": f"Timed out after {timeout:g}s waiting for Godot to answer '{method}'"})
+            except Exception as e:
+                return _record_call(method, params, started, {"error": f"Communication error: {str(e)}"})
+        _record_call(method, params, started, response)
+        if not response.get("busy") or attempt == BUSY_RETRIES:
+            return response
+        # The bridge's queue is full: back off outside the concurrency slot
+        await asyncio.sleep(_busy_delay(response, attempt))
+
+@mcp.tool()
+async def godot_write_binary_file(path: str, content_base64: str = "", source_path: str = "") -> str:
+    """
+    Write binary content to a file in the Godot project.
     Args:
         path: Resource path (e.g. "res://assets/image.png").
         content_base64: Base64 encoded string of the binary content.
+        source_path: Alternatively, a local file to copy (read directly, no base64 needed).
     """
     normalized_path = normalize_godot_path(path)
-    # Pass the base64 string directly to Godot
-    # GDScript has Marshalls.base64_to_raw() to handle it efficiently
-    response = send_to_godot("write_binary_file", {
-        "path": normalized_path, 
-        "content_base64": content_base64
+    if source_path:
+        try:
+            data = await asyncio.to_thread(_read_local_file, source_path)
+        except OSError as e:
+            return f"Error: Could not read {source_path} - {e}"
+    else:
+        try:
+            data = base64.b64decode(content_base64, validate=True)
+        except ValueError:
+            return "Error: Invalid base64 content"
+    # Raw bytes go over binary frames; plugins without them get base64
+    response = await send_to_godot_async("write_binary_file", {
+        "path": normalized_path,
+        "_binary": data,
+        "_binary_fallback": "content_base64"
     })
     
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
+def _read_local_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
 @mcp.tool()
-def godot_status() -> str:
+async def godot_status() -> str:
     """Checks if the Godot Editor is running and listening."""
-    response = send_to_godot("ping")
+    response = await send_to_godot_async("ping")
     if response.get("result") == "pong":
         return "Connected: Godot Editor is listening."
     return f"Disconnected: {response.get('error')}"
 
 @mcp.tool()
-def godot_get_scene_tree() -> str:
-    """Returns the current scene tree structure (nodes and hierarchy) as JSON."""
-    response = send_to_godot("get_scene_tree")
-    if "error" in response:
-        return f"Error: {response['error']}"
-    return json.dumps(response.get("tree"), indent=2)
+async def godot_get_scene_tree(
+    root_path: str = "",
+    max_depth: int = -1,
+    type: str = "",
+    group: str = "",
+    fields: str = "",
+    cursor: str = "",
+    page_size: int = 0
+) -> str:
+    """
+    Returns the current scene tree structure (nodes and hierarchy) as JSON.
+    With no arguments, returns the whole tree nested. Any argument switches to a
+    flat, paged listing (pre-order) that only walks what was asked for. Either way,
+    node paths are relative to the scene root ("." is the root itself), the form
+    root_path and the other node tools take.
+    Args:
+        root_path: Only list this node and its descendants (relative to the scene root).
+        max_depth: Depth below root_path to descend (0 = just that node, -1 = unlimited).
+        type: Only include nodes of this class or a subclass (e.g. "MeshInstance3D").
+        group: Only include nodes in this group.
+        fields: Comma-separated fields per node. Defaults to "path,name,type,depth,child_count".
+                Also available: index, parent, groups, script, or any node property ("visible", "position").
+        cursor: next_cursor from a previous page, to continue that listing.
+        page_size: Nodes per page (default 200, max 2000).
+    """
+    query = {}
+    if root_path:
+        query["root_path"] = root_path
+    if max_depth >= 0:
+        query["max_depth"] = max_depth
+    if type:
+        query["type"] = type
+    if group:
+        query["group"] = group
+    if fields:
+        query["fields"] = [f.strip() for f in fields.split(",") if f.strip()]
+    if cursor:
+        query["cursor"] = cursor
+    if page_size > 0:
+        query["page_size"] = page_size
+    if query:
+        response = await send_to_godot_async("get_scene_tree", query)
+        if "error" in response:
+            return f"Error: {response['error']}"
+        if "nodes" not in response:
+            return "Error: This version of the MCP Bridge plugin can't filter or page the scene tree; call without arguments"
+        return json.dumps(response, indent=2)
+
+    error = await sync_scene_mirror()
+    if error:
+        return f"Error: {error}"
+    return _scene_mirror.render()
+
+async def sync_scene_mirror():
+    """
+    Bring _scene_mirror up to date: apply the changes since its revision, or
+    fetch the whole tree if the bridge asks for a reset (or predates revisions).
+    Returns an error message, or None on success.
+    """
+    async with _scene_mirror_lock:
+        if _scene_mirror.loaded:
+            response = await send_to_godot_async("get_scene_tree_changes", {"since": _scene_mirror.revision})
+            if "error" not in response and not response.get("reset"):
+                if _scene_mirror.apply(response.get("changes", []), response["revision"]):
+                    return None
+        response = await send_to_godot_async("get_scene_tree")
+        if "error" in response:
+            _scene_mirror.clear()
+            return response["error"]
+        # Bridges without revisions get a fresh tree every time
+        _scene_mirror.load(response.get("tree"), response.get("revision"))
+        return None
 
 @mcp.tool()
-def godot_add_node(node_type: str, name: str = "", parent_path: str = ".") -> str:
+async def godot_add_node(node_type: str, name: str = "", parent_path: str = ".") -> str:
     """
     Adds a new node to the current scene.
     
@@ -131,74 +297,230 @@ def godot_add_node(node_type: str, name: str = "", parent_path: str = ".") -> st
         "name": name,
         "parent_path": parent_path
     }
-    response = send_to_godot("add_node", params)
+    response = await send_to_godot_async("add_node", params)
     if "error" in response:
         return f"Error adding node: {response['error']}"
     return f"Success: Node created at {response.get('path')}"
 
 @mcp.tool()
-def godot_execute_code(code: str) -> str:
+async def godot_execute_code(code: str, args: str = "") -> str:
     """
     Executes a snippet of GDScript in the context of the EditorInterface.
     
-    The code is wrapped in a function: `func eval(EditorInterface):`
+    The code is wrapped in a function: `func eval(editor_interface, args):`
     You can use `EditorInterface` to access the editor API.
     Return values are converted to string.
+    Compiled snippets are cached by source, so pass changing values through
+    `args` rather than formatting them into the code.
     
     Example:
-        return EditorInterface.get_edited_scene_root().name
+        return EditorInterface.get_edited_scene_root().get_node(args.path).position
+    Args:
+        code: GDScript function body.
+        args: Optional JSON object available to the code as `args`.
+    """
+    params = {"code": code}
+    if args:
+        try:
+            params["args"] = json.loads(args)
+        except json.JSONDecodeError as e:
+            return f"Error: Invalid JSON args - {e}"
+    response = await send_to_godot_async("execute_script", params)
+    if "error" in response:
+        return f"Script Error: {response['error']}\nSource:\n{response.get('source', '')}"
+    return f"Result: {response.get('result')}"
+
+# Named snippets, kept here too so they can be re-registered after Godot restarts
+_snippets: dict = {}
+
+@mcp.tool()
+async def godot_register_snippet(name: str, code: str) -> str:
     """
-    response = send_to_godot("execute_script", {"code": code})
+    Compile a GDScript snippet once and store it under a name for godot_run_snippet.
+    The code is a function body like godot_execute_code's, reading its inputs from `args`.
+    Args:
+        name: Handle to call the snippet by (registering again replaces it).
+        code: GDScript function body.
+    """
+    response = await send_to_godot_async("register_snippet", {"name": name, "code": code})
     if "error" in response:
         return f"Script Error: {response['error']}\nSource:\n{response.get('source', '')}"
+    _snippets[name] = code
+    return f"Registered snippet '{name}'"
+
+@mcp.tool()
+async def godot_run_snippet(name: str, args: str = "") -> str:
+    """
+    Run a snippet registered with godot_register_snippet.
+    Args:
+        name: Snippet name.
+        args: Optional JSON object available to the snippet as `args`.
+    """
+    params = {"name": name}
+    if args:
+        try:
+            params["args"] = json.loads(args)
+        except json.JSONDecodeError as e:
+            return f"Error: Invalid JSON args - {e}"
+    response = await send_to_godot_async("run_snippet", params)
+    if response.get("unknown_snippet") and name in _snippets:
+        # The editor was restarted since registration
+        registered = await send_to_godot_async("register_snippet", {"name": name, "code": _snippets[name]})
+        if "error" in registered:
+            return f"Script Error: {registered['error']}"
+        response = await send_to_godot_async("run_snippet", params)
+    if "error" in response:
+        return f"Script Error: {response['error']}"
     return f"Result: {response.get('result')}"
 
 @mcp.tool()
-def godot_get_state() -> str:
+async def godot_get_state() -> str:
     """Debug tool to check Editor state (open scenes, etc)."""
-    response = send_to_godot("get_state")
+    response = await send_to_godot_async("get_state")
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_get_node_details(path: str) -> str:
+async def godot_get_node_details(path: str, typed: bool = False) -> str:
     """
     Get detailed properties of a node.
     Args:
         path: Path to the node (e.g. "Player/Sprite2D" or "." for root).
+        typed: Return exact values as {"$t": type, "v": ...} instead of display strings
+               (e.g. {"$t": "Vector3", "v": [0, 1, 0]}); these can be passed back to godot_set_property.
     """
-    response = send_to_godot("get_node_details", {"path": path})
+    response = await send_to_godot_async("get_node_details", {"path": path, "typed": typed})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_set_property(path: str, property: str, value: str) -> str:
+async def godot_set_property(path: str, property: str, value: str) -> str:
     """
     Set a property on a node.
     Args:
         path: Path to the node (e.g. "Player").
         property: Property name (e.g. "position", "modulate", "text").
-        value: The value to set. For Vector3 use "x,y,z".
+        value: The value to set. For Vector3 use "x,y,z", or pass an exact typed
+               value as JSON: {"$t": "Vector3", "v": [1, 2, 3]}.
     """
-    response = send_to_godot("set_property", {"path": path, "property": property, "value": value})
+    response = await send_to_godot_async("set_property", {"path": path, "property": property, "value": _typed_or_text(value)})
     if "error" in response:
         return f"Error: {response['error']}"
     return f"Success: Set {property} to {response.get('new_value')}"
 
+def _name_list(text: str) -> list:
+    """A JSON array or comma-separated names."""
+    text = text.strip()
+    if text.startswith("["):
+        return [str(name) for name in json.loads(text)]
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+def _node_selector(paths: str, group: str, type: str, root_path: str) -> dict:
+    selector = {"root_path": root_path}
+    if paths:
+        selector["paths"] = _name_list(paths)
+    if group:
+        selector["group"] = group
+    if type:
+        selector["type"] = type
+    return selector
+
+@mcp.tool()
+async def godot_get_properties(properties: str, paths: str = "", group: str = "", type: str = "", root_path: str = ".", typed: bool = False) -> str:
+    """
+    Read the same properties from many nodes in one call.
+    Select nodes by explicit paths, or by group and/or type under root_path.
+    Args:
+        properties: Property names, comma-separated or a JSON array (e.g. "position,visible").
+        paths: Node paths, comma-separated or a JSON array (relative to root_path).
+        group: Select every node in this group.
+        type: Select every node of this class (subclasses included, e.g. "Light3D").
+        root_path: Where selection and paths start (default scene root).
+        typed: Exact {"$t", "v"} values instead of display strings for non-JSON types.
+    Returns: JSON columns: {"paths": [...], "properties": {"position": [one value per path], ...}}.
+    """
+    try:
+        params = _node_selector(paths, group, type, root_path)
+        params["properties"] = _name_list(properties)
+    except json.JSONDecodeError as e:
+        return f"Error: Invalid JSON list - {e}"
+    params["typed"] = typed
+    response = await send_to_godot_async("get_properties", params)
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+@mcp.tool()
+async def godot_set_properties(values: str = "", columns: str = "", paths: str = "", group: str = "", type: str = "", root_path: str = ".") -> str:
+    """
+    Set properties on many nodes in one call, with a result per node.
+    Select nodes by explicit paths, or by group and/or type under root_path.
+    Args:
+        values: JSON object applied to every node, e.g. {"light_energy": 2.0, "visible": true}.
+        columns: JSON object of per-node values, one per selected node in selection order,
+                 e.g. {"position": [{"$t": "Vector3", "v": [0, 0, 0]}, "1,0,0"]}.
+        paths: Node paths, comma-separated or a JSON array (relative to root_path).
+        group: Select every node in this group.
+        type: Select every node of this class (subclasses included).
+        root_path: Where selection and paths start (default scene root).
+    Values use the same forms as godot_set_property ("x,y,z" strings or typed {"$t", "v"}).
+    """
+    try:
+        params = _node_selector(paths, group, type, root_path)
+        params["values"] = json.loads(values) if values else {}
+        params["columns"] = json.loads(columns) if columns else {}
+    except json.JSONDecodeError as e:
+        return f"Error: Invalid JSON - {e}"
+    if not isinstance(params["values"], dict) or not isinstance(params["columns"], dict):
+        return "Error: values and columns must be JSON objects"
+    response = await send_to_godot_async("set_properties", params)
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+def _typed_or_text(value: str):
+    """A tool's string value, or the tagged Variant it holds ({"$t": ..., "v": ...})."""
+    if value.lstrip().startswith("{"):
+        try:
+            parsed = json.loads(value)
+        except json.JSONDecodeError:
+            return value
+        if variant_codec.is_encoded(parsed):
+            return parsed
+    return value
+
+# Typed property access for Python callers: values come back as variant_codec
+# types (tuples, array.array) and go out encoded, with no string round trip.
+
+async def get_node_properties(path: str) -> dict:
+    """A node's stored properties, decoded (e.g. {"position": Vector3(0.0, 1.0, 0.0)})."""
+    response = await send_to_godot_async("get_node_details", {"path": path, "typed": True})
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return variant_codec.decode(response.get("properties", {}))
+
+async def set_node_property(path: str, property: str, value):
+    """Set a property from a Python/variant_codec value; returns the stored value, decoded."""
+    response = await send_to_godot_async("set_property", {
+        "path": path, "property": property, "value": variant_codec.encode(value), "typed": True})
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return variant_codec.decode(response.get("value"))
+
 @mcp.tool()
-def godot_list_resources(path: str = "res://") -> str:
+async def godot_list_resources(path: str = "res://") -> str:
     """
     List files in the Godot filesystem.
     Args:
         path: Directory to list (defaults to "res://").
     """
-    response = send_to_godot("list_dir", {"path": path})
+    response = await send_to_godot_async("list_dir", {"path": path})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("files"), indent=2)
 
 @mcp.tool()
-def godot_create_script(path: str, content: str) -> str:
+async def godot_create_script(path: str, content: str) -> str:
     """
     Create or overwrite a GDScript file.
     Args:
@@ -206,65 +528,65 @@ def godot_create_script(path: str, content: str) -> str:
         content: The content of the script.
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("save_script", {"path": normalized_path, "content": content})
+    response = await send_to_godot_async("save_script", {"path": normalized_path, "content": content})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_delete_node(path: str) -> str:
+async def godot_delete_node(path: str) -> str:
     """
     Delete a node from the scene.
     Args:
         path: Path to the node.
     """
-    response = send_to_godot("delete_node", {"path": path})
+    response = await send_to_godot_async("delete_node", {"path": path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_reparent_node(path: str, new_parent_path: str) -> str:
+async def godot_reparent_node(path: str, new_parent_path: str) -> str:
     """
     Move a node to a new parent.
     Args:
         path: Path to the node to move.
         new_parent_path: Path to the new parent.
     """
-    response = send_to_godot("reparent_node", {"path": path, "new_parent": new_parent_path})
+    response = await send_to_godot_async("reparent_node", {"path": path, "new_parent": new_parent_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_move_node(path: str, index: int) -> str:
+async def godot_move_node(path: str, index: int) -> str:
     """
     Move a node to a specific index among its siblings (useful for 2D Z-ordering).
     Args:
         path: Path to the node.
         index: The new index (0 = bottom/back, -1 = top/front).
     """
-    response = send_to_godot("move_node", {"path": path, "index": index})
+    response = await send_to_godot_async("move_node", {"path": path, "index": index})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_set_shader_param(path: str, param: str, value: str) -> str:
+async def godot_set_shader_param(path: str, param: str, value: str) -> str:
     """
     Set a shader uniform value on a node's material.
     Args:
         path: Path to the node.
         param: Name of the shader uniform.
-        value: Value (as string, e.g. "1.0", "1,0,0,1", "true").
+        value: Value (as string, e.g. "1.0", "1,0,0,1", "true", or typed JSON like {"$t": "Color", "v": [1, 0, 0, 1]}).
     """
-    response = send_to_godot("set_shader_param", {"path": path, "param": param, "value": value})
+    response = await send_to_godot_async("set_shader_param", {"path": path, "param": param, "value": _typed_or_text(value)})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_instantiate_scene(path: str, parent_path: str = ".") -> str:
+async def godot_instantiate_scene(path: str, parent_path: str = ".") -> str:
     """
     Instantiate a .tscn file into the current scene.
     Args:
@@ -272,13 +594,13 @@ def godot_instantiate_scene(path: str, parent_path: str = ".") -> str:
         parent_path: Where to add it (defaults to root).
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("instantiate_scene", {"path": normalized_path, "parent_path": parent_path})
+    response = await send_to_godot_async("instantiate_scene", {"path": normalized_path, "parent_path": parent_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_save_scene(path: str = "", ignore_safety: bool = False) -> str:
+async def godot_save_scene(path: str = "", ignore_safety: bool = False) -> str:
     """
     Save the current scene.
     Args:
@@ -288,26 +610,26 @@ def godot_save_scene(path: str = "", ignore_safety: bool = False) -> str:
         ignore_safety: (Optional) Set to True to overwrite existing files that don't match the current scene.
     """
     normalized_path = normalize_godot_path(path) if path else ""
-    response = send_to_godot("save_scene", {"path": normalized_path, "ignore_safety": ignore_safety})
+    response = await send_to_godot_async("save_scene", {"path": normalized_path, "ignore_safety": ignore_safety})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_read_script(path: str) -> str:
+async def godot_read_script(path: str) -> str:
     """
     Read the content of a GDScript file.
     Args:
         path: Resource path (e.g. "res://player.gd" or "godot_project/player.gd").
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("read_script", {"path": normalized_path})
+    response = await send_to_godot_async("read_script", {"path": normalized_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("content")
 
 @mcp.tool()
-def godot_signal(source: str, signal: str, target: str, method: str, action: str = "connect") -> str:
+async def godot_signal(source: str, signal: str, target: str, method: str, action: str = "connect") -> str:
     """
     Connect or disconnect a signal.
     Args:
@@ -318,9 +640,9 @@ def godot_signal(source: str, signal: str, target: str, method: str, action: str
         action: "connect" or "disconnect"
     """
     if action == "connect":
-        response = send_to_godot("connect_signal", {"source": source, "signal": signal, "target": target, "method": method})
+        response = await send_to_godot_async("connect_signal", {"source": source, "signal": signal, "target": target, "method": method})
     elif action == "disconnect":
-        response = send_to_godot("disconnect_signal", {"source": source, "signal": signal, "target": target, "method": method})
+        response = await send_to_godot_async("disconnect_signal", {"source": source, "signal": signal, "target": target, "method": method})
     else:
         return f"Error: Unknown action '{action}'. Use 'connect' or 'disconnect'."
     if "error" in response:
@@ -328,22 +650,22 @@ def godot_signal(source: str, signal: str, target: str, method: str, action: str
     return response.get("result")
 
 @mcp.tool()
-def godot_game(action: str = "play") -> str:
+async def godot_game(action: str = "play") -> str:
     """
     Control game execution.
     Args:
         action: "play" (F5) or "stop" (F8)
     """
     if action == "play":
-        response = send_to_godot("play_game")
+        response = await send_to_godot_async("play_game")
     elif action == "stop":
-        response = send_to_godot("stop_game")
+        response = await send_to_godot_async("stop_game")
     else:
         return f"Error: Unknown action '{action}'. Use 'play' or 'stop'."
     return response.get("result")
 
 @mcp.tool()
-def godot_setup_input_map(action: str, event_type: str, key: str = "", joy_button: int = -1) -> str:
+async def godot_setup_input_map(action: str, event_type: str, key: str = "", joy_button: int = -1) -> str:
     """
     Add an action to the Input Map.
     Args:
@@ -358,47 +680,47 @@ def godot_setup_input_map(action: str, event_type: str, key: str = "", joy_butto
         "key": key,
         "joy_button": joy_button
     }
-    response = send_to_godot("setup_input_map", params)
+    response = await send_to_godot_async("setup_input_map", params)
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_get_selection() -> str:
+async def godot_get_selection() -> str:
     """
     Get the list of currently selected nodes in the editor.
     """
-    response = send_to_godot("get_selection")
+    response = await send_to_godot_async("get_selection")
     return json.dumps(response.get("selection", []), indent=2)
 
 @mcp.tool()
-def godot_set_project_setting(name: str, value: str) -> str:
+async def godot_set_project_setting(name: str, value: str) -> str:
     """
     Set a project setting.
     Args:
         name: Setting path (e.g. "display/window/size/viewport_width").
         value: The value to set (will be auto-converted if possible).
     """
-    response = send_to_godot("set_project_setting", {"name": name, "value": value})
+    response = await send_to_godot_async("set_project_setting", {"name": name, "value": value})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_create_folder(path: str) -> str:
+async def godot_create_folder(path: str) -> str:
     """
     Create a folder in the filesystem.
     Args:
         path: Folder path (must start with res://).
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("create_folder", {"path": normalized_path})
+    response = await send_to_godot_async("create_folder", {"path": normalized_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_create_shader(path: str, code: str) -> str:
+async def godot_create_shader(path: str, code: str) -> str:
     """
     Create a .gdshader file.
     Args:
@@ -406,13 +728,13 @@ def godot_create_shader(path: str, code: str) -> str:
         code: The shader code.
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("create_shader", {"path": normalized_path, "code": code})
+    response = await send_to_godot_async("create_shader", {"path": normalized_path, "code": code})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_apply_shader(node_path: str, shader_path: str) -> str:
+async def godot_apply_shader(node_path: str, shader_path: str) -> str:
     """
     Apply a shader to a node (sets material_override or surface_material).
     Args:
@@ -420,103 +742,201 @@ def godot_apply_shader(node_path: str, shader_path: str) -> str:
         shader_path: Path to the .gdshader file.
     """
     normalized_shader_path = normalize_godot_path(shader_path)
-    response = send_to_godot("apply_shader", {"node_path": node_path, "shader_path": normalized_shader_path})
+    response = await send_to_godot_async("apply_shader", {"node_path": node_path, "shader_path": normalized_shader_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_rename_node(path: str, new_name: str) -> str:
+async def godot_rename_node(path: str, new_name: str) -> str:
     """
     Rename a node.
     Args:
         path: Path to the node to rename.
         new_name: The new name for the node.
     """
-    response = send_to_godot("rename_node", {"path": path, "new_name": new_name})
+    response = await send_to_godot_async("rename_node", {"path": path, "new_name": new_name})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_duplicate_node(path: str, new_name: str = "") -> str:
+async def godot_duplicate_node(path: str, new_name: str = "") -> str:
     """
     Duplicate a node (and all its children).
     Args:
         path: Path to the node to duplicate.
         new_name: (Optional) Name for the duplicate.
     """
-    response = send_to_godot("duplicate_node", {"path": path, "new_name": new_name})
+    response = await send_to_godot_async("duplicate_node", {"path": path, "new_name": new_name})
     if "error" in response:
         return f"Error: {response['error']}"
     return f"Duplicated: {response.get('path')}"
 
 @mcp.tool()
-def godot_new_scene(root_type: str = "Node3D", name: str = "Root") -> str:
+async def godot_new_scene(root_type: str = "Node3D", name: str = "Root") -> str:
     """
     Create a new empty scene and open it.
     Args:
         root_type: Type of the root node (e.g. "Node2D", "Node3D", "Control").
         name: Name for the root node.
     """
-    response = send_to_godot("new_scene", {"root_type": root_type, "name": name})
+    response = await send_to_godot_async("new_scene", {"root_type": root_type, "name": name})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_open_scene(path: str) -> str:
+async def godot_open_scene(path: str) -> str:
     """
     Open an existing scene file.
     Args:
         path: Resource path to the scene (e.g. "res://levels/level1.tscn").
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("open_scene", {"path": normalized_path})
+    response = await send_to_godot_async("open_scene", {"path": normalized_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_list_signals(path: str) -> str:
+async def godot_list_signals(path: str) -> str:
     """
     List all signals available on a node.
     Args:
         path: Path to the node (e.g. "Player" or "." for root).
     """
-    response = send_to_godot("list_signals", {"path": path})
+    response = await send_to_godot_async("list_signals", {"path": path})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("signals", []), indent=2)
 
 @mcp.tool()
-def godot_list_methods(path: str) -> str:
+async def godot_list_methods(path: str) -> str:
     """
     List all methods available on a node.
     Args:
         path: Path to the node (e.g. "Player" or "." for root).
     """
-    response = send_to_godot("list_methods", {"path": path})
+    response = await send_to_godot_async("list_methods", {"path": path})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("methods", []), indent=2)
 
+# ============ Batch Commands ============
+
+@mcp.tool()
+async def godot_batch(steps: str, stop_on_error: bool = True) -> str:
+    """
+    Run many bridge commands in one round trip (and one editor frame).
+    Args:
+        steps: JSON array of {"method": ..., "params": {...}} objects using the bridge
+               command names (e.g. "add_node", "set_property", "add_to_group").
+               A param value of "$N.key" is replaced with `key` from step N's result
+               (0-based), and "${N.key}" is substituted inside longer strings.
+               Example: [{"method": "add_node", "params": {"type": "Node3D", "name": "Enemy"}},
+                         {"method": "add_node", "params": {"type": "MeshInstance3D", "parent_path": "$0.path"}}]
+        stop_on_error: Stop at the first failing step (default True).
+    Returns: JSON with a summary and one result per executed step.
+    """
+    try:
+        parsed = json.loads(steps)
+    except json.JSONDecodeError as e:
+        return f"Error: Invalid JSON steps - {e}"
+    if not isinstance(parsed, list):
+        return "Error: steps must be a JSON array"
+    response = await send_to_godot_async("batch", {"steps": parsed, "stop_on_error": stop_on_error})
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+# ============ Background Jobs ============
+
+@mcp.tool()
+async def godot_job_status(job_id: int = 0) -> str:
+    """
+    Check on commands running in the background (terrain generation, resource
+    replacement, file search) that were started with background=True.
+    Args:
+        job_id: Job to query (0 = list all recent jobs).
+    Returns: JSON with status (running/done/error/cancelled), progress (0-1),
+             elapsed_ms and, once finished, the command's result.
+    """
+    params = {"job_id": job_id} if job_id else {}
+    response = await send_to_godot_async("job_status", params)
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+@mcp.tool()
+async def godot_job_cancel(job_id: int) -> str:
+    """
+    Cancel a background job. The job stops at its next checkpoint and nothing
+    is added to the scene.
+    Args:
+        job_id: Job id returned by the command that started it.
+    """
+    response = await send_to_godot_async("job_cancel", {"job_id": job_id})
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return response.get("result")
+
+# ============ Metrics ============
+
+@mcp.tool()
+async def godot_metrics(format: str = "json", output_path: str = "", include_bridge: bool = True,
+                        reset: bool = False) -> str:
+    """
+    Per-method call counts, error rates, request/response bytes and latency
+    histograms, to find slow tools. Client side: round trip per call, plus the
+    bridge's queue and execution time for each reply. Bridge side: the same
+    counted inside Godot for every client, plus busy rejections.
+    Args:
+        format: "json" (summaries with p50/p95/p99), "prometheus" (text exposition format) or "jsonl" (one line).
+        output_path: Also write to this local file: prometheus replaces it, json/jsonl append one line.
+        include_bridge: Fetch the bridge's own numbers too.
+        reset: Start counting afresh after this snapshot (both sides).
+    """
+    if format not in ("json", "prometheus", "jsonl"):
+        return f"Error: Unknown format '{format}' (use json, prometheus or jsonl)"
+    snapshot = _metrics.snapshot()
+    if reset:
+        _metrics.reset()
+    if include_bridge:
+        response = await send_to_godot_async("get_metrics", {"reset": reset})
+        if "error" in response:
+            snapshot["bridge_error"] = response["error"]
+        else:
+            snapshot["bridge"] = metrics.bridge_summary(response["result"])
+
+    if output_path:
+        try:
+            await asyncio.to_thread(metrics.export, output_path, snapshot,
+                                    "prometheus" if format == "prometheus" else "jsonl")
+        except OSError as e:
+            return f"Error: Could not write {output_path} - {e}"
+    if format == "prometheus":
+        return metrics.to_prometheus(snapshot)
+    if format == "jsonl":
+        return metrics.to_json_line(snapshot)
+    return json.dumps(snapshot, indent=2)
+
 # ============ Animation Tools ============
 
 @mcp.tool()
-def godot_list_animations(player_path: str) -> str:
+async def godot_list_animations(player_path: str) -> str:
     """
     List all animations on an AnimationPlayer node.
     Args:
         player_path: Path to the AnimationPlayer node.
     """
-    response = send_to_godot("list_animations", {"path": player_path})
+    response = await send_to_godot_async("list_animations", {"path": player_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("animations", []), indent=2)
 
 @mcp.tool()
-def godot_animation(player_path: str, action: str = "play", animation: str = "", start_time: float = 0.0, backwards: bool = False) -> str:
+async def godot_animation(player_path: str, action: str = "play", animation: str = "", start_time: float = 0.0, backwards: bool = False) -> str:
     """
     Control AnimationPlayer playback.
     Args:
@@ -529,15 +949,15 @@ def godot_animation(player_path: str, action: str = "play", animation: str = "",
     if action == "play":
         if not animation:
             return "Error: 'animation' parameter required for play action"
-        response = send_to_godot("play_animation", {
+        response = await send_to_godot_async("play_animation", {
             "path": player_path,
             "animation": animation,
             "start_time": start_time,
         })
     elif action == "stop":
-        response = send_to_godot("stop_animation", {"path": player_path})
+        response = await send_to_godot_async("stop_animation", {"path": player_path})
     elif action == "seek":
-        response = send_to_godot("seek_animation", {
+        response = await send_to_godot_async("seek_animation", {
             "path": player_path,
             "time": start_time,
             "update": True,
@@ -550,7 +970,7 @@ def godot_animation(player_path: str, action: str = "play", animation: str = "",
     return response.get("result")
 
 @mcp.tool()
-def godot_create_simple_animation(
+async def godot_create_simple_animation(
     player_path: str,
     animation_name: str,
     node_path: str,
@@ -570,7 +990,7 @@ def godot_create_simple_animation(
         end_value: Ending value as string (e.g. "0,2,0").
         duration: Duration in seconds.
     """
-    response = send_to_godot("create_simple_animation", {
+    response = await send_to_godot_async("create_simple_animation", {
         "player_path": player_path,
         "animation_name": animation_name,
         "node_path": node_path,
@@ -586,7 +1006,7 @@ def godot_create_simple_animation(
 # ============ Group Management ============
 
 @mcp.tool()
-def godot_group(path: str, action: str = "get", group: str = "") -> str:
+async def godot_group(path: str, action: str = "get", group: str = "") -> str:
     """
     Manage node groups.
     Args:
@@ -595,18 +1015,18 @@ def godot_group(path: str, action: str = "get", group: str = "") -> str:
         group: Group name (required for add/remove)
     """
     if action == "get":
-        response = send_to_godot("get_groups", {"path": path})
+        response = await send_to_godot_async("get_groups", {"path": path})
         if "error" in response:
             return f"Error: {response['error']}"
         return json.dumps(response.get("groups", []), indent=2)
     elif action == "add":
         if not group:
             return "Error: 'group' parameter required for add action"
-        response = send_to_godot("add_to_group", {"path": path, "group": group})
+        response = await send_to_godot_async("add_to_group", {"path": path, "group": group})
     elif action == "remove":
         if not group:
             return "Error: 'group' parameter required for remove action"
-        response = send_to_godot("remove_from_group", {"path": path, "group": group})
+        response = await send_to_godot_async("remove_from_group", {"path": path, "group": group})
     else:
         return f"Error: Unknown action '{action}'. Use 'add', 'remove', or 'get'."
     if "error" in response:
@@ -616,7 +1036,7 @@ def godot_group(path: str, action: str = "get", group: str = "") -> str:
 # ============ Audio Tools ============
 
 @mcp.tool()
-def godot_create_audio_player(
+async def godot_create_audio_player(
     parent_path: str = ".",
     name: str = "AudioPlayer",
     is_3d: bool = False,
@@ -628,7 +1048,7 @@ def godot_create_audio_player(
     Create an AudioStreamPlayer or AudioStreamPlayer3D, optionally assigning a stream.
     """
     normalized_audio_path = normalize_godot_path(audio_path) if audio_path else ""
-    response = send_to_godot("create_audio_player", {
+    response = await send_to_godot_async("create_audio_player", {
         "parent_path": parent_path,
         "name": name,
         "is_3d": is_3d,
@@ -641,7 +1061,7 @@ def godot_create_audio_player(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_audio(path: str, action: str = "play") -> str:
+async def godot_audio(path: str, action: str = "play") -> str:
     """
     Control audio playback.
     Args:
@@ -649,9 +1069,9 @@ def godot_audio(path: str, action: str = "play") -> str:
         action: "play" or "stop"
     """
     if action == "play":
-        response = send_to_godot("play_audio", {"path": path})
+        response = await send_to_godot_async("play_audio", {"path": path})
     elif action == "stop":
-        response = send_to_godot("stop_audio", {"path": path})
+        response = await send_to_godot_async("stop_audio", {"path": path})
     else:
         return f"Error: Unknown action '{action}'. Use 'play' or 'stop'."
     if "error" in response:
@@ -659,14 +1079,14 @@ def godot_audio(path: str, action: str = "play") -> str:
     return response.get("result")
 
 @mcp.tool()
-def godot_set_bus_volume(bus: str, volume_db: float) -> str:
+async def godot_set_bus_volume(bus: str, volume_db: float) -> str:
     """
     Set a bus volume in decibels.
     Args:
         bus: Bus name (e.g. "Master").
         volume_db: Volume in dB (e.g. -6.0).
     """
-    response = send_to_godot("set_bus_volume", {"bus": bus, "volume_db": volume_db})
+    response = await send_to_godot_async("set_bus_volume", {"bus": bus, "volume_db": volume_db})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
@@ -674,7 +1094,7 @@ def godot_set_bus_volume(bus: str, volume_db: float) -> str:
 # ============ Script Attachment ============
 
 @mcp.tool()
-def godot_attach_script(node_path: str, script_path: str) -> str:
+async def godot_attach_script(node_path: str, script_path: str) -> str:
     """
     Attach an existing script to a node.
     Args:
@@ -682,7 +1102,7 @@ def godot_attach_script(node_path: str, script_path: str) -> str:
         script_path: Resource path to the script (e.g. "res://player.gd").
     """
     normalized_script_path = normalize_godot_path(script_path)
-    response = send_to_godot("attach_script", {"node_path": node_path, "script_path": normalized_script_path})
+    response = await send_to_godot_async("attach_script", {"node_path": node_path, "script_path": normalized_script_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
@@ -690,25 +1110,25 @@ def godot_attach_script(node_path: str, script_path: str) -> str:
 # ============ Find Nodes ============
 
 @mcp.tool()
-def godot_find_nodes_by_type(type: str) -> str:
+async def godot_find_nodes_by_type(type: str) -> str:
     """
     Find all nodes of a specific type in the scene.
     Args:
         type: The class name (e.g. "Area3D", "MeshInstance3D", "Label").
     """
-    response = send_to_godot("find_nodes_by_type", {"type": type})
+    response = await send_to_godot_async("find_nodes_by_type", {"type": type})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("nodes", []), indent=2)
 
 @mcp.tool()
-def godot_find_nodes_by_group(group: str) -> str:
+async def godot_find_nodes_by_group(group: str) -> str:
     """
     Find all nodes in a specific group.
     Args:
         group: The group name (e.g. "enemies", "coins").
     """
-    response = send_to_godot("find_nodes_by_group", {"group": group})
+    response = await send_to_godot_async("find_nodes_by_group", {"group": group})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("nodes", []), indent=2)
@@ -716,17 +1136,17 @@ def godot_find_nodes_by_group(group: str) -> str:
 # ============ Debug/Errors ============
 
 @mcp.tool()
-def godot_get_errors() -> str:
+async def godot_get_errors() -> str:
     """
     Get recent errors from the Godot editor (limited - check Output panel for full logs).
     """
-    response = send_to_godot("get_errors", {})
+    response = await send_to_godot_async("get_errors", {})
     return json.dumps(response, indent=2)
 
 # ============ Signal Utilities ============
 
 @mcp.tool()
-def godot_list_signal_connections(source: str, signal: str = "") -> str:
+async def godot_list_signal_connections(source: str, signal: str = "") -> str:
     """
     List connections for a given node and optional signal.
     Args:
@@ -736,7 +1156,7 @@ def godot_list_signal_connections(source: str, signal: str = "") -> str:
     params = {"source": source}
     if signal:
         params["signal"] = signal
-    response = send_to_godot("list_signal_connections", params)
+    response = await send_to_godot_async("list_signal_connections", params)
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("connections", []), indent=2)
@@ -744,13 +1164,13 @@ def godot_list_signal_connections(source: str, signal: str = "") -> str:
 # ============ Editor Navigation ============
 
 @mcp.tool()
-def godot_focus_node(path: str) -> str:
+async def godot_focus_node(path: str) -> str:
     """
     Focus the editor camera/selection on a specific node.
     Args:
         path: Path to the node to focus on.
     """
-    response = send_to_godot("focus_node", {"path": path})
+    response = await send_to_godot_async("focus_node", {"path": path})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
@@ -758,57 +1178,68 @@ def godot_focus_node(path: str) -> str:
 # ============ Screenshots ============
 
 @mcp.tool()
-def godot_get_editor_screenshot() -> str:
+async def godot_get_editor_screenshot() -> Image | str:
     """
     Capture a screenshot of the Godot editor window.
-    Returns base64-encoded PNG image.
+    Returns the PNG image.
     """
-    response = send_to_godot("get_editor_screenshot", {})
+    response = await send_to_godot_async("get_editor_screenshot", {})
     if "error" in response:
         return f"Error: {response['error']}"
-    return f"Screenshot captured (base64 PNG, {len(response.get('image_base64', ''))} chars)"
+    return _screenshot_image(response)
 
 @mcp.tool()
-def godot_get_game_screenshot() -> str:
+async def godot_get_game_screenshot() -> Image | str:
     """
     Capture a screenshot of the running game window.
     Requires game to be running (use godot_play_game first).
     """
-    response = send_to_godot("get_game_screenshot", {})
+    response = await send_to_godot_async("get_game_screenshot", {})
     if "error" in response:
         return f"Error: {response['error']}"
-    return f"Screenshot captured (base64 PNG)"
+    return _screenshot_image(response)
+
+def _screenshot_image(response: dict) -> Image:
+    # Raw PNG bytes arrive over binary frames; older plugins send base64
+    data = response.get("binary")
+    if data is None:
+        data = base64.b64decode(response.get("image_base64", ""))
+    return Image(data=bytes(data), format=response.get("format", "png"))
 
 # ============ File Search ============
 
 @mcp.tool()
-def godot_search_files(query: str, extension: str = "") -> str:
+async def godot_search_files(query: str, extension: str = "", limit: int = 50) -> str:
     """
     Search for files in the project using fuzzy matching.
+    Results are ranked best first: exact name, name prefix, name substring,
+    folder/path substring, then in-order letters ("plyctl" finds player_controller.gd)
+    and near misspellings. Space-separated words must all match.
     Args:
         query: Search query (matches filename).
         extension: Optional file extension filter (e.g. ".gd", ".tscn").
+        limit: Maximum number of results (default 50, 0 = all).
     """
-    response = send_to_godot("search_files", {"query": query, "extension": extension})
+    response = await send_to_godot_async("search_files", {"query": query, "extension": extension, "limit": limit})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("files", []), indent=2)
 
 @mcp.tool()
-def godot_file_exists(path: str) -> str:
+async def godot_file_exists(path: str) -> str:
     """
     Check if a file exists in the Godot project.
     Args:
         path: Resource path (e.g. "res://player.gd").
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("file_exists", {"path": normalized_path})
+    response = await send_to_godot_async("file_exists", {"path": normalized_path})
     if "error" in response:
         return f"Error: {response['error']}"
     return "true" if response.get("exists") else "false"
 
 @mcp.tool()
-def godot_set_collision_layer(node_path: str, layer_number: int, value: bool) -> str:
+async def godot_set_collision_layer(node_path: str, layer_number: int, value: bool) -> str:
     """
     Set a collision layer or mask bit (1-32) for a CollisionObject3D/2D.
     Args:
@@ -816,7 +1247,7 @@ def godot_set_collision_layer(node_path: str, layer_number: int, value: bool) ->
         layer_number: Layer number (1-32).
         value: True to enable, False to disable.
     """
-    response = send_to_godot("set_collision_layer", {
+    response = await send_to_godot_async("set_collision_layer", {
         "node_path": node_path, 
         "layer": layer_number, 
         "value": value
@@ -828,7 +1259,7 @@ def godot_set_collision_layer(node_path: str, layer_number: int, value: bool) ->
 # ============ UID Conversion ============
 
 @mcp.tool()
-def godot_uid(value: str) -> str:
+async def godot_uid(value: str) -> str:
     """
     Convert between UID and resource path.
     Args:
@@ -836,14 +1267,14 @@ def godot_uid(value: str) -> str:
                Auto-detects direction based on prefix.
     """
     if value.startswith("uid://"):
-        response = send_to_godot("uid_to_path", {"uid": value})
+        response = await send_to_godot_async("uid_to_path", {"uid": value})
         if "error" in response:
             return f"Error: {response['error']}"
         return response.get("path")
     else:
         # Assume it's a path (or normalize it to one)
         normalized_path = normalize_godot_path(value)
-        response = send_to_godot("path_to_uid", {"path": normalized_path})
+        response = await send_to_godot_async("path_to_uid", {"path": normalized_path})
         if "error" in response:
             return f"Error: {response['error']}"
         return response.get("uid")
@@ -851,87 +1282,462 @@ def godot_uid(value: str) -> str:
 # ============ Scene File Content ============
 
 @mcp.tool()
-def godot_get_scene_file_content() -> str:
+async def godot_get_scene_file_content() -> str:
     """
     Get the raw text content of the current scene file (.tscn).
     Useful for seeing exact property values and resources.
     """
-    response = send_to_godot("get_scene_file_content", {})
+    response = await send_to_godot_async("get_scene_file_content", {})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("content")
 
 @mcp.tool()
-def godot_delete_scene(path: str) -> str:
+async def godot_delete_scene(path: str, force: bool = False) -> str:
     """
-    Delete a scene file from the project.
+    Delete a scene file from the project. Refuses while other files still
+    reference it (see godot_dependents) unless forced.
     Args:
         path: Path to the scene file (e.g. "res://levels/level1.tscn").
+        force: Delete even though it would leave broken references.
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("delete_scene", {"path": normalized_path})
+    graph = await asyncio.to_thread(_dependency_graph)
+    dependents = graph.dependents(normalized_path)
+    if dependents and not force:
+        return (f"Error: {normalized_path} is still used by {len(dependents)} file(s); "
+                "pass force=True to delete anyway\n" + "\n".join(dependents))
+    response = await send_to_godot_async("delete_scene", {"path": normalized_path})
     if "error" in response:
         return f"Error: {response['error']}"
+    await asyncio.to_thread(graph.update, [normalized_path])
+    if dependents:
+        return response.get("result") + "\nWarning: these files now reference a missing scene:\n" + "\n".join(dependents)
     return response.get("result")
 
 @mcp.tool()
-def godot_duplicate_scene(source_path: str, dest_path: str) -> str:
+async def godot_duplicate_scene(source_path: str, dest_path: str) -> str:
     """
-    Duplicate a scene file.
+    Duplicate a scene file (the copy gets a UID of its own). Lists any resources
+    the scene references that no longer exist.
     Args:
         source_path: Existing .tscn scene path.
         dest_path: New .tscn scene path.
     """
     normalized_source = normalize_godot_path(source_path)
     normalized_dest = normalize_godot_path(dest_path)
-    response = send_to_godot("duplicate_scene", {
+    response = await send_to_godot_async("duplicate_scene", {
         "source_path": normalized_source,
         "dest_path": normalized_dest,
     })
     if "error" in response:
         return f"Error: {response['error']}"
+    graph = await asyncio.to_thread(_dependency_graph)
+    await asyncio.to_thread(graph.update, [normalized_dest])
+    missing = [d for d in graph.dependencies(normalized_dest) if d["missing"]]
+    if missing:
+        response["missing_dependencies"] = missing
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_rename_scene(old_path: str, new_path: str) -> str:
+async def godot_rename_scene(old_path: str, new_path: str, update_references: bool = True) -> str:
     """
-    Rename a scene file.
+    Rename a scene file, and repoint the files that reference it (known from the
+    dependency graph, so there is no project-wide scan).
+    Args:
+        old_path: Existing .tscn scene path.
+        new_path: New .tscn scene path.
+        update_references: Rewrite references in dependent files; if False they
+                           are only listed.
     """
     normalized_old = normalize_godot_path(old_path)
     normalized_new = normalize_godot_path(new_path)
-    response = send_to_godot("rename_scene", {
+    graph = await asyncio.to_thread(_dependency_graph)
+    dependents = graph.dependents(normalized_old)
+    old_uid = graph.uid_of(normalized_old)
+    response = await send_to_godot_async("rename_scene", {
         "old_path": normalized_old,
         "new_path": normalized_new,
     })
     if "error" in response:
         return f"Error: {response['error']}"
+    await asyncio.to_thread(graph.update, [normalized_old, normalized_new])
+    if not dependents:
+        return json.dumps(response, indent=2)
+    if not update_references:
+        response["broken_references"] = dependents
+        return json.dumps(response, indent=2)
+    try:
+        rename = refactor.Rename(normalized_old, normalized_new, old_uid)  # The scene keeps its UID
+        files = [project_file(d) for d in dependents]
+        result = await asyncio.to_thread(refactor.refactor, GODOT_PROJECT_DIR, rename, False, 1, files)
+    except (OSError, ValueError) as e:
+        return f"Error: Scene renamed, but its references could not be updated: {e}"
+    if result["errors"]:
+        response["broken_references"] = dependents
+        response["errors"] = [f for f in result["files"] if "error" in f]
+    else:
+        response["references_updated"] = result["written"]
+        if result["written"]:
+            response["editor"] = await _update_editor_files(result["written"])
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_replace_resource_in_scene(scene_path: str, old_resource: str, new_resource: str) -> str:
+async def godot_replace_resource_in_scene(scene_path: str, old_resource: str, new_resource: str, background: bool = False) -> str:
     """
     Replace all uses of a resource path inside a scene file.
     Args:
         scene_path: .tscn path.
         old_resource: Existing resource path to replace.
         new_resource: New resource path.
+        background: Return a job id right away instead of waiting (see godot_job_status).
     """
     normalized_scene = normalize_godot_path(scene_path)
     normalized_old = normalize_godot_path(old_resource)
     normalized_new = normalize_godot_path(new_resource)
-    response = send_to_godot("replace_resource_in_scene", {
+    response = await send_to_godot_async("replace_resource_in_scene", {
         "scene_path": normalized_scene,
         "old_resource": normalized_old,
         "new_resource": normalized_new,
+        "async": background,
     })
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
 
+# ============ Scene Files on Disk ============
+
+# Parsed .tscn/.tres files by local path: (mtime_ns, size, ResourceFile)
+_scene_files = {}
+SCENE_FILE_CACHE_SIZE = 32
+
+def _load_scene_file(path: str) -> tscn.ResourceFile:
+    """Parse a project scene/resource, reusing the last parse while the file is unchanged."""
+    local = project_file(path)
+    stat = os.stat(local)
+    cached = _scene_files.get(local)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    parsed = tscn.load(local)
+    if len(_scene_files) >= SCENE_FILE_CACHE_SIZE:
+        _scene_files.pop(next(iter(_scene_files)))
+    _scene_files[local] = (stat.st_mtime_ns, stat.st_size, parsed)
+    return parsed
+
+def _scene_file_value(raw: str, typed: bool):
+    if not typed:
+        return raw
+    try:
+        return tscn.to_json(tscn.parse_value(raw))
+    except (ValueError, TypeError):
+        return raw  # Something the parser doesn't model: keep the text
+
+def _query_scene_file(path: str, node_path: str, type: str, group: str, include_properties: bool, typed: bool) -> dict:
+    f = _load_scene_file(path)
+    header = f.header
+    ext = {s.attr("id"): s for s in f.ext_resources}
+    out = {
+        "path": normalize_godot_path(path),
+        "kind": f.kind,
+        "format": header.attr("format"),
+        "uid": header.attr("uid", ""),
+        "ext_resources": [{"id": s.attr("id"), "type": s.attr("type"), "path": s.attr("path"), "uid": s.attr("uid", "")}
+                          for s in ext.values()],
+        "sub_resources": [],
+    }
+    for s in f.sub_resources:
+        entry = {"id": s.attr("id"), "type": s.attr("type")}
+        if include_properties:
+            entry["properties"] = {k: _scene_file_value(v, typed) for k, v in s.props.items()}
+        out["sub_resources"].append(entry)
+    if f.kind == "gd_resource":
+        out["type"] = header.attr("type")
+        if f.resource is not None:
+            out["properties"] = {k: _scene_file_value(v, typed) for k, v in f.resource.props.items()}
+        return out
+
+    paths = f.descendants(node_path.strip("/") or ".") if f.nodes else []
+    if node_path and not paths:
+        raise ValueError(f"Node not found: {node_path}")
+    nodes = []
+    for p in paths:
+        s = f.node(p)
+        groups = s.attr("groups", [])
+        instance = s.attr("instance")
+        node_type = s.attr("type", "")
+        if type and node_type != type:
+            continue
+        if group and group not in groups:
+            continue
+        entry = {"path": p, "type": node_type}
+        if instance is not None:
+            source = ext.get(str(instance))
+            entry["instance"] = source.attr("path") if source else str(instance)
+        if groups:
+            entry["groups"] = groups
+        if include_properties:
+            entry["properties"] = {k: _scene_file_value(v, typed) for k, v in s.props.items()}
+        nodes.append(entry)
+    out["node_count"] = len(f.nodes)
+    out["nodes"] = nodes
+    out["connections"] = [{k: s.attr(k) for k in s.attrs} for s in f.connections]
+    return out
+
+@mcp.tool()
+async def godot_scene_file_query(path: str, node_path: str = "", type: str = "", group: str = "",
+                                 include_properties: bool = False, typed: bool = False) -> str:
+    """
+    Read a .tscn/.tres file straight from disk (GODOT_PROJECT_DIR) without opening it
+    in the editor: resources, nodes, groups, instances and connections.
+    Args:
+        path: Scene or resource path (e.g. "res://levels/level1.tscn").
+        node_path: Only this node and its descendants ("." is the root).
+        type: Only nodes of this class.
+        group: Only nodes in this group.
+        include_properties: Include each node's / sub-resource's stored properties.
+        typed: Return property values as tagged JSON (like godot_get_node_details typed=True)
+               instead of the raw text stored in the file.
+    """
+    try:
+        result = await asyncio.to_thread(_query_scene_file, path, node_path, type, group, include_properties, typed)
+    except (OSError, ValueError) as e:
+        return f"Error: {e}"
+    return json.dumps(result, indent=2)
+
+def _patch_section(f: tscn.ResourceFile, op: dict) -> tscn.Section:
+    if "sub_resource" in op:
+        section = f.sub_resource(op["sub_resource"])
+        if section is None:
+            raise ValueError(f"No sub_resource with id {op['sub_resource']}")
+        return section
+    if f.kind == "gd_resource":
+        if f.resource is None:
+            raise ValueError("The file has no [resource] section")
+        return f.resource
+    section = f.node(op.get("node", "."))
+    if section is None:
+        raise ValueError(f"Node not found: {op.get('node')}")
+    return section
+
+def _patch_value(f: tscn.ResourceFile, op: dict) -> str:
+    """Godot text for an operation's "raw" text, "resource" path or JSON "value"."""
+    if "raw" in op:
+        tscn.parse_value(op["raw"])  # Refuse text Godot couldn't load
+        return op["raw"]
+    if "resource" in op:
+        resource_id = f.add_ext_resource(op.get("resource_type", "Resource"), normalize_godot_path(op["resource"]))
+        return tscn.format_value(tscn.ExtResource(resource_id))
+    if "value" not in op:
+        raise ValueError('Needs "value", "raw" or "resource"')
+    return tscn.format_value(tscn.from_json(op["value"]))
+
+def _apply_scene_patch(f: tscn.ResourceFile, op: dict):
+    kind = op.get("op")
+    if kind == "set_property":
+        section = _patch_section(f, op)
+        section.set_prop(op["property"], _patch_value(f, op))
+        return None
+    if kind == "remove_property":
+        return _patch_section(f, op).remove_prop(op["property"])
+    if kind == "add_node":
+        instance = ""
+        if op.get("instance"):
+            instance = f.add_ext_resource("PackedScene", normalize_godot_path(op["instance"]))
+        section = f.add_node(op["name"], op.get("type", ""), op.get("parent", "."), instance)
+        for key, value in (op.get("properties") or {}).items():
+            section.set_prop(key, tscn.format_value(tscn.from_json(value)))
+        return f.node_path(section)
+    if kind == "remove_node":
+        return f.remove_node(op["node"])
+    if kind == "rename_node":
+        f.rename_node(op["node"], op["name"])
+        return None
+    if kind == "add_ext_resource":
+        return f.add_ext_resource(op["type"], normalize_godot_path(op["path"]), op.get("uid", ""))
+    if kind == "set_ext_resource_path":
+        return f.set_ext_resource_path(normalize_godot_path(op["old_path"]), normalize_godot_path(op["new_path"]),
+                                       op.get("uid"))
+    if kind == "remove_unused_resources":
+        return f.remove_unused_resources()
+    raise ValueError(f"Unknown op: {kind}")
+
+def _patch_scene_file(path: str, operations: list, dry_run: bool) -> dict:
+    local = project_file(path)
+    with open(local, "r", encoding="utf-8", newline="") as fh:
+        before = fh.read()
+    f = tscn.parse(before)
+    results = []
+    for i, op in enumerate(operations):
+        try:
+            results.append(_apply_scene_patch(f, op))
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"Operation {i} ({op.get('op')}): {e}") from e
+    after = f.dump()
+    out = {"path": normalize_godot_path(path), "changed": after != before, "results": results, "dry_run": dry_run}
+    if dry_run:
+        out["diff"] = "".join(difflib.unified_diff(before.splitlines(keepends=True), after.splitlines(keepends=True),
+                                                   out["path"], out["path"]))
+    elif after != before:
+        f.save(local)
+        _scene_files.pop(local, None)
+    return out
+
+@mcp.tool()
+async def godot_scene_file_patch(path: str, operations: str, dry_run: bool = False) -> str:
+    """
+    Edit a .tscn/.tres file on disk without opening it in the editor. All operations
+    apply or none do; the file is replaced atomically and untouched lines keep their
+    exact text. A running editor is told to reload the file.
+    Args:
+        path: Scene or resource path (e.g. "res://levels/level1.tscn").
+        operations: JSON list of operations, applied in order:
+            {"op": "set_property", "node": "Player", "property": "speed", "value": 5.0}
+                (target "sub_resource": id instead of "node"; .tres files target their [resource];
+                 give "raw": "Vector3(1, 2, 3)" for Godot text, or "resource": "res://m.tres"
+                 with optional "resource_type" to reference a file; "value" takes tagged JSON too)
+            {"op": "remove_property", "node": "Player", "property": "speed"}
+            {"op": "add_node", "name": "Light", "type": "OmniLight3D", "parent": ".", "properties": {...}}
+                (or "instance": "res://enemy.tscn" instead of "type")
+            {"op": "remove_node", "node": "Player/Old"}
+            {"op": "rename_node", "node": "Player", "name": "Hero"}
+            {"op": "add_ext_resource", "type": "Texture2D", "path": "res://icon.svg"}
+            {"op": "set_ext_resource_path", "old_path": "res://a.png", "new_path": "res://b.png"}
+            {"op": "remove_unused_resources"}
+        dry_run: Don't write; return a unified diff of what would change.
+    """
+    try:
+        ops = json.loads(operations)
+    except json.JSONDecodeError as e:
+        return f"Error: Invalid operations JSON - {e}"
+    if not isinstance(ops, list):
+        return "Error: operations must be a JSON list"
+    if not all(isinstance(op, dict) for op in ops):
+        return "Error: each operation must be a JSON object"
+    try:
+        result = await asyncio.to_thread(_patch_scene_file, path, ops, dry_run)
+    except (OSError, ValueError) as e:
+        return f"Error: {e}"
+    if result["changed"] and not dry_run:
+        result["editor"] = await _update_editor_files([result["path"]])
+    return json.dumps(result, indent=2)
+
+async def _update_editor_files(paths: list) -> dict:
+    """Have the editor pick up files changed on disk: one targeted update, no full rescan."""
+    if _depgraph is not None:
+        await asyncio.to_thread(_depgraph.update, paths)
+    response = await send_to_godot_async("update_files", {"paths": paths})
+    if "error" in response:
+        return {"error": response["error"]}
+    return {k: response.get(k, []) for k in ("updated", "removed", "reloaded")}
+
+@mcp.tool()
+async def godot_refactor_resource(old: str, new: str, dry_run: bool = False, workers: int = 0) -> str:
+    """
+    Point every reference to a resource at a new path, across the whole project:
+    [ext_resource] entries in .tscn/.tres files, and quoted paths/UIDs in .gd,
+    shader files and project.godot. Files are rewritten in parallel and replaced
+    only if all succeed; the editor then updates just the changed files.
+    Does not move the resource itself. If the new file already exists, its UID is
+    written into the references too; otherwise their UIDs are kept (as when the
+    file is about to be moved along with its UID).
+    Args:
+        old: Old resource path, its "uid://..." id, or a folder ending in "/" to
+             repoint everything below it.
+        new: New resource path (a folder ending in "/" if old is one).
+        dry_run: Only report which files and references would change.
+        workers: Processes to use (0 = one per CPU, up to 8).
+    """
+    prefix = old.endswith("/")
+    if prefix != new.endswith("/"):
+        return "Error: old and new must both be folders (ending in /) or both be files"
+    old_uid = ""
+    if old.startswith("uid://"):
+        old_uid = old
+        response = await send_to_godot_async("uid_to_path", {"uid": old})
+        old_path = response.get("path", "") if "error" not in response else ""
+    else:
+        old_path = normalize_godot_path(old)
+    new_path = normalize_godot_path(new)
+    new_uid = None
+    try:
+        if not prefix:
+            if not old_uid and os.path.exists(project_file(old_path)):
+                old_uid = refactor.read_uid(project_file(old_path))
+            if os.path.exists(project_file(new_path)):
+                new_uid = refactor.read_uid(project_file(new_path))  # "" drops stale uids: Godot goes by path
+        rename = refactor.Rename(old_path, new_path, old_uid, new_uid, prefix)
+        result = await asyncio.to_thread(refactor.refactor, GODOT_PROJECT_DIR, rename, dry_run, workers)
+    except (OSError, ValueError) as e:
+        return f"Error: {e}"
+    if result["errors"]:
+        failed = [f for f in result["files"] if "error" in f]
+        return f"Error: {len(failed)} file(s) could not be rewritten; nothing was changed\n" + json.dumps(failed, indent=2)
+    if result["written"]:
+        result["editor"] = await _update_editor_files(result["written"])
+    return json.dumps(result, indent=2)
+
+# ============ Resource Dependencies ============
+
+_depgraph = None
+_depgraph_lock = threading.Lock()
+DEPGRAPH_MAX_AGE = 2.0  # Seconds before a query re-checks file mtimes; our own writes update it directly
+
+def _dependency_graph() -> depgraph.DependencyGraph:
+    """The project's dependency graph, brought up to date if stale (blocking; run in a thread)."""
+    global _depgraph
+    with _depgraph_lock:
+        if _depgraph is None:
+            _depgraph = depgraph.DependencyGraph(GODOT_PROJECT_DIR)
+        graph = _depgraph
+    if time.time() - graph.refreshed > DEPGRAPH_MAX_AGE:
+        graph.refresh()
+    return graph
+
+@mcp.tool()
+async def godot_dependencies(path: str, recursive: bool = False) -> str:
+    """
+    What a scene, resource or script loads: its [ext_resource]s, preload()/load()
+    paths and shader #includes, resolved by UID first as Godot does. Works from
+    the files on disk; references to files that no longer exist are flagged.
+    Args:
+        path: Resource path or "uid://..." id.
+        recursive: Also list what those dependencies load, and so on.
+    """
+    graph = await asyncio.to_thread(_dependency_graph)
+    resolved = graph.resolve(path if path.startswith("uid://") else normalize_godot_path(path))
+    if not resolved:
+        return f"Error: Unknown UID {path}"
+    deps = graph.dependencies(resolved, recursive)
+    return json.dumps({
+        "path": resolved,
+        "uid": graph.uid_of(resolved),
+        "dependencies": deps,
+        "missing": sum(1 for d in deps if d["missing"]),
+    }, indent=2)
+
+@mcp.tool()
+async def godot_dependents(path: str, recursive: bool = False) -> str:
+    """
+    Which files use a resource ("what uses this asset?"), by path or UID, from
+    the files on disk.
+    Args:
+        path: Resource path or "uid://..." id.
+        recursive: Also list the files that use those, and so on.
+    """
+    graph = await asyncio.to_thread(_dependency_graph)
+    resolved = graph.resolve(path if path.startswith("uid://") else normalize_godot_path(path))
+    if not resolved:
+        return f"Error: Unknown UID {path}"
+    return json.dumps({
+        "path": resolved,
+        "uid": graph.uid_of(resolved),
+        "dependents": graph.dependents(resolved, recursive),
+    }, indent=2)
+
 # ============ Add Resource ============
 
 @mcp.tool()
-def godot_add_resource(node_path: str, property: str, resource_type: str) -> str:
+async def godot_add_resource(node_path: str, property: str, resource_type: str) -> str:
     """
     Add a new resource to a node's property.
     Args:
@@ -939,7 +1745,7 @@ def godot_add_resource(node_path: str, property: str, resource_type: str) -> str
         property: Property name (e.g. "shape", "mesh", "texture").
         resource_type: Resource class (e.g. "BoxShape3D", "BoxMesh", "ImageTexture").
     """
-    response = send_to_godot("add_resource", {
+    response = await send_to_godot_async("add_resource", {
         "node_path": node_path,
         "property": property,
         "resource_type": resource_type
@@ -951,12 +1757,12 @@ def godot_add_resource(node_path: str, property: str, resource_type: str) -> str
 # ============ Macro / Helper Tools ============
 
 @mcp.tool()
-def godot_spawn_fps_controller(parent_path: str = ".", name: str = "Player") -> str:
+async def godot_spawn_fps_controller(parent_path: str = ".", name: str = "Player") -> str:
     """
     Spawn a CharacterBody3D-based FPS controller with a Camera3D.
     If res://player.gd exists, it will be attached as the script.
     """
-    response = send_to_godot("spawn_fps_controller", {
+    response = await send_to_godot_async("spawn_fps_controller", {
         "parent_path": parent_path,
         "name": name,
     })
@@ -965,11 +1771,11 @@ def godot_spawn_fps_controller(parent_path: str = ".", name: str = "Player") ->
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_health_bar_ui(parent_path: str = ".", name: str = "HealthBar") -> str:
+async def godot_create_health_bar_ui(parent_path: str = ".", name: str = "HealthBar") -> str:
     """
     Create a simple health bar UI (Control + ProgressBar) anchored top-left.
     """
-    response = send_to_godot("create_health_bar_ui", {
+    response = await send_to_godot_async("create_health_bar_ui", {
         "parent_path": parent_path,
         "name": name,
     })
@@ -978,12 +1784,12 @@ def godot_create_health_bar_ui(parent_path: str = ".", name: str = "HealthBar")
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_spawn_spinning_pickup(parent_path: str = ".", scene_path: str = "res://coin.tscn") -> str:
+async def godot_spawn_spinning_pickup(parent_path: str = ".", scene_path: str = "res://coin.tscn") -> str:
     """
     Spawn a spinning pickup instance, by default using res://coin.tscn.
     """
     normalized_scene_path = normalize_godot_path(scene_path)
-    response = send_to_godot("spawn_spinning_pickup", {
+    response = await send_to_godot_async("spawn_spinning_pickup", {
         "parent_path": parent_path,
         "scene_path": normalized_scene_path,
     })
@@ -994,7 +1800,7 @@ def godot_spawn_spinning_pickup(parent_path: str = ".", scene_path: str = "res:/
 # ============ UI Anchors ============
 
 @mcp.tool()
-def godot_set_anchor_preset(path: str, preset: str) -> str:
+async def godot_set_anchor_preset(path: str, preset: str) -> str:
     """
     Set a Control node's anchor using a preset.
     Args:
@@ -1004,13 +1810,13 @@ def godot_set_anchor_preset(path: str, preset: str) -> str:
                 left_wide, right_wide, top_wide, bottom_wide,
                 vcenter_wide, hcenter_wide, full_rect
     """
-    response = send_to_godot("set_anchor_preset", {"path": path, "preset": preset})
+    response = await send_to_godot_async("set_anchor_preset", {"path": path, "preset": preset})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
 
 @mcp.tool()
-def godot_set_anchor_values(path: str, left: float = 0.0, top: float = 0.0, 
+async def godot_set_anchor_values(path: str, left: float = 0.0, top: float = 0.0, 
                             right: float = 1.0, bottom: float = 1.0) -> str:
     """
     Set precise anchor values for a Control node.
@@ -1021,7 +1827,7 @@ def godot_set_anchor_values(path: str, left: float = 0.0, top: float = 0.0,
         right: Right anchor (0.0 to 1.0).
         bottom: Bottom anchor (0.0 to 1.0).
     """
-    response = send_to_godot("set_anchor_values", {
+    response = await send_to_godot_async("set_anchor_values", {
         "path": path, "left": left, "top": top, "right": right, "bottom": bottom
     })
     if "error" in response:
@@ -1031,11 +1837,11 @@ def godot_set_anchor_values(path: str, left: float = 0.0, top: float = 0.0,
 # ============ Open Scripts ============
 
 @mcp.tool()
-def godot_get_open_scripts() -> str:
+async def godot_get_open_scripts() -> str:
     """
     Get a list of all scripts currently open in the Godot script editor.
     """
-    response = send_to_godot("get_open_scripts", {})
+    response = await send_to_godot_async("get_open_scripts", {})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response.get("scripts", []), indent=2)
@@ -1043,7 +1849,7 @@ def godot_get_open_scripts() -> str:
 # ============ Edit File ============
 
 @mcp.tool()
-def godot_edit_file(path: str, find: str, replace: str) -> str:
+async def godot_edit_file(path: str, find: str, replace: str) -> str:
     """
     Edit a file by finding and replacing text.
     Args:
@@ -1052,7 +1858,7 @@ def godot_edit_file(path: str, find: str, replace: str) -> str:
         replace: Text to replace with.
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("edit_file", {"path": normalized_path, "find": find, "replace": replace})
+    response = await send_to_godot_async("edit_file", {"path": normalized_path, "find": find, "replace": replace})
     if "error" in response:
         return f"Error: {response['error']}"
     return response.get("result")
@@ -1060,51 +1866,319 @@ def godot_edit_file(path: str, find: str, replace: str) -> str:
 # ============ Clear Output ============
 
 @mcp.tool()
-def godot_clear_output() -> str:
+async def godot_clear_output() -> str:
     """
     Clear/reset the Godot output panel.
     """
-    response = send_to_godot("clear_output", {})
+    response = await send_to_godot_async("clear_output", {})
     return response.get("result")
 
 # ============ Project Info ============
 
 @mcp.tool()
-def godot_get_project_info() -> str:
+async def godot_get_project_info() -> str:
     """
     Get comprehensive information about the Godot project.
     Includes: name, version, main scene, renderer, window size, physics settings, etc.
     """
-    response = send_to_godot("get_project_info", {})
+    response = await send_to_godot_async("get_project_info", {})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_generate_terrain_mesh(size: int = 32, height_scale: float = 5.0, seed: int = 0, parent_path: str = ".", name: str = "Terrain") -> str:
+async def godot_generate_terrain_mesh(
+    size: int = 32,
+    height_scale: float = 5.0,
+    seed: int = 0,
+    parent_path: str = ".",
+    name: str = "Terrain",
+    background: bool = False,
+    chunk_size: int = 0,
+    lod_levels: int = 3,
+    lod_distance: float = 0.0,
+    view_distance: float = 0.0,
+    save_dir: str = ""
+) -> str:
     """
     Generate a 3D terrain mesh with collision using FastNoiseLite.
     Creates a StaticBody3D with a MeshInstance3D and CollisionShape3D.
+    With chunk_size set, builds a streamable chunked terrain instead (for large
+    worlds, needs numpy): a Node3D root with one StaticBody3D per tile, each with
+    LOD meshes switched by visibility range and a HeightMapShape3D collider, all
+    saved as separate resources.
     Args:
         size: Width/Depth of the terrain in units (default 32)
         height_scale: Maximum height of the terrain (default 5.0)
         seed: Random seed for noise generation (0 = random)
         parent_path: Parent node path
         name: Name of the created node
-    """
-    response = send_to_godot("generate_terrain_mesh", {
+        background: Return a job id right away instead of waiting (see godot_job_status)
+        chunk_size: Tile size in units (0 = single mesh); size must be a multiple of it
+        lod_levels: Detail levels per tile, each at half the resolution of the last (default 3)
+        lod_distance: Camera distance where LOD 1 takes over; doubles per level (default 1.5 tiles)
+        view_distance: Distance past which tiles are culled (0 = never)
+        save_dir: Folder for the tile resources (default res://terrain/<name>)
+    """
+    if chunk_size > 0:
+        if not TERRAIN_AVAILABLE:
+            return "Error: numpy is required for chunked terrain (pip install numpy)"
+        # FastNoiseLite settings of the single-mesh terrain: frequency 0.02, 4 octaves
+        heights = await asyncio.to_thread(_heightmap, size, height_scale, seed, 0.02, 4, 0, 0.0, "", 1.0)
+        return await _send_terrain_chunks(heights, name, parent_path, chunk_size, lod_levels,
+                                          lod_distance, view_distance, 1.0, save_dir)
+    response = await send_to_godot_async("generate_terrain_mesh", {
         "size": size,
         "height_scale": height_scale,
         "seed": seed,
         "parent_path": parent_path,
-        "name": name
+        "name": name,
+        "async": background
+    })
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+def _heightmap(size: int, height_scale: float, seed: int, frequency: float, octaves: int,
+               erosion_iterations: int, talus_angle: float, heightmap_path: str, cell_size: float,
+               chunk_size: int = 0):
+    """Heights in world units: fBm noise, or a PNG scaled to height_scale; optionally eroded."""
+    if heightmap_path:
+        heights = terrain.read_png_heightmap(heightmap_path) * height_scale
+        if chunk_size > 0:
+            # Square, with a whole number of tiles
+            tiles = max(1, round((max(heights.shape) - 1) / chunk_size))
+            heights = terrain.resample(heights, tiles * chunk_size + 1, tiles * chunk_size + 1)
+    else:
+        heights = terrain.fbm(size + 1, size + 1, seed or None, frequency, octaves) * height_scale
+    if erosion_iterations > 0:
+        talus = np.tan(np.radians(talus_angle)) * cell_size
+        heights = terrain.erode(heights, erosion_iterations, talus)
+    return heights
+
+async def _send_terrain_chunks(heights, name: str, parent_path: str, chunk_size: int, lod_levels: int,
+                               lod_distance: float, view_distance: float, cell_size: float, save_dir: str) -> str:
+    """Build every tile with terrain.chunk_payloads and send them all at once (pipelined)."""
+    lod_levels = max(1, lod_levels)
+    tile = chunk_size * cell_size
+    lod_distance = lod_distance or tile * 1.5
+    # LOD n covers [lod_distance * 2**(n-1), lod_distance * 2**n); the last runs to view_distance
+    ranges = [[0.0 if lod == 0 else lod_distance * 2 ** (lod - 1), lod_distance * 2 ** lod]
+              for lod in range(lod_levels)]
+    ranges[-1][1] = view_distance
+
+    try:
+        chunks = await asyncio.to_thread(
+            lambda: list(terrain.chunk_payloads(heights, chunk_size, lod_levels, cell_size)))
+    except ValueError as e:
+        return f"Error: {e}"
+    responses = await asyncio.gather(*(send_to_godot_async("build_terrain_chunk", {
+        "terrain": name,
+        "parent_path": parent_path,
+        "x": chunk["x"],
+        "z": chunk["z"],
+        "position": chunk["position"],
+        "width": chunk["width"],
+        "cell_size": cell_size,
+        "lod_ranges": ranges,
+        "save_dir": normalize_godot_path(save_dir) if save_dir else "",
+        "sections": chunk["sections"],
+        "_binary": chunk["blob"],
+    }) for chunk in chunks))
+
+    errors = [f"Chunk_{c['x']}_{c['z']}: {r['error']}" for c, r in zip(chunks, responses) if "error" in r]
+    if len(errors) == len(chunks):
+        return f"Error: {errors[0]}"
+    return json.dumps({
+        "result": "Chunked terrain generated",
+        "chunks": len(chunks) - len(errors),
+        "lod_ranges": ranges,
+        "errors": errors,
+    }, indent=2)
+
+@mcp.tool()
+async def godot_generate_heightmap_terrain(
+    size: int = 256,
+    height_scale: float = 20.0,
+    seed: int = 0,
+    frequency: float = 0.02,
+    octaves: int = 5,
+    erosion_iterations: int = 0,
+    talus_angle: float = 35.0,
+    heightmap_path: str = "",
+    cell_size: float = 1.0,
+    parent_path: str = ".",
+    name: str = "Terrain",
+    chunk_size: int = 0,
+    lod_levels: int = 3,
+    lod_distance: float = 0.0,
+    view_distance: float = 0.0,
+    save_dir: str = ""
+) -> str:
+    """
+    Generate a large terrain from a heightmap, fast (size 512+ in seconds).
+    Heights come from fBm noise (or a grayscale PNG, 16-bit recommended); the
+    indexed mesh is built with NumPy and sent in one call. Collision uses a
+    HeightMapShape3D. Creates a StaticBody3D with a MeshInstance3D and CollisionShape3D,
+    centred on the parent. Works with godot_create_terrain_material.
+    Args:
+        size: Quads per side (default 256); ignored when heightmap_path is set
+        height_scale: Maximum height in units (default 20)
+        seed: Random seed for the noise (0 = random)
+        frequency: Base noise frequency per cell (default 0.02)
+        octaves: fBm octaves (default 5)
+        erosion_iterations: Thermal erosion passes (0 = none, 50-200 for weathered slopes)
+        talus_angle: Steepest slope in degrees that erosion leaves alone (default 35)
+        heightmap_path: Local PNG heightmap to use instead of noise
+        cell_size: Distance between height samples in units (default 1.0)
+        parent_path: Parent node path
+        name: Name of the created node
+        chunk_size: Tile size in cells for a chunked LOD terrain (0 = single mesh), see godot_generate_terrain_mesh
+        lod_levels: Detail levels per tile (default 3)
+        lod_distance: Camera distance where LOD 1 takes over; doubles per level (default 1.5 tiles)
+        view_distance: Distance past which tiles are culled (0 = never)
+        save_dir: Folder for the tile resources (default res://terrain/<name>)
+    """
+    if not TERRAIN_AVAILABLE:
+        return "Error: numpy is required for heightmap terrain (pip install numpy)"
+    try:
+        heights = await asyncio.to_thread(_heightmap, size, height_scale, seed, frequency, octaves,
+                                          erosion_iterations, talus_angle, heightmap_path, cell_size, chunk_size)
+    except (OSError, ValueError) as e:
+        return f"Error: Could not build heightmap - {e}"
+    if chunk_size > 0:
+        return await _send_terrain_chunks(heights, name, parent_path, chunk_size, lod_levels,
+                                          lod_distance, view_distance, cell_size, save_dir)
+    blob, sections, width, depth = await asyncio.to_thread(terrain.terrain_payload, heights, cell_size)
+    response = await send_to_godot_async("build_heightmap_terrain", {
+        "width": width,
+        "depth": depth,
+        "cell_size": cell_size,
+        "sections": sections,
+        "parent_path": parent_path,
+        "name": name,
+        "_binary": blob,
     })
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_terrain_material(
+async def godot_scatter(
+    mesh_path: str = "",
+    scene_path: str = "",
+    primitive: str = "box",
+    size: float = 1.0,
+    color: str = "0.8,0.8,0.8",
+    terrain_path: str = "",
+    area: str = "",
+    density: float = 0.1,
+    min_distance: float = 0.0,
+    seed: int = 0,
+    scale_min: float = 1.0,
+    scale_max: float = 1.0,
+    random_yaw: bool = True,
+    y_offset: float = 0.0,
+    max_instances: int = 100000,
+    visibility_range: float = 0.0,
+    parent_path: str = ".",
+    name: str = "Scatter"
+) -> str:
+    """
+    Scatter thousands of copies of a mesh (foliage, rocks, pickups) as ONE
+    MultiMeshInstance3D: one node and one draw call instead of a node per object.
+    Placement is computed here and uploaded in one call. Needs numpy.
+    Args:
+        mesh_path: Mesh resource to scatter (e.g. "res://rock.tres")
+        scene_path: Or a scene; its first MeshInstance3D's mesh (and material_override) is used
+        primitive: Otherwise a primitive: box, sphere, cylinder, capsule, plane, prism, torus
+        size: Primitive size in units
+        color: Primitive color "r,g,b" (0-1)
+        terrain_path: Node with HeightMapShape3D collision (e.g. a generated terrain) to place on
+        area: "x0,z0,x1,z1" in the parent's space (default: the terrain's extent)
+        density: Instances per square unit for random placement (default 0.1)
+        min_distance: If > 0, Poisson-disk placement with this spacing instead (even, no clumps)
+        seed: Random seed (0 = random)
+        scale_min: Smallest random uniform scale
+        scale_max: Largest random uniform scale
+        random_yaw: Random rotation around Y per instance
+        y_offset: Added to every height (e.g. negative to sink rocks in)
+        max_instances: Upper limit on the instance count
+        visibility_range: Hide the whole scatter beyond this camera distance (0 = never)
+        parent_path: Parent node path
+        name: Name of the created node
+    """
+    if not TERRAIN_AVAILABLE:
+        return "Error: numpy is required for scattering (pip install numpy)"
+    if not all(math.isfinite(v) and v >= 0 for v in (density, min_distance, scale_min, scale_max)):
+        return "Error: density, min_distance, scale_min and scale_max must be finite and not negative"
+    if scale_min > scale_max:
+        return "Error: scale_min must not be larger than scale_max"
+    if max_instances < 1:
+        return "Error: max_instances must be at least 1"
+
+    field = None
+    if terrain_path:
+        response = await send_to_godot_async("get_heightmap", {"path": terrain_path, "relative_to": parent_path})
+        if "error" in response:
+            return f"Error: {response['error']}"
+        data = response.get("binary")
+        if data is None:
+            data = base64.b64decode(response.get("heights_base64", ""))
+        field = scatter.HeightField.from_response(response, data)
+    if area:
+        try:
+            bounds = tuple(float(v) for v in area.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4 or not all(map(math.isfinite, bounds)) or bounds[0] >= bounds[2] or bounds[1] >= bounds[3]:
+            return "Error: area must be \"x0,z0,x1,z1\" with x0 < x1 and z0 < z1"
+    elif field is not None:
+        bounds = field.bounds()
+    else:
+        return "Error: Give an area or a terrain_path"
+
+    def place():
+        rng = np.random.default_rng(seed or None)
+        if min_distance > 0:
+            points = scatter.poisson_disk(bounds, min_distance, rng, limit=max_instances)
+        else:
+            count = int(density * (bounds[2] - bounds[0]) * (bounds[3] - bounds[1]))
+            points = scatter.random_points(bounds, min(count, max_instances), rng)
+        heights = np.zeros(len(points))
+        if field is not None:
+            heights, found = field.sample(points)
+            points, heights = points[found], heights[found]
+        positions = np.column_stack([points[:, 0], heights + y_offset, points[:, 1]])
+        return scatter.instance_buffer(positions, rng, random_yaw, (scale_min, scale_max))
+
+    buffer = await asyncio.to_thread(place)
+    if len(buffer) == 0:
+        return "Error: No instances placed (density too low, or area outside the terrain)"
+    try:
+        rgb = [float(c) for c in color.split(",")[:3]]
+    except ValueError:
+        rgb = []
+    if len(rgb) != 3:
+        rgb = [0.8, 0.8, 0.8]
+    response = await send_to_godot_async("scatter_multimesh", {
+        "mesh_path": normalize_godot_path(mesh_path) if mesh_path else "",
+        "scene_path": normalize_godot_path(scene_path) if scene_path else "",
+        "primitive": primitive,
+        "size": size,
+        "color": rgb,
+        "count": len(buffer),
+        "visibility_range": visibility_range,
+        "parent_path": parent_path,
+        "name": name,
+        "_binary": buffer.tobytes(),
+    })
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+@mcp.tool()
+async def godot_create_terrain_material(
     path: str = "res://terrain_material.gdshader",
     type: str = "full",
     texture_scale: float = 0.1,
@@ -1129,7 +2203,7 @@ def godot_create_terrain_material(
         - normal_grass, normal_rock, normal_cliff (for normals)
     """
     normalized_path = normalize_godot_path(path)
-    response = send_to_godot("create_terrain_material", {
+    response = await send_to_godot_async("create_terrain_material", {
         "path": normalized_path,
         "type": type,
         "texture_scale": texture_scale,
@@ -1141,7 +2215,7 @@ def godot_create_terrain_material(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_particle_effect(
+async def godot_create_particle_effect(
     preset: str = "fire",
     parent_path: str = ".",
     name: str = "Particles",
@@ -1169,7 +2243,7 @@ def godot_create_particle_effect(
         one_shot: Play once then stop (auto-set for explosion/blood)
         emitting: Start emitting immediately
     """
-    response = send_to_godot("create_particle_effect", {
+    response = await send_to_godot_async("create_particle_effect", {
         "preset": preset,
         "parent_path": parent_path,
         "name": name,
@@ -1182,7 +2256,7 @@ def godot_create_particle_effect(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_lighting_preset(
+async def godot_lighting_preset(
     preset: str = "sunny",
     parent_path: str = "."
 ) -> str:
@@ -1197,7 +2271,7 @@ def godot_lighting_preset(
             - "indoor": Soft ambient lighting for interiors
         parent_path: Parent node path
     """
-    response = send_to_godot("lighting_preset", {
+    response = await send_to_godot_async("lighting_preset", {
         "preset": preset,
         "parent_path": parent_path
     })
@@ -1206,7 +2280,7 @@ def godot_lighting_preset(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_primitive(
+async def godot_create_primitive(
     shape: str = "box",
     parent_path: str = ".",
     name: str = "Primitive",
@@ -1231,7 +2305,7 @@ def godot_create_primitive(
         color: RGB color as "r,g,b" (0-1 range), e.g. "1.0,0.5,0.0" for orange
         collision: If true (default), wraps in StaticBody3D with collision shape
     """
-    response = send_to_godot("create_primitive", {
+    response = await send_to_godot_async("create_primitive", {
         "shape": shape,
         "parent_path": parent_path,
         "name": name,
@@ -1244,7 +2318,7 @@ def godot_create_primitive(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_ui_template(
+async def godot_create_ui_template(
     template: str = "main_menu",
     parent_path: str = ".",
     name: str = ""
@@ -1261,7 +2335,7 @@ def godot_create_ui_template(
         parent_path: Parent node path
         name: Optional custom name (defaults to template name)
     """
-    response = send_to_godot("create_ui_template", {
+    response = await send_to_godot_async("create_ui_template", {
         "template": template,
         "parent_path": parent_path,
         "name": name
@@ -1271,7 +2345,7 @@ def godot_create_ui_template(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_trigger_area(
+async def godot_create_trigger_area(
     parent_path: str = ".",
     name: str = "TriggerArea",
     shape: str = "box",
@@ -1291,7 +2365,7 @@ def godot_create_trigger_area(
     
     Note: Connect body_entered/body_exited signals for your game logic.
     """
-    response = send_to_godot("create_trigger_area", {
+    response = await send_to_godot_async("create_trigger_area", {
         "parent_path": parent_path,
         "name": name,
         "shape": shape,
@@ -1303,7 +2377,7 @@ def godot_create_trigger_area(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_create_rigidbody(
+async def godot_create_rigidbody(
     parent_path: str = ".",
     name: str = "RigidBody",
     shape: str = "box",
@@ -1325,7 +2399,7 @@ def godot_create_rigidbody(
     
     The RigidBody3D comes with collision shape AND visual mesh!
     """
-    response = send_to_godot("create_rigidbody", {
+    response = await send_to_godot_async("create_rigidbody", {
         "parent_path": parent_path,
         "name": name,
         "shape": shape,
@@ -1338,7 +2412,26 @@ def godot_create_rigidbody(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_save_game_data(
+async def godot_resource_cache(action: str = "report", cache_dir: str = "") -> str:
+    """
+    Shared resource cache of the builder tools (primitives, rigidbodies, pickups,
+    triggers, particles, scatter). Identical meshes, materials and shapes are
+    created once and reused, so scenes don't fill up with duplicate sub-resources.
+    Args:
+        action: "report" (hit rate, memory saved, per type), "clear", or "configure"
+        cache_dir: For "configure": res:// folder to also save shared resources in as .tres
+                   (so scenes reference them as files); empty = memory only
+    """
+    params = {"action": action}
+    if action == "configure":
+        params["dir"] = normalize_godot_path(cache_dir) if cache_dir else ""
+    response = await send_to_godot_async("resource_cache", params)
+    if "error" in response:
+        return f"Error: {response['error']}"
+    return json.dumps(response, indent=2)
+
+@mcp.tool()
+async def godot_save_game_data(
     filename: str = "save.json",
     data: str = "{}"
 ) -> str:
@@ -1353,7 +2446,7 @@ def godot_save_game_data(
     except json.JSONDecodeError as e:
         return f"Error: Invalid JSON data - {e}"
     
-    response = send_to_godot("save_game_data", {
+    response = await send_to_godot_async("save_game_data", {
         "filename": filename,
         "data": parsed_data
     })
@@ -1362,7 +2455,7 @@ def godot_save_game_data(
     return json.dumps(response, indent=2)
 
 @mcp.tool()
-def godot_load_game_data(filename: str = "save.json") -> str:
+async def godot_load_game_data(filename: str = "save.json") -> str:
     """
     Load game data from user:// directory.
     Args:
@@ -1370,7 +2463,7 @@ def godot_load_game_data(filename: str = "save.json") -> str:
     Returns:
         JSON string containing the loaded data
     """
-    response = send_to_godot("load_game_data", {"filename": filename})
+    response = await send_to_godot_async("load_game_data", {"filename": filename})
     if "error" in response:
         return f"Error: {response['error']}"
     return json.dumps(response, indent=2)
@@ -1379,9 +2472,18 @@ def godot_load_game_data(filename: str = "save.json") -> str:
 
 GODOT_DOCS_BASE = "https://docs.godotengine.org/en/stable/classes/class_{}.html"
 GODOT_DOCS_SEARCH = "https://docs.godotengine.org/en/stable/search.html?q={}"
+# Without a local index (see docs_index.py), fall back to docs.godotengine.org; set to 0 on offline machines
+GODOT_DOCS_NETWORK = os.environ.get("GODOT_DOCS_NETWORK", "1") != "0"
+NO_DOCS_INDEX = "Error: No local docs index. Build one with: python docs_index.py build --godot /path/to/godot"
+
+def _local_docs_index():
+    try:
+        return docs_index.load_default()
+    except (OSError, ValueError):
+        return None
 
 @mcp.tool()
-def godot_docs(class_name: str) -> str:
+async def godot_docs(class_name: str) -> str:
     """
     Look up official Godot documentation for a class.
     Args:
@@ -1389,6 +2491,23 @@ def godot_docs(class_name: str) -> str:
     Returns:
         Summary of the class including description, key properties, methods, and signals.
     """
+    # Loading the index or fetching a page blocks, so run it off the event loop
+    return await asyncio.to_thread(_class_docs, class_name)
+
+def _class_docs(class_name: str) -> str:
+    index = _local_docs_index()
+    if index is not None:
+        text = index.render_class(class_name)
+        if text is not None:
+            return text
+        suggestions = index.suggest(class_name)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else " Check spelling."
+        return f"Class '{class_name}' not found in Godot documentation.{hint}"
+    if not GODOT_DOCS_NETWORK:
+        return NO_DOCS_INDEX
+    return _fetch_class_docs(class_name)
+
+def _fetch_class_docs(class_name: str) -> str:
     if not DOCS_AVAILABLE:
         return "Error: requests and beautifulsoup4 not installed. Run: pip install requests beautifulsoup4"
     
@@ -1468,7 +2587,7 @@ def godot_docs(class_name: str) -> str:
     return "\n".join(result)
 
 @mcp.tool()
-def godot_docs_search(query: str) -> str:
+async def godot_docs_search(query: str) -> str:
     """
     Search the Godot documentation for a topic.
     Args:
@@ -1476,6 +2595,27 @@ def godot_docs_search(query: str) -> str:
     Returns:
         List of relevant documentation pages with descriptions.
     """
+    return await asyncio.to_thread(_docs_search, query)
+
+def _docs_search(query: str) -> str:
+    index = _local_docs_index()
+    if index is None:
+        return _search_docs(query) if GODOT_DOCS_NETWORK else NO_DOCS_INDEX
+    
+    hits = index.search(query, limit=10)
+    if not hits:
+        return f"No results found for '{query}'. Try different keywords."
+    
+    output = [f"# Search Results for '{query}'", f"Found {len(hits)} results:\n"]
+    for i, (doc_id, _kind, title) in enumerate(hits, 1):
+        output.append(f"**{i}. {title}**")
+        description = index.describe(doc_id)
+        if description:
+            output.append(f"   {description[:200]}..." if len(description) > 200 else f"   {description}")
+        output.append("")
+    return "\n".join(output)
+
+def _search_docs(query: str) -> str:
     if not DOCS_AVAILABLE:
         return "Error: requests and beautifulsoup4 not installed. Run: pip install requests beautifulsoup4"
     
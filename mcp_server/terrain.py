@@ -0,0 +1,325 @@
+"""
+Heightmap terrain built with NumPy and shipped to the bridge in one call.
+
+The heightfield (fBm gradient noise, optionally thermally eroded, or a 16-bit
+grayscale PNG) is turned into indexed mesh arrays here: positions, normals,
+UVs and triangle indices are whole-array operations instead of per-quad loops.
+Everything is serialized in Godot's own binary Variant format, so the bridge
+gets ready-made PackedVector3Array/PackedInt32Array values from bytes_to_var()
+and builds the ArrayMesh and HeightMapShape3D without touching a vertex.
+"""
+import struct
+import zlib
+
+import numpy as np
+
+# Variant type ids from Godot's binary serialization (bytes_to_var)
+_PACKED_INT32 = 30
+_PACKED_FLOAT32 = 32
+_PACKED_VECTOR2 = 35
+_PACKED_VECTOR3 = 36
+
+
+def fbm(width: int, depth: int, seed: int = 0, frequency: float = 0.02, octaves: int = 4,
+        lacunarity: float = 2.0, gain: float = 0.5) -> np.ndarray:
+    """
+    Fractal Brownian motion over gradient noise, shape (depth, width), roughly in [-1, 1].
+    Defaults match the FastNoiseLite settings of godot_generate_terrain_mesh.
+    """
+    rng = np.random.default_rng(seed)
+    heights = np.zeros((depth, width), dtype=np.float64)
+    amplitude, total = 1.0, 0.0
+    for _ in range(max(1, octaves)):
+        heights += amplitude * _gradient_noise(width, depth, frequency, rng)
+        total += amplitude
+        amplitude *= gain
+        frequency *= lacunarity
+    return heights / total
+
+
+def _gradient_noise(width: int, depth: int, frequency: float, rng) -> np.ndarray:
+    # Perlin-style noise: random unit gradients on a lattice, quintic fade between them
+    x = np.arange(width) * frequency
+    z = np.arange(depth) * frequency
+    angles = rng.uniform(0, 2 * np.pi, (int(z[-1]) + 2, int(x[-1]) + 2))
+    gx, gz = np.cos(angles), np.sin(angles)
+
+    x0, z0 = np.floor(x).astype(int), np.floor(z).astype(int)
+    fx, fz = (x - x0)[None, :], (z - z0)[:, None]
+    zi, xi = z0[:, None], x0[None, :]
+
+    def corner(dz, dx):
+        return gx[zi + dz, xi + dx] * (fx - dx) + gz[zi + dz, xi + dx] * (fz - dz)
+
+    ux = fx * fx * fx * (fx * (fx * 6 - 15) + 10)
+    uz = fz * fz * fz * (fz * (fz * 6 - 15) + 10)
+    top = corner(0, 0) + ux * (corner(0, 1) - corner(0, 0))
+    bottom = corner(1, 0) + ux * (corner(1, 1) - corner(1, 0))
+    # Gradient noise peaks at about +-0.7; stretch to roughly [-1, 1]
+    return (top + uz * (bottom - top)) * np.sqrt(2)
+
+
+def erode(heights: np.ndarray, iterations: int = 50, talus: float = 0.7, rate: float = 0.25) -> np.ndarray:
+    """
+    Thermal erosion: wherever the drop to a neighbour exceeds `talus` (height
+    units per cell), part of the excess slides downhill. Softens spikes and
+    builds scree slopes. Returns a new array.
+    """
+    h = np.array(heights, dtype=np.float64)
+    for _ in range(iterations):
+        delta = np.zeros_like(h)
+        for diff, src, dst in (
+            (h[:, :-1] - h[:, 1:], (slice(None), slice(None, -1)), (slice(None), slice(1, None))),
+            (h[:-1, :] - h[1:, :], (slice(None, -1), slice(None)), (slice(1, None), slice(None))),
+        ):
+            # Downhill in either direction along this axis
+            move = np.where(diff > talus, (diff - talus) * rate, 0.0)
+            move -= np.where(-diff > talus, (-diff - talus) * rate, 0.0)
+            delta[src] -= move
+            delta[dst] += move
+        h += delta
+    return h
+
+
+def read_png_heightmap(path: str) -> np.ndarray:
+    """
+    Decode a grayscale (8 or 16-bit) PNG into floats in [0, 1]. Color images
+    use their first channel. No imaging library needed.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError(f"{path} is not a PNG file")
+
+    pos, idat = 8, []
+    width = height = bit_depth = color_type = interlace = None
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+    if width is None:
+        raise ValueError(f"{path} has no IHDR chunk")
+    if interlace or bit_depth not in (8, 16) or color_type == 3:
+        raise ValueError("Only non-interlaced 8/16-bit grayscale or RGB(A) PNGs are supported")
+
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}[color_type]
+    bpp = channels * bit_depth // 8
+    stride = width * bpp
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, stride + 1)
+    rows = _unfilter(raw[:, 0], raw[:, 1:], bpp)
+
+    if bit_depth == 16:
+        samples = rows.reshape(height, width, channels, 2)
+        values = samples[..., 0, 0].astype(np.uint16) << 8 | samples[..., 0, 1]
+        return values.astype(np.float64) / 65535.0
+    return rows.reshape(height, width, channels)[..., 0].astype(np.float64) / 255.0
+
+
+def _unfilter(filters: np.ndarray, rows: np.ndarray, bpp: int) -> np.ndarray:
+    out = np.zeros(rows.shape, dtype=np.uint8)
+    prior = np.zeros(rows.shape[1], dtype=np.uint8)
+    for y, kind in enumerate(filters):
+        line = rows[y]
+        if kind == 0:
+            cur = line.copy()
+        elif kind == 1:
+            # Sub: running sum per byte lane
+            cur = (np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint64) % 256).astype(np.uint8).ravel()
+        elif kind == 2:
+            cur = line + prior
+        elif kind == 3:
+            cur = _unfilter_sequential(line, prior, bpp, lambda a, b, c: (a + b) >> 1)
+        elif kind == 4:
+            cur = _unfilter_sequential(line, prior, bpp, _paeth)
+        else:
+            raise ValueError(f"Bad PNG filter type {kind}")
+        out[y] = cur
+        prior = cur
+    return out
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter_sequential(line: np.ndarray, prior: np.ndarray, bpp: int, predict) -> np.ndarray:
+    # Average and Paeth depend on the byte just decoded, so go byte by byte
+    cur = bytearray(line.tobytes())
+    up = prior.tobytes()
+    for i in range(len(cur)):
+        left = cur[i - bpp] if i >= bpp else 0
+        upper_left = up[i - bpp] if i >= bpp else 0
+        cur[i] = (cur[i] + predict(left, up[i], upper_left)) & 0xFF
+    return np.frombuffer(bytes(cur), dtype=np.uint8)
+
+
+def resample(heights: np.ndarray, width: int, depth: int) -> np.ndarray:
+    """Bilinear resize to (depth, width)."""
+    src_d, src_w = heights.shape
+    if (src_d, src_w) == (depth, width):
+        return heights
+    z = np.linspace(0, src_d - 1, depth)
+    x = np.linspace(0, src_w - 1, width)
+    z0, x0 = np.floor(z).astype(int), np.floor(x).astype(int)
+    z1, x1 = np.minimum(z0 + 1, src_d - 1), np.minimum(x0 + 1, src_w - 1)
+    fz, fx = (z - z0)[:, None], (x - x0)[None, :]
+    top = heights[z0][:, x0] * (1 - fx) + heights[z0][:, x1] * fx
+    bottom = heights[z1][:, x0] * (1 - fx) + heights[z1][:, x1] * fx
+    return top * (1 - fz) + bottom * fz
+
+
+def grid_normals(heights: np.ndarray, cell_size: float = 1.0) -> np.ndarray:
+    """Unit normals, shape (depth, width, 3), from central differences of the heightfield."""
+    dz, dx = np.gradient(heights, cell_size)
+    normals = np.stack([-dx, np.ones_like(heights), -dz], axis=-1)
+    return normals / np.linalg.norm(normals, axis=-1, keepdims=True)
+
+
+def mesh_arrays(heights: np.ndarray, cell_size: float = 1.0, normals: np.ndarray = None,
+                uv_offset: tuple = (0, 0), uv_step: int = 1) -> dict:
+    """
+    Indexed grid mesh for a (depth, width) heightfield in world units, centred
+    on the origin like HeightMapShape3D. UVs are grid coordinates, as in the
+    SurfaceTool terrain, so existing terrain materials tile the same way; tiles
+    pass their grid offset and sample step to keep UVs continuous. Tiles also
+    pass normals sliced from the whole heightfield so edges shade seamlessly.
+    """
+    depth, width = heights.shape
+    xs = (np.arange(width) - (width - 1) / 2.0) * cell_size
+    zs = (np.arange(depth) - (depth - 1) / 2.0) * cell_size
+    gx, gz = np.meshgrid(xs, zs)
+    vertices = np.stack([gx, heights, gz], axis=-1).reshape(-1, 3)
+    if normals is None:
+        normals = grid_normals(heights, cell_size)
+
+    u, v = np.meshgrid(np.arange(width, dtype=np.float32) * uv_step + uv_offset[0],
+                       np.arange(depth, dtype=np.float32) * uv_step + uv_offset[1])
+    uvs = np.stack([u, v], axis=-1).reshape(-1, 2)
+
+    # Two triangles per quad, wound like the SurfaceTool terrain
+    i = (np.arange(depth - 1)[:, None] * width + np.arange(width - 1)[None, :]).ravel()
+    indices = np.stack([i, i + 1, i + width, i + 1, i + width + 1, i + width], axis=-1).ravel()
+    return {
+        "vertices": vertices.reshape(-1, 3),
+        "normals": normals.reshape(-1, 3),
+        "uvs": uvs,
+        "indices": indices,
+    }
+
+
+def add_skirts(arrays: dict, width: int, depth: int, skirt_depth: float) -> dict:
+    """
+    Hang a vertical strip of `skirt_depth` below the mesh border. Neighbouring
+    tiles at different LODs don't share edge vertices, and the skirts hide the
+    cracks that leaves. They are drawn from both sides so winding doesn't
+    matter along any edge.
+    """
+    ring = np.concatenate([
+        np.arange(width),                                     # top row
+        np.arange(1, depth) * width + width - 1,              # right column
+        (depth - 1) * width + np.arange(width - 2, -1, -1),   # bottom row, backwards
+        np.arange(depth - 2, 0, -1) * width,                  # left column, upwards
+    ])
+    count = len(arrays["vertices"])
+    hanging = arrays["vertices"][ring].copy()
+    hanging[:, 1] -= skirt_depth
+
+    top, bottom = ring, count + np.arange(len(ring))
+    top_next, bottom_next = np.roll(top, -1), np.roll(bottom, -1)
+    front = np.stack([top, top_next, bottom, top_next, bottom_next, bottom], axis=-1).reshape(-1, 3)
+    return {
+        "vertices": np.concatenate([arrays["vertices"], hanging]),
+        "normals": np.concatenate([arrays["normals"], arrays["normals"][ring]]),
+        "uvs": np.concatenate([arrays["uvs"], arrays["uvs"][ring]]),
+        "indices": np.concatenate([arrays["indices"], front.ravel(), front[:, ::-1].ravel()]),
+    }
+
+
+def pack_godot(value: np.ndarray, type_id: int, dtype) -> bytes:
+    """One packed array in Godot's binary Variant format: type, element count, little-endian data."""
+    data = np.ascontiguousarray(value, dtype=np.dtype(dtype).newbyteorder("<"))
+    count = len(data) if data.ndim > 1 else data.size
+    return struct.pack("<II", type_id, count) + data.tobytes()
+
+
+def pack_sections(sections: dict) -> tuple:
+    """
+    Concatenate (bytes) sections into one buffer. Returns the buffer and
+    {name: [offset, length]} for the bridge to slice it back apart.
+    """
+    blob, layout = bytearray(), {}
+    for name, data in sections.items():
+        layout[name] = [len(blob), len(data)]
+        blob += data
+    return bytes(blob), layout
+
+
+def terrain_payload(heights: np.ndarray, cell_size: float = 1.0) -> tuple:
+    """
+    Everything build_heightmap_terrain needs for one heightfield: mesh arrays
+    and the HeightMapShape3D data. Returns (buffer, layout, width, depth).
+    """
+    arrays = mesh_arrays(heights, cell_size)
+    depth, width = heights.shape
+    blob, layout = pack_sections({
+        "vertices": pack_godot(arrays["vertices"], _PACKED_VECTOR3, np.float32),
+        "normals": pack_godot(arrays["normals"], _PACKED_VECTOR3, np.float32),
+        "uvs": pack_godot(arrays["uvs"], _PACKED_VECTOR2, np.float32),
+        "indices": pack_godot(arrays["indices"], _PACKED_INT32, np.int32),
+        # The collider is scaled by cell_size on the bridge, so store heights in cells
+        "heights": pack_godot(heights.ravel() / cell_size, _PACKED_FLOAT32, np.float32),
+    })
+    return blob, layout, width, depth
+
+
+def chunk_payloads(heights: np.ndarray, chunk_size: int, lod_levels: int = 3,
+                   cell_size: float = 1.0, skirt_depth: float = None):
+    """
+    Split a (size+1, size+1) heightfield into chunk_size x chunk_size tiles.
+    Yields one dict per tile with its grid coordinates, centre position
+    (relative to the terrain centre), and a buffer/layout holding lod{N}_*
+    mesh arrays (every 2**N-th sample, with skirts) plus the full-resolution
+    collision heights.
+    """
+    depth, width = heights.shape
+    size = width - 1
+    if depth != width or size % chunk_size:
+        raise ValueError(f"Terrain size {size} must be square and a multiple of chunk_size {chunk_size}")
+    if chunk_size % (1 << (lod_levels - 1)):
+        raise ValueError(f"chunk_size {chunk_size} must be divisible by {1 << (lod_levels - 1)} for {lod_levels} LOD levels")
+    if skirt_depth is None:
+        # Deep enough to cover the largest height error between LOD levels
+        skirt_depth = max(float(np.ptp(heights)) * 0.1, cell_size * (1 << lod_levels))
+
+    normals = grid_normals(heights, cell_size)
+    for cz in range(size // chunk_size):
+        for cx in range(size // chunk_size):
+            rows = slice(cz * chunk_size, (cz + 1) * chunk_size + 1)
+            cols = slice(cx * chunk_size, (cx + 1) * chunk_size + 1)
+            tile = heights[rows, cols]
+            sections = {}
+            for lod in range(lod_levels):
+                step = 1 << lod
+                sub = tile[::step, ::step]
+                arrays = mesh_arrays(sub, cell_size * step, normals[rows, cols][::step, ::step],
+                                     (cx * chunk_size, cz * chunk_size), step)
+                arrays = add_skirts(arrays, sub.shape[1], sub.shape[0], skirt_depth)
+                sections[f"lod{lod}_vertices"] = pack_godot(arrays["vertices"], _PACKED_VECTOR3, np.float32)
+                sections[f"lod{lod}_normals"] = pack_godot(arrays["normals"], _PACKED_VECTOR3, np.float32)
+                sections[f"lod{lod}_uvs"] = pack_godot(arrays["uvs"], _PACKED_VECTOR2, np.float32)
+                sections[f"lod{lod}_indices"] = pack_godot(arrays["indices"], _PACKED_INT32, np.int32)
+            sections["heights"] = pack_godot(tile.ravel() / cell_size, _PACKED_FLOAT32, np.float32)
+            blob, layout = pack_sections(sections)
+            centre = (((cx + 0.5) * chunk_size - size / 2.0) * cell_size, 0.0,
+                      ((cz + 0.5) * chunk_size - size / 2.0) * cell_size)
+            yield {"x": cx, "z": cz, "position": centre, "width": chunk_size + 1, "blob": blob, "sections": layout}
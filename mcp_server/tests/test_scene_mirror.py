@@ -0,0 +1,135 @@
+from mock_bridge import MockBridge
+from scene_mirror import SceneTreeMirror
+
+ROOT = "/root/Level"
+
+
+def _node(name, type_name, path, children=()):
+    return {"name": name, "type": type_name, "path": path, "children": list(children)}
+
+
+def _tree():
+    return _node("Level", "Node3D", ROOT, [
+        _node("Player", "CharacterBody3D", f"{ROOT}/Player", [
+            _node("Camera", "Camera3D", f"{ROOT}/Player/Camera", [
+                _node("Ray", "RayCast3D", f"{ROOT}/Player/Camera/Ray"),
+            ]),
+            _node("Mesh", "MeshInstance3D", f"{ROOT}/Player/Mesh"),
+        ]),
+        _node("Light", "DirectionalLight3D", f"{ROOT}/Light"),
+        _node("Floor", "StaticBody3D", f"{ROOT}/Floor"),
+    ])
+
+
+def _mirror():
+    mirror = SceneTreeMirror()
+    mirror.load(_tree(), 1)
+    return mirror
+
+
+def _paths(tree):
+    out, stack = [], [tree]
+    while stack:
+        node = stack.pop()
+        out.append(node["path"])
+        stack.extend(reversed(node["children"]))
+    return out
+
+
+def test_load_renders_root_relative_paths():
+    tree = _mirror().to_tree()
+    assert _paths(tree) == [".", "Player", "Player/Camera", "Player/Camera/Ray", "Player/Mesh", "Light", "Floor"]
+
+
+def test_rename_moves_descendant_paths():
+    mirror = _mirror()
+    change = {"op": "renamed", "old_path": f"{ROOT}/Player", "path": f"{ROOT}/Hero", "name": "Hero"}
+    assert mirror.apply([change], 2)
+    assert mirror.revision == 2
+    tree = mirror.to_tree()
+    assert _paths(tree) == [".", "Hero", "Hero/Camera", "Hero/Camera/Ray", "Hero/Mesh", "Light", "Floor"]
+    assert tree["children"][0]["name"] == "Hero"
+    # Later changes address the nodes by their new absolute paths
+    assert mirror.apply([{"op": "removed", "path": f"{ROOT}/Hero/Camera/Ray"}], 3)
+    assert "Hero/Camera/Ray" not in _paths(mirror.to_tree())
+
+
+def test_rename_root():
+    mirror = _mirror()
+    assert mirror.apply([{"op": "renamed", "old_path": ROOT, "path": "/root/Arena", "name": "Arena"}], 2)
+    tree = mirror.to_tree()
+    assert tree["name"] == "Arena"
+    assert _paths(tree)[1:3] == ["Player", "Player/Camera"]
+
+
+def test_reorder_sets_child_order():
+    mirror = _mirror()
+    change = {"op": "reordered", "path": ROOT, "children": [f"{ROOT}/Floor", f"{ROOT}/Player", f"{ROOT}/Light"]}
+    assert mirror.apply([change], 2)
+    assert [c["name"] for c in mirror.to_tree()["children"]] == ["Floor", "Player", "Light"]
+
+
+def test_reorder_that_does_not_fit_clears_the_mirror():
+    mirror = _mirror()
+    change = {"op": "reordered", "path": ROOT, "children": [f"{ROOT}/Floor", f"{ROOT}/Player"]}
+    assert not mirror.apply([change], 2)
+    assert not mirror.loaded
+    mirror = _mirror()
+    assert not mirror.apply([{"op": "reordered", "path": f"{ROOT}/Missing", "children": []}], 2)
+
+
+def test_add_and_remove():
+    mirror = _mirror()
+    changes = [
+        {"op": "added", "path": f"{ROOT}/Player/Gun", "parent": f"{ROOT}/Player", "name": "Gun",
+         "type": "Node3D", "index": 1},
+        {"op": "removed", "path": f"{ROOT}/Player/Camera"},
+        {"op": "removed", "path": f"{ROOT}/Player/Camera/Ray"},  # Godot reports the whole subtree
+    ]
+    assert mirror.apply(changes, 2)
+    assert _paths(mirror.to_tree()) == [".", "Player", "Player/Gun", "Player/Mesh", "Light", "Floor"]
+
+
+def test_unknown_op_or_parent_clears_the_mirror():
+    mirror = _mirror()
+    assert not mirror.apply([{"op": "teleported", "path": ROOT}], 2)
+    assert not mirror.loaded
+    mirror = _mirror()
+    orphan = {"op": "added", "path": "/root/Nowhere/X", "parent": "/root/Nowhere", "name": "X", "type": "Node"}
+    assert not mirror.apply([orphan], 2)
+
+
+def test_render_is_cached_per_revision():
+    mirror = _mirror()
+    first = mirror.render()
+    assert mirror.render() is first
+    assert mirror.apply([], 2)
+    assert mirror.render() is first
+    assert mirror.apply([{"op": "removed", "path": f"{ROOT}/Floor"}], 3)
+    assert mirror.render() is not first
+
+
+def test_patched_mirror_matches_a_fresh_tree():
+    bridge = MockBridge(port=0)
+    assert "error" not in bridge.execute("new_scene", {"root_type": "Node3D", "name": "Level"})
+    mirror = SceneTreeMirror()
+    full = bridge.execute("get_scene_tree", {})
+    mirror.load(full["tree"], full["revision"])
+
+    edits = [("add_node", {"type": "Node3D", "name": name, "parent_path": "."}) for name in ("A", "B", "C")]
+    edits += [
+        ("add_node", {"type": "Node3D", "name": "Child", "parent_path": "A"}),
+        ("move_node", {"path": "C", "index": 0}),
+        ("rename_node", {"path": "A", "new_name": "Renamed"}),
+        ("delete_node", {"path": "B"}),
+    ]
+    for method, params in edits:
+        assert "error" not in bridge.execute(method, params), method
+
+    changes = bridge.execute("get_scene_tree_changes", {"since": mirror.revision})
+    assert mirror.apply(changes["changes"], changes["revision"])
+    fresh = SceneTreeMirror()
+    full = bridge.execute("get_scene_tree", {})
+    fresh.load(full["tree"], full["revision"])
+    assert mirror.render() == fresh.render()
+    assert _paths(mirror.to_tree()) == [".", "C", "Renamed", "Renamed/Child"]
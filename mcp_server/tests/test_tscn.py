@@ -0,0 +1,137 @@
+import glob
+import os
+
+import pytest
+
+import tscn
+from variant_codec import Transform2D
+
+PROJECT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "godot_project")
+
+SCENE = '''[gd_scene load_steps=6 format=3 uid="uid://c8w1k2yq3x0ab"]
+
+[ext_resource type="Script" uid="uid://bq1x2c3d4e5f6" path="res://player.gd" id="1_ab3xk"]
+[ext_resource type="Texture2D" path="res://icon.svg" id="2_q0k9m"]
+[ext_resource type="PackedScene" path="res://enemy.tscn" id="3_unused"]
+
+[sub_resource type="BoxMesh" id="BoxMesh_k2p1d"]
+size = Vector3(2, 0.5, 2)
+
+[sub_resource type="Gradient" id="Gradient_x1"]
+offsets = PackedFloat32Array(0, 0.5, 1)
+colors = PackedColorArray(0, 0, 0, 1, 0.5, 0.5, 0.5, 1, 1, 1, 1, 1)
+
+[node name="Level" type="Node3D"]
+script = ExtResource("1_ab3xk")
+metadata/notes = "line one
+[not a section]
+line \\"three\\""
+
+[node name="Camera3D" type="Camera3D" parent="."]
+transform = Transform3D(1, 0, 0, 0, 0.866025, 0.5, 0, -0.5, 0.866025, 0, 3, 5)
+current = true
+
+[node name="Floor" type="MeshInstance3D" parent="."]
+mesh = SubResource("BoxMesh_k2p1d")
+metadata/_edit_lock_ = true
+metadata/spawns = {
+"east": Vector3(10, 0, 0),
+"west": Vector3(-10, 0, 0)
+}
+
+[node name="Sprite" type="Sprite2D" parent="Floor"]
+texture = ExtResource("2_q0k9m")
+metadata/ramp = SubResource("Gradient_x1")
+
+[connection signal="ready" from="." to="." method="_on_ready"]
+'''
+
+RESOURCE = '''[gd_resource type="StandardMaterial3D" load_steps=2 format=3]
+
+[ext_resource type="Texture2D" path="res://icon.svg" id="1_tex"]
+
+[resource]
+albedo_color = Color(0.8, 0.2, 0.2, 1)
+albedo_texture = ExtResource("1_tex")
+uv1_scale = Vector3(4, 4, 4)
+'''
+
+
+def _project_files():
+    found = glob.glob(os.path.join(PROJECT, "**", "*.tscn"), recursive=True)
+    found += glob.glob(os.path.join(PROJECT, "**", "*.tres"), recursive=True)
+    found.append(os.path.join(PROJECT, "project.godot"))  # Same section syntax, no props with " = "
+    return sorted(found)
+
+
+@pytest.mark.parametrize("path", _project_files(), ids=lambda p: os.path.relpath(p, PROJECT))
+def test_project_files_round_trip(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    assert tscn.parse(text).dump() == text
+
+
+@pytest.mark.parametrize("text", [SCENE, RESOURCE, SCENE.replace("\n", "\r\n"), SCENE.rstrip("\n")],
+                         ids=["scene", "resource", "crlf", "no-final-newline"])
+def test_round_trip_is_byte_stable(text):
+    f = tscn.parse(text)
+    assert f.dump() == text
+    for s in f.sections:
+        s.attrs, s.props  # Reading values must not change what gets written
+    assert f.dump() == text
+
+
+def test_parse_keeps_multiline_values_in_one_section():
+    f = tscn.parse(SCENE)
+    assert [tscn.ResourceFile.node_path(s) for s in f.nodes] == [".", "Camera3D", "Floor", "Floor/Sprite"]
+    assert f.node(".").prop("metadata/notes") == 'line one\n[not a section]\nline "three"'
+    assert set(f.node("Floor").prop("metadata/spawns")) == {"east", "west"}
+
+
+def test_transform3d_text_is_row_major():
+    t = tscn.parse_value("Transform3D(1, 0, 0, 0, 0.866025, 0.5, 0, -0.5, 0.866025, 0, 3, 5)")
+    assert t[0:3] == (1.0, 0.0, 0.0)  # basis.x
+    assert t[3:6] == (0.0, 0.866025, -0.5)  # basis.y
+    assert t[6:9] == (0.0, 0.5, 0.866025)  # basis.z
+    assert t[9:] == (0.0, 3.0, 5.0)  # origin
+
+
+def test_basis_text_is_row_major():
+    b = tscn.parse_value("Basis(1, 2, 3, 4, 5, 6, 7, 8, 9)")
+    assert tuple(b) == (1.0, 4.0, 7.0, 2.0, 5.0, 8.0, 3.0, 6.0, 9.0)
+    assert tscn.format_value(b) == "Basis(1, 2, 3, 4, 5, 6, 7, 8, 9)"
+
+
+def test_transform3d_round_trips_through_json():
+    text = "Transform3D(1, 0, 0, 0, 0.866025, 0.5, 0, -0.5, 0.866025, 0, 3, 5)"
+    value = tscn.from_json(tscn.to_json(tscn.parse_value(text)))
+    assert tscn.format_value(value) == text
+
+
+def test_transform2d_is_not_transposed():
+    t = tscn.parse_value("Transform2D(1, 2, 3, 4, 5, 6)")
+    assert isinstance(t, Transform2D)
+    assert tuple(t) == (1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+    assert tscn.format_value(t) == "Transform2D(1, 2, 3, 4, 5, 6)"
+
+
+def test_edit_rewrites_only_the_changed_line():
+    f = tscn.parse(SCENE)
+    f.node("Camera3D").set_prop("current", "false")
+    assert f.dump() == SCENE.replace("current = true", "current = false")
+
+
+def test_remove_unused_resources_keeps_separators():
+    f = tscn.parse(SCENE)
+    assert f.remove_unused_resources() == ["3_unused"]
+    dump = f.dump()
+    expected = SCENE.replace('[ext_resource type="PackedScene" path="res://enemy.tscn" id="3_unused"]\n', "")
+    assert dump == expected.replace("load_steps=6", "load_steps=5")
+    assert 'id="2_q0k9m"]\n\n[sub_resource' in dump
+
+
+def test_remove_last_section_keeps_file_ending():
+    text = SCENE[:SCENE.index("\n[connection")]
+    f = tscn.parse(text)
+    assert f.remove_node("Floor") == 2
+    assert f.dump() == text[:text.index("\n[node name=\"Floor\"")]
@@ -0,0 +1,916 @@
+"""
+Reader and writer for Godot's text scene and resource formats (.tscn / .tres).
+
+A file is a list of sections, each a bracketed header followed by
+`key = value` properties:
+
+    [gd_scene load_steps=3 format=3 uid="uid://b1x..."]
+    [ext_resource type="Script" path="res://player.gd" id="1_ab3xk"]
+    [sub_resource type="BoxMesh" id="BoxMesh_k2p1d"]
+    [node name="Player" type="CharacterBody3D" parent="."]
+    [connection signal="body_entered" from="Area" to="." method="_on_body_entered"]
+
+parse() splits the text into Section objects in one pass over its lines,
+keeping header attributes and property values as their raw Godot text; values
+are only parsed (parse_value) when asked for. Each section also keeps the text
+it was read from, so dump() reproduces the input byte for byte, and after an
+edit only the changed header or property lines are written anew.
+
+Values convert to the variant_codec types (Vector3, Color, packed arrays...),
+plus ExtResource / SubResource references, so they can be returned in the same
+tagged JSON as the live tools (to_json).
+"""
+import base64
+import os
+import random
+import re
+import string
+import tempfile
+
+import variant_codec
+from variant_codec import COMPONENT_TYPES, PACKED_TYPES, NodePath, Opaque, PackedStringArray, StringName
+
+_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_ATTR = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_/]*)=')
+
+# One-line values nested up to three brackets deep, and one-line headers: the
+# common cases, matched without the character-level _balance / _split_attrs
+_S = r'"(?:[^"\\\n]|\\.)*"'
+_L1 = rf'(?:[^"()\[\]{{}}\r\n]|{_S})*'
+_L2 = rf'(?:[^"()\[\]{{}}\r\n]|{_S}|\({_L1}\)|\[{_L1}\]|\{{{_L1}\}})*'
+_L3 = rf'(?:[^"()\[\]{{}}\r\n]|{_S}|\({_L2}\)|\[{_L2}\]|\{{{_L2}\}})*'
+_ONE_LINE = re.compile(_L3 + r'\r?\n?')
+_ATTR_VALUE = rf'(?:{_S}|\[{_L1}\]|[\w.+-]+(?:\({_L1}\))?)'
+_HEADER = re.compile(rf'\[(\w+)((?:[ \t]+[A-Za-z_][\w/]*={_ATTR_VALUE})*)[ \t]*\]\r?\n?')
+_HEADER_ATTR = re.compile(rf'[ \t]+([A-Za-z_][\w/]*)=({_ATTR_VALUE})')
+_SECTION_START = re.compile(r'^\[', re.M)
+_ESCAPE = re.compile(r'\\.', re.S)
+
+
+# ---------------------------------------------------------------------------
+# Values
+# ---------------------------------------------------------------------------
+
+class ExtResource(str):
+    """Reference to an [ext_resource] by id."""
+    godot_type = "ExtResource"
+
+    def __repr__(self):
+        return f'ExtResource("{self}")'
+
+
+class SubResource(str):
+    """Reference to a [sub_resource] by id."""
+    godot_type = "SubResource"
+
+    def __repr__(self):
+        return f'SubResource("{self}")'
+
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<str>[&^]?"(?:[^"\\]|\\.)*")
+  | (?P<num>[-+]?(?:inf(?![A-Za-z0-9_])|nan(?![A-Za-z0-9_])|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))
+  | (?P<id>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<p>[\[\]{}(),:=])
+)''', re.S | re.X)
+
+_ROW_MAJOR = ("Basis", "Transform3D")  # Written row by row; the codec goes column by column
+
+
+def _transpose_basis(components) -> list:
+    """Swap the 3x3 basis block between row and column order (its own inverse); origin untouched."""
+    c = list(components)
+    return [c[3 * (i % 3) + i // 3] for i in range(9)] + c[9:]
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "a": "\a", "v": "\v", '"': '"', "\\": "\\"}
+
+
+def _unescape(body: str) -> str:
+    if "\\" not in body:
+        return body
+
+    def sub(m):
+        c = m.group(1)
+        if c[0] in "uU":
+            return chr(int(c[1:], 16))
+        return _ESCAPES.get(c, c)
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{6}|.)", sub, body, flags=re.S)
+
+
+class _ValueParser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str):
+        return ValueError(f"{message} at offset {self.pos} in {self.text[:80]!r}")
+
+    def next(self):
+        m = _TOKEN.match(self.text, self.pos)
+        if not m:
+            raise self.error("Unexpected character")
+        self.pos = m.end()
+        return m.lastgroup, m.group(m.lastgroup)
+
+    def peek(self):
+        m = _TOKEN.match(self.text, self.pos)
+        return (m.lastgroup, m.group(m.lastgroup)) if m else (None, None)
+
+    def expect(self, punct: str):
+        kind, tok = self.next()
+        if kind != "p" or tok != punct:
+            raise self.error(f"Expected '{punct}'")
+
+    def items(self, close: str) -> list:
+        """Comma-separated values up to `close` (the opening token already consumed)."""
+        out = []
+        if self.peek() == ("p", close):
+            self.next()
+            return out
+        while True:
+            out.append(self.value())
+            kind, tok = self.next()
+            if kind == "p" and tok == close:
+                return out
+            if kind != "p" or tok != ",":
+                raise self.error(f"Expected ',' or '{close}'")
+            if self.peek() == ("p", close):  # Trailing comma
+                self.next()
+                return out
+
+    def value(self):
+        kind, tok = self.next()
+        if kind == "str":
+            if tok[0] == "&":
+                return StringName(_unescape(tok[2:-1]))
+            if tok[0] == "^":
+                return NodePath(_unescape(tok[2:-1]))
+            return _unescape(tok[1:-1])
+        if kind == "num":
+            if tok.lstrip("+-") in ("inf", "nan"):
+                return float(tok)
+            return float(tok) if any(c in tok for c in ".eE") else int(tok)
+        if kind == "p":
+            if tok == "[":
+                return self.items("]")
+            if tok == "{":
+                return self.dict()
+            raise self.error(f"Unexpected '{tok}'")
+        if tok in ("true", "false"):
+            return tok == "true"
+        if tok in ("null", "nil"):
+            return None
+        return self.constructor(tok)
+
+    def dict(self) -> dict:
+        out = {}
+        if self.peek() == ("p", "}"):
+            self.next()
+            return out
+        while True:
+            key = self.value()
+            self.expect(":")
+            out[key if isinstance(key, (str, int, float, bool)) or key is None else repr(key)] = self.value()
+            kind, tok = self.next()
+            if kind == "p" and tok == "}":
+                return out
+            if kind != "p" or tok != ",":
+                raise self.error("Expected ',' or '}'")
+            if self.peek() == ("p", "}"):
+                self.next()
+                return out
+
+    def constructor(self, name: str):
+        if self.peek() == ("p", "["):
+            # Typed containers: Array[int]([...]), Dictionary[String, int]({...})
+            self.next()
+            depth = 1
+            while depth:
+                kind, tok = self.next()
+                if kind == "p":
+                    depth += {"[": 1, "]": -1}.get(tok, 0)
+        start = self.pos
+        self.expect("(")
+        if name in ("Array", "Dictionary"):
+            inner = self.value()
+            self.expect(")")
+            return inner
+        if name == "Object":
+            depth = 1
+            while depth:
+                kind, tok = self.next()
+                if kind == "p":
+                    depth += {"(": 1, ")": -1}.get(tok, 0)
+            return Opaque("Object", self.text[start:self.pos].strip())
+        args = self.items(")")
+        if name in COMPONENT_TYPES:
+            return COMPONENT_TYPES[name](_transpose_basis(args) if name in _ROW_MAJOR else args)
+        if name in PACKED_TYPES:
+            return PACKED_TYPES[name](args)
+        if name == "PackedByteArray":
+            if len(args) == 1 and isinstance(args[0], str):
+                return base64.b64decode(args[0])  # Godot 4.3+ writes byte arrays as base64
+            return bytes(args)
+        if name == "PackedStringArray":
+            return PackedStringArray(args)
+        if name == "ExtResource":
+            return ExtResource(args[0])
+        if name == "SubResource":
+            return SubResource(args[0])
+        if name == "NodePath":
+            return NodePath(args[0] if args else "")
+        if name == "StringName":
+            return StringName(args[0] if args else "")
+        if name == "Resource":
+            return variant_codec.ResourceRef(args[0])
+        return Opaque(name, self.text[start:self.pos].strip())
+
+
+def parse_value(text: str):
+    """
+    Parse one Godot text value ("Vector3(1, 2, 3)", "ExtResource(\"1_x\")", ...).
+
+    Basis / Transform3D text is row by row, codec values column by column; a
+    camera pitched down 30 degrees has basis.y = (0, cos 30, -sin 30):
+
+    >>> t = parse_value("Transform3D(1, 0, 0, 0, 0.866025, 0.5, 0, -0.5, 0.866025, 0, 3, 5)")
+    >>> t[3:6], t[9:]
+    ((0.0, 0.866025, -0.5), (0.0, 3.0, 5.0))
+    >>> format_value(t)
+    'Transform3D(1, 0, 0, 0, 0.866025, 0.5, 0, -0.5, 0.866025, 0, 3, 5)'
+    """
+    parser = _ValueParser(text)
+    value = parser.value()
+    if parser.pos < len(text) and text[parser.pos:].strip():
+        raise parser.error("Unexpected trailing text")
+    return value
+
+
+def _number(value: float, component: bool = False) -> str:
+    if value != value:
+        return "nan"
+    if value in (float("inf"), float("-inf")):
+        return "inf" if value > 0 else "-inf"
+    text = repr(float(value))
+    if "e" in text:
+        return text
+    if component and text.endswith(".0"):
+        return text[:-2]  # Godot writes Vector3(0, 1, 0) but 1.0 on its own
+    return text
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def format_value(value) -> str:
+    """Godot text for a Python value (the inverse of parse_value)."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, ExtResource):
+        return f"ExtResource({_quote(value)})"
+    if isinstance(value, SubResource):
+        return f"SubResource({_quote(value)})"
+    if isinstance(value, StringName):
+        return "&" + _quote(value)
+    if isinstance(value, NodePath):
+        return f"NodePath({_quote(value)})"
+    if isinstance(value, variant_codec.ResourceRef):
+        return f"Resource({_quote(value)})"
+    if isinstance(value, Opaque):
+        return f"{value.godot_type}{value.text}"  # Kept as written: "(" + arguments + ")"
+    if isinstance(value, str):
+        return _quote(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _number(value)
+    if isinstance(value, variant_codec._Components):
+        if value.godot_type in _ROW_MAJOR:
+            return f"{value.godot_type}({', '.join(_number(c, True) for c in _transpose_basis(value))})"
+        if value.integer:
+            return f"{value.godot_type}({', '.join(str(int(c)) for c in value)})"
+        return f"{value.godot_type}({', '.join(_number(c, True) for c in value)})"
+    if isinstance(value, variant_codec._Packed):
+        if value.typecode in "fd":
+            return f"{value.godot_type}({', '.join(_number(c, True) for c in value)})"
+        return f"{value.godot_type}({', '.join(str(c) for c in value)})"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"PackedByteArray({', '.join(str(b) for b in bytes(value))})"
+    if isinstance(value, PackedStringArray):
+        return f"PackedStringArray({', '.join(_quote(s) for s in value)})"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        return "{\n" + ",\n".join(f"{format_value(k)}: {format_value(v)}" for k, v in value.items()) + "\n}"
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(format_value(v) for v in value)}]"
+    raise TypeError(f"Can't write {type(value).__name__} values to a Godot text file")
+
+
+def to_json(value):
+    """Tagged codec JSON for a parsed value; references become {"$t": "ExtResource", "v": id}."""
+    if isinstance(value, (ExtResource, SubResource)):
+        return {variant_codec.TAG: value.godot_type, "v": str(value)}
+    if isinstance(value, Opaque):
+        return {variant_codec.TAG: value.godot_type, "v": value.text}
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, list) and not isinstance(value, PackedStringArray):
+        return [to_json(v) for v in value]
+    return variant_codec.encode(value)
+
+
+def from_json(value):
+    """Inverse of to_json: codec JSON (as accepted by the live tools) to Python values."""
+    if isinstance(value, dict) and value.get(variant_codec.TAG) in ("ExtResource", "SubResource"):
+        return (ExtResource if value[variant_codec.TAG] == "ExtResource" else SubResource)(value["v"])
+    if isinstance(value, dict) and variant_codec.TAG not in value:
+        return {k: from_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [from_json(v) for v in value]
+    return variant_codec.decode(value)
+
+
+def _balance(text: str, depth: int = 0, in_string: bool = False):
+    """Bracket depth and open-string state after `text`, continuing from a previous line."""
+    pos = 0
+    if in_string:
+        m = _STRING_END.match(text)
+        if not m:
+            return depth, True
+        pos = m.end()
+    if '"' not in text[pos:]:
+        rest = text[pos:]
+        return depth + rest.count("(") + rest.count("[") + rest.count("{") \
+            - rest.count(")") - rest.count("]") - rest.count("}"), False
+    while True:
+        quote = text.find('"', pos)
+        chunk = text[pos:] if quote < 0 else text[pos:quote]
+        depth += chunk.count("(") + chunk.count("[") + chunk.count("{") \
+            - chunk.count(")") - chunk.count("]") - chunk.count("}")
+        if quote < 0:
+            return depth, False
+        m = _STRING_END.match(text, quote + 1)
+        if not m:
+            return depth, True
+        pos = m.end()
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+
+def _split_attrs(text: str) -> dict:
+    """Header attributes (between the brackets) as name -> raw value text."""
+    attrs = {}
+    pos = 0
+    while True:
+        m = _ATTR.match(text, pos)
+        if not m:
+            return attrs
+        start = pos = m.end()
+        depth, in_string = 0, False
+        while pos < len(text):
+            c = text[pos]
+            if in_string:
+                if c == "\\":
+                    pos += 1
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c in "([{":
+                depth += 1
+            elif c in ")]}":
+                depth -= 1
+            elif c in " \t" and depth == 0:
+                break
+            pos += 1
+        attrs[m.group(1)] = text[start:pos]
+
+
+class Section:
+    """
+    One [tag ...] block. `attrs` and `props` map names to raw Godot text and
+    are read-only; edit through set_attr / set_prop / remove_prop so the
+    section knows which lines to write anew. Properties of a parsed section are
+    only split out of its text when first used.
+    """
+    __slots__ = ("tag", "_attrs", "_props", "_body", "_raw", "_header", "_lines", "_trailer", "_dirty")
+
+    def __init__(self, tag: str, attrs: dict = None, props: dict = None):
+        self.tag = tag
+        self._attrs = dict(attrs or {})
+        self._props = dict(props or {})
+        self._body = None  # Unparsed text after the header
+        self._raw = None  # Text this section was parsed from
+        self._header = None  # (attrs as parsed, header text)
+        self._lines = {}  # key -> (raw value as parsed, line text)
+        self._trailer = None  # Blank lines after the section; new sections get one
+        self._dirty = True
+
+    @classmethod
+    def _parsed(cls, tag: str, header: str, body: str, raw: str) -> "Section":
+        section = cls.__new__(cls)
+        section.tag = tag
+        section._attrs = None
+        section._props = None
+        section._body = body
+        section._raw = raw
+        section._header = (None, header)
+        section._lines = None
+        section._trailer = None
+        section._dirty = False
+        return section
+
+    def __repr__(self):
+        return f"<Section [{self.tag} {' '.join(f'{k}={v}' for k, v in self.attrs.items())}]>"
+
+    @property
+    def attrs(self) -> dict:
+        if self._attrs is None:
+            self._attrs = _split_header(self._header[1])
+            self._header = (dict(self._attrs), self._header[1])
+        return self._attrs
+
+    @property
+    def props(self) -> dict:
+        if self._props is None:
+            self._split_body()
+        return self._props
+
+    def _split_body(self):
+        props, line_text = {}, {}
+        lines = self._body.splitlines(keepends=True)
+        pending = None  # [key, value lines, depth, in_string] of a value spanning lines
+        for line in lines:
+            if pending is not None:
+                pending[1].append(line)
+                pending[2], pending[3] = _balance(line, pending[2], pending[3])
+                if pending[2] <= 0 and not pending[3]:
+                    value = "".join(pending[1]).rstrip("\r\n")
+                    props[pending[0]] = value
+                    line_text[pending[0]] = (value, f"{pending[0]} = " + "".join(pending[1]))
+                    pending = None
+                continue
+            key, sep, value = line.partition(" = ")
+            if not sep or not key or key[0] in " \t;":
+                continue  # Blank line or comment
+            stripped = value.rstrip("\r\n")
+            if not _ONE_LINE.fullmatch(value):
+                depth, in_string = _balance(value)
+                if depth > 0 or in_string:
+                    pending = [key, [value], depth, in_string]
+                    continue
+            props[key] = stripped
+            line_text[key] = (stripped, line)
+        if pending is not None:
+            raise ValueError(f"Unterminated value for {pending[0]!r} in [{self.tag}]")
+        # Trailing blank lines belong to the section (Godot separates sections with one)
+        end = len(lines)
+        while end and not lines[end - 1].strip():
+            end -= 1
+        self._props = props
+        self._lines = line_text
+        self._trailer = "".join(lines[end:])
+        self._body = None
+
+    def attr(self, name: str, default=None):
+        """Parsed value of a header attribute."""
+        raw = self.attrs.get(name)
+        if raw is None:
+            return default
+        if raw[0] == '"' and "\\" not in raw:
+            return raw[1:-1]  # Plain string, by far the most common
+        return parse_value(raw)
+
+    def prop(self, key: str, default=None):
+        """Parsed value of a property."""
+        raw = self.props.get(key)
+        return default if raw is None else parse_value(raw)
+
+    def set_attr(self, name: str, raw: str):
+        if self.attrs.get(name) != raw:
+            self.attrs[name] = raw
+            self._dirty = True
+
+    def insert_attr(self, name: str, raw: str, before: str):
+        """Set an attribute; a new one goes in front of `before` (or last, if that isn't there)."""
+        if name in self.attrs or before not in self.attrs:
+            self.set_attr(name, raw)
+            return
+        attrs = self.attrs
+        self._attrs = {}
+        for key, value in attrs.items():
+            if key == before:
+                self._attrs[name] = raw
+            self._attrs[key] = value
+        self._dirty = True
+
+    def remove_attr(self, name: str):
+        if self.attrs.pop(name, None) is not None:
+            self._dirty = True
+
+    def set_prop(self, key: str, raw: str):
+        if self.props.get(key) != raw:
+            self._props[key] = raw
+            self._dirty = True
+
+    def remove_prop(self, key: str) -> bool:
+        if self.props.pop(key, None) is None:
+            return False
+        self._dirty = True
+        return True
+
+    def set_trailer(self, text: str) -> str:
+        """Replace the blank lines after the section; returns the old ones."""
+        if self._props is None:
+            self._split_body()  # The trailer is split out with the properties
+        old, self._trailer = self._trailer, text
+        self._dirty = True
+        return old
+
+    def text(self, newline: str = "\n", last: bool = False) -> str:
+        if not self._dirty:
+            return self._raw
+        props = self.props
+        if self._header and self._header[0] == self.attrs:
+            out = [self._header[1]]
+        else:
+            out = ["[" + " ".join([self.tag] + [f"{k}={v}" for k, v in self.attrs.items()]) + "]" + newline]
+        for key, raw in props.items():
+            original = self._lines.get(key)
+            out.append(original[1] if original and original[0] == raw else f"{key} = {raw}{newline}")
+        out.append(self._trailer if self._trailer is not None else ("" if last else newline))
+        return "".join(out)
+
+
+def _closed(chunk: str) -> bool:
+    """False if `chunk` ends inside a string (a "[" line that is really part of a multi-line string)."""
+    if '"' not in chunk:
+        return True
+    if "\\" in chunk:
+        chunk = _ESCAPE.sub("", chunk)
+    return chunk.count('"') % 2 == 0
+
+
+def _split_header(text: str) -> dict:
+    """Attributes of a header ("[tag a=1 b=\"x\"]") as name -> raw value text."""
+    body = text.rstrip()[1:-1]
+    if "\\" not in body and "(" not in body and "[" not in body:
+        # Only plain strings and numbers: split on quotes, strings are every other part
+        attrs = {}
+        parts = body.split('"')
+        for i in range(0, len(parts), 2):
+            tokens = parts[i].split()
+            for token in tokens[1:] if i == 0 else tokens:
+                key, _, value = token.partition("=")
+                attrs[key] = value if value else f'"{parts[i + 1]}"'
+        return attrs
+    m = _HEADER.fullmatch(text)
+    if m:
+        return dict(_HEADER_ATTR.findall(m.group(2)))
+    body = text.strip()[1:-1]  # Unusual header: spans lines, or values the pattern doesn't cover
+    return _split_attrs(body.partition(" ")[2])
+
+
+def _section(chunk: str) -> Section:
+    """Build a Section from its text, header line first; attributes are split out later."""
+    end = chunk.find("\n") + 1 or len(chunk)
+    line = chunk[:end].rstrip()
+    if not (line.endswith("]") and line.count("[") == line.count("]") and _closed(line)):
+        depth, in_string = 0, False
+        end = 0
+        while end < len(chunk):
+            stop = chunk.find("\n", end) + 1 or len(chunk)
+            depth, in_string = _balance(chunk[end:stop], depth, in_string)
+            end = stop
+            if depth <= 0 and not in_string:
+                break
+        line = chunk[:end].rstrip()
+        if depth > 0 or in_string or not line.endswith("]"):
+            raise ValueError(f"Malformed section header: {line[:80]!r}")
+    tag = line[1:-1].split(None, 1)[0] if len(line) > 2 else ""
+    return Section._parsed(tag, chunk[:end], chunk[end:], chunk)
+
+
+class ResourceFile:
+    """A parsed .tscn or .tres file: the header section plus the ones after it."""
+
+    def __init__(self, sections: list, preamble: str = "", newline: str = "\n"):
+        self.sections = sections
+        self.preamble = preamble  # Anything before the first section (normally nothing)
+        self.newline = newline
+        self._nodes = None
+
+    # -- reading -------------------------------------------------------------
+
+    @classmethod
+    def parse(cls, text: str) -> "ResourceFile":
+        first_newline = text.find("\n")
+        newline = "\r\n" if first_newline > 0 and text[first_newline - 1] == "\r" else "\n"
+        starts = [m.start() for m in _SECTION_START.finditer(text)]
+        if not starts:
+            raise ValueError("No [sections]: not a .tscn/.tres file")
+        sections = []
+        begin = starts[0]
+        for end in starts[1:]:
+            if _closed(text[begin:end]):
+                sections.append(_section(text[begin:end]))
+                begin = end
+        if not _closed(text[begin:]):
+            raise ValueError("Unexpected end of file inside a string")
+        sections.append(_section(text[begin:]))
+        return cls(sections, text[:starts[0]], newline)
+
+    @classmethod
+    def load(cls, path: str) -> "ResourceFile":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.parse(f.read())
+
+    def dump(self) -> str:
+        out = [self.preamble]
+        for i, s in enumerate(self.sections):
+            if i and s._raw is None and not out[-1].endswith(self.newline * 2) and not (
+                    s.tag == "ext_resource" and self.sections[i - 1].tag == "ext_resource"):
+                out.append(self.newline)  # Keep the blank line between sections
+            out.append(s.text(self.newline, i == len(self.sections) - 1))
+        return "".join(out)
+
+    def save(self, path: str):
+        """Write atomically: a temporary file next to `path`, then rename over it."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".tscn-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(self.dump())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # -- structure -----------------------------------------------------------
+
+    @property
+    def header(self) -> Section:
+        if not self.sections:
+            raise ValueError("File has no header section")
+        return self.sections[0]
+
+    @property
+    def kind(self) -> str:
+        """"gd_scene" or "gd_resource"."""
+        return self.header.tag if self.sections else ""
+
+    def of(self, tag: str) -> list:
+        return [s for s in self.sections if s.tag == tag]
+
+    @property
+    def ext_resources(self) -> list:
+        return self.of("ext_resource")
+
+    @property
+    def sub_resources(self) -> list:
+        return self.of("sub_resource")
+
+    @property
+    def nodes(self) -> list:
+        return self.of("node")
+
+    @property
+    def connections(self) -> list:
+        return self.of("connection")
+
+    @property
+    def resource(self) -> Section:
+        """The [resource] section of a .tres, or None."""
+        return next((s for s in self.sections if s.tag == "resource"), None)
+
+    def ext_resource(self, resource_id: str) -> Section:
+        return next((s for s in self.ext_resources if s.attr("id") == resource_id), None)
+
+    def sub_resource(self, resource_id: str) -> Section:
+        return next((s for s in self.sub_resources if s.attr("id") == resource_id), None)
+
+    @staticmethod
+    def node_path(section: Section) -> str:
+        """Path of a [node] relative to the scene root ("." for the root itself)."""
+        parent = section.attr("parent")
+        name = section.attr("name", "")
+        if parent is None:
+            return "."
+        return name if parent == "." else f"{parent}/{name}"
+
+    def _node_index(self) -> dict:
+        if self._nodes is None:
+            self._nodes = {self.node_path(s): s for s in self.nodes}
+        return self._nodes
+
+    def node(self, path: str) -> Section:
+        path = path.strip("/") or "."
+        return self._node_index().get(path)
+
+    def descendants(self, path: str) -> list:
+        """Paths of the node at `path` and everything below it, in file order."""
+        if path == ".":
+            return list(self._node_index())
+        prefix = path + "/"
+        return [p for p in self._node_index() if p == path or p.startswith(prefix)]
+
+    # -- editing -------------------------------------------------------------
+
+    def _insert(self, index: int, section: Section):
+        self.sections.insert(index, section)
+        self._nodes = None
+
+    def _remove(self, doomed: set):
+        """
+        Drop sections (by id()). A removed section's trailing blank line moves to
+        the one before it when that has none (the last of a run of
+        [ext_resource]s), and the file's last section keeps the original ending.
+        """
+        kept, trailer = [], None
+        for s in self.sections:
+            if id(s) not in doomed:
+                kept.append(s)
+                trailer = None
+                continue
+            trailer = s.set_trailer("")
+            if kept and trailer:
+                previous = kept[-1]
+                if previous._props is None:
+                    previous._split_body()
+                if not previous._trailer:
+                    previous.set_trailer(trailer)
+        if kept and trailer is not None:
+            kept[-1].set_trailer(trailer)  # The old last section went: end the file the way it did
+        self.sections = kept
+        self._nodes = None
+
+    def _last_index(self, tags: tuple) -> int:
+        """Index after the last section with one of `tags` (after the header if none)."""
+        last = 0
+        for i, s in enumerate(self.sections):
+            if s.tag in tags:
+                last = i
+        return last + 1
+
+    def _update_load_steps(self):
+        if "load_steps" in self.header.attrs:
+            self.header.set_attr("load_steps", str(len(self.ext_resources) + len(self.sub_resources) + 1))
+
+    def add_ext_resource(self, type: str, path: str, uid: str = "") -> str:
+        """Id of the [ext_resource] for `path`, adding one if the file has none."""
+        for s in self.ext_resources:
+            if s.attr("path") == path:
+                return s.attr("id")
+        taken = {s.attr("id") for s in self.ext_resources}
+        n = len(taken) + 1
+        while True:
+            new_id = f"{n}_{''.join(random.choices(string.ascii_lowercase + string.digits, k=5))}"
+            if new_id not in taken:
+                break
+        attrs = {"type": _quote(type)}
+        if uid:
+            attrs["uid"] = _quote(uid)
+        attrs["path"] = _quote(path)
+        attrs["id"] = _quote(new_id)
+        section = Section("ext_resource", attrs)
+        index = self._last_index(("gd_scene", "gd_resource", "ext_resource"))
+        previous = self.sections[index - 1]
+        if previous.tag == "ext_resource":
+            # Godot lists ext resources without blank lines between them
+            section._trailer = previous.set_trailer("")
+        self._insert(index, section)
+        self._update_load_steps()
+        return new_id
+
+    def set_ext_resource_path(self, old_path: str, new_path: str, uid: str = None) -> int:
+        """Point [ext_resource] entries at a new path; returns how many changed."""
+        changed = 0
+        for s in self.ext_resources:
+            if s.attr("path") == old_path:
+                s.set_attr("path", _quote(new_path))
+                if uid:
+                    s.insert_attr("uid", _quote(uid), before="path")  # Godot's order: type, uid, path, id
+                elif uid is not None:
+                    s.remove_attr("uid")
+                changed += 1
+        return changed
+
+    def add_node(self, name: str, type: str = "", parent: str = ".", instance: str = "", props: dict = None) -> Section:
+        """Add a [node] under `parent`, after that parent's last descendant."""
+        if not self.nodes:
+            if parent not in (".", ""):
+                raise ValueError("The scene has no root node yet")
+            path, parent_attr = ".", None
+        else:
+            parent = parent.strip("/") or "."
+            if self.node(parent) is None:
+                raise ValueError(f"Node not found: {parent}")
+            path = name if parent == "." else f"{parent}/{name}"
+            if self.node(path) is not None:
+                raise ValueError(f"{parent} already has a child named {name}")
+            parent_attr = parent
+        if not type and not instance:
+            raise ValueError("A node needs a type or an instance")
+        attrs = {"name": _quote(name)}
+        if type:
+            attrs["type"] = _quote(type)
+        if parent_attr is not None:
+            attrs["parent"] = _quote(parent_attr)
+        if instance:
+            attrs["instance"] = f"ExtResource({_quote(instance)})"
+        section = Section("node", attrs, props)
+        if parent_attr is None:
+            index = self._last_index(("gd_scene", "ext_resource", "sub_resource"))
+        else:
+            last = self.descendants(parent)[-1]
+            index = self.sections.index(self.node(last)) + 1
+        self._insert(index, section)
+        return section
+
+    def remove_node(self, path: str) -> int:
+        """Remove a node, its descendants and connections touching them; returns nodes removed."""
+        path = path.strip("/") or "."
+        if self.node(path) is None:
+            raise ValueError(f"Node not found: {path}")
+        doomed = set(self.descendants(path))
+        index = self._node_index()
+        removed = {id(index[p]) for p in doomed}
+        removed.update(id(s) for s in self.connections if s.attr("from") in doomed or s.attr("to") in doomed)
+        self._remove(removed)
+        return len(doomed)
+
+    def rename_node(self, path: str, new_name: str):
+        """Rename a node, updating its descendants' parent paths and connections."""
+        path = path.strip("/") or "."
+        section = self.node(path)
+        if section is None:
+            raise ValueError(f"Node not found: {path}")
+        if "/" in new_name or not new_name:
+            raise ValueError(f"Invalid node name: {new_name!r}")
+        if path == ".":
+            section.set_attr("name", _quote(new_name))
+            return
+        parent = section.attr("parent")
+        new_path = new_name if parent == "." else f"{parent}/{new_name}"
+        if self.node(new_path) is not None:
+            raise ValueError(f"{parent} already has a child named {new_name}")
+
+        def moved(p):
+            if p == path:
+                return new_path
+            if p.startswith(path + "/"):
+                return new_path + p[len(path):]
+            return p
+
+        for s in self.nodes:
+            p = s.attr("parent")
+            if p is not None and moved(p) != p:
+                s.set_attr("parent", _quote(moved(p)))
+        for s in self.connections:
+            for key in ("from", "to"):
+                p = s.attr(key)
+                if p is not None and moved(p) != p:
+                    s.set_attr(key, _quote(moved(p)))
+        section.set_attr("name", _quote(new_name))
+        self._nodes = None
+
+    def remove_unused_resources(self) -> list:
+        """Drop ext/sub resources nothing refers to any more; returns their ids."""
+        used_ext, used_sub = set(), set()
+        ref = re.compile(r'(ExtResource|SubResource)\(\s*"((?:[^"\\]|\\.)*)"\s*\)')
+        removed = []
+        # Sub resources can reference each other, so repeat until nothing else goes
+        while True:
+            used_ext.clear()
+            used_sub.clear()
+            for s in self.sections:
+                for raw in list(s.attrs.values()) + list(s.props.values()):
+                    if "Resource(" in raw:
+                        for kind, ref_id in ref.findall(raw):
+                            (used_ext if kind == "ExtResource" else used_sub).add(ref_id)
+            unused = [s for s in self.sections if
+                      (s.tag == "ext_resource" and s.attr("id") not in used_ext) or
+                      (s.tag == "sub_resource" and s.attr("id") not in used_sub)]
+            if not unused:
+                break
+            removed += [s.attr("id") for s in unused]
+            self._remove({id(s) for s in unused})
+        if removed:
+            self._update_load_steps()
+        return removed
+
+
+def load(path: str) -> ResourceFile:
+    return ResourceFile.load(path)
+
+
+def parse(text: str) -> ResourceFile:
+    return ResourceFile.parse(text)
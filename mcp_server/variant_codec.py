@@ -0,0 +1,235 @@
+"""
+Lossless JSON form of Godot Variants, mirrored by "Variant Codec" in server.gd.
+
+JSON-native values (null, bool, numbers, strings, lists, objects) pass through.
+Everything else is tagged as {"$t": <Godot type>, "v": <payload>}:
+
+    vectors, colors, rects, planes, AABBs   flat component list
+    Basis / Transform2D / Transform3D       flat list, column by column (+ origin)
+    packed numeric/vector arrays            base64 of the raw little-endian bytes
+    StringName, NodePath                    string
+    Resource                                resource path (plus "class")
+
+decode() turns these into tuple subclasses (Vector3(1.0, 2.0, 3.0) is a tuple)
+and array.array subclasses for packed arrays, without any string parsing.
+Each decoded value remembers its Godot type, so encode(decode(x)) == x.
+"""
+import array
+import base64
+import sys
+
+TAG = "$t"
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class _Components(tuple):
+    """A fixed-size Godot value (Vector3, Color, Transform3D...) as a plain tuple."""
+    godot_type = None
+    size = 0
+    integer = False
+
+    def __new__(cls, *components):
+        if len(components) == 1 and not isinstance(components[0], (int, float)):
+            components = tuple(components[0])
+        if len(components) != cls.size:
+            raise ValueError(f"{cls.godot_type} takes {cls.size} components, got {len(components)}")
+        cast = int if cls.integer else float
+        return super().__new__(cls, (cast(c) for c in components))
+
+    def __repr__(self):
+        return f"{self.godot_type}{tuple.__repr__(self)}"
+
+
+def _components(name: str, size: int, integer: bool = False):
+    return type(name, (_Components,), {"godot_type": name, "size": size, "integer": integer, "__slots__": ()})
+
+
+Vector2 = _components("Vector2", 2)
+Vector2i = _components("Vector2i", 2, integer=True)
+Vector3 = _components("Vector3", 3)
+Vector3i = _components("Vector3i", 3, integer=True)
+Vector4 = _components("Vector4", 4)
+Vector4i = _components("Vector4i", 4, integer=True)
+Quaternion = _components("Quaternion", 4)
+Color = _components("Color", 4)
+Rect2 = _components("Rect2", 4)
+Rect2i = _components("Rect2i", 4, integer=True)
+Plane = _components("Plane", 4)
+AABB = _components("AABB", 6)
+Transform2D = _components("Transform2D", 6)
+Basis = _components("Basis", 9)
+Transform3D = _components("Transform3D", 12)
+Projection = _components("Projection", 16)
+
+COMPONENT_TYPES = {cls.godot_type: cls for cls in (
+    Vector2, Vector2i, Vector3, Vector3i, Vector4, Vector4i, Quaternion, Color,
+    Rect2, Rect2i, Plane, AABB, Transform2D, Basis, Transform3D, Projection,
+)}
+
+
+class _Packed(array.array):
+    """A Godot packed array as a flat array.array; vector arrays keep `width` floats per item."""
+    godot_type = None
+    typecode_ = "f"
+    width = 1
+
+    def __new__(cls, values=()):
+        if cls.width > 1:
+            values = [c for item in values for c in (item if isinstance(item, (tuple, list)) else (item,))]
+        return super().__new__(cls, cls.typecode_, values)
+
+    @classmethod
+    def frombuffer(cls, data: bytes):
+        out = cls()
+        out.frombytes(data)
+        if _BIG_ENDIAN:
+            out.byteswap()
+        return out
+
+    def tobuffer(self) -> bytes:
+        if _BIG_ENDIAN:
+            swapped = array.array(self.typecode, self)
+            swapped.byteswap()
+            return swapped.tobytes()
+        return self.tobytes()
+
+    def items(self):
+        """Iterate over elements; vector arrays yield one tuple per vector."""
+        if self.width == 1:
+            return iter(self)
+        return (tuple(self[i:i + self.width]) for i in range(0, len(self) - self.width + 1, self.width))
+
+    def __repr__(self):
+        return f"{self.godot_type}({list(self.items())!r})"
+
+
+def _packed(name: str, typecode: str, width: int = 1):
+    return type(name, (_Packed,), {"godot_type": name, "typecode_": typecode, "width": width})
+
+
+# array.array has no fixed-width integer codes; pick the ones that match here
+_INT32 = next(code for code in "ilh" if array.array(code).itemsize == 4)
+_INT64 = next(code for code in "lq" if array.array(code).itemsize == 8)
+
+PackedInt32Array = _packed("PackedInt32Array", _INT32)
+PackedInt64Array = _packed("PackedInt64Array", _INT64)
+PackedFloat32Array = _packed("PackedFloat32Array", "f")
+PackedFloat64Array = _packed("PackedFloat64Array", "d")
+PackedVector2Array = _packed("PackedVector2Array", "f", 2)
+PackedVector3Array = _packed("PackedVector3Array", "f", 3)
+PackedColorArray = _packed("PackedColorArray", "f", 4)
+PackedVector4Array = _packed("PackedVector4Array", "f", 4)
+
+PACKED_TYPES = {cls.godot_type: cls for cls in (
+    PackedInt32Array, PackedInt64Array, PackedFloat32Array, PackedFloat64Array,
+    PackedVector2Array, PackedVector3Array, PackedColorArray, PackedVector4Array,
+)}
+
+
+class PackedStringArray(list):
+    godot_type = "PackedStringArray"
+
+
+class StringName(str):
+    godot_type = "StringName"
+
+
+class NodePath(str):
+    godot_type = "NodePath"
+
+
+class ResourceRef(str):
+    """A Resource by path; `godot_class` is the class reported by the editor."""
+    godot_type = "Resource"
+
+    def __new__(cls, path: str, godot_class: str = ""):
+        obj = super().__new__(cls, path)
+        obj.godot_class = godot_class
+        return obj
+
+
+class Opaque:
+    """Values that only travel one way (Object, RID, Callable, Signal): type and display string."""
+
+    def __init__(self, godot_type: str, text: str, godot_class: str = ""):
+        self.godot_type = godot_type
+        self.text = text
+        self.godot_class = godot_class
+
+    def __repr__(self):
+        return f"{self.godot_type}({self.text!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Opaque) and (self.godot_type, self.text, self.godot_class) == (
+            other.godot_type, other.text, other.godot_class)
+
+
+def decode(value):
+    """Turn codec JSON (already json.loads-ed) into Python values."""
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if TAG not in value:
+        return {k: decode(v) for k, v in value.items()}
+
+    t, v = value[TAG], value.get("v")
+    if t in COMPONENT_TYPES:
+        return COMPONENT_TYPES[t](v)
+    if t in PACKED_TYPES:
+        return PACKED_TYPES[t].frombuffer(base64.b64decode(v))
+    if t == "PackedByteArray":
+        return base64.b64decode(v)
+    if t == "PackedStringArray":
+        return PackedStringArray(v)
+    if t == "StringName":
+        return StringName(v)
+    if t == "NodePath":
+        return NodePath(v)
+    if t == "Resource":
+        return ResourceRef(v, value.get("class", ""))
+    return Opaque(t, v, value.get("class", ""))
+
+
+def encode(value):
+    """Turn Python values (decoded ones included) into codec JSON."""
+    godot_type = getattr(value, "godot_type", None)
+    if isinstance(value, _Components):
+        return {TAG: godot_type, "v": list(value)}
+    if isinstance(value, _Packed):
+        return {TAG: godot_type, "v": base64.b64encode(value.tobuffer()).decode("ascii")}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {TAG: "PackedByteArray", "v": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, PackedStringArray):
+        return {TAG: godot_type, "v": [str(s) for s in value]}
+    if isinstance(value, ResourceRef):
+        return {TAG: godot_type, "v": str(value), "class": value.godot_class}
+    if isinstance(value, (StringName, NodePath)):
+        return {TAG: godot_type, "v": str(value)}
+    if isinstance(value, Opaque):
+        raise TypeError(f"{value.godot_type} values can't be sent back to Godot")
+    if isinstance(value, dict):
+        return {str(k): encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    return value
+
+
+def typed(godot_type: str, value):
+    """Build a tagged value by type name, e.g. typed("Vector3", (1, 2, 3))."""
+    if godot_type in COMPONENT_TYPES:
+        return encode(COMPONENT_TYPES[godot_type](value))
+    if godot_type in PACKED_TYPES:
+        return encode(PACKED_TYPES[godot_type](value))
+    if godot_type == "PackedByteArray":
+        return encode(bytes(value))
+    if godot_type == "PackedStringArray":
+        return encode(PackedStringArray(value))
+    if godot_type in ("StringName", "NodePath", "Resource"):
+        return {TAG: godot_type, "v": str(value)}
+    raise ValueError(f"Unsupported Godot type: {godot_type}")
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, dict) and TAG in value